@@ -0,0 +1,138 @@
+"""Benchmarks for mysite project.
+
+Run a benchmark module from repository root, for example:
+
+    PYTHONPATH=./mysite python -m benchmarks.bench_logging
+
+Benchmarks that need the database run against a throwaway test database, the
+same way `manage.py test` does, so `db.sqlite3` is never touched.
+"""
+
+import os
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+
+def setup_django() -> None:
+    """Configure settings and populate app registry."""
+    # pylint: disable-next=import-outside-toplevel
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mysite.settings")
+    django.setup()
+
+
+@contextmanager
+def test_database() -> Iterator[None]:
+    """Create a test database for the duration of the context."""
+    setup_django()
+    # pylint: disable-next=import-outside-toplevel
+    from django.db import connection
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def make_productivities(count: int, group_count: int = 20) -> list[Any]:
+    """Build unsaved Productivity objects spread over groups.
+
+    - Groups are created, so this needs a database, see `test_database`.
+
+    Args:
+        count:
+            Number of objects.
+        group_count:
+            Number of groups.
+
+    Returns:
+        List of Productivity objects.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from productivity.models import Productivity, ProductivityGroup
+
+    group_ids = [
+        ProductivityGroup.objects.get_id(f"Group {i}")
+        for i in range(group_count)
+    ]
+
+    return [
+        Productivity(
+            item=f"Item {i}",
+            frequency=i % 5,
+            group_id=group_ids[i % group_count],
+        )
+        for i in range(count)
+    ]
+
+
+def grow_productivities(
+    sizes: Iterable[int], batch_size: int = 5000
+) -> Iterator[int]:
+    """Save Productivity objects up to each size in turn, in batches.
+
+    - Objects of previous sizes are kept, so each size only inserts the
+    difference. Needs a database, see `test_database`.
+
+    Args:
+        sizes:
+            Increasing numbers of objects.
+        batch_size:
+            Objects inserted per `bulk_create`.
+
+    Yields:
+        Each size, once that many objects are saved.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from productivity.models import Productivity
+
+    count = 0
+    for size in sizes:
+        for start in range(count, size, batch_size):
+            Productivity.objects.bulk_create(
+                make_productivities(min(batch_size, size - start))
+            )
+        count = size
+
+        yield size
+
+
+def timeit(func: Callable[[], Any], repeat: int = 5) -> float:
+    """Return best wall-clock time of calling a function.
+
+    Args:
+        func:
+            Function to be timed.
+        repeat:
+            Number of times to call the function.
+
+    Returns:
+        Minimum elapsed seconds over all calls.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def report(title: str, rows: list[tuple[str, str]]) -> None:
+    """Print benchmark result as an aligned table.
+
+    Args:
+        title:
+            Benchmark title.
+        rows:
+            List of (label, value) pairs.
+    """
+    print(title)
+    width = max(len(label) for label, _ in rows)
+    for label, value in rows:
+        print(f"  {label.ljust(width)}  {value}")
@@ -0,0 +1,106 @@
+"""Compare Productivity admin change list and actions with Django defaults.
+
+- Default change list counts all objects, filtered and unfiltered, and reads
+a page by offset, here the last page. Keyset change list counts up to
+`COUNT_LIMIT` objects and reads the page after a cursor, see
+`productivity.admin`.
+- Default action loads each selected object, saves it and records its check,
+as `update_productivity` does. Set-based action checks all in a few
+queries, see `ProductivityQuerySet.mark_checked`.
+"""
+
+from datetime import datetime, timedelta
+
+from benchmarks import (
+    grow_productivities,
+    report,
+    setup_django,
+    test_database,
+    timeit,
+)
+
+setup_django()
+
+# pylint: disable=wrong-import-order,wrong-import-position
+from django.db import transaction  # noqa: E402
+
+from productivity.admin import estimate_count  # noqa: E402
+from productivity.models import Productivity, ProductivityCheck  # noqa: E402
+
+# pylint: enable=wrong-import-order,wrong-import-position
+
+ACTION_SIZE = 200
+
+PAGE_SIZE = 100
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+BATCH_SIZE = 5000
+
+
+def offset_page() -> None:
+    """List last page, as default change list does."""
+    queryset = Productivity.objects.filter(frequency=2)
+    count = queryset.count()
+    Productivity.objects.count()
+    list(queryset.order_by("-id")[count - PAGE_SIZE : count])
+
+
+def keyset_page() -> None:
+    """List last page, as keyset change list does."""
+    queryset = Productivity.objects.filter(frequency=2)
+    estimate_count(queryset)
+    list(queryset.order_by("-id").filter(id__lt=PAGE_SIZE * 5)[:PAGE_SIZE])
+
+
+def check_each(ids: list[int]) -> None:
+    """Check objects one by one."""
+    now = datetime.now()
+    with transaction.atomic():
+        for productivity in Productivity.objects.filter(id__in=ids):
+            previous = productivity.last_check
+            productivity.last_check_undo = previous
+            productivity.last_check = now
+            productivity.save()
+            ProductivityCheck.objects.record(productivity, previous)
+
+
+def main() -> None:
+    """Run benchmark."""
+    rows = []
+    with test_database():
+        for size in grow_productivities(SIZES, BATCH_SIZE):
+            offset = timeit(offset_page)
+            keyset = timeit(keyset_page)
+            rows.append(
+                (
+                    f"list {size:,} objects",
+                    f"default {offset * 1000:.2f}ms, "
+                    f"keyset {keyset * 1000:.2f}ms",
+                )
+            )
+
+        ids = list(
+            Productivity.objects.values_list("id", flat=True)[:ACTION_SIZE]
+        )
+        day = timedelta(days=1)
+        each = timeit(lambda: check_each(ids), repeat=1)
+        set_based = timeit(
+            lambda: Productivity.objects.filter(id__in=ids).mark_checked(
+                datetime.now() + day
+            ),
+            repeat=1,
+        )
+        rows.append(
+            (
+                f"check {ACTION_SIZE:,} objects",
+                f"default {each * 1000:.2f}ms, "
+                f"set-based {set_based * 1000:.2f}ms",
+            )
+        )
+
+    report(f"Productivity admin, {PAGE_SIZE} objects per page", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Measure write latency while `mysite.backup` backs up a database.
+
+- A writer thread inserts and commits a row every `WRITE_INTERVAL` seconds
+on its own connection, as a server worker would, while the database is
+backed up in one step, as a copy under lock would, and in steps.
+- Latency is of each insert and commit, over the duration of the backup.
+"""
+
+import sqlite3
+import statistics
+import threading
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Optional
+
+from benchmarks import report
+from mysite.backup import (  # pylint: disable=wrong-import-order
+    DEFAULT_PAGES,
+    DEFAULT_SLEEP,
+    BackupResult,
+    backup_database,
+)
+
+ROW_COUNT = 10_000
+
+ROW_SIZE = 4000
+
+WRITE_INTERVAL = 0.01
+
+WRITE_TIMEOUT = 5.0
+
+CASES: tuple[tuple[str, Optional[int], float], ...] = (
+    ("no backup", None, 0.0),
+    ("1 step", -1, 0.0),
+    (
+        f"{DEFAULT_PAGES} pages, {DEFAULT_SLEEP}s sleep",
+        DEFAULT_PAGES,
+        DEFAULT_SLEEP,
+    ),
+    ("16 pages, 0.01s sleep", 16, 0.01),
+)
+
+
+def write(path: Path, stop: threading.Event, latencies: list[float]) -> None:
+    """Insert rows until stopped, recording latency of each."""
+    connection = sqlite3.connect(path, timeout=WRITE_TIMEOUT)
+    while not stop.is_set():
+        start = time.perf_counter()
+        connection.execute("INSERT INTO t (b) VALUES (x'00')")
+        connection.commit()
+        latencies.append(time.perf_counter() - start)
+        time.sleep(WRITE_INTERVAL)
+    connection.close()
+
+
+def run(
+    path: Path, target: Path, pages: Optional[int], sleep: float
+) -> tuple[list[float], float, Optional[BackupResult]]:
+    """Back up database while writer runs.
+
+    Returns:
+        Write latencies, backup seconds and backup result, None if no
+        backup.
+    """
+    stop = threading.Event()
+    latencies: list[float] = []
+    writer = threading.Thread(target=write, args=(path, stop, latencies))
+    writer.start()
+    time.sleep(0.1)
+    del latencies[:]
+
+    source = sqlite3.connect(path)
+    start = time.perf_counter()
+    result = None
+    if pages is None:
+        time.sleep(1)
+    else:
+        result = backup_database(source, target, pages, sleep)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    writer.join()
+    source.close()
+
+    return latencies, elapsed, result
+
+
+def main() -> None:
+    """Run benchmark."""
+    rows = []
+    with TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "db.sqlite3"
+        connection = sqlite3.connect(path)
+        connection.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, b BLOB)")
+        connection.executemany(
+            "INSERT INTO t (b) VALUES (?)",
+            ((bytes(ROW_SIZE),) for _ in range(ROW_COUNT)),
+        )
+        connection.commit()
+        connection.close()
+        size = path.stat().st_size
+
+        for label, pages, sleep in CASES:
+            latencies, elapsed, result = run(
+                path, Path(temp_dir) / "backup.sqlite3", pages, sleep
+            )
+            latencies.sort()
+            value = (
+                f"write p50 {statistics.median(latencies) * 1000:.2f}ms, "
+                f"p99 {latencies[len(latencies) * 99 // 100] * 1000:.2f}ms, "
+                f"max {latencies[-1] * 1000:.2f}ms"
+            )
+            if result is not None:
+                value += (
+                    f"; backup {elapsed:.2f}s, {result.steps} steps, "
+                    f"{result.restarts} restarts"
+                )
+            rows.append((label, value))
+
+    report(
+        f"Write latency during backup of {size / 2**20:.0f}MiB, a write "
+        f"every {WRITE_INTERVAL * 1000:.0f}ms",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
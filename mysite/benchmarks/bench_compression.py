@@ -0,0 +1,92 @@
+"""Compare bytes on wire and CPU per list request with compression.
+
+- Uncached cases render the list on every request, as without a cache.
+- Middleware case compresses the rendered body on every request, as
+`GZipMiddleware` would.
+- Cached cases serve bytes stored by `get_productivities`.
+"""
+
+import time
+from collections.abc import Callable
+from functools import partial
+
+from benchmarks import (
+    make_productivities,
+    report,
+    setup_django,
+    test_database,
+)
+
+setup_django()
+
+# pylint: disable=wrong-import-order,wrong-import-position
+from django.core.cache import cache  # noqa: E402
+from django.http import HttpResponse  # noqa: E402
+
+from mysite.compression import SUPPORTED_ENCODINGS, compress  # noqa: E402
+from productivity.models import Productivity  # noqa: E402
+from productivity.views import (  # noqa: E402
+    get_productivities,
+    render_productivities,
+)
+
+# pylint: enable=wrong-import-order,wrong-import-position
+
+ROW_COUNT = 10_000
+REQUEST_COUNT = 20
+
+
+def measure(func: Callable[[], HttpResponse]) -> tuple[int, float]:
+    """Return bytes of response and CPU seconds per request.
+
+    Args:
+        func:
+            Function returning response of one request.
+
+    Returns:
+        Tuple of response bytes and mean CPU seconds.
+    """
+    size = len(func().content)
+    start = time.process_time()
+    for _ in range(REQUEST_COUNT):
+        func()
+
+    return size, (time.process_time() - start) / REQUEST_COUNT
+
+
+def render_gzip() -> HttpResponse:
+    """Render list and compress it, as a middleware would."""
+    response = render_productivities()
+    response.content = compress(response.content, "gzip")
+
+    return response
+
+
+def main() -> None:
+    """Run benchmark."""
+    cases: list[tuple[str, Callable[[], HttpResponse]]] = [
+        ("uncached, identity", render_productivities),
+        ("uncached, gzip middleware", render_gzip),
+        ("cached, identity", get_productivities),
+    ]
+    for encoding in SUPPORTED_ENCODINGS:
+        cases.append(
+            (
+                f"cached, {encoding}",
+                partial(get_productivities, accept_encoding=encoding),
+            )
+        )
+
+    with test_database():
+        Productivity.objects.bulk_create(make_productivities(ROW_COUNT))
+        cache.clear()
+        rows = []
+        for label, func in cases:
+            size, cpu = measure(func)
+            rows.append((label, f"{size:,} bytes, {cpu * 1000:.2f}ms CPU"))
+
+    report(f"GET /productivity/ with {ROW_COUNT:,} rows", rows)
+
+
+if __name__ == "__main__":
+    main()
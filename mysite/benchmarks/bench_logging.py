@@ -0,0 +1,111 @@
+"""Compare request-thread cost of `FileHandler` and `QueueFileHandler`.
+
+- Caller time is how long logging threads are blocked by log calls.
+- Total time includes waiting for the background thread to drain the queue.
+- Each run is repeated with a simulated per-flush disk latency, as on a busy
+or network-backed disk.
+"""
+
+import logging
+import threading
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any
+
+from benchmarks import report
+from mysite.log import QueueFileHandler
+
+THREAD_COUNT = 8
+RECORD_COUNT = 20_000
+FLUSH_LATENCY = 0.0001
+
+
+def slow_flush(handler: "logging.StreamHandler[Any]", latency: float) -> None:
+    """Add latency to every flush of a stream handler.
+
+    Args:
+        handler:
+            Stream handler to be patched.
+        latency:
+            Seconds to sleep per flush.
+    """
+    flush = handler.flush
+
+    def patched_flush() -> None:
+        time.sleep(latency)
+        flush()
+
+    handler.flush = patched_flush  # type: ignore[method-assign]
+
+
+def run(handler: logging.Handler) -> tuple[float, float]:
+    """Log records from several threads through a handler.
+
+    Args:
+        handler:
+            Handler to be benchmarked, closed when done.
+
+    Returns:
+        Tuple of caller seconds and total seconds.
+    """
+    logger = logging.getLogger(f"bench.{type(handler).__name__}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+
+    def log_records() -> None:
+        for i in range(RECORD_COUNT):
+            logger.info("Heavy logging record %s", i)
+
+    threads = [
+        threading.Thread(target=log_records) for _ in range(THREAD_COUNT)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    caller = time.perf_counter() - start
+    logger.removeHandler(handler)
+    handler.close()
+    total = time.perf_counter() - start
+
+    return caller, total
+
+
+def main() -> None:
+    """Run benchmark."""
+    record_total = THREAD_COUNT * RECORD_COUNT
+    rows = []
+    with TemporaryDirectory() as temp_dir:
+        for latency in [0, FLUSH_LATENCY]:
+            file_handler = logging.FileHandler(str(Path(temp_dir) / "f.log"))
+            queue_handler = QueueFileHandler(
+                str(Path(temp_dir) / "q.log"),
+                max_bytes=10 * 1024 * 1024,
+                backup_count=100,
+            )
+            if latency > 0:
+                slow_flush(file_handler, latency)
+                slow_flush(queue_handler.file_handler, latency)
+
+            for handler in [file_handler, queue_handler]:
+                caller, total = run(handler)
+                rows.append(
+                    (
+                        f"{type(handler).__name__} "
+                        f"(flush latency {latency * 1000:.1f}ms)",
+                        f"caller {caller:.3f}s "
+                        f"({record_total / caller:,.0f} records/s), "
+                        f"total {total:.3f}s",
+                    )
+                )
+
+    report(
+        f"Logging {record_total:,} records from {THREAD_COUNT} threads", rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare time of parsing large request bodies as JSON and as form data.
+
+- Field count stays under `DATA_UPLOAD_MAX_NUMBER_FIELDS`, which limits form
+data, so bodies grow by length of values.
+"""
+
+import json
+from functools import partial
+from importlib.util import find_spec
+from urllib.parse import urlencode
+
+from benchmarks import report, setup_django, timeit
+
+setup_django()
+
+# pylint: disable=wrong-import-order,wrong-import-position
+from django.http import QueryDict  # noqa: E402
+
+from productivity.parsers import loads  # noqa: E402
+
+# pylint: enable=wrong-import-order,wrong-import-position
+
+FIELD_COUNT = 900
+
+VALUE_LENGTHS = [10, 100, 1_000]
+
+
+def make_fields(value_length: int) -> dict[str, str]:
+    """Return Productivity fields padded with extra fields.
+
+    Args:
+        value_length:
+            Length of value of each extra field.
+
+    Returns:
+        Field names mapped to values.
+    """
+    fields = {"item": "Calendar", "frequency": "Key", "group": "Next"}
+    fields.update(
+        (f"extra_{i}", "x" * value_length)
+        for i in range(FIELD_COUNT - len(fields))
+    )
+
+    return fields
+
+
+def main() -> None:
+    """Run benchmark."""
+    rows = []
+    for value_length in VALUE_LENGTHS:
+        fields = make_fields(value_length)
+        json_body = json.dumps(fields).encode()
+        form_body = urlencode(fields)
+        cases = [
+            ("QueryDict", partial(QueryDict, form_body), len(form_body)),
+            ("json.loads", partial(json.loads, json_body), len(json_body)),
+        ]
+        if find_spec("orjson"):
+            cases.append(("orjson", partial(loads, json_body), len(json_body)))
+
+        for label, func, size in cases:
+            elapsed = timeit(func)
+            rows.append(
+                (
+                    f"{value_length:,} chars/value {label}",
+                    f"{size:,} bytes, {elapsed * 1000:.3f}ms",
+                )
+            )
+
+    report(f"Parse request body of {FIELD_COUNT} fields", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Compare lists served from `productivity.readmodel` and from the ORM.
+
+- Memory is of the objects of a list: model instances as `Productivity.
+objects.all()` creates them, and a read model snapshot, measured with
+`tracemalloc`, scaled to 10k rows.
+- Latency is of rendering a list without response cache, see
+`views.render_productivities`, in default and compact format, and of a
+read model refresh after one object changed, and with nothing changed.
+"""
+
+import tracemalloc
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+from benchmarks import (
+    grow_productivities,
+    report,
+    setup_django,
+    test_database,
+    timeit,
+)
+
+setup_django()
+
+# pylint: disable=wrong-import-order,wrong-import-position
+from productivity.models import Productivity  # noqa: E402
+from productivity.readmodel import ReadModel, refresh_snapshot  # noqa: E402
+from productivity.views import render_productivities  # noqa: E402
+
+# pylint: enable=wrong-import-order,wrong-import-position
+
+SIZES = (10_000, 100_000)
+
+BATCH_SIZE = 5000
+
+
+def measure(func: Callable[[], Any]) -> int:
+    """Return bytes allocated by a function and kept by its result."""
+    tracemalloc.start()
+    result = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+
+    return size
+
+
+def time_refresh(size: int) -> tuple[str, str]:
+    """Time read model refresh with nothing and one object changed."""
+    read_model = ReadModel()
+    read_model.get_snapshot()
+    unchanged = timeit(read_model.get_snapshot)
+    productivity = Productivity.objects.first()
+    assert productivity is not None
+
+    def change() -> None:
+        productivity.save()
+        read_model.get_snapshot()
+
+    changed = timeit(change)
+    read_model.close()
+
+    return (
+        f"refresh, {size:,} objects",
+        f"unchanged {unchanged * 1000:.3f}ms, "
+        f"1 changed {changed * 1000:.1f}ms",
+    )
+
+
+def main() -> None:
+    """Run benchmark."""
+    rows = []
+    with test_database():
+        for size in grow_productivities(SIZES, BATCH_SIZE):
+            scale = 10_000 / size
+            orm_memory = measure(lambda: list(Productivity.objects.all()))
+            snapshot_memory = measure(lambda: refresh_snapshot(None))
+            rows.append(
+                (
+                    f"memory per 10k rows, {size:,} objects",
+                    f"ORM {orm_memory * scale / 2**20:.2f}MiB, "
+                    f"read model {snapshot_memory * scale / 2**20:.2f}MiB",
+                )
+            )
+
+            snapshot = refresh_snapshot(None)
+            for label, response_format in (
+                ("default", None),
+                ("compact", "compact"),
+            ):
+                orm = timeit(
+                    partial(
+                        render_productivities, response_format=response_format
+                    )
+                )
+                memory = timeit(
+                    partial(
+                        render_productivities,
+                        response_format=response_format,
+                        snapshot=snapshot,
+                    )
+                )
+                rows.append(
+                    (
+                        f"render {label}, {size:,} objects",
+                        f"ORM {orm * 1000:.1f}ms, "
+                        f"read model {memory * 1000:.1f}ms",
+                    )
+                )
+
+            rows.append(time_refresh(size))
+
+    report("Lists from read model and ORM", rows)
+
+
+if __name__ == "__main__":
+    main()
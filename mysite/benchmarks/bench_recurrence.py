@@ -0,0 +1,133 @@
+"""Compare next due date computation for many objects.
+
+- Calendar walk tests each day after the last check against the rule, then
+sorts all objects by due date, as a per-object loop would.
+- Engine looks up next occurrence in memoized rule tables, and pops due
+objects from a heap, see `productivity.recurrence`.
+- Query case is `ProductivityQuerySet.due`, reading objects from the
+database.
+"""
+
+import calendar
+import random
+from datetime import date, datetime, timedelta
+from functools import partial
+
+from benchmarks import report, setup_django, test_database, timeit
+
+setup_django()
+
+# pylint: disable=wrong-import-order,wrong-import-position
+from productivity.models import Productivity, ProductivityGroup  # noqa: E402
+from productivity.recurrence import (  # noqa: E402
+    Rule,
+    Scheduler,
+    get_due,
+    parse_rule,
+)
+
+# pylint: enable=wrong-import-order,wrong-import-position
+
+OBJECT_COUNT = 100_000
+
+LIMIT = 100
+
+TODAY = date(2024, 6, 30)
+
+RULES = (
+    "FREQ=DAILY",
+    "FREQ=WEEKLY;BYDAY=MO",
+    "FREQ=MONTHLY;BYMONTHDAY=1",
+    "FREQ=DAILY;INTERVAL=3",
+    "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR",
+    "FREQ=MONTHLY;BYMONTHDAY=1,15",
+)
+
+
+def is_occurrence(rule: Rule, day: date, after: date) -> bool:
+    """Return True if day is an occurrence of rule anchored at after."""
+    if rule.freq == "DAILY":
+        return (day - after).days % rule.interval == 0
+    if rule.freq == "WEEKLY":
+        weeks = (day.toordinal() - 1) // 7 - (after.toordinal() - 1) // 7
+        return day.weekday() in rule.by_day and weeks % rule.interval == 0
+
+    months = day.year * 12 + day.month - after.year * 12 - after.month
+    length = calendar.monthrange(day.year, day.month)[1]
+    return (
+        day.day in {min(d, length) for d in rule.by_month_day}
+        and months % rule.interval == 0
+    )
+
+
+def walk_calendar(rows: list[tuple[int, str, date]]) -> list[tuple[date, int]]:
+    """Return due objects by walking each object's calendar."""
+    due = []
+    for productivity_id, text, after in rows:
+        rule = parse_rule.__wrapped__(text)
+        day = after + timedelta(days=1)
+        while not is_occurrence(rule, day, after):
+            day += timedelta(days=1)
+        due.append((day, productivity_id))
+    due.sort()
+
+    return [entry for entry in due if entry[0] <= TODAY][:LIMIT]
+
+
+def engine(rows: list[tuple[int, str, date]]) -> list[tuple[date, int]]:
+    """Return due objects with memoized tables and a heap."""
+    get_due.cache_clear()
+    scheduler = Scheduler(
+        (get_due(text, after), productivity_id)
+        for productivity_id, text, after in rows
+    )
+
+    return scheduler.pop_due(TODAY, LIMIT)
+
+
+def main() -> None:
+    """Run benchmark."""
+    rng = random.Random(0)
+    rows = [
+        (i, rng.choice(RULES), TODAY - timedelta(days=rng.randrange(60)))
+        for i in range(OBJECT_COUNT)
+    ]
+    assert walk_calendar(rows) == engine(rows)
+
+    results = [
+        ("calendar walk, sort", timeit(partial(walk_calendar, rows), 3)),
+        ("rule tables, heap", timeit(partial(engine, rows), 3)),
+    ]
+
+    with test_database():
+        group_id = ProductivityGroup.objects.get_id("Benchmark")
+        Productivity.objects.bulk_create(
+            (
+                Productivity(
+                    item=f"Item {i}",
+                    frequency=Productivity.Frequency.KEY,
+                    group_id=group_id,
+                    recurrence=text,
+                )
+                for i, text, _ in rows
+            ),
+            batch_size=5000,
+        )
+        Productivity.objects.update(
+            last_check=datetime.combine(TODAY, datetime.min.time())
+        )
+        results.append(
+            (
+                "ProductivityQuerySet.due",
+                timeit(partial(Productivity.objects.due, TODAY, LIMIT), 3),
+            )
+        )
+
+    report(
+        f"Next {LIMIT} due of {OBJECT_COUNT:,} objects",
+        [(label, f"{seconds * 1000:.1f}ms") for label, seconds in results],
+    )
+
+
+if __name__ == "__main__":
+    main()
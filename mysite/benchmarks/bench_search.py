@@ -0,0 +1,78 @@
+"""Compare FTS5 search against an `icontains` scan at 100k rows."""
+
+import random
+from functools import partial
+
+from benchmarks import report, setup_django, test_database, timeit
+
+setup_django()
+
+# pylint: disable=wrong-import-position
+from productivity.models import (  # noqa: E402
+    Productivity,
+    ProductivityGroup,
+)
+from productivity.search import (  # noqa: E402
+    find_productivities,
+    find_productivities_icontains,
+)
+
+# pylint: enable=wrong-import-position
+
+ROW_COUNT = 100_000
+WORDS = [
+    "calendar",
+    "review",
+    "inbox",
+    "budget",
+    "exercise",
+    "reading",
+    "journal",
+    "groceries",
+    "laundry",
+    "backup",
+]
+TAGS = [f"tag{i:04d}" for i in range(2000)]
+QUERIES = ["journal", "budget review", "tag0042", "tag0042 inbox", "zzz"]
+
+
+def populate() -> None:
+    """Create `ROW_COUNT` Productivity objects with random words."""
+    rng = random.Random(0)
+    group_ids = [
+        ProductivityGroup.objects.get_id(word.title()) for word in WORDS
+    ]
+    Productivity.objects.bulk_create(
+        (
+            Productivity(
+                item=" ".join([*rng.sample(WORDS, 3), rng.choice(TAGS)]),
+                frequency=rng.randrange(5),
+                group_id=rng.choice(group_ids),
+            )
+            for i in range(ROW_COUNT)
+        ),
+        batch_size=5000,
+    )
+
+
+def main() -> None:
+    """Run benchmark."""
+    with test_database():
+        populate()
+        rows = []
+        for query in QUERIES:
+            fts = timeit(partial(find_productivities, query))
+            scan = timeit(partial(find_productivities_icontains, query))
+            rows.append(
+                (
+                    f"q={query!r}",
+                    f"fts5 {fts * 1000:.2f}ms, icontains {scan * 1000:.2f}ms"
+                    f" ({scan / fts:.1f}x)",
+                )
+            )
+
+    report(f"Search over {ROW_COUNT:,} rows, limit 100", rows)
+
+
+if __name__ == "__main__":
+    main()
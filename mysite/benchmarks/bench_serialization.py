@@ -0,0 +1,49 @@
+"""Compare payload bytes and time of list response formats."""
+
+from functools import partial
+
+from benchmarks import (
+    make_productivities,
+    report,
+    setup_django,
+    test_database,
+    timeit,
+)
+
+setup_django()
+
+# pylint: disable=wrong-import-position
+from productivity.models import Productivity  # noqa: E402
+from productivity.views import get_productivities  # noqa: E402
+
+# pylint: enable=wrong-import-position
+
+ROW_COUNT = 10_000
+CASES = [
+    ("default", None, None),
+    ("fields=id,item,last_check", "id,item,last_check", None),
+    ("format=compact", None, "compact"),
+    (
+        "fields=id,item,last_check&format=compact",
+        "id,item,last_check",
+        "compact",
+    ),
+]
+
+
+def main() -> None:
+    """Run benchmark."""
+    with test_database():
+        Productivity.objects.bulk_create(make_productivities(ROW_COUNT))
+        rows = []
+        for label, fields, response_format in CASES:
+            func = partial(get_productivities, fields, response_format)
+            elapsed = timeit(func)
+            size = len(func().content)
+            rows.append((label, f"{size:,} bytes, {elapsed * 1000:.1f}ms"))
+
+    report(f"GET /productivity/ with {ROW_COUNT:,} rows", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Compare memory per worker of `mysite.server` with and without preloading.
+
+- Server is started with `WORKERS` workers, never recycled, and warmed with
+requests spread over workers, so each has imported what it needs.
+- Memory is read from `/proc/<pid>/smaps_rollup` of master and workers:
+RSS counts shared pages in full in each process, PSS splits them between
+processes sharing them, private is memory only that process holds, freed
+when it exits.
+- Without preloading, each worker imports Django and the project after
+forking, so none of it is shared.
+"""
+
+import signal
+import socket
+import subprocess
+import sys
+import time
+from collections.abc import Mapping
+from http.client import HTTPConnection
+from pathlib import Path
+
+from benchmarks import report
+
+WORKERS = 4
+
+REQUESTS = 400
+
+PATHS = ("/authentication/csrftoken/", "/productivity/")
+
+SMAPS_FIELDS = ("Rss", "Pss", "Private_Clean", "Private_Dirty")
+
+
+def get_children(pid: int) -> list[int]:
+    """Return IDs of child processes of a process."""
+    children = []
+    for path in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            stat = path.read_text(encoding="utf-8")
+        except OSError:
+            continue
+        if int(stat.rpartition(")")[2].split()[1]) == pid:
+            children.append(int(path.parent.name))
+
+    return children
+
+
+def get_memory(pid: int) -> dict[str, int]:
+    """Return RSS, PSS and private memory of a process in KiB."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in SMAPS_FIELDS:
+                values[name] = int(value.split()[0])
+
+    return {
+        "rss": values["Rss"],
+        "pss": values["Pss"],
+        "private": values["Private_Clean"] + values["Private_Dirty"],
+    }
+
+
+def format_memory(memory: Mapping[str, float]) -> str:
+    """Format memory in MiB."""
+    return ", ".join(
+        f"{name} {value / 1024:.1f}MiB" for name, value in memory.items()
+    )
+
+
+def measure(preload: bool) -> tuple[dict[str, int], dict[str, float], float]:
+    """Run server and measure memory and shutdown time.
+
+    Args:
+        preload:
+            Load Django in master before forking.
+
+    Returns:
+        Memory of master, mean memory per worker, and seconds from SIGTERM
+        to exit of master.
+    """
+    with socket.create_server(("127.0.0.1", 0)) as sock:
+        port = sock.getsockname()[1]
+    args = [
+        sys.executable,
+        "-m",
+        "mysite.server",
+        f"--port={port}",
+        f"--workers={WORKERS}",
+        "--max-requests=0",
+    ]
+    if not preload:
+        args.append("--no-preload")
+
+    with subprocess.Popen(args, stderr=subprocess.DEVNULL) as process:
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port)).close()
+                break
+            except ConnectionRefusedError:
+                time.sleep(0.05)
+        for i in range(REQUESTS):
+            # Anonymous requests to /productivity/ are redirected to login.
+            connection = HTTPConnection("127.0.0.1", port)
+            connection.request("GET", PATHS[i % len(PATHS)])
+            connection.getresponse().read()
+            connection.close()
+        time.sleep(0.5)
+
+        master = get_memory(process.pid)
+        workers = [get_memory(pid) for pid in get_children(process.pid)]
+        mean = {
+            name: sum(worker[name] for worker in workers) / len(workers)
+            for name in master
+        }
+
+        start = time.perf_counter()
+        process.send_signal(signal.SIGTERM)
+        process.wait()
+
+    return master, mean, time.perf_counter() - start
+
+
+def main() -> None:
+    """Run benchmark."""
+    rows = []
+    for preload in (True, False):
+        label = "preload" if preload else "no preload"
+        master, worker, shutdown = measure(preload)
+        total = master["pss"] + worker["pss"] * WORKERS
+        rows.extend(
+            [
+                (f"{label}, master", format_memory(master)),
+                (f"{label}, per worker", format_memory(worker)),
+                (
+                    f"{label}, total",
+                    f"pss {total / 1024:.1f}MiB, shutdown {shutdown:.2f}s",
+                ),
+            ]
+        )
+
+    report(
+        f"mysite.server memory, {WORKERS} workers after {REQUESTS} requests",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Compare completion statistics from rollups and from raw checks.
+
+- History grows backwards in time, so the requested range, the last
+`RANGE_DAYS` days, always holds the same checks.
+- Raw case counts checks of the range per group, Frequency and day, which
+scans history, as the check index leads with the object.
+- Rollup case reads rollups of the range, see `productivity.rollups`.
+"""
+
+from datetime import datetime, timedelta
+from functools import partial
+
+from benchmarks import (
+    make_productivities,
+    report,
+    setup_django,
+    test_database,
+    timeit,
+)
+
+setup_django()
+
+# pylint: disable=wrong-import-order,wrong-import-position
+from django.db import models  # noqa: E402
+from django.db.models.functions import TruncDate  # noqa: E402
+
+from productivity.models import Productivity, ProductivityCheck  # noqa: E402
+from productivity.rollups import get_stats, rebuild_rollups  # noqa: E402
+
+# pylint: enable=wrong-import-order,wrong-import-position
+
+OBJECT_COUNT = 200
+
+HISTORY_SIZES = (10_000, 100_000, 1_000_000)
+
+RANGE_DAYS = 30
+
+BATCH_SIZE = 5000
+
+NOW = datetime(2024, 6, 30, 12)
+
+
+def add_history(
+    productivity_ids: list[int], first_day: int, days: int
+) -> None:
+    """Insert a daily check of each object for days before `NOW`.
+
+    Args:
+        productivity_ids:
+            IDs of objects.
+        first_day:
+            Days before `NOW` of the latest day to insert.
+        days:
+            Number of days to insert.
+    """
+    batch: list[ProductivityCheck] = []
+    for day in range(first_day, first_day + days):
+        checked_at = NOW - timedelta(days=day)
+        batch.extend(
+            ProductivityCheck(productivity_id=i, checked_at=checked_at)
+            for i in productivity_ids
+        )
+        if len(batch) >= BATCH_SIZE:
+            ProductivityCheck.objects.bulk_create(batch)
+            batch = []
+    ProductivityCheck.objects.bulk_create(batch)
+
+
+def raw_stats() -> list[dict[str, object]]:
+    """Count checks of the range from raw rows."""
+    return list(
+        ProductivityCheck.objects.filter(
+            checked_at__gte=NOW - timedelta(days=RANGE_DAYS)
+        )
+        .values(
+            "productivity__group__name",
+            "productivity__frequency",
+            day=TruncDate("checked_at"),
+        )
+        .annotate(
+            checks=models.Count("id"),
+            done=models.Count("productivity", distinct=True),
+        )
+        .order_by(
+            "productivity__group__name", "productivity__frequency", "day"
+        )
+    )
+
+
+def main() -> None:
+    """Run benchmark."""
+    rows = []
+    with test_database():
+        Productivity.objects.bulk_create(make_productivities(OBJECT_COUNT))
+        productivity_ids = list(
+            Productivity.objects.values_list("id", flat=True)
+        )
+
+        days = 0
+        for size in HISTORY_SIZES:
+            added = size // OBJECT_COUNT - days
+            add_history(productivity_ids, days, added)
+            days += added
+            rebuild = timeit(rebuild_rollups, repeat=1)
+
+            since = (NOW - timedelta(days=RANGE_DAYS)).date()
+            raw = timeit(raw_stats)
+            rollup = timeit(partial(get_stats, since, NOW.date()))
+            rows.append(
+                (
+                    f"{size:,} checks",
+                    f"raw {raw * 1000:.2f}ms, rollups {rollup * 1000:.2f}ms,"
+                    f" rebuild {rebuild:.2f}s",
+                )
+            )
+
+    report(
+        f"GET /productivity/stats/ for last {RANGE_DAYS} days, "
+        f"{OBJECT_COUNT} objects",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
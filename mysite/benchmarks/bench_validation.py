@@ -0,0 +1,62 @@
+"""Compare time of validating Productivity objects per 10k rows.
+
+- `clean_fields` checks that the group exists with a query per object,
+`validate_productivity` checks the group ID type only.
+"""
+
+from collections.abc import Callable
+from functools import partial
+
+from benchmarks import (
+    make_productivities,
+    report,
+    setup_django,
+    test_database,
+    timeit,
+)
+
+setup_django()
+
+# pylint: disable=wrong-import-position
+from productivity.models import (  # noqa: E402
+    Productivity,
+    validate_productivity,
+)
+
+# pylint: enable=wrong-import-position
+
+ROW_COUNT = 10_000
+
+
+def validate_all(
+    validate: Callable[[Productivity], None], objs: list[Productivity]
+) -> None:
+    """Validate every object.
+
+    Args:
+        validate:
+            Validation function.
+        objs:
+            Productivity objects.
+    """
+    for obj in objs:
+        validate(obj)
+
+
+def main() -> None:
+    """Run benchmark."""
+    rows = []
+    with test_database():
+        objs = make_productivities(ROW_COUNT)
+        for label, validate in (
+            ("clean_fields", Productivity.clean_fields),
+            ("validate_productivity", validate_productivity),
+        ):
+            elapsed = timeit(partial(validate_all, validate, objs))
+            rows.append((label, f"{elapsed * 1000:.1f}ms"))
+
+    report(f"Validate {ROW_COUNT:,} Productivity objects", rows)
+
+
+if __name__ == "__main__":
+    main()
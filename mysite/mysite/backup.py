@@ -0,0 +1,156 @@
+"""Online backup of SQLite databases for mysite project.
+
+- Pages are copied with SQLite's online backup API, `pages` pages per step,
+sleeping between steps. A step holds a read lock on the source only while
+copying its pages, so writers on other connections, such as server workers,
+commit between steps instead of waiting for the whole copy.
+- SQLite restarts a backup from the first page when another connection
+writes to the source. On restart, the copy is aborted and retried with
+`PAGES_GROWTH` times as many pages per step, so a backup under steady writes
+still finishes, in fewer and longer steps, at worst in one step holding the
+lock for the whole copy, as a plain copy would.
+- Backup is written to a temporary file next to the target and renamed, so
+the target is never a partial copy. If compressed, the temporary copy is
+streamed through gzip.
+"""
+
+import gzip
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional, Union
+
+from mysite.compression import GZIP_LEVEL
+
+DEFAULT_PAGES = 256
+
+DEFAULT_SLEEP = 0.05
+
+PAGES_GROWTH = 4
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+class BackupRestarted(Exception):
+    """Backup restarted by a write on another connection."""
+
+
+class BackupResult(NamedTuple):
+    """Summary of a backup."""
+
+    pages: int
+    steps: int
+    restarts: int
+
+
+class Progress:  # pylint: disable=too-few-public-methods
+    """Backup progress callback, sleeping between steps.
+
+    - Raises `BackupRestarted` when remaining pages do not decrease, which
+    aborts the backup.
+    """
+
+    def __init__(self, sleep: float) -> None:
+        self.sleep = sleep
+        self.pages = 0
+        self.remaining: Optional[int] = None
+        self.steps = 0
+
+    def __call__(self, _status: int, remaining: int, total: int) -> None:
+        self.steps += 1
+        self.pages = total
+        if self.remaining is not None and remaining >= self.remaining:
+            raise BackupRestarted
+        self.remaining = remaining
+        if remaining and self.sleep > 0:
+            time.sleep(self.sleep)
+
+
+def copy_database(
+    source: sqlite3.Connection,
+    target: sqlite3.Connection,
+    pages: int = DEFAULT_PAGES,
+    sleep: float = DEFAULT_SLEEP,
+) -> BackupResult:
+    """Copy database in steps, see module docstring.
+
+    Args:
+        source:
+            Connection to database to be copied.
+        target:
+            Connection to database to be overwritten.
+        pages:
+            Pages copied per step, -1 for all pages in one step.
+        sleep:
+            Seconds to sleep between steps.
+
+    Returns:
+        Number of pages copied, total number of steps and number of
+        restarts.
+    """
+    steps = restarts = 0
+    while True:
+        progress = Progress(sleep)
+        try:
+            source.backup(target, pages=pages, progress=progress)
+        except BackupRestarted:
+            steps += progress.steps
+            restarts += 1
+            pages *= PAGES_GROWTH
+            if pages >= progress.pages:
+                pages = -1
+            continue
+
+        return BackupResult(progress.pages, steps + progress.steps, restarts)
+
+
+def backup_database(
+    source: sqlite3.Connection,
+    path: Union[str, Path],
+    pages: int = DEFAULT_PAGES,
+    sleep: float = DEFAULT_SLEEP,
+    compress: bool = False,
+) -> BackupResult:
+    """Back up database to a file.
+
+    Args:
+        source:
+            Connection to database to be backed up.
+        path:
+            Path of backup, replaced if it exists.
+        pages:
+            Pages copied per step, -1 for all pages in one step.
+        sleep:
+            Seconds to sleep between steps.
+        compress:
+            Write backup compressed with gzip.
+
+    Returns:
+        Number of pages copied, total number of steps and number of
+        restarts.
+    """
+    path = Path(path)
+    temp = path.with_name(f".{path.name}.tmp")
+    compressed = path.with_name(f".{path.name}.gz.tmp")
+    temp.unlink(missing_ok=True)
+    try:
+        target = sqlite3.connect(temp)
+        try:
+            result = copy_database(source, target, pages, sleep)
+        finally:
+            target.close()
+
+        if compress:
+            with temp.open("rb") as f, gzip.open(
+                compressed, "wb", compresslevel=GZIP_LEVEL
+            ) as gz:
+                shutil.copyfileobj(f, gz, STREAM_CHUNK_SIZE)
+            compressed.replace(path)
+        else:
+            temp.replace(path)
+    finally:
+        temp.unlink(missing_ok=True)
+        compressed.unlink(missing_ok=True)
+
+    return result
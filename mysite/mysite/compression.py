@@ -0,0 +1,140 @@
+"""Response compression for mysite project.
+
+- Encoding is negotiated from `Accept-Encoding`, preferring Brotli if the
+optional `brotli` package is installed, then gzip.
+- Views that cache their responses can store compressed bytes with
+`compress`, and set `Content-Encoding` themselves, `CompressionMiddleware`
+leaves such responses as they are. Such bodies must not hold secrets, such
+as CSRF tokens, as `compress` adds no padding against BREACH.
+"""
+
+import gzip
+from collections.abc import Sequence
+from typing import Optional
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.http.response import HttpResponseBase
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover
+    brotli = None
+
+DEFAULT_PATH_PREFIXES = ("/productivity/",)
+
+MIN_COMPRESS_SIZE = 200
+
+GZIP_LEVEL = 6
+
+BROTLI_QUALITY = 5
+
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    """Compress content.
+
+    Args:
+        content:
+            Bytes to be compressed.
+        encoding:
+            Content coding, in `SUPPORTED_ENCODINGS`.
+
+    Returns:
+        Compressed bytes.
+
+    Raises:
+        ValueError:
+            Encoding is not supported.
+    """
+    if encoding == "gzip":
+        return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+    if encoding == "br" and brotli:
+        return bytes(brotli.compress(content, quality=BROTLI_QUALITY))
+
+    raise ValueError(f"Unsupported encoding {encoding}")
+
+
+def negotiate_encoding(
+    accept_encoding: str, encodings: Sequence[str] = SUPPORTED_ENCODINGS
+) -> Optional[str]:
+    """Choose content coding from `Accept-Encoding` header.
+
+    - Codings with `q=0` are refused, `*` matches any supported coding.
+    - Ties in quality are broken by order of `encodings`.
+
+    Args:
+        accept_encoding:
+            Value of `Accept-Encoding` header.
+        encodings:
+            Supported codings, in order of preference.
+
+    Returns:
+        Supported coding with highest quality, None for identity.
+    """
+    qualities: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        if coding:
+            qualities[coding.strip().lower()] = quality
+
+    best = None
+    best_quality = 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best = encoding
+            best_quality = quality
+
+    return best
+
+
+# pylint: disable-next=too-few-public-methods
+class CompressionMiddleware(GZipMiddleware):
+    """Compress API responses with gzip, see `GZipMiddleware`.
+
+    - Only paths starting with one of `COMPRESSION_PATH_PREFIXES` in
+    settings are compressed, by default `DEFAULT_PATH_PREFIXES`, so HTML
+    pages, such as admin, which hold CSRF tokens, are left out.
+    - Random padding against BREACH and weakening of strong `ETag`s are done
+    by `GZipMiddleware`. Brotli has no such padding, so it is left to views
+    that compress bodies without secrets, see `compress`.
+    - Skipped for streaming responses, which are mostly event streams, and
+    for codings refused with `q=0`.
+    """
+
+    def process_response(
+        self, request: HttpRequest, response: HttpResponseBase
+    ) -> HttpResponseBase:
+        prefixes = tuple(
+            getattr(
+                settings, "COMPRESSION_PATH_PREFIXES", DEFAULT_PATH_PREFIXES
+            )
+        )
+        if not isinstance(
+            response, HttpResponse
+        ) or not request.path_info.startswith(prefixes):
+            return response
+
+        encoding = negotiate_encoding(
+            request.headers.get("Accept-Encoding", ""), ("gzip",)
+        )
+        if encoding is None:
+            if len(response.content) >= MIN_COMPRESS_SIZE and not (
+                response.has_header("Content-Encoding")
+            ):
+                patch_vary_headers(response, ("Accept-Encoding",))
+            return response
+
+        return super().process_response(request, response)
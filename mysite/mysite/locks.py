@@ -0,0 +1,75 @@
+"""Reporting of database lock errors for mysite project.
+
+- A server error caused by a database lock, such as SQLite `database is
+locked` once its busy timeout expires, has `X-Database-Lock` header, see
+`DatabaseLockMiddleware`. Clients such as `manage.py loadtest` count lock
+errors from it, as the error page only shows the exception with DEBUG.
+"""
+
+from collections.abc import Callable
+
+from django.db import DatabaseError
+from django.http import HttpRequest, HttpResponse
+
+LOCK_ERRORS = (
+    "database is locked",
+    "database table is locked",
+    "deadlock detected",
+    "could not obtain lock",
+    "lock timeout",
+)
+
+LOCK_HEADER = "X-Database-Lock"
+
+LOCK_META_KEY = "mysite.database_lock"
+
+
+def is_lock_error(exception: Exception) -> bool:
+    """Return True if exception is a database error from a lock.
+
+    Args:
+        exception:
+            Exception raised.
+
+    Returns:
+        True if lock error.
+    """
+    return isinstance(exception, DatabaseError) and any(
+        e in str(exception) for e in LOCK_ERRORS
+    )
+
+
+class DatabaseLockMiddleware:
+    """Set `X-Database-Lock` header on server errors from a database lock.
+
+    - Exceptions raised by views are seen by `process_exception`, the error
+    response is built by Django afterwards.
+    """
+
+    def __init__(
+        self, get_response: Callable[[HttpRequest], HttpResponse]
+    ) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        response = self.get_response(request)
+        if request.META.get(LOCK_META_KEY) and response.status_code >= 500:
+            response.headers[LOCK_HEADER] = "1"
+
+        return response
+
+    def process_exception(
+        self, request: HttpRequest, exception: Exception
+    ) -> None:
+        """Mark request if exception is a lock error.
+
+        - Nothing is returned, so the exception is handled as usual.
+
+        Args:
+            request:
+                HttpRequest object.
+            exception:
+                Exception raised by view.
+        """
+        if is_lock_error(exception):
+            request.META[LOCK_META_KEY] = True
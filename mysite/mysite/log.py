@@ -0,0 +1,331 @@
+"""Logging handlers for mysite project.
+
+Log records are put on a queue by the request thread and written to disk by a
+background thread, so a log call never blocks a request on file I/O.
+"""
+
+import copy
+import logging
+import os
+import queue
+import time
+import weakref
+from functools import partial
+from logging.handlers import BaseRotatingHandler, QueueHandler, QueueListener
+from typing import Any, Optional
+
+
+class BufferedRotatingFileHandler(BaseRotatingHandler):
+    """File handler that does not flush per record and rotates by size or age.
+
+    - Flushing is left to the caller, `BatchQueueListener` flushes once per
+    batch of records.
+    - Rollover happens when the file reaches `max_bytes` or when `interval`
+    seconds have passed since the file was opened, whichever comes first. A
+    value of 0 disables that trigger.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = 0,
+        interval: float = 0,
+        backup_count: int = 0,
+        encoding: Optional[str] = None,
+    ) -> None:
+        super().__init__(filename, "a", encoding=encoding, delay=True)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.rollover_at = self.compute_rollover_at()
+
+    def compute_rollover_at(self) -> float:
+        """Return timestamp of next time-based rollover, `inf` if disabled."""
+        if self.interval <= 0:
+            return float("inf")
+
+        return time.time() + self.interval
+
+    def doRollover(self) -> None:  # pylint: disable=invalid-name
+        """Close current file, shift backups and open a new file.
+
+        - Backups are named `<filename>.1` (newest) to
+        `<filename>.<backup_count>` (oldest).
+        - If `backup_count` is 0, current file is truncated.
+        """
+        if self.stream:
+            self.stream.close()
+            self.stream = None  # type: ignore[assignment]
+
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                source = self.rotation_filename(f"{self.baseFilename}.{i}")
+                dest = self.rotation_filename(f"{self.baseFilename}.{i + 1}")
+                try:
+                    self.rotate(source, dest)
+                except FileNotFoundError:
+                    pass
+            self.rotate(
+                self.baseFilename,
+                self.rotation_filename(f"{self.baseFilename}.1"),
+            )
+            self.mode = "a"
+        else:
+            self.mode = "w"
+
+        self.stream = self._open()
+        self.mode = "a"
+        self.rollover_at = self.compute_rollover_at()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Write formatted record to file without flushing.
+
+        Args:
+            record:
+                Log record.
+        """
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:  # pylint: disable=broad-exception-caught
+            self.handleError(record)
+
+    # pylint: disable-next=invalid-name,unused-argument
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        """Check if file should be rolled over before writing record.
+
+        Args:
+            record:
+                Log record.
+
+        Returns:
+            True if file reached `max_bytes` or `interval` has passed.
+        """
+        if time.time() >= self.rollover_at:
+            return True
+
+        if self.max_bytes > 0 and self.stream is not None:
+            return self.stream.tell() >= self.max_bytes
+
+        return False
+
+
+class BatchQueueListener(QueueListener):
+    """Queue listener that flushes its handlers once per batch of records.
+
+    - Background thread blocks for the first record, then drains up to
+    `batch_size` queued records without blocking before flushing. Under heavy
+    logging, many records share one flush, when idle each record is flushed
+    immediately.
+    - `stop()` enqueues a sentinel behind pending records, so every record
+    logged before `stop()` is written.
+    """
+
+    def __init__(
+        self,
+        log_queue: "queue.SimpleQueue[Any]",
+        *handlers: logging.Handler,
+        batch_size: int = 100,
+    ) -> None:
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+
+    def _monitor(self) -> None:
+        is_stopping = False
+        while not is_stopping:
+            batch = [self.dequeue(True)]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.dequeue(False))
+                except queue.Empty:
+                    break
+
+            for record in batch:
+                # pylint: disable-next=protected-access
+                if record is self._sentinel:  # type: ignore[attr-defined]
+                    is_stopping = True
+                else:
+                    self.handle(record)
+
+            for handler in self.handlers:
+                handler.flush()
+
+    def is_alive(self) -> bool:
+        """Return True if background thread is running."""
+        # pylint: disable-next=protected-access
+        return self._thread is not None
+
+
+class QueueFileHandler(QueueHandler):
+    """Handler that writes to a rotating file from a background thread.
+
+    - Records are handed over through a queue to `BatchQueueListener`, which
+    formats and writes them with `BufferedRotatingFileHandler`.
+    - On `close()`, which `logging.shutdown()` calls at exit, queued records
+    are written before the file is closed. Records emitted after that are
+    written synchronously instead of being dropped.
+    - A forked child, such as a server worker, gets its own queue and
+    background thread, as threads are not copied by `fork()`. Platforms
+    without `fork()` have no `os.register_at_fork`, and nothing to restart.
+    - A server worker writes to a file of its own, see `set_worker`, so
+    workers do not rotate one file from several processes.
+    """
+
+    instances: "weakref.WeakSet[QueueFileHandler]" = weakref.WeakSet()
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        filename: str,
+        *,
+        max_bytes: int = 0,
+        interval: float = 0,
+        backup_count: int = 0,
+        batch_size: int = 100,
+        encoding: Optional[str] = None,
+    ) -> None:
+        super().__init__(queue.SimpleQueue())
+        self.file_handler = BufferedRotatingFileHandler(
+            filename,
+            max_bytes=max_bytes,
+            interval=interval,
+            backup_count=backup_count,
+            encoding=encoding,
+        )
+        self.listener = BatchQueueListener(
+            self.queue,  # type: ignore[arg-type]
+            self.file_handler,
+            batch_size=batch_size,
+        )
+        self.listener.start()
+        self.filename = self.file_handler.baseFilename
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(
+                after_in_child=partial(restart_in_child, weakref.ref(self))
+            )
+        self.instances.add(self)
+
+    def after_fork(self) -> None:
+        """Replace queue and restart background thread, in a forked child.
+
+        - Records queued in the parent are left to the parent.
+        """
+        if self.listener.is_alive():
+            self.queue = self.listener.queue = queue.SimpleQueue()
+            # pylint: disable-next=protected-access
+            self.listener._thread = None
+            self.listener.start()
+
+    def set_worker(self, worker: int) -> None:
+        """Write to file of a server worker, `<name>.worker<worker>.<ext>`.
+
+        - Worker number is reused by the worker replacing it, so files do
+        not accumulate as workers are recycled.
+
+        Args:
+            worker:
+                Worker number.
+        """
+        is_alive = self.listener.is_alive()
+        if is_alive:
+            self.listener.stop()
+        if self.file_handler.stream:
+            self.file_handler.stream.close()
+            self.file_handler.stream = None  # type: ignore[assignment]
+
+        root, ext = os.path.splitext(self.filename)
+        self.file_handler.baseFilename = f"{root}.worker{worker}{ext}"
+        self.file_handler.rollover_at = self.file_handler.compute_rollover_at()
+        if is_alive:
+            self.listener.start()
+
+    def close(self) -> None:
+        """Stop background thread after writing queued records, close file."""
+        self.acquire()
+        try:
+            if self.listener.is_alive():
+                self.listener.stop()
+            self.file_handler.close()
+        finally:
+            self.release()
+
+        super().close()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merge message arguments, leave formatting to background thread.
+
+        - Arguments are merged now, as they may be mutated after the call.
+        - Exception is formatted now, and `exc_info` dropped, so its
+        traceback frames are not kept alive while the record is queued.
+        - Other formatting, including `asctime`, is done by `file_handler`.
+
+        Args:
+            record:
+                Log record.
+
+        Returns:
+            Log record to be enqueued.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                formatter = self.file_handler.formatter or logging.Formatter()
+                record.exc_text = formatter.formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+    def setFormatter(self, fmt: Optional[logging.Formatter]) -> None:
+        """Set formatter of `file_handler`.
+
+        Args:
+            fmt:
+                Formatter.
+        """
+        super().setFormatter(fmt)
+        self.file_handler.setFormatter(fmt)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Enqueue record, or write it directly if listener is stopped.
+
+        Args:
+            record:
+                Log record.
+        """
+        if self.listener.is_alive():
+            super().emit(record)
+            return
+
+        try:
+            self.file_handler.handle(self.prepare(record))
+            self.file_handler.flush()
+        except Exception:  # pylint: disable=broad-exception-caught
+            self.handleError(record)
+
+
+def set_worker(worker: int) -> None:
+    """Switch every `QueueFileHandler` to file of a server worker.
+
+    Args:
+        worker:
+            Worker number.
+    """
+    for handler in list(QueueFileHandler.instances):
+        handler.set_worker(worker)
+
+
+def restart_in_child(ref: "weakref.ReferenceType[QueueFileHandler]") -> None:
+    """Call `after_fork` of a handler, if it still exists.
+
+    Args:
+        ref:
+            Weak reference to handler, so registering it for fork does not
+            keep it alive.
+    """
+    handler = ref()
+    if handler is not None:
+        handler.after_fork()
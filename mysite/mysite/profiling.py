@@ -0,0 +1,265 @@
+"""Profiling of individual requests for mysite project.
+
+- A staff user asks for a profile with `profile` query parameter or
+`X-Profile` header. `cprofile`, the default, stores cProfile stats as
+`.prof`, for `pstats` or snakeviz. `sample` samples the stack of the request
+thread every `SAMPLE_INTERVAL` seconds and stores collapsed stacks as
+`.folded`, for flamegraph.pl or speedscope.
+- Profiles are stored in `PROFILE_DIR` setting, only the newest
+`PROFILE_RETENTION` are kept. Response has the profile name in `X-Profile`
+header, download it from `/profiles/<name>`.
+- Middleware outside `ProfilingMiddleware`, up to authentication, is not
+profiled. Other requests are not profiled, nor are requests from users who
+are not staff.
+"""
+
+import cProfile
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+from types import FrameType
+from typing import Any, Optional
+
+from django.conf import settings
+from django.contrib.auth.decorators import user_passes_test
+from django.http import (
+    FileResponse,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseBase,
+    JsonResponse,
+)
+from django.utils.text import slugify
+from django.views.decorators.http import require_http_methods
+
+MODES = {"cprofile": ".prof", "sample": ".folded"}
+
+NAME_PATTERN = re.compile(r"[\w-]+\.(prof|folded)")
+
+PROFILE_HEADER = "X-Profile"
+
+PROFILE_PARAMETER = "profile"
+
+SAMPLE_INTERVAL = 0.001
+
+
+class StackSampler(threading.Thread):
+    """Thread counting collapsed stacks of another thread.
+
+    - A collapsed stack is frames from outermost to innermost, each as
+    `function (file:line)`, joined by `;`.
+    """
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            # pylint: disable-next=protected-access
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+
+    def stop(self) -> None:
+        """Stop sampling and wait for thread to exit."""
+        self.stop_event.set()
+        self.join()
+
+    def dump(self, path: Path) -> None:
+        """Write collapsed stacks with their sample counts.
+
+        Args:
+            path:
+                Path of file to be written.
+        """
+        path.write_text(
+            "".join(f"{s} {n}\n" for s, n in self.stacks.most_common()),
+            encoding="utf-8",
+        )
+
+
+def collapse_stack(frame: FrameType) -> str:
+    """Return collapsed stack ending at frame, see `StackSampler`.
+
+    Args:
+        frame:
+            Innermost frame.
+
+    Returns:
+        Collapsed stack.
+    """
+    frames = []
+    current: Optional[FrameType] = frame
+    while current is not None:
+        code = current.f_code
+        frames.append(
+            f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+        )
+        current = current.f_back
+
+    return ";".join(reversed(frames))
+
+
+def get_profile_dir() -> Path:
+    """Return directory of profiles, created if missing."""
+    profile_dir = Path(settings.PROFILE_DIR)
+    profile_dir.mkdir(parents=True, exist_ok=True)
+
+    return profile_dir
+
+
+def get_profile_mode(request: HttpRequest) -> Optional[str]:
+    """Return profiling mode requested, None if not requested or allowed.
+
+    Args:
+        request:
+            HttpRequest object, after authentication.
+
+    Returns:
+        Key of `MODES`, None if request is not to be profiled.
+    """
+    mode = request.GET.get(PROFILE_PARAMETER)
+    if mode is None:
+        mode = request.headers.get(PROFILE_HEADER)
+    if mode is None:
+        return None
+
+    user = getattr(request, "user", None)
+    if not (user and user.is_staff):
+        return None
+
+    return mode if mode in MODES else "cprofile"
+
+
+def make_profile_name(request: HttpRequest, mode: str) -> str:
+    """Return unique file name of profile.
+
+    Args:
+        request:
+            Profiled HttpRequest object.
+        mode:
+            Key of `MODES`.
+
+    Returns:
+        File name with time, method and path of request.
+    """
+    return (
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{request.method}-"
+        f"{slugify(request.path)[:50]}-{uuid.uuid4().hex[:8]}{MODES[mode]}"
+    )
+
+
+def list_profiles() -> list[Path]:
+    """Return paths of stored profiles, newest first."""
+    return sorted(
+        (
+            p
+            for p in get_profile_dir().iterdir()
+            if NAME_PATTERN.fullmatch(p.name)
+        ),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+
+
+def prune_profiles(retention: int) -> None:
+    """Delete all but the newest profiles.
+
+    Args:
+        retention:
+            Number of profiles to keep.
+    """
+    for path in list_profiles()[retention:]:
+        path.unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:  # pylint: disable=too-few-public-methods
+    """Profile requests asking for it from staff users."""
+
+    def __init__(
+        self, get_response: Callable[[HttpRequest], HttpResponse]
+    ) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        mode = get_profile_mode(request)
+        if mode is None:
+            return self.get_response(request)
+
+        path = get_profile_dir() / make_profile_name(request, mode)
+        if mode == "sample":
+            sampler = StackSampler(threading.get_ident(), SAMPLE_INTERVAL)
+            sampler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                sampler.stop()
+            sampler.dump(path)
+        else:
+            profiler = cProfile.Profile()
+            try:
+                response = profiler.runcall(self.get_response, request)
+            finally:
+                profiler.dump_stats(path)
+
+        prune_profiles(settings.PROFILE_RETENTION)
+        response.headers[PROFILE_HEADER] = path.name
+
+        return response
+
+
+def is_staff(user: Any) -> bool:
+    """Return True if user is staff."""
+    return bool(user.is_staff)
+
+
+@user_passes_test(is_staff)
+@require_http_methods(["GET"])
+def profile_list(request: HttpRequest) -> JsonResponse:
+    """List stored profiles, newest first.
+
+    Args:
+        request:
+            HttpRequest object.
+
+    Returns:
+        JSON Response of profile names and sizes.
+    """
+    return JsonResponse(
+        {
+            "profiles": [
+                {"name": p.name, "size": p.stat().st_size}
+                for p in list_profiles()
+            ]
+        }
+    )
+
+
+@user_passes_test(is_staff)
+@require_http_methods(["GET"])
+def profile_detail(request: HttpRequest, name: str) -> HttpResponseBase:
+    """Download stored profile.
+
+    Args:
+        request:
+            HttpRequest object.
+        name:
+            Profile name, from `X-Profile` header.
+
+    Returns:
+        File Response of profile as attachment, or error message.
+    """
+    path = get_profile_dir() / name
+    if not NAME_PATTERN.fullmatch(name) or not path.is_file():
+        return JsonResponse({"error": "Profile not found"}, status=404)
+
+    return FileResponse(path.open("rb"), as_attachment=True, filename=name)
@@ -0,0 +1,114 @@
+"""Database routing for mysite project.
+
+- Writes, and reads outside of read-only requests, go to `default`, the
+primary database.
+- Reads in requests with a safe method such as GET go to a replica in
+`DATABASE_REPLICAS`, see `ReplicaMiddleware`, unless the session wrote
+within `REPLICA_STICKY_SECONDS`, so users read their own writes despite
+replication lag.
+- A replica is chosen once per request, so all reads of a request see the
+same point in time, and values cached from them can be keyed by alias.
+"""
+
+import random
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, models
+from django.http import HttpRequest, HttpResponse
+
+REPLICA_STICKY_SECONDS = 5
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+STICKY_SESSION_KEY = "replica_sticky_until"
+
+read_alias: ContextVar[Optional[str]] = ContextVar("read_alias", default=None)
+
+
+def get_replicas() -> list[str]:
+    """Return aliases of replica databases, empty if none."""
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+@contextmanager
+def replica_reads(enabled: bool = True) -> Iterator[None]:
+    """Route reads to a random replica for the duration of the context.
+
+    Args:
+        enabled:
+            Route reads to a replica if True, to primary if False.
+    """
+    replicas = get_replicas()
+    token = read_alias.set(
+        random.choice(replicas) if enabled and replicas else None
+    )
+    try:
+        yield
+    finally:
+        read_alias.reset(token)
+
+
+class ReplicaRouter:  # pylint: disable=unused-argument
+    """Route reads to the replica chosen by `replica_reads`, if any."""
+
+    def db_for_read(
+        self, model: type[models.Model], **hints: Any
+    ) -> Optional[str]:
+        """Return replica alias, None for primary."""
+        return read_alias.get()
+
+    def db_for_write(
+        self, model: type[models.Model], **hints: Any
+    ) -> Optional[str]:
+        """Return primary alias."""
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(
+        self, obj1: models.Model, obj2: models.Model, **hints: Any
+    ) -> Optional[bool]:
+        """Allow relations, as replicas hold the same data as primary."""
+        return True
+
+    def allow_migrate(
+        self, db: str, app_label: str, **hints: Any
+    ) -> Optional[bool]:
+        """Migrate primary only, replicas copy its schema."""
+        return db not in get_replicas()
+
+
+class ReplicaMiddleware:  # pylint: disable=too-few-public-methods
+    """Enable replica reads for requests with a safe method.
+
+    - After a request with another method from an authenticated user, the
+    session sticks to primary for `REPLICA_STICKY_SECONDS`.
+    """
+
+    def __init__(
+        self, get_response: Callable[[HttpRequest], HttpResponse]
+    ) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        session = getattr(request, "session", None)
+
+        if request.method in SAFE_METHODS:
+            sticky_until = (
+                session.get(STICKY_SESSION_KEY, 0)
+                if session is not None
+                else 0
+            )
+            with replica_reads(time.time() >= sticky_until):
+                return self.get_response(request)
+
+        response = self.get_response(request)
+
+        user = getattr(request, "user", None)
+        if session is not None and user and user.is_authenticated:
+            session[STICKY_SESSION_KEY] = time.time() + REPLICA_STICKY_SECONDS
+
+        return response
@@ -0,0 +1,528 @@
+"""Production server for mysite project, a pre-forking WSGI server.
+
+Run from the directory of `manage.py`, for example:
+
+    python -m mysite.server --host 0.0.0.0 --port 8000
+
+- The master process loads Django, imports the URLconf and views, then
+forks workers that share the listening socket. Code and data loaded before
+forking are shared copy-on-write, and `gc.freeze` keeps the collector from
+touching, and so copying, those pages in workers.
+- Default worker count is 1, or the number of CPUs available to the process
+if settings configure a cache and an event broker shared by processes, see
+`get_default_workers`. Each worker serves requests from a pool of threads,
+as requests wait on the database with the GIL released.
+- Thread count is `DEFAULT_THREADS`, not derived from CPU count: workers
+use the CPUs, threads only overlap waits, and each thread holds a database
+connection of its own, so threads are bounded by what the database serves
+at once, such as the single writer of SQLite.
+- A worker exits after `max_requests` requests plus a random jitter, so
+memory grows by no more than that many requests and workers do not all
+recycle at once. The master replaces workers that exit.
+- On SIGTERM or SIGINT, the master stops workers with SIGTERM. Workers stop
+accepting, finish requests in flight and exit. Workers still running after
+`graceful_timeout` seconds are killed.
+- Worker count is passed to settings in `MYSITE_SERVER_WORKERS`, so
+several workers share events through the database, see
+`productivity.events`.
+- Each worker writes its log file of its own, numbered by worker, see
+`mysite.log.set_worker`.
+- Server-Sent Events are not served, as Django buffers an async stream
+under WSGI until it ends. Clients long-poll `events/poll/` instead.
+- This is a module entry point, not a management command, so the master
+decides whether Django is loaded before or after forking, see `--no-preload`.
+- POSIX only, as workers are forked. Signals are built by
+`get_master_signals` when serving, so the module imports everywhere.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import random
+import select
+import signal
+import socket
+import threading
+import time
+from collections.abc import Callable, Sequence
+from socketserver import ThreadingMixIn
+from typing import Any, NamedTuple, Optional
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from mysite.log import set_worker
+
+logger = logging.getLogger(__name__)
+
+BACKLOG = 2048
+
+DEFAULT_GRACEFUL_TIMEOUT = 30.0
+
+DEFAULT_HOST = "127.0.0.1"
+
+DEFAULT_MAX_REQUESTS = 1000
+
+DEFAULT_MAX_REQUESTS_JITTER = 100
+
+DEFAULT_PORT = 8000
+
+DEFAULT_THREADS = 4
+
+IN_PROCESS_BROKER = "productivity.events.InProcessBroker"
+
+POLL_INTERVAL = 0.5
+
+PROCESS_CACHE_BACKENDS = ("django.core.cache.backends.locmem.LocMemCache",)
+
+WSGIApplication = Callable[..., Any]
+
+
+def get_cpu_count() -> int:
+    """Return number of CPUs available to this process.
+
+    - CPU affinity, as set by `taskset` or a container runtime, is respected
+    where supported.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+
+    return os.cpu_count() or 1
+
+
+def get_master_signals() -> set[signal.Signals]:
+    """Return signals handled by the master, POSIX only."""
+    return {signal.SIGCHLD, signal.SIGINT, signal.SIGTERM}
+
+
+def has_shared_cache() -> bool:
+    """Return True if default cache is shared by processes, loading settings.
+
+    - A cache of one process, as `LocMemCache`, is kept by each worker.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from django.conf import settings
+
+    return settings.CACHES["default"]["BACKEND"] not in PROCESS_CACHE_BACKENDS
+
+
+def get_default_workers() -> int:
+    """Return CPU count if a shared cache and event broker are configured,
+    else 1.
+
+    - With one worker, events of writes are fanned out in memory, and
+    cached values are kept once.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from django.conf import settings
+
+    broker = getattr(settings, "PRODUCTIVITY_EVENT_BROKER", IN_PROCESS_BROKER)
+    if has_shared_cache() and broker != IN_PROCESS_BROKER:
+        return get_cpu_count()
+
+    return 1
+
+
+class Config(NamedTuple):
+    """Server settings, see module docstring and `parse_args`."""
+
+    host: str = DEFAULT_HOST
+    port: int = DEFAULT_PORT
+    workers: int = 1
+    threads: int = DEFAULT_THREADS
+    max_requests: int = DEFAULT_MAX_REQUESTS
+    max_requests_jitter: int = DEFAULT_MAX_REQUESTS_JITTER
+    graceful_timeout: float = DEFAULT_GRACEFUL_TIMEOUT
+    preload: bool = True
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> Config:
+    """Parse command line arguments.
+
+    Args:
+        argv:
+            Arguments, `sys.argv[1:]` if None.
+
+    Returns:
+        Server settings.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m mysite.server",
+        description=__doc__.split("\n", maxsplit=1)[0],
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help=(
+            "Number of worker processes, default is CPU count with a shared"
+            " cache and event broker, else 1"
+        ),
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=DEFAULT_THREADS,
+        help="Maximum concurrent requests per worker",
+    )
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=DEFAULT_MAX_REQUESTS,
+        help="Requests before a worker is replaced, 0 for never",
+    )
+    parser.add_argument(
+        "--max-requests-jitter",
+        type=int,
+        default=DEFAULT_MAX_REQUESTS_JITTER,
+        help="Maximum random requests added to --max-requests per worker",
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=float,
+        default=DEFAULT_GRACEFUL_TIMEOUT,
+        help="Seconds to finish requests in flight on shutdown",
+    )
+    parser.add_argument(
+        "--no-preload",
+        dest="preload",
+        action="store_false",
+        help="Load Django in each worker after forking",
+    )
+    args = parser.parse_args(argv)
+    if args.workers is None:
+        args.workers = get_default_workers()
+    if args.workers < 1 or args.threads < 1:
+        parser.error("--workers and --threads must be positive")
+    if args.max_requests < 0 or args.max_requests_jitter < 0:
+        parser.error("--max-requests and --max-requests-jitter must be >= 0")
+
+    return Config(**vars(args))
+
+
+def load_application() -> WSGIApplication:
+    """Load Django WSGI application with its URLconf and views.
+
+    - Django otherwise imports the URLconf, and so views, on first request,
+    after forking, in each worker.
+    """
+    # pylint: disable=import-outside-toplevel
+    from django.urls import get_resolver
+
+    from mysite.wsgi import application
+
+    # pylint: enable=import-outside-toplevel
+
+    get_resolver().url_patterns  # pylint: disable=expression-not-assigned
+
+    return application
+
+
+def prepare_fork() -> None:
+    """Close database connections and freeze objects, before forking.
+
+    - A connection must not be shared between processes.
+    - Frozen objects are ignored by the garbage collector, so collections in
+    workers do not write to, and copy, pages shared with the master.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from django.db import connections
+
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
+
+
+class RequestHandler(WSGIRequestHandler):
+    """Request handler logging requests to `logger`, not to stderr."""
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # pylint: disable-next=redefined-builtin
+        logger.debug("%s %s", self.address_string(), format % args)
+
+
+class WorkerServer(ThreadingMixIn, WSGIServer):
+    """Threaded WSGI server on a listening socket inherited from master.
+
+    - Thread count is bounded by a semaphore, acquired before accepting, so
+    connections beyond it wait in the listen backlog, where other workers
+    can accept them.
+    - `server_close` waits for requests in flight, as threads are not
+    daemonic.
+    """
+
+    daemon_threads = False
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        application: WSGIApplication,
+        threads: int = DEFAULT_THREADS,
+        max_requests: int = 0,
+    ) -> None:
+        """Create server.
+
+        Args:
+            sock:
+                Listening socket, non-blocking, as all workers are woken by
+                a connection and only one accepts it.
+            application:
+                WSGI application.
+            threads:
+                Maximum concurrent requests.
+            max_requests:
+                Requests before stopping, 0 for never.
+        """
+        super().__init__(
+            sock.getsockname()[:2], RequestHandler, bind_and_activate=False
+        )
+        self.socket.close()
+        self.socket = sock
+        host, self.server_port = sock.getsockname()[:2]
+        self.server_name = socket.getfqdn(host)
+        self.setup_environ()
+        self.set_app(application)
+
+        self.slots = threading.BoundedSemaphore(threads)
+        self.requests_left = max_requests
+        self.stopping = False
+
+    def get_request(self) -> tuple[socket.socket, Any]:
+        self.slots.acquire()  # pylint: disable=consider-using-with
+        try:
+            return super().get_request()
+        except OSError:
+            self.slots.release()
+            raise
+
+    def process_request_thread(
+        self, request: Any, client_address: Any
+    ) -> None:
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.slots.release()
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        super().process_request(request, client_address)
+        if self.requests_left:
+            self.requests_left -= 1
+            if not self.requests_left:
+                logger.info("Worker %d reached max requests", os.getpid())
+                self.stop()
+
+    def stop(self) -> None:
+        """Stop serving, from any thread or a signal handler."""
+        if not self.stopping:
+            self.stopping = True
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+
+def run_worker(
+    sock: socket.socket,
+    application: Optional[WSGIApplication],
+    config: Config,
+    worker: int = 0,
+) -> None:
+    """Serve requests until stopped, in a forked worker.
+
+    Args:
+        sock:
+            Listening socket.
+        application:
+            Preloaded WSGI application, loaded here if None.
+        config:
+            Server settings.
+        worker:
+            Worker number, from 0, reused by the worker replacing it.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.set_wakeup_fd(-1)
+    if application is None:
+        application = load_application()
+    set_worker(worker)
+
+    max_requests = config.max_requests
+    if max_requests:
+        max_requests += random.randint(0, config.max_requests_jitter)
+    server = WorkerServer(sock, application, config.threads, max_requests)
+    signal.signal(signal.SIGTERM, lambda *_: server.stop())
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, get_master_signals())
+
+    server.serve_forever(poll_interval=POLL_INTERVAL)
+    server.server_close()
+
+
+class Master:
+    """Process forking and replacing workers, see module docstring."""
+
+    def __init__(self, config: Config) -> None:
+        """Load application if preloading and bind listening socket.
+
+        - Master signals are blocked first, so threads started by loading,
+        such as the log writer of `mysite.log`, inherit the mask, and the
+        signals are left to `run`.
+
+        Args:
+            config:
+                Server settings.
+        """
+        self.signals = get_master_signals()
+        signal.pthread_sigmask(signal.SIG_BLOCK, self.signals)
+        self.config = config
+        self.application = load_application() if config.preload else None
+        self.socket = socket.create_server(
+            (config.host, config.port), backlog=BACKLOG
+        )
+        self.socket.setblocking(False)
+        self.workers: dict[int, int] = {}
+        self.wakeup: Optional[tuple[socket.socket, socket.socket]] = None
+
+    def spawn(self, worker: int) -> None:
+        """Fork a worker.
+
+        Args:
+            worker:
+                Worker number.
+        """
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(self.socket, self.application, self.config, worker)
+            except BaseException:  # pylint: disable=broad-exception-caught
+                logger.exception("Worker %d failed", os.getpid())
+                code = 1
+            finally:
+                logging.shutdown()
+                os._exit(code)  # pylint: disable=protected-access
+        self.workers[pid] = worker
+
+    def reap(self) -> list[int]:
+        """Collect exited workers.
+
+        Returns:
+            Numbers of workers collected.
+        """
+        exited = []
+        while self.workers:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if not pid:
+                break
+            exited.append(self.workers.pop(pid))
+            code = os.waitstatus_to_exitcode(status)
+            log = logger.info if code == 0 else logger.warning
+            log("Worker %d exited with code %d", pid, code)
+
+        return exited
+
+    def run(self) -> None:
+        """Serve until SIGTERM or SIGINT and all workers exit."""
+        if self.application is not None:
+            prepare_fork()
+        for worker in range(self.config.workers):
+            self.spawn(worker)
+        host, port = self.socket.getsockname()[:2]
+        logger.info(
+            "Listening on http://%s:%d, %d workers of %d threads",
+            host,
+            port,
+            self.config.workers,
+            self.config.threads,
+        )
+
+        deadline: Optional[float] = None
+        while self.workers:
+            if self.wait_signals(POLL_INTERVAL) - {signal.SIGCHLD}:
+                if deadline is None:
+                    logger.info("Stopping workers")
+                    deadline = time.monotonic() + self.config.graceful_timeout
+                    self.kill(signal.SIGTERM)
+            exited = self.reap()
+            if deadline is None:
+                for worker in exited:
+                    self.spawn(worker)
+            elif time.monotonic() > deadline:
+                self.kill(signal.SIGKILL)
+
+        self.socket.close()
+        if self.wakeup is not None:
+            signal.set_wakeup_fd(-1)
+            for sock in self.wakeup:
+                sock.close()
+
+    def wait_signals(self, timeout: float) -> set[int]:
+        """Wait for master signals.
+
+        - Signals stay blocked and are taken by `signal.sigtimedwait`. Where
+        it is missing, as on macOS, they are unblocked in this thread only,
+        on first call, and wake `select` through `signal.set_wakeup_fd`.
+
+        Args:
+            timeout:
+                Seconds to wait.
+
+        Returns:
+            Numbers of signals received, empty if none within timeout.
+        """
+        sigtimedwait = getattr(signal, "sigtimedwait", None)
+        if sigtimedwait is not None:
+            info = sigtimedwait(self.signals, timeout)
+            return set() if info is None else {info.si_signo}
+
+        if self.wakeup is None:
+            self.wakeup = socket.socketpair()
+            for sock in self.wakeup:
+                sock.setblocking(False)
+            signal.set_wakeup_fd(self.wakeup[1].fileno())
+            for signum in self.signals:
+                signal.signal(signum, lambda *_: None)
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, self.signals)
+
+        readable, _, _ = select.select([self.wakeup[0]], [], [], timeout)
+        if not readable:
+            return set()
+
+        return set(self.wakeup[0].recv(64))
+
+    def kill(self, signum: int) -> None:
+        """Send a signal to all workers.
+
+        Args:
+            signum:
+                Signal number.
+        """
+        for pid in self.workers:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Run server.
+
+    Args:
+        argv:
+            Arguments, `sys.argv[1:]` if None.
+    """
+    logging.basicConfig(
+        level=logging.INFO, format="[%(process)d] %(levelname)s %(message)s"
+    )
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mysite.settings")
+    config = parse_args(argv)
+    if not hasattr(os, "fork"):
+        raise SystemExit("mysite.server forks workers, which needs POSIX")
+    os.environ["MYSITE_SERVER_WORKERS"] = str(config.workers)
+    if config.workers > 1 and not has_shared_cache():
+        logger.warning(
+            "Each of %d workers keeps its own cache, configure a shared cache"
+            " such as Memcached",
+            config.workers,
+        )
+    Master(config).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,8 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from copy import deepcopy
 from pathlib import Path
+from typing import Any
 
 from django.utils.log import DEFAULT_LOGGING
 
@@ -46,10 +48,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "mysite.locks.DatabaseLockMiddleware",
+    "mysite.compression.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "mysite.profiling.ProfilingMiddleware",
+    "mysite.routers.ReplicaMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -60,7 +66,7 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [],
-        "APP_DIRS": False,
+        "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.debug",
@@ -78,10 +84,43 @@ WSGI_APPLICATION = "mysite.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
+# `MYSITE_DATABASE_NAME` selects another database of the same engine, such
+# as the dedicated database of `manage.py loadtest`.
+DATABASES: dict[str, dict[str, Any]] = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": os.environ.get(
+            "MYSITE_DATABASE_NAME", BASE_DIR / "db.sqlite3"
+        ),
+    },
+}
+
+DATABASE_ROUTERS = ["mysite.routers.ReplicaRouter"]
+
+# Aliases in DATABASES that read-only requests read from, see mysite.routers.
+# Empty to read from default only. To try locally with SQLite, add "replica"
+# and copy default to it with `manage.py sync_replica`. Each alias is defined
+# below as an SQLite database next to default, only when listed here.
+DATABASE_REPLICAS: list[str] = []
+
+DATABASES.update(
+    {
+        alias: {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / f"db.{alias}.sqlite3",
+            "TEST": {"MIRROR": "default"},
+        }
+        for alias in DATABASE_REPLICAS
+    }
+)
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
     }
 }
 
@@ -91,6 +130,23 @@ DATABASES = {
 LOGIN_URL = "/authentication/login/"
 
 
+# Productivity
+
+# Worker processes of mysite.server, which sets this variable before loading
+# settings. Events of writes reach other processes through the database.
+SERVER_WORKERS = int(os.environ.get("MYSITE_SERVER_WORKERS", "1"))
+
+PRODUCTIVITY_EVENT_BROKER = (
+    "productivity.events.InProcessBroker"
+    if SERVER_WORKERS == 1
+    else "productivity.events.DatabaseBroker"
+)
+
+# Serve lists from an in-memory copy in each worker process, refreshed on
+# writes, see productivity.readmodel.
+PRODUCTIVITY_READ_MODEL = False
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -133,6 +189,13 @@ TIME_ZONE = "UTC"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
+# Profiling of requests from staff users, see mysite.profiling
+
+PROFILE_DIR = BASE_DIR / "profiles"
+
+PROFILE_RETENTION = 50
+
+
 # Logging
 
 LOGGING = deepcopy(DEFAULT_LOGGING)
@@ -146,8 +209,12 @@ LOGGING["formatters"]["file"] = {
 
 LOGGING["handlers"]["file"] = {
     "level": "INFO",
-    "class": "logging.FileHandler",
+    "class": "mysite.log.QueueFileHandler",
     "filename": "mysite/mysite.log",
+    "max_bytes": 10 * 1024 * 1024,
+    "interval": 7 * 24 * 60 * 60,
+    "backup_count": 5,
+    "batch_size": 100,
     "formatter": "file",
 }
 
@@ -1,8 +1,810 @@
+import gzip
+import inspect
+import json
+import logging
+import os
+import pstats
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
 from copy import deepcopy
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Optional, cast
+from unittest import skipUnless
+from unittest.mock import patch
+from urllib.request import urlopen
 
-from django.test import SimpleTestCase
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, OperationalError
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
 from django.utils.log import DEFAULT_LOGGING
 
+from mysite.backup import backup_database, copy_database
+from mysite.compression import (
+    MIN_COMPRESS_SIZE,
+    SUPPORTED_ENCODINGS,
+    CompressionMiddleware,
+    compress,
+    negotiate_encoding,
+)
+from mysite.locks import LOCK_HEADER, DatabaseLockMiddleware, is_lock_error
+from mysite.log import (
+    BufferedRotatingFileHandler,
+    QueueFileHandler,
+    set_worker,
+)
+from mysite.profiling import (
+    PROFILE_HEADER,
+    ProfilingMiddleware,
+    collapse_stack,
+    profile_detail,
+    profile_list,
+)
+from mysite.routers import (
+    REPLICA_STICKY_SECONDS,
+    STICKY_SESSION_KEY,
+    ReplicaMiddleware,
+    ReplicaRouter,
+    replica_reads,
+)
+
+
+def count_lines(paths: list[Path]) -> int:
+    """Count total number of lines in files.
+
+    Args:
+        paths:
+            Paths of files to be counted.
+
+    Returns:
+        Total number of lines.
+    """
+    total = 0
+    for path in paths:
+        with path.open(encoding="utf-8") as f:
+            total += sum(1 for _ in f)
+
+    return total
+
+
+class BackupTests(SimpleTestCase):
+    databases = {"default"}
+
+    def setUp(self) -> None:
+        # pylint: disable-next=consider-using-with
+        self.temp_dir = TemporaryDirectory()
+        self.path = Path(self.temp_dir.name) / "backup.sqlite3"
+        self.source = sqlite3.connect(Path(self.temp_dir.name) / "db.sqlite3")
+        self.source.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, b BLOB)")
+        self.source.executemany(
+            "INSERT INTO t (b) VALUES (?)",
+            ((bytes(1000),) for _ in range(100)),
+        )
+        self.source.commit()
+        self.page_count = self.source.execute("PRAGMA page_count").fetchone()[
+            0
+        ]
+
+    def tearDown(self) -> None:
+        self.source.close()
+        self.temp_dir.cleanup()
+
+    def count_rows(self, data: Optional[bytes] = None) -> int:
+        """Count rows in backup, replaced with data if given."""
+        if data is not None:
+            self.path.write_bytes(data)
+        connection = sqlite3.connect(self.path)
+        try:
+            count: int = connection.execute(
+                "SELECT COUNT(*) FROM t"
+            ).fetchone()[0]
+        finally:
+            connection.close()
+
+        return count
+
+    def test_backup_database(self) -> None:
+        result = backup_database(self.source, self.path, pages=4, sleep=0)
+
+        self.assertEqual(result.pages, self.page_count)
+        self.assertEqual(result.steps, -(-self.page_count // 4))
+        self.assertEqual(result.restarts, 0)
+        self.assertEqual(self.count_rows(), 100)
+        self.assertEqual(list(Path(self.temp_dir.name).glob(".*")), [])
+
+    def test_backup_database_gzip(self) -> None:
+        backup_database(self.source, self.path, compress=True)
+
+        self.assertEqual(
+            self.count_rows(gzip.decompress(self.path.read_bytes())), 100
+        )
+
+    def test_copy_database_restart(self) -> None:
+        writer = sqlite3.connect(Path(self.temp_dir.name) / "db.sqlite3")
+        target = sqlite3.connect(self.path)
+        writes: list[int] = []
+
+        def write(_seconds: float) -> None:
+            if len(writes) < 2:
+                writer.execute("INSERT INTO t (b) VALUES (x'00')")
+                writer.commit()
+                writes.append(1)
+
+        with patch("mysite.backup.time.sleep", side_effect=write):
+            result = copy_database(self.source, target, pages=4, sleep=1)
+        target.close()
+        writer.close()
+
+        self.assertEqual(result.restarts, 2)
+        self.assertEqual(self.count_rows(), 102)
+
+    def test_command(self) -> None:
+        stdout = StringIO()
+
+        call_command("backup_db", str(self.path), "--gzip", stdout=stdout)
+
+        self.assertRegex(stdout.getvalue(), r"^Backed up \d+ pages to ")
+        self.assertEqual(
+            gzip.decompress(self.path.read_bytes())[:16], b"SQLite format 3\0"
+        )
+
+    def test_command_validation_error(self) -> None:
+        for args in (["--pages", "0"], ["--sleep", "-1"]):
+            with self.subTest(args=args):
+                with self.assertRaises(CommandError):
+                    call_command("backup_db", str(self.path), *args)
+
+
+class CompressionTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.content = b"x" * MIN_COMPRESS_SIZE
+
+    def get_middleware_response(
+        self,
+        response: HttpResponse,
+        accept_encoding: str = "gzip",
+        path: str = "/productivity/",
+    ) -> HttpResponse:
+        def get_response(request: HttpRequest) -> HttpResponse:
+            return response
+
+        request = RequestFactory().get(
+            path, HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+
+        return cast(HttpResponse, CompressionMiddleware(get_response)(request))
+
+    def test_compress_gzip(self) -> None:
+        self.assertEqual(
+            gzip.decompress(compress(self.content, "gzip")), self.content
+        )
+
+    def test_compress_unsupported(self) -> None:
+        with self.assertRaises(ValueError) as cm:
+            compress(self.content, "deflate")
+        self.assertEqual(cm.exception.args[0], "Unsupported encoding deflate")
+
+    def test_negotiate_encoding(self) -> None:
+        self.assertEqual(negotiate_encoding("gzip, deflate"), "gzip")
+        self.assertEqual(negotiate_encoding("*"), SUPPORTED_ENCODINGS[0])
+        self.assertEqual(
+            negotiate_encoding("br;q=0.5, gzip;q=0.8"),
+            "gzip",
+        )
+
+    def test_negotiate_encoding_identity(self) -> None:
+        self.assertIsNone(negotiate_encoding(""))
+        self.assertIsNone(negotiate_encoding("deflate"))
+        self.assertIsNone(negotiate_encoding("gzip;q=0"))
+        self.assertIsNone(negotiate_encoding("*;q=0, gzip;q=a"))
+
+    def test_middleware(self) -> None:
+        response = self.get_middleware_response(HttpResponse(self.content))
+
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+        self.assertEqual(
+            response.headers["Content-Length"], str(len(response.content))
+        )
+        self.assertEqual(gzip.decompress(response.content), self.content)
+
+    def test_middleware_padding(self) -> None:
+        response = self.get_middleware_response(HttpResponse(self.content))
+
+        # Random file name against BREACH, FNAME flag of gzip header
+        self.assertTrue(response.content[3] & 0x08)
+
+    def test_middleware_weak_etag(self) -> None:
+        response = HttpResponse(self.content)
+        response.headers["ETag"] = '"1"'
+
+        response = self.get_middleware_response(response)
+
+        self.assertEqual(response.headers["ETag"], 'W/"1"')
+
+    def test_middleware_identity(self) -> None:
+        response = self.get_middleware_response(HttpResponse(self.content), "")
+
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+        self.assertEqual(response.content, self.content)
+
+    def test_middleware_identity_refused(self) -> None:
+        response = self.get_middleware_response(
+            HttpResponse(self.content), "gzip;q=0"
+        )
+
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+
+    def test_middleware_skip_path(self) -> None:
+        response = self.get_middleware_response(
+            HttpResponse(self.content), path="/admin/"
+        )
+
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(response.content, self.content)
+
+    def test_middleware_skip_small(self) -> None:
+        response = self.get_middleware_response(HttpResponse(b"x"))
+
+        self.assertNotIn("Content-Encoding", response.headers)
+
+    def test_middleware_skip_encoded(self) -> None:
+        response = HttpResponse(self.content)
+        response.headers["Content-Encoding"] = "br"
+
+        response = self.get_middleware_response(response)
+
+        self.assertEqual(response.content, self.content)
+
+    def test_middleware_skip_streaming(self) -> None:
+        response = self.get_middleware_response(
+            StreamingHttpResponse([self.content])  # type: ignore[arg-type]
+        )
+
+        self.assertNotIn("Content-Encoding", response.headers)
+
+
+class LocksTests(SimpleTestCase):
+    def get_middleware_response(self, exception: Exception) -> HttpResponse:
+        request = RequestFactory().get("/")
+        middleware = DatabaseLockMiddleware(
+            lambda request: HttpResponse(status=500)
+        )
+        middleware.process_exception(request, exception)
+
+        return middleware(request)
+
+    def test_is_lock_error(self) -> None:
+        self.assertTrue(is_lock_error(OperationalError("database is locked")))
+        self.assertFalse(is_lock_error(IntegrityError("UNIQUE constraint")))
+        self.assertFalse(is_lock_error(ValueError("database is locked")))
+
+    def test_middleware(self) -> None:
+        response = self.get_middleware_response(
+            OperationalError("database is locked")
+        )
+
+        self.assertEqual(response.headers[LOCK_HEADER], "1")
+
+    def test_middleware_other_error(self) -> None:
+        response = self.get_middleware_response(
+            OperationalError("no such table")
+        )
+
+        self.assertNotIn(LOCK_HEADER, response.headers)
+
+
+class LogTests(SimpleTestCase):
+    def setUp(self) -> None:
+        # pylint: disable-next=consider-using-with
+        self.temp_dir = TemporaryDirectory()
+        self.filename = Path(self.temp_dir.name) / "test.log"
+        self.logger = logging.getLogger(f"{__name__}.{self.id()}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def tearDown(self) -> None:
+        for handler in self.logger.handlers:
+            self.logger.removeHandler(handler)
+            handler.close()
+        self.temp_dir.cleanup()
+
+    def test_buffered_rotating_file_handler_rollover_size(self) -> None:
+        handler = BufferedRotatingFileHandler(
+            str(self.filename), max_bytes=100, backup_count=100
+        )
+        self.logger.addHandler(handler)
+
+        for i in range(50):
+            self.logger.info("Message %s", i)
+        handler.flush()
+
+        paths = list(Path(self.temp_dir.name).glob("test.log*"))
+        self.assertGreater(len(paths), 1)
+        self.assertEqual(count_lines(paths), 50)
+
+    def test_buffered_rotating_file_handler_rollover_time(self) -> None:
+        handler = BufferedRotatingFileHandler(
+            str(self.filename), interval=60, backup_count=1
+        )
+        self.logger.addHandler(handler)
+
+        self.logger.info("Before")
+        handler.rollover_at = time.time() - 1
+        self.logger.info("After")
+        handler.flush()
+
+        self.assertEqual(
+            Path(f"{self.filename}.1").read_text(encoding="utf-8"),
+            "Before\n",
+        )
+        self.assertEqual(self.filename.read_text(encoding="utf-8"), "After\n")
+        self.assertGreater(handler.rollover_at, time.time())
+
+    def test_buffered_rotating_file_handler_rollover_no_backup(self) -> None:
+        handler = BufferedRotatingFileHandler(str(self.filename), max_bytes=1)
+        self.logger.addHandler(handler)
+
+        self.logger.info("Before")
+        self.logger.info("After")
+        handler.flush()
+
+        self.assertEqual(self.filename.read_text(encoding="utf-8"), "After\n")
+
+    def test_queue_file_handler(self) -> None:
+        handler = QueueFileHandler(str(self.filename))
+        handler.setFormatter(
+            logging.Formatter("{levelname} {message}", style="{")
+        )
+        self.logger.addHandler(handler)
+
+        self.logger.info("Message")
+        handler.close()
+
+        self.assertEqual(
+            self.filename.read_text(encoding="utf-8"), "INFO Message\n"
+        )
+
+    def test_queue_file_handler_emit_after_close(self) -> None:
+        handler = QueueFileHandler(str(self.filename))
+        self.logger.addHandler(handler)
+        handler.close()
+
+        self.logger.info("Message")
+
+        self.assertEqual(
+            self.filename.read_text(encoding="utf-8"), "Message\n"
+        )
+
+    def test_queue_file_handler_exception(self) -> None:
+        handler = QueueFileHandler(str(self.filename))
+        self.logger.addHandler(handler)
+        record = self.logger.makeRecord(
+            self.logger.name, logging.ERROR, "", 0, "Failed", (), None
+        )
+        try:
+            raise ValueError("Invalid")
+        except ValueError:
+            record.exc_info = sys.exc_info()
+
+        prepared = handler.prepare(record)
+        handler.handle(record)
+        handler.close()
+
+        self.assertIsNone(prepared.exc_info)
+        self.assertIn("ValueError: Invalid", str(prepared.exc_text))
+        self.assertIn(
+            "ValueError: Invalid", self.filename.read_text(encoding="utf-8")
+        )
+
+    @skipUnless(hasattr(os, "fork"), "Needs os.fork")
+    def test_queue_file_handler_fork(self) -> None:
+        handler = QueueFileHandler(str(self.filename))
+        self.logger.addHandler(handler)
+
+        pid = os.fork()
+        if pid == 0:
+            self.logger.info("Child")
+            handler.close()
+            os._exit(0)  # pylint: disable=protected-access
+        _, status = os.waitpid(pid, 0)
+
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertTrue(handler.listener.is_alive())
+        self.assertEqual(self.filename.read_text(encoding="utf-8"), "Child\n")
+
+    @skipUnless(hasattr(os, "fork"), "Needs os.fork")
+    def test_queue_file_handler_set_worker(self) -> None:
+        handler = QueueFileHandler(str(self.filename))
+        self.logger.addHandler(handler)
+
+        pid = os.fork()
+        if pid == 0:
+            set_worker(1)
+            self.logger.info("Child")
+            handler.close()
+            os._exit(0)  # pylint: disable=protected-access
+        _, status = os.waitpid(pid, 0)
+        self.logger.info("Parent")
+        handler.close()
+
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertEqual(self.filename.read_text(encoding="utf-8"), "Parent\n")
+        self.assertEqual(
+            (Path(self.temp_dir.name) / "test.worker1.log").read_text(
+                encoding="utf-8"
+            ),
+            "Child\n",
+        )
+
+    def test_queue_file_handler_throughput(self) -> None:
+        thread_count = 8
+        record_count = 5000
+        handler = QueueFileHandler(
+            str(self.filename), max_bytes=64 * 1024, backup_count=1000
+        )
+        self.logger.addHandler(handler)
+
+        def log_records() -> None:
+            for i in range(record_count):
+                self.logger.info("Heavy logging record %s", i)
+
+        threads = [
+            threading.Thread(target=log_records) for _ in range(thread_count)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        handler.close()
+
+        self.assertEqual(
+            count_lines(list(Path(self.temp_dir.name).glob("test.log*"))),
+            thread_count * record_count,
+        )
+        self.assertLess(elapsed, 30)
+
+
+class ProfilingTests(SimpleTestCase):
+    def setUp(self) -> None:
+        temp_dir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(temp_dir.cleanup)
+        self.profile_dir = Path(temp_dir.name)
+        settings_override = override_settings(
+            PROFILE_DIR=self.profile_dir, PROFILE_RETENTION=2
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.staff = get_user_model()(username="staff", is_staff=True)
+        self.middleware = ProfilingMiddleware(
+            lambda _: HttpResponse("content")
+        )
+
+    def test_middleware_cprofile(self) -> None:
+        request = RequestFactory().get("/productivity/", {"profile": ""})
+        request.user = self.staff
+
+        response = self.middleware(request)
+
+        path = self.profile_dir / response.headers[PROFILE_HEADER]
+        self.assertTrue(path.name.endswith(".prof"))
+        self.assertIn("-GET-productivity-", path.name)
+        self.assertTrue(
+            pstats.Stats(str(path)).get_stats_profile().func_profiles
+        )
+
+    def test_middleware_sample(self) -> None:
+        def get_response(_: HttpRequest) -> HttpResponse:
+            time.sleep(0.05)
+            return HttpResponse()
+
+        request = RequestFactory().get("", HTTP_X_PROFILE="sample")
+        request.user = self.staff
+
+        response = ProfilingMiddleware(get_response)(request)
+
+        path = self.profile_dir / response.headers[PROFILE_HEADER]
+        self.assertTrue(path.name.endswith(".folded"))
+        self.assertIn("get_response", path.read_text(encoding="utf-8"))
+
+    def test_middleware_skip(self) -> None:
+        for user in (self.staff, AnonymousUser(), get_user_model()()):
+            with self.subTest(user=user):
+                request = RequestFactory().get(
+                    "", {"profile": ""} if user is not self.staff else {}
+                )
+                request.user = user
+
+                response = self.middleware(request)
+
+                self.assertNotIn(PROFILE_HEADER, response.headers)
+        self.assertListEqual(list(self.profile_dir.iterdir()), [])
+
+    def test_middleware_retention(self) -> None:
+        names = []
+        for _ in range(3):
+            request = RequestFactory().get("", {"profile": ""})
+            request.user = self.staff
+            names.append(self.middleware(request).headers[PROFILE_HEADER])
+            time.sleep(0.01)
+
+        self.assertSetEqual(
+            {p.name for p in self.profile_dir.iterdir()}, set(names[1:])
+        )
+
+    def test_collapse_stack(self) -> None:
+        frame = inspect.currentframe()
+        assert frame is not None
+
+        stack = collapse_stack(frame)
+
+        self.assertTrue(
+            stack.rsplit(";", maxsplit=1)[-1].startswith("test_collapse_stack")
+        )
+
+    def test_profile_views(self) -> None:
+        request = RequestFactory().get("", {"profile": ""})
+        request.user = self.staff
+        name = self.middleware(request).headers[PROFILE_HEADER]
+
+        request = RequestFactory().get("")
+        request.user = self.staff
+        list_response = profile_list(request)
+        self.assertEqual(
+            json.loads(list_response.content)["profiles"][0]["name"], name
+        )
+
+        detail_response = profile_detail(request, name)
+        self.assertEqual(detail_response.status_code, 200)
+        self.assertIn(
+            "attachment", detail_response.headers["Content-Disposition"]
+        )
+        detail_response.close()
+
+        for missing in ("missing.prof", "../settings.py"):
+            with self.subTest(name=missing):
+                self.assertEqual(
+                    profile_detail(request, missing).status_code, 404
+                )
+
+    def test_profile_views_staff_only(self) -> None:
+        request = RequestFactory().get("")
+        request.user = get_user_model()()
+
+        response = profile_list(request)
+
+        self.assertEqual(response.status_code, 302)
+
+
+class RouterTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.router = ReplicaRouter()
+        self.model = get_user_model()
+
+    def get_read_alias(self, request: HttpRequest) -> Optional[str]:
+        """Return alias routed for reads by view behind `ReplicaMiddleware`."""
+        aliases = []
+
+        def get_response(_: HttpRequest) -> HttpResponse:
+            aliases.append(self.router.db_for_read(self.model))
+            return HttpResponse()
+
+        ReplicaMiddleware(get_response)(request)
+
+        return aliases[0]
+
+    def test_db_for_read(self) -> None:
+        self.assertIsNone(self.router.db_for_read(self.model))
+
+        with replica_reads():
+            self.assertIsNone(self.router.db_for_read(self.model))
+
+    @override_settings(DATABASE_REPLICAS=["replica"])
+    def test_db_for_read_replica(self) -> None:
+        self.assertIsNone(self.router.db_for_read(self.model))
+
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(self.model), "replica")
+            with replica_reads(False):
+                self.assertIsNone(self.router.db_for_read(self.model))
+
+    @override_settings(DATABASE_REPLICAS=["replica", "replica2"])
+    def test_db_for_read_replica_once(self) -> None:
+        with replica_reads():
+            aliases = {self.router.db_for_read(self.model) for _ in range(20)}
+
+        self.assertEqual(len(aliases), 1)
+
+    @override_settings(DATABASE_REPLICAS=["replica"])
+    def test_db_for_write(self) -> None:
+        with replica_reads():
+            self.assertEqual(self.router.db_for_write(self.model), "default")
+
+    @override_settings(DATABASE_REPLICAS=["replica"])
+    def test_allow_migrate(self) -> None:
+        self.assertIs(
+            self.router.allow_migrate("default", "productivity"), True
+        )
+        self.assertIs(
+            self.router.allow_migrate("replica", "productivity"), False
+        )
+
+    @override_settings(DATABASE_REPLICAS=["replica"])
+    def test_middleware(self) -> None:
+        request = RequestFactory().get("")
+        request.session = SessionStore()
+        self.assertEqual(self.get_read_alias(request), "replica")
+
+        request = RequestFactory().put("")
+        request.session = SessionStore()
+        self.assertIsNone(self.get_read_alias(request))
+
+    @override_settings(DATABASE_REPLICAS=["replica"])
+    def test_middleware_sticky_after_write(self) -> None:
+        session = SessionStore()
+        request = RequestFactory().post("")
+        request.session = session
+        request.user = self.model()
+        self.get_read_alias(request)
+
+        request = RequestFactory().get("")
+        request.session = session
+        self.assertIsNone(self.get_read_alias(request))
+
+        with patch(
+            "mysite.routers.time.time",
+            return_value=time.time() + REPLICA_STICKY_SECONDS,
+        ):
+            self.assertEqual(self.get_read_alias(request), "replica")
+
+    @override_settings(DATABASE_REPLICAS=["replica"])
+    def test_middleware_anonymous_write_not_sticky(self) -> None:
+        session = SessionStore()
+        request = RequestFactory().post("")
+        request.session = session
+        request.user = AnonymousUser()
+        self.get_read_alias(request)
+
+        self.assertNotIn(STICKY_SESSION_KEY, session)
+
+
+@skipUnless(hasattr(os, "fork"), "Needs os.fork")
+class ServerTests(SimpleTestCase):
+    @staticmethod
+    def application(
+        environ: dict[str, Any], start_response: Any
+    ) -> list[bytes]:
+        """Respond with request path."""
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return [environ["PATH_INFO"].encode()]
+
+    def test_master_wait_signals_select(self) -> None:
+        # pylint: disable-next=import-outside-toplevel
+        from mysite.server import Config, Master, get_master_signals
+
+        mask = signal.pthread_sigmask(signal.SIG_BLOCK, [])
+        self.addCleanup(signal.pthread_sigmask, signal.SIG_SETMASK, mask)
+        for signum in get_master_signals():
+            self.addCleanup(signal.signal, signum, signal.getsignal(signum))
+        self.addCleanup(signal.set_wakeup_fd, -1)
+        master = Master(Config(port=0, preload=False))
+        self.addCleanup(master.socket.close)
+
+        # To this thread, as other threads of tests do not block signals
+        signal.pthread_kill(threading.get_ident(), signal.SIGCHLD)
+        with patch.object(signal, "sigtimedwait", None):
+            self.assertSetEqual(master.wait_signals(5), {signal.SIGCHLD})
+            self.assertSetEqual(master.wait_signals(0), set())
+
+        assert master.wakeup is not None
+        for sock in master.wakeup:
+            sock.close()
+
+    def test_parse_args(self) -> None:
+        # pylint: disable-next=import-outside-toplevel
+        from mysite.server import Config, get_cpu_count, parse_args
+
+        self.assertEqual(parse_args([]), Config(workers=1))
+        self.assertEqual(
+            parse_args(
+                ["--workers", "2", "--max-requests", "0", "--no-preload"]
+            ),
+            Config(workers=2, max_requests=0, preload=False),
+        )
+
+        with override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                    "LOCATION": "redis://127.0.0.1:6379",
+                }
+            },
+            PRODUCTIVITY_EVENT_BROKER="productivity.events.CacheBroker",
+        ):
+            self.assertEqual(parse_args([]), Config(workers=get_cpu_count()))
+
+        for argv in (["--workers", "0"], ["--max-requests", "-1"]):
+            with self.subTest(argv=argv), patch("sys.stderr"):
+                with self.assertRaises(SystemExit):
+                    parse_args(argv)
+
+    def test_worker_server_max_requests(self) -> None:
+        # pylint: disable-next=import-outside-toplevel
+        from mysite.server import WorkerServer
+
+        with socket.create_server(("127.0.0.1", 0)) as sock:
+            sock.setblocking(False)
+            server = WorkerServer(sock, self.application, max_requests=2)
+            thread = threading.Thread(target=server.serve_forever, args=(0.1,))
+            thread.start()
+
+            port = sock.getsockname()[1]
+            for path in ("/a", "/b"):
+                with urlopen(f"http://127.0.0.1:{port}{path}") as response:
+                    self.assertEqual(response.read(), path.encode())
+            thread.join(5)
+            server.server_close()
+
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(server.stopping)
+
+    def test_run(self) -> None:
+        with socket.create_server(("127.0.0.1", 0)) as sock:
+            port = sock.getsockname()[1]
+        # pylint: disable-next=consider-using-with
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "mysite.server",
+                f"--port={port}",
+                "--workers=1",
+                "--max-requests=2",
+                "--max-requests-jitter=0",
+            ],
+            cwd=settings.BASE_DIR.parent,
+            env={**os.environ, "PYTHONPATH": str(settings.BASE_DIR)},
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", port)).close()
+                    break
+                except ConnectionRefusedError:
+                    self.assertLess(time.monotonic(), deadline)
+                    time.sleep(0.1)
+
+            url = f"http://127.0.0.1:{port}/authentication/csrftoken/"
+            for _ in range(5):
+                with urlopen(url) as response:
+                    self.assertEqual(response.status, 200)
+        finally:
+            process.send_signal(signal.SIGTERM)
+            _, stderr = process.communicate(timeout=30)
+
+        self.assertEqual(process.returncode, 0, stderr)
+        self.assertEqual(stderr.count("reached max requests"), 3)
+        self.assertIn("Stopping workers", stderr)
+
 
 class SettingsTests(SimpleTestCase):
     def test_pop_mail_admins_handler(self) -> None:
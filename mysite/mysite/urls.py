@@ -15,9 +15,15 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.contrib import admin
 from django.urls import include, path
 
+from mysite import profiling
+
 urlpatterns = [
+    path("admin/", admin.site.urls),
     path("productivity/", include("productivity.urls")),
     path("authentication/", include("authentication.urls")),
+    path("profiles/", profiling.profile_list),
+    path("profiles/<str:name>", profiling.profile_detail),
 ]
@@ -0,0 +1,176 @@
+"""Admin of productivity app, safe on large tables.
+
+- Change list is paginated by keyset, `?after=<id>` lists objects with a
+lower ID, newest first, read from the primary key index. Page links with
+offsets, and sorting by other columns, would scan the table.
+- Result count is estimated: counted exactly up to `COUNT_LIMIT` objects,
+shown as a lower bound past it, so the full table is never counted.
+- Filters are on `frequency` and `group`, backed by indexes leading with
+those columns.
+- Actions check, undo the last check of, and soft delete the selected
+objects in set-based queries, see `ProductivityQuerySet`, instead of
+loading and saving each object.
+- Delete view soft deletes too, so deletes from the admin can be restored,
+and publish a change like deletes from the API.
+"""
+
+from typing import Any, Optional
+
+from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.db import models
+from django.http import HttpRequest
+from django.utils import timezone
+
+from productivity.models import Productivity
+
+COUNT_LIMIT = 10_000
+
+CURSOR_VAR = "after"
+
+
+def estimate_count(
+    queryset: models.QuerySet[Any], limit: int = COUNT_LIMIT
+) -> tuple[int, bool]:
+    """Count objects up to a limit, in one query reading at most `limit`
+    rows.
+
+    Args:
+        queryset:
+            QuerySet to count.
+        limit:
+            Maximum number of objects to count.
+
+    Returns:
+        Number of objects, and True if it is a lower bound, there being
+        more than `limit` objects.
+    """
+    count = queryset.order_by()[: limit + 1].count()
+
+    return min(count, limit), count > limit
+
+
+class KeysetChangeList(  # pylint: disable=too-many-instance-attributes
+    ChangeList
+):
+    """Change list paginated by ID, see module docstring."""
+
+    def __init__(self, request: HttpRequest, *args: Any, **kwargs: Any):
+        try:
+            self.cursor: Optional[int] = int(request.GET[CURSOR_VAR])
+        except (KeyError, ValueError):
+            self.cursor = None
+        self.next_cursor: Optional[int] = None
+        self.result_count_is_estimate = False
+        super().__init__(request, *args, **kwargs)
+        # Links to filters start over from the first page
+        self.params.pop(CURSOR_VAR, None)
+
+    def get_filters_params(
+        self, params: Optional[dict[str, Any]] = None
+    ) -> dict[str, Any]:
+        """Override method in base class to leave out cursor."""
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+
+        return lookup_params
+
+    def get_results(self, request: HttpRequest) -> None:
+        """Override method in base class to read one page after cursor.
+
+        - One more object than a page is read, to know if there is a next
+        page.
+        """
+        queryset = self.queryset.order_by("-pk")
+        if self.cursor is not None:
+            queryset = queryset.filter(pk__lt=self.cursor)
+        result_list = list(queryset[: self.list_per_page + 1])
+        if len(result_list) > self.list_per_page:
+            result_list = result_list[: self.list_per_page]
+            self.next_cursor = result_list[-1].pk
+
+        self.result_count, self.result_count_is_estimate = estimate_count(
+            self.queryset
+        )
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = result_list
+        self.can_show_all = False
+        self.multi_page = False
+        self.paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
+
+    def get_first_page_url(self) -> str:
+        """Return query string of first page."""
+        return self.get_query_string(remove=[CURSOR_VAR])
+
+    def get_next_page_url(self) -> str:
+        """Return query string of next page."""
+        return self.get_query_string({CURSOR_VAR: self.next_cursor})
+
+
+@admin.register(Productivity)
+class ProductivityAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
+    """Admin of Productivity objects not soft deleted."""
+
+    actions = ["check_selected", "undo_checks", "soft_delete_selected"]
+    list_display = ["id", "item", "frequency", "group", "last_check"]
+    list_filter = ["frequency", "group"]
+    list_per_page = 100
+    list_select_related = ["group"]
+    ordering = ["-id"]
+    show_full_result_count = False
+    sortable_by: list[str] = []
+
+    def delete_model(self, request: HttpRequest, obj: Productivity) -> None:
+        """Override method in base class to soft delete, see
+        `ProductivityQuerySet.soft_delete`."""
+        Productivity.objects.soft_delete(obj.id)
+
+    def delete_queryset(
+        self, request: HttpRequest, queryset: models.QuerySet[Productivity]
+    ) -> None:
+        """Override method in base class to soft delete, see
+        `ProductivityQuerySet.soft_delete_many`."""
+        queryset.soft_delete_many()  # type: ignore[attr-defined]
+
+    def get_actions(self, request: HttpRequest) -> dict[str, Any]:
+        """Override method in base class to leave out `delete_selected`,
+        which deletes objects one by one after counting related objects."""
+        actions = super().get_actions(request)
+        actions.pop("delete_selected", None)
+
+        return actions
+
+    def get_changelist(
+        self, request: HttpRequest, **kwargs: Any
+    ) -> type[ChangeList]:
+        """Override method in base class, see `KeysetChangeList`."""
+        return KeysetChangeList
+
+    @admin.action(description="Check selected productivities")
+    def check_selected(
+        self, request: HttpRequest, queryset: models.QuerySet[Productivity]
+    ) -> None:
+        """Check objects, see `ProductivityQuerySet.mark_checked`."""
+        rows = queryset.mark_checked(timezone.now())  # type: ignore
+        self.message_user(request, f"Checked {rows} productivities")
+
+    @admin.action(description="Undo last check of selected productivities")
+    def undo_checks(
+        self, request: HttpRequest, queryset: models.QuerySet[Productivity]
+    ) -> None:
+        """Undo last check, see `ProductivityQuerySet.undo_checks`."""
+        rows = queryset.undo_checks()  # type: ignore[attr-defined]
+        self.message_user(request, f"Reset {rows} productivities")
+
+    @admin.action(description="Delete selected productivities")
+    def soft_delete_selected(
+        self, request: HttpRequest, queryset: models.QuerySet[Productivity]
+    ) -> None:
+        """Soft delete objects, see `ProductivityQuerySet.soft_delete_many`,
+        they can be restored with `restore` view."""
+        rows = queryset.soft_delete_many()  # type: ignore[attr-defined]
+        self.message_user(request, f"Deleted {rows} productivities")
@@ -1,6 +1,22 @@
 """Application configuration."""
 
+from typing import Any
+
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def install_search_index(using: str, **kwargs: Any) -> None:
+    """Create full-text index after `migrate`, see `productivity.search`.
+
+    Args:
+        using:
+            Database alias migrated.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from productivity import search
+
+    search.install_search_index(using)
 
 
 class ProductivityConfig(AppConfig):
@@ -8,3 +24,7 @@ class ProductivityConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "productivity"
+
+    def ready(self) -> None:
+        """Connect signal handlers."""
+        post_migrate.connect(install_search_index, sender=self)
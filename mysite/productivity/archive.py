@@ -0,0 +1,61 @@
+"""Archival of stale Productivity objects.
+
+- Stale objects, see `ProductivityQuerySet.stale`, are moved to
+`ArchivedProductivity` table in chunks. Each chunk is copied and deleted in
+its own transaction, so locks are held briefly and an interrupted run keeps
+the chunks already moved.
+- Productivity table keeps only objects in use, archived objects are read
+only if requested, see `include_archived` of `views.index`.
+- Checks of moved objects are kept, see `ProductivityCheck`.
+"""
+
+from datetime import datetime
+
+from django.db import transaction
+
+from productivity.models import (
+    ArchivedProductivity,
+    Productivity,
+    ProductivityGroup,
+)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def archive_productivities(
+    cutoff: datetime, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """Move stale Productivity objects to archive table.
+
+    Args:
+        cutoff:
+            Objects last checked before this datetime are stale.
+        chunk_size:
+            Maximum number of objects moved per transaction.
+
+    Returns:
+        Number of objects moved.
+    """
+    total = 0
+    group_names = ProductivityGroup.objects.get_names()
+    while True:
+        with transaction.atomic():
+            productivities = list(
+                Productivity.objects.stale(cutoff)
+                .order_by("id")
+                .select_for_update()[:chunk_size]
+            )
+            if not productivities:
+                break
+
+            ArchivedProductivity.objects.bulk_create(
+                ArchivedProductivity.from_productivity(p, group_names)
+                for p in productivities
+            )
+            Productivity.objects.filter(
+                id__in=[p.id for p in productivities]
+            ).delete(keep_checks=True)
+
+        total += len(productivities)
+
+    return total
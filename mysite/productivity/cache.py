@@ -0,0 +1,88 @@
+"""Cache helpers for productivity app.
+
+Cached values are keyed by a generation counter, which is bumped on every
+write to Productivity objects. Stale entries are never read again and expire
+on their own, so no key has to be deleted explicitly.
+
+- Counter is kept in the cache backend, so a cache hit does no query, and
+bumped by atomic `incr`, so writes do not contend on a database row.
+- Counter is shared by processes sharing the cache backend. With a
+per-process cache such as `LocMemCache`, writes of other processes, such as
+commands, are seen once cached values expire, so several server workers
+need a shared cache, see `mysite.server`.
+- Keys hold the database alias reads are routed to, see `mysite.routers`,
+so values read from a replica are not served to requests reading primary.
+A lagging replica can still serve rows from before a write under the
+bumped counter, until the next write or expiry.
+"""
+
+import time
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+
+GENERATION_KEY = "productivity:generation"
+
+
+def bump_generation() -> None:
+    """Increment generation counter, invalidating all keys from `make_key`."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def get_generation() -> int:
+    """Return current generation counter.
+
+    - Counter starts from current time in nanoseconds, so it does not repeat
+    values from before the counter was evicted.
+    """
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+
+    return int(generation)
+
+
+def invalidate() -> None:
+    """Invalidate cached values after a write.
+
+    - Generation is bumped immediately, so the writing request does not read
+    stale values.
+    - If in a transaction, generation is bumped again on commit, so values
+    cached by other requests before commit are not kept.
+    """
+    bump_generation()
+
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump_generation)
+
+
+def make_key(name: str, *parts: object) -> str:
+    """Return cache key for current generation and database reads are
+    routed to.
+
+    Args:
+        name:
+            Name of cached value.
+        parts:
+            Values the cached value depends on, such as query parameters.
+
+    Returns:
+        Cache key.
+    """
+    model = apps.get_model("productivity", "Productivity")
+    alias = router.db_for_read(model) or DEFAULT_DB_ALIAS
+
+    return ":".join(
+        [
+            "productivity",
+            alias,
+            str(get_generation()),
+            name,
+            *map(str, parts),
+        ]
+    )
@@ -0,0 +1,390 @@
+"""Change notifications for Productivity objects.
+
+- Writes publish an event to a broker after commit, see `publish_change`.
+- Event streams and long polls wait on the broker for events after a
+sequence number, so clients resume from the last event they received.
+- Broker class is set by `PRODUCTIVITY_EVENT_BROKER` in settings.
+    - `InProcessBroker` fans out within one worker process, the default with
+    one worker.
+    - `DatabaseBroker` fans out through a table polled by waiting clients,
+    the default with several worker processes, see `mysite.settings`.
+    - `CacheBroker` fans out through Django cache, for setups with several
+    worker processes sharing a cache such as Memcached or Redis.
+- `events/poll/` is the primary path. The Server-Sent Events view is async,
+and only a WSGI server, `mysite.server`, is shipped, under which Django
+buffers a stream until it ends, so the view refuses WSGI requests.
+Server-Sent Events need an ASGI server running `mysite.asgi`.
+"""
+
+import abc
+import asyncio
+import threading
+import time
+from collections import deque
+from functools import lru_cache, partial
+from typing import Optional, TypedDict
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router, transaction
+from django.utils.module_loading import import_string
+
+DEFAULT_BROKER = "productivity.events.InProcessBroker"
+
+
+class Event(TypedDict):
+    """Change notification.
+
+    - action: `save`, `delete`, or `bulk` for a write to many objects.
+    - id: ID of Productivity object, None if action is `bulk`.
+    """
+
+    sequence: int
+    action: str
+    id: Optional[int]
+
+
+class Broker(abc.ABC):
+    """Interface of event brokers.
+
+    - Sequence numbers increase by 1 per event. If the first event returned
+    by `wait` is not `after + 1`, events were missed and clients should
+    reload.
+    """
+
+    @abc.abstractmethod
+    def get_sequence(self) -> int:
+        """Return sequence number of latest event, 0 if none."""
+
+    @abc.abstractmethod
+    def publish(self, action: str, productivity_id: Optional[int]) -> Event:
+        """Publish event to all waiting clients.
+
+        Args:
+            action:
+                `save`, `delete` or `bulk`.
+            productivity_id:
+                ID of Productivity object, None if action is `bulk`.
+
+        Returns:
+            Published event.
+        """
+
+    @abc.abstractmethod
+    async def wait(self, after: int, timeout: float) -> list[Event]:
+        """Wait for events after a sequence number.
+
+        Args:
+            after:
+                Sequence number of last event received by client.
+            timeout:
+                Maximum seconds to wait.
+
+        Returns:
+            Events after sequence number, empty list if timed out.
+        """
+
+
+class InProcessBroker(Broker):
+    """Broker keeping latest events in memory of current process.
+
+    - Waiting coroutines may run in different threads and event loops, each
+    is woken up in its own loop.
+    """
+
+    def __init__(self, history: int = 1000) -> None:
+        self.events: deque[Event] = deque(maxlen=history)
+        self.lock = threading.Lock()
+        self.sequence = 0
+        self.waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = (
+            set()
+        )
+
+    def get_events(self, after: int) -> list[Event]:
+        """Return kept events after a sequence number.
+
+        Args:
+            after:
+                Sequence number.
+
+        Returns:
+            Events after sequence number.
+        """
+        with self.lock:
+            return [e for e in self.events if e["sequence"] > after]
+
+    def get_sequence(self) -> int:
+        """Return sequence number of latest event, 0 if none."""
+        return self.sequence
+
+    def publish(self, action: str, productivity_id: Optional[int]) -> Event:
+        """Publish event to all waiting clients.
+
+        Args:
+            action:
+                `save`, `delete` or `bulk`.
+            productivity_id:
+                ID of Productivity object, None if action is `bulk`.
+
+        Returns:
+            Published event.
+        """
+        with self.lock:
+            self.sequence += 1
+            event = Event(
+                sequence=self.sequence, action=action, id=productivity_id
+            )
+            self.events.append(event)
+            waiters = list(self.waiters)
+
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                # Event loop closed
+                pass
+
+        return event
+
+    async def wait(self, after: int, timeout: float) -> list[Event]:
+        """Wait for events after a sequence number.
+
+        Args:
+            after:
+                Sequence number of last event received by client.
+            timeout:
+                Maximum seconds to wait.
+
+        Returns:
+            Events after sequence number, empty list if timed out.
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self.lock:
+            self.waiters.add(waiter)
+
+        try:
+            events = self.get_events(after)
+            if not events:
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                events = self.get_events(after)
+        finally:
+            with self.lock:
+                self.waiters.discard(waiter)
+
+        return events
+
+
+class CacheBroker(Broker):
+    """Broker storing events in Django cache, polled by waiting clients.
+
+    - Cache backend must be shared by all worker processes and support
+    atomic `incr`, as Memcached and Redis do.
+    """
+
+    SEQUENCE_KEY = "productivity:events:sequence"
+
+    def __init__(
+        self,
+        alias: str = "default",
+        poll_interval: float = 0.5,
+        history_timeout: int = 5 * 60,
+    ) -> None:
+        self.cache = caches[alias]
+        self.poll_interval = poll_interval
+        self.history_timeout = history_timeout
+
+    def get_event_key(self, sequence: int) -> str:
+        """Return cache key of event.
+
+        Args:
+            sequence:
+                Sequence number of event.
+
+        Returns:
+            Cache key.
+        """
+        return f"productivity:events:{sequence}"
+
+    def get_sequence(self) -> int:
+        """Return sequence number of latest event, 0 if none."""
+        return int(self.cache.get(self.SEQUENCE_KEY, 0))
+
+    def publish(self, action: str, productivity_id: Optional[int]) -> Event:
+        """Publish event to all waiting clients.
+
+        Args:
+            action:
+                `save`, `delete` or `bulk`.
+            productivity_id:
+                ID of Productivity object, None if action is `bulk`.
+
+        Returns:
+            Published event.
+        """
+        self.cache.add(self.SEQUENCE_KEY, 0, timeout=None)
+        event = Event(
+            sequence=self.cache.incr(self.SEQUENCE_KEY),
+            action=action,
+            id=productivity_id,
+        )
+        self.cache.set(
+            self.get_event_key(event["sequence"]), event, self.history_timeout
+        )
+
+        return event
+
+    async def wait(self, after: int, timeout: float) -> list[Event]:
+        """Poll cache for events after a sequence number.
+
+        Args:
+            after:
+                Sequence number of last event received by client.
+            timeout:
+                Maximum seconds to wait.
+
+        Returns:
+            Events after sequence number, empty list if timed out. Expired
+            events are left out.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            sequence = int(await self.cache.aget(self.SEQUENCE_KEY, 0))
+            if sequence > after:
+                keys = [
+                    self.get_event_key(i)
+                    for i in range(after + 1, sequence + 1)
+                ]
+                found = await self.cache.aget_many(keys)
+                if len(found) < len(keys):
+                    # Sequence is incremented before event is stored
+                    await asyncio.sleep(self.poll_interval)
+                    found = await self.cache.aget_many(keys)
+
+                return [found[k] for k in keys if k in found]
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            await asyncio.sleep(min(self.poll_interval, remaining))
+
+
+class DatabaseBroker(Broker):
+    """Broker storing events in `ProductivityEvent` table, polled by waiting
+    clients.
+
+    - Works across worker processes and commands without a shared cache.
+    - Event ID is the sequence number. Events older than latest `history`
+    are deleted on publish.
+    - Reads go to the database written to, as a replica may lag.
+    """
+
+    def __init__(
+        self, poll_interval: float = 0.5, history: int = 1000
+    ) -> None:
+        self.model = apps.get_model("productivity", "ProductivityEvent")
+        self.poll_interval = poll_interval
+        self.history = history
+
+    def get_events(self, after: int) -> list[Event]:
+        """Return stored events after a sequence number.
+
+        Args:
+            after:
+                Sequence number.
+
+        Returns:
+            Events after sequence number, at most `history`.
+        """
+        rows = (
+            self.model.objects.using(router.db_for_write(self.model))
+            .filter(id__gt=after)
+            .order_by("id")
+            .values_list("id", "action", "productivity_id")[: self.history]
+        )
+
+        return [
+            Event(sequence=sequence, action=action, id=productivity_id)
+            for sequence, action, productivity_id in rows
+        ]
+
+    def get_sequence(self) -> int:
+        """Return sequence number of latest event, 0 if none."""
+        return (
+            self.model.objects.using(router.db_for_write(self.model))
+            .order_by("-id")
+            .values_list("id", flat=True)
+            .first()
+            or 0
+        )
+
+    def publish(self, action: str, productivity_id: Optional[int]) -> Event:
+        """Publish event to all waiting clients.
+
+        Args:
+            action:
+                `save`, `delete` or `bulk`.
+            productivity_id:
+                ID of Productivity object, None if action is `bulk`.
+
+        Returns:
+            Published event.
+        """
+        row = self.model.objects.create(
+            action=action, productivity_id=productivity_id
+        )
+        self.model.objects.filter(id__lte=row.id - self.history).delete()
+
+        return Event(sequence=row.id, action=action, id=productivity_id)
+
+    async def wait(self, after: int, timeout: float) -> list[Event]:
+        """Poll table for events after a sequence number.
+
+        Args:
+            after:
+                Sequence number of last event received by client.
+            timeout:
+                Maximum seconds to wait.
+
+        Returns:
+            Events after sequence number, empty list if timed out. Deleted
+            events are left out.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            events = await sync_to_async(self.get_events)(after)
+            if events:
+                return events
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            await asyncio.sleep(min(self.poll_interval, remaining))
+
+
+@lru_cache(maxsize=None)
+def get_broker() -> Broker:
+    """Return broker set by `PRODUCTIVITY_EVENT_BROKER` in settings."""
+    broker_class: type[Broker] = import_string(
+        getattr(settings, "PRODUCTIVITY_EVENT_BROKER", DEFAULT_BROKER)
+    )
+
+    return broker_class()
+
+
+def publish_change(action: str, productivity_id: Optional[int]) -> None:
+    """Publish change of Productivity objects once transaction commits.
+
+    Args:
+        action:
+            `save`, `delete` or `bulk`.
+        productivity_id:
+            ID of Productivity object, None if action is `bulk`.
+    """
+    transaction.on_commit(
+        partial(get_broker().publish, action, productivity_id)
+    )
@@ -0,0 +1,155 @@
+"""Check history and streaks of Productivity objects.
+
+- Checks are rows of `ProductivityCheck`, appended in the transaction of
+each check, see `ProductivityCheckQuerySet.record`.
+- A streak is a run of consecutive periods with a check, periods are per
+Frequency, see `Productivity.Frequency.get_period_index`. Current streak
+is the run ending in the current or previous period, as the current period
+may not be checked yet.
+- Streaks are computed in one pass over checks ordered by the index on
+object and datetime, streamed from the database, so memory does not grow
+with history.
+"""
+
+from collections.abc import Collection, Iterable, Mapping
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+from typing import NamedTuple, Optional
+
+from productivity.models import Productivity, ProductivityCheck
+
+HISTORY_LIMIT = 100
+
+HISTORY_PAGE_LIMIT = 100
+
+HISTORY_PAGE_MAX = 1000
+
+STREAM_CHUNK_SIZE = 2000
+
+
+class Streak(NamedTuple):
+    """Check counts of a Productivity object."""
+
+    checks: int
+    current: int
+    longest: int
+
+
+def compute_streaks(
+    rows: Iterable[tuple[int, datetime]],
+    frequencies: Mapping[int, int],
+    now: datetime,
+) -> dict[int, Streak]:
+    """Compute streaks of objects in one pass over their checks.
+
+    Args:
+        rows:
+            Object ID and check datetime, ordered by both.
+        frequencies:
+            Map of object ID to Frequency value, objects missing are
+            skipped.
+        now:
+            Current datetime, to determine current period.
+
+    Returns:
+        Map of object ID to streak, for objects having checks.
+    """
+    streaks = {}
+    for productivity_id, checks in groupby(rows, key=itemgetter(0)):
+        if productivity_id not in frequencies:
+            continue
+        frequency = Productivity.Frequency(frequencies[productivity_id])
+
+        count = run = longest = 0
+        last_period: Optional[int] = None
+        for _, checked_at in checks:
+            count += 1
+            period = frequency.get_period_index(checked_at)
+            if period == last_period:
+                continue
+            run = run + 1 if last_period == period - 1 else 1
+            longest = max(longest, run)
+            last_period = period
+
+        current_period = frequency.get_period_index(now)
+        current = (
+            run
+            if last_period is not None and last_period >= current_period - 1
+            else 0
+        )
+        streaks[productivity_id] = Streak(count, current, longest)
+
+    return streaks
+
+
+def get_history(
+    productivity_id: int, limit: int = HISTORY_LIMIT
+) -> list[datetime]:
+    """Return latest checks of an object, read backwards on the index.
+
+    Args:
+        productivity_id:
+            ID (primary key) of Productivity object.
+        limit:
+            Maximum number of checks to return.
+
+    Returns:
+        Check datetimes, latest first.
+    """
+    return list(
+        ProductivityCheck.objects.filter(productivity_id=productivity_id)
+        .order_by("-checked_at")
+        .values_list("checked_at", flat=True)[:limit]
+    )
+
+
+def get_streaks(
+    now: datetime,
+    productivity_ids: Optional[Collection[int]] = None,
+    after: int = 0,
+    limit: Optional[int] = None,
+) -> dict[int, Streak]:
+    """Compute streaks of objects not soft deleted.
+
+    - With `limit`, checks are read for the range of IDs of the page only, on
+    the index of object and datetime.
+
+    Args:
+        now:
+            Current datetime, to determine current period.
+        productivity_ids:
+            IDs of objects, all objects if None.
+        after:
+            Only objects with a greater ID.
+        limit:
+            Maximum number of objects, ordered by ID, no limit if None.
+
+    Returns:
+        Map of object ID to streak, objects without checks have zero
+        counts.
+    """
+    objects = Productivity.objects.filter(id__gt=after).order_by("id")
+    checks = ProductivityCheck.objects.filter(productivity_id__gt=after)
+    if productivity_ids is not None:
+        objects = objects.filter(id__in=productivity_ids)
+        checks = checks.filter(productivity_id__in=productivity_ids)
+    if limit is not None:
+        objects = objects[:limit]
+    frequencies = dict(objects.values_list("id", "frequency"))
+    if limit is not None:
+        checks = checks.filter(
+            productivity_id__lte=max(frequencies, default=0)
+        )
+
+    rows = (
+        checks.order_by("productivity_id", "checked_at")
+        .values_list("productivity_id", "checked_at")
+        .iterator(chunk_size=STREAM_CHUNK_SIZE)
+    )
+    streaks = compute_streaks(rows, frequencies, now)
+
+    return {
+        productivity_id: streaks.get(productivity_id, Streak(0, 0, 0))
+        for productivity_id in sorted(frequencies)
+    }
@@ -0,0 +1,197 @@
+"""Idempotency keys of write requests.
+
+- A client sends an `Idempotency-Key` header, unique per logical request
+and repeated on its retries. The first request runs the view and stores its
+response in the transaction of the view. Retries get the stored response
+without running the view again, marked by `Idempotent-Replayed: true`.
+- Keys are scoped per user, and expire after `IDEMPOTENCY_TTL`. Expired
+keys are ignored and can be reused, and are deleted by
+`purge_idempotency_keys` command.
+- Requests are fingerprinted by method, path and body. Reusing a key for
+another request is rejected with 422.
+- A concurrent retry, run before the first request stored its response,
+fails to store its own on the unique constraint. Its transaction, writes
+of the view included, is rolled back and the first response is returned.
+- Server errors are not stored, so their retries run the view again.
+"""
+
+import hashlib
+from collections.abc import Callable
+from datetime import timedelta
+from functools import wraps
+from typing import Any, Optional, TypeVar, cast
+from urllib.parse import urlencode
+
+from django.db import IntegrityError, transaction
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.http.request import RawPostDataException
+from django.utils import timezone
+
+# pylint: disable=wrong-import-order
+from mysite.routers import SAFE_METHODS
+from productivity.models import IdempotencyKey
+
+# pylint: enable=wrong-import-order
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+IDEMPOTENCY_TTL = timedelta(hours=24)
+
+KEY_MAX_LENGTH = 255
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+STORED_HEADERS = ("Content-Type", "ETag", "Location")
+
+View = TypeVar("View", bound=Callable[..., HttpResponse])
+
+
+def get_fingerprint(request: HttpRequest) -> bytes:
+    """Return SHA-256 digest of method, path and body of request.
+
+    - Multipart bodies, which Django reads as a stream, are fingerprinted
+    by their parsed form data.
+
+    Args:
+        request:
+            HttpRequest object.
+
+    Returns:
+        Digest bytes.
+    """
+    digest = hashlib.sha256(
+        f"{request.method}\n{request.get_full_path()}\n".encode()
+    )
+    try:
+        digest.update(request.body)
+    except RawPostDataException:
+        digest.update(urlencode(sorted(request.POST.lists()), True).encode())
+
+    return digest.digest()
+
+
+def find_response(user_id: int, key: str) -> Optional[IdempotencyKey]:
+    """Return stored response of a key, if not expired.
+
+    Args:
+        user_id:
+            ID (primary key) of user.
+        key:
+            Value of `Idempotency-Key` header.
+
+    Returns:
+        Stored response, None if not found or expired.
+    """
+    return IdempotencyKey.objects.filter(
+        user_id=user_id, key=key, expires_at__gt=timezone.now()
+    ).first()
+
+
+def replay(stored: IdempotencyKey, fingerprint: bytes) -> HttpResponse:
+    """Build response from stored response.
+
+    Args:
+        stored:
+            Stored response.
+        fingerprint:
+            Fingerprint of replayed request.
+
+    Returns:
+        Stored response, or error message if key was used for another
+        request.
+    """
+    if bytes(stored.fingerprint) != fingerprint:
+        return JsonResponse(
+            {"error": "Idempotency-Key reused for another request"},
+            status=422,
+        )
+
+    response = HttpResponse(bytes(stored.body), status=stored.status)
+    for name, value in stored.headers.items():
+        response.headers[name] = value
+    response.headers[REPLAYED_HEADER] = "true"
+
+    return response
+
+
+def store(
+    request: HttpRequest, key: str, fingerprint: bytes, response: HttpResponse
+) -> None:
+    """Store response of a key, replacing its expired response if any.
+
+    Args:
+        request:
+            HttpRequest object, of an authenticated user.
+        key:
+            Value of `Idempotency-Key` header.
+        fingerprint:
+            Fingerprint of request, see `get_fingerprint`.
+        response:
+            Response of view, not streaming.
+
+    Raises:
+        django.db.IntegrityError:
+            Response of key was stored by a concurrent request.
+    """
+    now = timezone.now()
+    IdempotencyKey.objects.filter(
+        user_id=request.user.pk, key=key, expires_at__lte=now
+    ).delete()
+    IdempotencyKey.objects.create(
+        user_id=request.user.pk,
+        key=key,
+        fingerprint=fingerprint,
+        status=response.status_code,
+        headers={
+            name: response.headers[name]
+            for name in STORED_HEADERS
+            if name in response.headers
+        },
+        body=response.content,
+        expires_at=now + IDEMPOTENCY_TTL,
+    )
+
+
+def idempotent(view: View) -> View:
+    """Decorate view to replay responses of requests with a known
+    `Idempotency-Key`, see module docstring.
+
+    - Apply inside `login_required`, safe methods are passed through.
+
+    Args:
+        view:
+            View function.
+
+    Returns:
+        Decorated view function.
+    """
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> Any:
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None or request.method in SAFE_METHODS:
+            return view(request, *args, **kwargs)
+        if not key or len(key) > KEY_MAX_LENGTH:
+            return JsonResponse(
+                {"error": "Invalid Idempotency-Key"}, status=400
+            )
+
+        fingerprint = get_fingerprint(request)
+        stored = find_response(request.user.pk, key)
+        if stored is not None:
+            return replay(stored, fingerprint)
+
+        try:
+            with transaction.atomic():
+                response = view(request, *args, **kwargs)
+                if response.status_code < 500:
+                    store(request, key, fingerprint, response)
+        except IntegrityError:
+            stored = find_response(request.user.pk, key)
+            if stored is None:
+                raise
+            return replay(stored, fingerprint)
+
+        return response
+
+    return cast(View, wrapper)
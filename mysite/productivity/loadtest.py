@@ -0,0 +1,622 @@
+"""Load test of productivity API with simulated clients.
+
+- Each virtual user follows the real client flow: get CSRF token, log in,
+then list, check, create and delete Productivity objects in a weighted
+mix, pausing for a random think time between requests.
+- Concurrency is stepped through levels, each run for a fixed duration.
+The capacity report gives requests per second, p50 and p99 latency, error
+rate and database lock errors per level, and the highest throughput with
+p99 latency within target.
+- Lock errors are server errors from a database lock, such as SQLite
+`database is locked` once its busy timeout expires, marked by the server with
+`X-Database-Lock` header, see `mysite.locks`. On PostgreSQL, sessions waiting
+on a lock are also sampled from `pg_stat_activity` while a level runs.
+- Requests are sent with a minimal HTTP/1.1 client on asyncio streams, so
+no HTTP client package is needed.
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+from collections.abc import Sequence
+from typing import NamedTuple, Optional, TypedDict
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+# pylint: disable=wrong-import-order
+from mysite.locks import LOCK_HEADER
+from productivity.models import Productivity, ProductivityGroup
+
+# pylint: enable=wrong-import-order
+
+DEFAULT_MIX = {"list": 60, "check": 25, "create": 10, "delete": 5}
+
+LOCK_SAMPLE_INTERVAL = 0.1
+
+SEED_GROUP = "Load test"
+
+
+class Config(NamedTuple):
+    """Load test settings."""
+
+    host: str
+    port: int
+    username: str
+    password: str
+    mix: dict[str, int]
+    think_time: float
+    duration: float
+
+
+class Sample(NamedTuple):
+    """Outcome of one request."""
+
+    action: str
+    latency: float
+    status: int
+    is_locked: bool
+
+
+class LevelResult(TypedDict):
+    """Statistics of one concurrency level."""
+
+    users: int
+    requests: int
+    rps: float
+    p50: float
+    p99: float
+    error_rate: float
+    locked: int
+    lock_waits: Optional[int]
+
+
+class HttpClient:
+    """HTTP/1.1 client keeping connection alive and cookies per client."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self.cookies: dict[str, str] = {}
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    def close(self) -> None:
+        """Close connection if open."""
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = None
+        self.writer = None
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes = b"",
+        content_type: str = "application/json",
+    ) -> tuple[int, dict[str, str], bytes]:
+        """Send request and read response.
+
+        - `X-CSRFToken` header is sent from `csrftoken` cookie, as the
+        client app does.
+        - If a kept-alive connection was closed by server, request is sent
+        again once on a new connection.
+
+        Args:
+            method:
+                HTTP method.
+            path:
+                Path with query string.
+            body:
+                Request body.
+            content_type:
+                Content type of request body.
+
+        Returns:
+            Tuple of status code, headers with lowercase names, and response
+            body.
+        """
+        lines = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            f"Content-Length: {len(body)}",
+        ]
+        if body:
+            lines.append(f"Content-Type: {content_type}")
+        if self.cookies:
+            cookie = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+            lines.append(f"Cookie: {cookie}")
+        if "csrftoken" in self.cookies:
+            lines.append(f"X-CSRFToken: {self.cookies['csrftoken']}")
+        data = ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+
+        for is_retry in (False, True):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(
+                    self.host, self.port
+                )
+            self.writer.write(data)
+            await self.writer.drain()
+            try:
+                return await self.read_response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.close()
+                if is_retry:
+                    raise
+
+        raise AssertionError("Unreachable")
+
+    async def read_response(self) -> tuple[int, dict[str, str], bytes]:
+        """Read response, storing cookies set by server.
+
+        Returns:
+            Tuple of status code, headers with lowercase names, and response
+            body.
+
+        Raises:
+            ConnectionError:
+                Connection closed before response.
+        """
+        assert self.reader is not None
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        status = int(status_line.split()[1])
+
+        headers: dict[str, str] = {}
+        while (line := await self.reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            value = value.strip()
+            if name == "set-cookie":
+                cookie_name, _, cookie_value = value.split(";", 1)[
+                    0
+                ].partition("=")
+                self.cookies[cookie_name] = cookie_value
+            headers[name] = value
+
+        if "content-length" in headers:
+            body = await self.reader.readexactly(
+                int(headers["content-length"])
+            )
+        else:
+            body = await self.reader.read()
+            self.close()
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+
+        return status, headers, body
+
+
+def is_lock_error(status: int, headers: dict[str, str]) -> bool:
+    """Return True if server error is from a database lock.
+
+    Args:
+        status:
+            Status code.
+        headers:
+            Response headers with lowercase names.
+
+    Returns:
+        True if lock error.
+    """
+    return status >= 500 and LOCK_HEADER.lower() in headers
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    """Parse request mix such as `list=60,check=25,create=10,delete=5`.
+
+    Args:
+        value:
+            Comma-separated action=weight pairs.
+
+    Returns:
+        Weight per action.
+
+    Raises:
+        ValueError:
+            Unknown action, or weight not a non-negative integer, or all
+            weights are 0.
+    """
+    mix = {}
+    for part in value.split(","):
+        action, _, weight = part.partition("=")
+        action = action.strip()
+        if action not in DEFAULT_MIX:
+            raise ValueError(f"Unknown action {action}")
+        mix[action] = int(weight)
+        if mix[action] < 0:
+            raise ValueError(f"Negative weight for {action}")
+    if not any(mix.values()):
+        raise ValueError("All weights are 0")
+
+    return mix
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Return percentile by nearest rank.
+
+    Args:
+        values:
+            Values, in any order.
+        q:
+            Percentile between 0 and 100.
+
+    Returns:
+        Percentile, 0 if no value.
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+
+    return ordered[rank - 1]
+
+
+def summarize(
+    users: int,
+    samples: Sequence[Sample],
+    elapsed: float,
+    lock_waits: Optional[Sequence[int]] = None,
+) -> LevelResult:
+    """Return statistics of samples of a concurrency level.
+
+    - Errors are server errors and failed connections, status 0. Client
+    errors such as 404 for an object deleted by another user are expected.
+
+    Args:
+        users:
+            Number of virtual users.
+        samples:
+            Samples of level.
+        elapsed:
+            Seconds level ran.
+        lock_waits:
+            Sampled numbers of sessions waiting on a lock, None if not
+            sampled.
+
+    Returns:
+        Level statistics.
+    """
+    latencies = [s.latency for s in samples]
+    errors = sum(1 for s in samples if s.status == 0 or s.status >= 500)
+
+    return LevelResult(
+        users=users,
+        requests=len(samples),
+        rps=len(samples) / elapsed if elapsed else 0.0,
+        p50=percentile(latencies, 50),
+        p99=percentile(latencies, 99),
+        error_rate=errors / len(samples) if samples else 0.0,
+        locked=sum(1 for s in samples if s.is_locked),
+        lock_waits=(
+            max(lock_waits, default=0) if lock_waits is not None else None
+        ),
+    )
+
+
+def find_capacity(
+    results: Sequence[LevelResult],
+    p99_target: float,
+    max_error_rate: float,
+) -> Optional[LevelResult]:
+    """Return level with highest throughput within targets.
+
+    Args:
+        results:
+            Statistics per level.
+        p99_target:
+            Maximum p99 latency in seconds.
+        max_error_rate:
+            Maximum error rate between 0 and 1.
+
+    Returns:
+        Level statistics, None if no level is within targets.
+    """
+    within = [
+        r
+        for r in results
+        if r["p99"] <= p99_target and r["error_rate"] <= max_error_rate
+    ]
+
+    if not within:
+        return None
+
+    return max(within, key=lambda r: r["rps"])
+
+
+class VirtualUser:
+    """Simulated client running the client app flow."""
+
+    def __init__(self, config: Config, samples: list[Sample]) -> None:
+        self.config = config
+        self.samples = samples
+        self.client = HttpClient(config.host, config.port)
+        self.rng = random.Random()
+        self.objects: dict[int, dict[str, str]] = {}
+        self.created: list[int] = []
+
+    async def send(
+        self,
+        action: str,
+        method: str,
+        path: str,
+        body: bytes = b"",
+        content_type: str = "application/json",
+    ) -> tuple[int, bytes]:
+        """Send request and record sample.
+
+        Args:
+            action:
+                Action name for report.
+            method:
+                HTTP method.
+            path:
+                Path with query string.
+            body:
+                Request body.
+            content_type:
+                Content type of request body.
+
+        Returns:
+            Tuple of status code and response body, status 0 if request
+            failed.
+        """
+        start = time.perf_counter()
+        try:
+            status, headers, response_body = await self.client.request(
+                method, path, body, content_type
+            )
+        except (ConnectionError, OSError, asyncio.IncompleteReadError):
+            self.client.close()
+            status, headers, response_body = 0, {}, b""
+        self.samples.append(
+            Sample(
+                action,
+                time.perf_counter() - start,
+                status,
+                is_lock_error(status, headers),
+            )
+        )
+
+        return status, response_body
+
+    async def login(self) -> bool:
+        """Get CSRF token and log in.
+
+        Returns:
+            True if logged in.
+        """
+        await self.send("csrftoken", "GET", "/authentication/csrftoken/")
+        status, _ = await self.send(
+            "login",
+            "POST",
+            "/authentication/login/",
+            urlencode(
+                {
+                    "username": self.config.username,
+                    "password": self.config.password,
+                }
+            ).encode(),
+            "application/x-www-form-urlencoded",
+        )
+
+        return status == 200
+
+    async def list_objects(self) -> None:
+        """List objects, keeping them for later checks."""
+        status, body = await self.send("list", "GET", "/productivity/")
+        if status == 200:
+            self.objects = {int(o["id"]): o for o in json.loads(body)}
+
+    async def check_object(self) -> None:
+        """Check a listed object, as done from client app."""
+        if not self.objects:
+            await self.list_objects()
+            return
+
+        productivity_id = self.rng.choice(list(self.objects))
+        obj = self.objects[productivity_id]
+        status, _ = await self.send(
+            "check",
+            "PUT",
+            f"/productivity/{productivity_id}/",
+            json.dumps(
+                {
+                    "item": obj["item"],
+                    "frequency": obj["frequency"],
+                    "group": obj["group"],
+                    "last_check": "",
+                }
+            ).encode(),
+        )
+        if status == 404:
+            del self.objects[productivity_id]
+
+    async def create_object(self) -> None:
+        """Create an object."""
+        status, body = await self.send(
+            "create",
+            "POST",
+            "/productivity/",
+            json.dumps(
+                {
+                    "item": f"Load test {self.rng.randrange(1_000_000)}",
+                    "frequency": self.rng.choice(["Key", "Day", "Week"]),
+                    "group": SEED_GROUP,
+                }
+            ).encode(),
+        )
+        if status == 201:
+            self.created.append(int(json.loads(body)["id"]))
+
+    async def delete_object(self) -> None:
+        """Delete an object created by this user, else create one."""
+        if not self.created:
+            await self.create_object()
+            return
+
+        productivity_id = self.created.pop()
+        await self.send(
+            "delete", "DELETE", f"/productivity/{productivity_id}/"
+        )
+        self.objects.pop(productivity_id, None)
+
+    async def run(self, stop_at: float) -> None:
+        """Log in, then send requests in configured mix until stop time.
+
+        Args:
+            stop_at:
+                Event loop time to stop at.
+        """
+        loop = asyncio.get_running_loop()
+        actions = {
+            "list": self.list_objects,
+            "check": self.check_object,
+            "create": self.create_object,
+            "delete": self.delete_object,
+        }
+        names = list(self.config.mix)
+        weights = list(self.config.mix.values())
+
+        try:
+            if not await self.login():
+                return
+            while loop.time() < stop_at:
+                await actions[self.rng.choices(names, weights)[0]]()
+                if self.config.think_time > 0:
+                    await asyncio.sleep(
+                        self.rng.expovariate(1 / self.config.think_time)
+                    )
+        finally:
+            self.client.close()
+
+
+def count_lock_waits() -> Optional[int]:
+    """Return number of database sessions waiting on a lock.
+
+    Returns:
+        Number of sessions, None if database is not PostgreSQL.
+    """
+    if connection.vendor != "postgresql":
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM pg_stat_activity "
+            "WHERE wait_event_type = 'Lock'"
+        )
+        (count,) = cursor.fetchone()
+
+    return int(count)
+
+
+async def sample_lock_waits(stop_at: float) -> Optional[list[int]]:
+    """Sample sessions waiting on a lock until stop time.
+
+    Args:
+        stop_at:
+            Event loop time to stop at.
+
+    Returns:
+        Sampled numbers of sessions, None if not supported by database.
+    """
+    loop = asyncio.get_running_loop()
+    samples = []
+    while loop.time() < stop_at:
+        count = await asyncio.to_thread(count_lock_waits)
+        if count is None:
+            return None
+        samples.append(count)
+        await asyncio.sleep(LOCK_SAMPLE_INTERVAL)
+
+    return samples
+
+
+async def run_level(config: Config, users: int) -> LevelResult:
+    """Run virtual users concurrently for configured duration.
+
+    Args:
+        config:
+            Load test settings.
+        users:
+            Number of virtual users.
+
+    Returns:
+        Level statistics.
+    """
+    samples: list[Sample] = []
+    loop = asyncio.get_running_loop()
+    stop_at = loop.time() + config.duration
+    start = loop.time()
+    lock_waits, *_ = await asyncio.gather(
+        sample_lock_waits(stop_at),
+        *(VirtualUser(config, samples).run(stop_at) for _ in range(users)),
+    )
+
+    return summarize(users, samples, loop.time() - start, lock_waits)
+
+
+def prepare_data(username: str, password: str, seed: int) -> None:
+    """Create load test user and Productivity objects if missing.
+
+    - Run on the dedicated database of `loadtest` command, or on the
+    database of a running server given by `--address`.
+
+    Args:
+        username:
+            Username of load test user, created or its password reset.
+        password:
+            Password of load test user.
+        seed:
+            Minimum number of objects in `SEED_GROUP` group.
+    """
+    user_model = get_user_model()
+    user, _ = user_model.objects.get_or_create(username=username)
+    user.set_password(password)
+    user.save()
+
+    group_id = ProductivityGroup.objects.get_id(SEED_GROUP)
+    missing = seed - Productivity.objects.filter(group_id=group_id).count()
+    Productivity.objects.bulk_create(
+        Productivity(
+            item=f"Seed {i}",
+            frequency=Productivity.Frequency.DAY,
+            group_id=group_id,
+        )
+        for i in range(max(missing, 0))
+    )
+
+
+async def wait_for_server(host: str, port: int, timeout: float) -> None:
+    """Wait until server accepts connections.
+
+    Args:
+        host:
+            Server host.
+        port:
+            Server port.
+        timeout:
+            Maximum seconds to wait.
+
+    Raises:
+        TimeoutError:
+            Server did not accept connections in time.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+        except OSError as exc:
+            if time.monotonic() > deadline:
+                raise TimeoutError(
+                    f"Server {host}:{port} not started"
+                ) from exc
+            await asyncio.sleep(0.1)
+        else:
+            writer.close()
+            return
@@ -0,0 +1,50 @@
+"""Command to move stale Productivity objects to archive table."""
+
+from datetime import timedelta
+from typing import Any
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+from django.utils import timezone
+
+# pylint: disable=wrong-import-order
+from productivity.archive import DEFAULT_CHUNK_SIZE, archive_productivities
+
+# pylint: enable=wrong-import-order
+
+
+class Command(BaseCommand):
+    """Move stale Productivity objects to archive table.
+
+    - KEY and LOOP objects, and all objects of inactive groups, not checked
+    for `--older-than` days are moved.
+    """
+
+    help = "Move stale Productivity objects to archive table."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            required=True,
+            help="Days since last check for an object to be stale.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Objects moved per transaction.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["older_than"] < 0:
+            raise CommandError("--older-than must not be negative")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive")
+
+        cutoff = timezone.now() - timedelta(days=options["older_than"])
+        total = archive_productivities(cutoff, options["chunk_size"])
+        self.stdout.write(f"Archived {total} Productivity objects")
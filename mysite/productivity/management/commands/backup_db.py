@@ -0,0 +1,78 @@
+"""Command to back up SQLite database while it is in use."""
+
+import sqlite3
+from typing import Any
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# pylint: disable=wrong-import-order
+from mysite.backup import DEFAULT_PAGES, DEFAULT_SLEEP, backup_database
+
+# pylint: enable=wrong-import-order
+
+
+class Command(BaseCommand):
+    """Back up SQLite database with online backup, see `mysite.backup`.
+
+    - Unlike copying the database file, the backup is consistent while
+    writers are running, and writers are not blocked for the whole copy.
+    """
+
+    help = "Back up SQLite database without stopping writers."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("path", help="Path of backup file.")
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database alias to back up.",
+        )
+        parser.add_argument(
+            "--pages",
+            type=int,
+            default=DEFAULT_PAGES,
+            help="Pages copied per step, -1 for all pages in one step.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=DEFAULT_SLEEP,
+            help="Seconds to sleep between steps.",
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="Compress backup with gzip.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["pages"] == 0 or options["pages"] < -1:
+            raise CommandError("--pages must be positive or -1")
+        if options["sleep"] < 0:
+            raise CommandError("--sleep must not be negative")
+
+        connection = connections[options["database"]]
+        if connection.vendor != "sqlite":
+            raise CommandError(f"Database {options['database']} is not SQLite")
+
+        connection.ensure_connection()
+        try:
+            result = backup_database(
+                connection.connection,
+                options["path"],
+                options["pages"],
+                options["sleep"],
+                options["gzip"],
+            )
+        except (OSError, sqlite3.Error) as error:
+            raise CommandError(f"Backup failed: {error}") from error
+
+        self.stdout.write(
+            f"Backed up {result.pages} pages to {options['path']} in "
+            f"{result.steps} steps, {result.restarts} restarts"
+        )
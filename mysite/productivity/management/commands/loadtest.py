@@ -0,0 +1,296 @@
+"""Command to load test productivity API and report capacity."""
+
+import asyncio
+import os
+import secrets
+import subprocess
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+from django.db import connection
+
+# pylint: disable=wrong-import-order
+from productivity.loadtest import (
+    DEFAULT_MIX,
+    Config,
+    LevelResult,
+    find_capacity,
+    parse_mix,
+    prepare_data,
+    run_level,
+    wait_for_server,
+)
+
+# pylint: enable=wrong-import-order
+
+SERVER_START_TIMEOUT = 10
+
+
+class Command(BaseCommand):
+    """Simulate clients against a server, stepping through concurrency levels.
+
+    - Without `--address`, a dedicated database of the configured engine is
+    created, and `mysite.server` is started on `--port` with the same
+    settings on that database, so `--settings` selects SQLite or PostgreSQL.
+    The database is destroyed afterwards, so load test user and objects are
+    never written to the configured database.
+    - With `--address`, load test user and seed objects are created in the
+    configured database, which must be the one of the running server.
+    """
+
+    help = "Load test productivity API and report capacity."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--address",
+            help="host:port of a running server, else one is started.",
+        )
+        parser.add_argument(
+            "--port",
+            type=int,
+            default=8765,
+            help="Port of started server.",
+        )
+        parser.add_argument(
+            "--users",
+            default="1,2,4,8,16",
+            help="Comma-separated numbers of concurrent users per level.",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10.0,
+            help="Seconds each level runs.",
+        )
+        parser.add_argument(
+            "--think-time",
+            type=float,
+            default=0.5,
+            help="Mean seconds a user waits between requests.",
+        )
+        parser.add_argument(
+            "--mix",
+            default=",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+            help="Comma-separated action=weight of list, check, create "
+            "and delete requests.",
+        )
+        parser.add_argument(
+            "--p99-target",
+            type=float,
+            default=500.0,
+            help="Target p99 latency in milliseconds.",
+        )
+        parser.add_argument(
+            "--max-error-rate",
+            type=float,
+            default=1.0,
+            help="Maximum error rate in percent within target.",
+        )
+        parser.add_argument(
+            "--username",
+            default="loadtest",
+            help="Username of load test user.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=100,
+            help="Minimum number of objects to list and check.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            levels = [int(users) for users in options["users"].split(",")]
+            mix = parse_mix(options["mix"])
+        except ValueError as exc:
+            raise CommandError(f"Invalid --users or --mix: {exc}") from exc
+        if min(levels) < 1:
+            raise CommandError("--users must be positive")
+        if options["duration"] <= 0:
+            raise CommandError("--duration must be positive")
+        if options["think_time"] < 0:
+            raise CommandError("--think-time must not be negative")
+
+        host, port = "127.0.0.1", options["port"]
+        if options["address"]:
+            host, _, port_str = options["address"].rpartition(":")
+            if not port_str.isdigit():
+                raise CommandError("--address must be host:port")
+            port = int(port_str)
+
+        with TemporaryDirectory() as temp_dir:
+            old_name = None
+            if not options["address"]:
+                old_name = self.create_database(Path(temp_dir))
+            try:
+                results = self.run_levels(host, port, levels, mix, options)
+            finally:
+                if old_name is not None:
+                    connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.write_capacity(
+            find_capacity(
+                results,
+                options["p99_target"] / 1000,
+                options["max_error_rate"] / 100,
+            ),
+            options["p99_target"],
+        )
+
+    def create_database(self, temp_dir: Path) -> str:
+        """Create and migrate dedicated database, and switch to it.
+
+        - SQLite database is a file in `temp_dir`, other databases are named
+        `loadtest_<name>`.
+
+        Args:
+            temp_dir:
+                Directory removed after load test.
+
+        Returns:
+            Name of configured database, to switch back to.
+        """
+        old_name = str(connection.settings_dict["NAME"])
+        connection.settings_dict["TEST"]["NAME"] = (
+            str(temp_dir / "loadtest.sqlite3")
+            if connection.vendor == "sqlite"
+            else f"loadtest_{old_name}"
+        )
+        self.stdout.write("Creating load test database")
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+
+        return old_name
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def run_levels(
+        self,
+        host: str,
+        port: int,
+        levels: list[int],
+        mix: dict[str, int],
+        options: dict[str, Any],
+    ) -> list[LevelResult]:
+        """Prepare data, start server if needed and run levels.
+
+        Args:
+            host:
+                Server host.
+            port:
+                Server port.
+            levels:
+                Numbers of concurrent users per level.
+            mix:
+                Weight per action.
+            options:
+                Command options.
+
+        Returns:
+            Statistics per level.
+        """
+        password = secrets.token_urlsafe()
+        prepare_data(options["username"], password, options["seed"])
+        config = Config(
+            host=host,
+            port=port,
+            username=options["username"],
+            password=password,
+            mix=mix,
+            think_time=options["think_time"],
+            duration=options["duration"],
+        )
+
+        server = None if options["address"] else self.start_server(port)
+        try:
+            asyncio.run(wait_for_server(host, port, SERVER_START_TIMEOUT))
+            results = []
+            for users in levels:
+                results.append(asyncio.run(run_level(config, users)))
+                self.write_level(results[-1])
+        except TimeoutError as exc:
+            raise CommandError(str(exc)) from exc
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+        return results
+
+    def start_server(self, port: int) -> subprocess.Popen[bytes]:
+        """Start `mysite.server` with current settings and database.
+
+        Args:
+            port:
+                Port to listen on.
+
+        Returns:
+            Server process.
+        """
+        self.stdout.write(f"Starting server on port {port}")
+        return subprocess.Popen(  # pylint: disable=consider-using-with
+            [
+                sys.executable,
+                "-m",
+                "mysite.server",
+                "--host=127.0.0.1",
+                f"--port={port}",
+            ],
+            cwd=settings.BASE_DIR,
+            env={
+                **os.environ,
+                "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE,
+                "MYSITE_DATABASE_NAME": str(connection.settings_dict["NAME"]),
+            },
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def write_level(self, result: LevelResult) -> None:
+        """Write statistics of a level.
+
+        Args:
+            result:
+                Level statistics.
+        """
+        lock_waits = result["lock_waits"]
+        self.stdout.write(
+            f"{result['users']:>4} users: "
+            f"{result['rps']:8.1f} req/s, "
+            f"p50 {result['p50'] * 1000:7.1f} ms, "
+            f"p99 {result['p99'] * 1000:7.1f} ms, "
+            f"errors {result['error_rate']:6.2%}, "
+            f"lock errors {result['locked']}, "
+            f"lock waits {'n/a' if lock_waits is None else lock_waits}"
+        )
+
+    def write_capacity(
+        self, result: Optional[LevelResult], p99_target: float
+    ) -> None:
+        """Write highest throughput within targets.
+
+        Args:
+            result:
+                Level statistics, None if no level is within targets.
+            p99_target:
+                Target p99 latency in milliseconds.
+        """
+        if result is None:
+            self.stdout.write(
+                f"Capacity ({connection.vendor}): no level within "
+                f"p99 {p99_target:g} ms"
+            )
+            return
+
+        self.stdout.write(
+            f"Capacity ({connection.vendor}): {result['rps']:.1f} req/s "
+            f"at {result['users']} users within p99 {p99_target:g} ms"
+        )
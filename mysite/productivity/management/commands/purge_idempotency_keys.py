@@ -0,0 +1,37 @@
+"""Command to delete expired idempotency keys."""
+
+from typing import Any
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+from django.utils import timezone
+
+# pylint: disable=wrong-import-order
+from productivity.purge import DEFAULT_BATCH_SIZE, purge_idempotency_keys
+
+# pylint: enable=wrong-import-order
+
+
+class Command(BaseCommand):
+    """Delete idempotency keys past their expiry, see
+    `productivity.idempotency`."""
+
+    help = "Delete expired idempotency keys."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Keys deleted per transaction.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        total = purge_idempotency_keys(timezone.now(), options["batch_size"])
+        self.stdout.write(f"Purged {total} idempotency keys")
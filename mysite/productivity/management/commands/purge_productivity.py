@@ -0,0 +1,47 @@
+"""Command to hard delete soft deleted Productivity objects."""
+
+from datetime import timedelta
+from typing import Any
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+from django.utils import timezone
+
+# pylint: disable=wrong-import-order
+from productivity.purge import DEFAULT_BATCH_SIZE, purge_productivities
+
+# pylint: enable=wrong-import-order
+
+
+class Command(BaseCommand):
+    """Hard delete Productivity objects soft deleted `--older-than` days
+    ago."""
+
+    help = "Hard delete soft deleted Productivity objects."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=30,
+            help="Days since soft delete for an object to be purged.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Objects deleted per transaction.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["older_than"] < 0:
+            raise CommandError("--older-than must not be negative")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        cutoff = timezone.now() - timedelta(days=options["older_than"])
+        total = purge_productivities(cutoff, options["batch_size"])
+        self.stdout.write(f"Purged {total} Productivity objects")
@@ -0,0 +1,39 @@
+"""Command to recompute completion rollups from check history."""
+
+from typing import Any
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+
+# pylint: disable=wrong-import-order
+from productivity.rollups import DEFAULT_BATCH_SIZE, rebuild_rollups
+
+# pylint: enable=wrong-import-order
+
+
+class Command(BaseCommand):
+    """Replace completion rollups with counts from check history.
+
+    - Run once after migrating, as checks recorded before rollups existed
+    are not counted, or to repair rollups.
+    """
+
+    help = "Recompute completion rollups from check history."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Rollups inserted per statement.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        total = rebuild_rollups(options["batch_size"])
+        self.stdout.write(f"Rebuilt {total} rollups")
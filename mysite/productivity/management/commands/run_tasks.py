@@ -0,0 +1,40 @@
+"""Command to run background tasks in a worker process."""
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+# pylint: disable=wrong-import-order
+from productivity.tasks import POLL_INTERVAL, run_worker
+
+# pylint: enable=wrong-import-order
+
+
+class Command(BaseCommand):
+    """Claim and run tasks from `Task` table until interrupted.
+
+    - Several workers may run at the same time, each task is claimed by one.
+    """
+
+    help = "Run background tasks."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=POLL_INTERVAL,
+            help="Seconds to wait before checking again if no task is due.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no task is due.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            count = run_worker(options["poll_interval"], options["once"])
+        except KeyboardInterrupt:
+            return
+
+        self.stdout.write(f"Ran {count} tasks")
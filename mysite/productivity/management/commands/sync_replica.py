@@ -0,0 +1,38 @@
+"""Command to copy SQLite primary database to SQLite replicas."""
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# pylint: disable=wrong-import-order
+from mysite.routers import get_replicas
+
+# pylint: enable=wrong-import-order
+
+
+class Command(BaseCommand):
+    """Copy primary database to each replica in `DATABASE_REPLICAS`.
+
+    - Stands in for replication when trying replica routing locally with
+    SQLite files. Uses SQLite online backup, so primary stays usable.
+    """
+
+    help = "Copy SQLite primary database to SQLite replicas."
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        replicas = get_replicas()
+        if not replicas:
+            raise CommandError("No replica in DATABASE_REPLICAS")
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        for alias in [DEFAULT_DB_ALIAS, *replicas]:
+            if connections[alias].vendor != "sqlite":
+                raise CommandError(f"Database {alias} is not SQLite")
+
+        primary.ensure_connection()
+        for alias in replicas:
+            replica = connections[alias]
+            replica.ensure_connection()
+            primary.connection.backup(replica.connection)
+            self.stdout.write(f"Copied {DEFAULT_DB_ALIAS} to {alias}")
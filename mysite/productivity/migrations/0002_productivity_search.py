@@ -0,0 +1,104 @@
+from django.db import migrations
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE productivity_productivity_fts USING fts5(
+        item,
+        "group",
+        content='productivity_productivity',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER productivity_productivity_fts_insert
+    AFTER INSERT ON productivity_productivity
+    BEGIN
+        INSERT INTO productivity_productivity_fts(rowid, item, "group")
+        VALUES (new.id, new.item, new."group");
+    END
+    """,
+    """
+    CREATE TRIGGER productivity_productivity_fts_delete
+    AFTER DELETE ON productivity_productivity
+    BEGIN
+        INSERT INTO productivity_productivity_fts(
+            productivity_productivity_fts, rowid, item, "group"
+        )
+        VALUES ('delete', old.id, old.item, old."group");
+    END
+    """,
+    """
+    CREATE TRIGGER productivity_productivity_fts_update
+    AFTER UPDATE OF item, "group" ON productivity_productivity
+    BEGIN
+        INSERT INTO productivity_productivity_fts(
+            productivity_productivity_fts, rowid, item, "group"
+        )
+        VALUES ('delete', old.id, old.item, old."group");
+        INSERT INTO productivity_productivity_fts(rowid, item, "group")
+        VALUES (new.id, new.item, new."group");
+    END
+    """,
+    """
+    INSERT INTO productivity_productivity_fts(productivity_productivity_fts)
+    VALUES ('rebuild')
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER productivity_productivity_fts_update",
+    "DROP TRIGGER productivity_productivity_fts_delete",
+    "DROP TRIGGER productivity_productivity_fts_insert",
+    "DROP TABLE productivity_productivity_fts",
+]
+
+POSTGRESQL_FORWARD = [
+    """
+    CREATE INDEX productivity_productivity_search
+    ON productivity_productivity
+    USING GIN (to_tsvector('simple', item || ' ' || "group"))
+    """,
+]
+
+POSTGRESQL_REVERSE = [
+    "DROP INDEX productivity_productivity_search",
+]
+
+
+def run_statements(
+    schema_editor: BaseDatabaseSchemaEditor,
+    statements_by_vendor: dict[str, list[str]],
+) -> None:
+    """Execute SQL statements for database vendor, skip other vendors."""
+    for statement in statements_by_vendor.get(
+        schema_editor.connection.vendor, []
+    ):
+        schema_editor.execute(statement)
+
+
+def forward(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    run_statements(
+        schema_editor,
+        {"sqlite": SQLITE_FORWARD, "postgresql": POSTGRESQL_FORWARD},
+    )
+
+
+def reverse(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    run_statements(
+        schema_editor,
+        {"sqlite": SQLITE_REVERSE, "postgresql": POSTGRESQL_REVERSE},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("productivity", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, reverse),
+    ]
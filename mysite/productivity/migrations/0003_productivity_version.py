@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("productivity", "0002_productivity_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productivity",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
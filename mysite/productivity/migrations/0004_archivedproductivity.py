@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("productivity", "0003_productivity_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedProductivity",
+            fields=[
+                ("id", models.IntegerField(primary_key=True, serialize=False)),
+                ("item", models.CharField(max_length=200)),
+                (
+                    "frequency",
+                    models.IntegerField(
+                        choices=[
+                            (0, "Key"),
+                            (1, "Loop"),
+                            (2, "Day"),
+                            (3, "Week"),
+                            (4, "Month"),
+                        ]
+                    ),
+                ),
+                ("group", models.CharField(max_length=200)),
+                ("last_check", models.DateTimeField()),
+                ("last_check_undo", models.DateTimeField()),
+                ("version", models.PositiveIntegerField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
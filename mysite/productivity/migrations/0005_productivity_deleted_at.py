@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("productivity", "0004_archivedproductivity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productivity",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="productivity",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["id"],
+                name="productivity_live_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productivity",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", False)),
+                fields=["deleted_at"],
+                name="productivity_deleted_idx",
+            ),
+        ),
+    ]
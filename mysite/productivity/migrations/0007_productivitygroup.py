@@ -0,0 +1,131 @@
+import importlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+# Full-text index over group column, see 0002_productivity_search.
+# Recreated over group names by `install_search_index` after `migrate`.
+SQLITE_DROP_SEARCH = [
+    "DROP TRIGGER IF EXISTS productivity_productivity_fts_update",
+    "DROP TRIGGER IF EXISTS productivity_productivity_fts_delete",
+    "DROP TRIGGER IF EXISTS productivity_productivity_fts_insert",
+    "DROP TABLE IF EXISTS productivity_productivity_fts",
+]
+
+POSTGRESQL_DROP_SEARCH = [
+    "DROP INDEX IF EXISTS productivity_productivity_search",
+]
+
+
+def drop_search_index(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    statements = {
+        "sqlite": SQLITE_DROP_SEARCH,
+        "postgresql": POSTGRESQL_DROP_SEARCH,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    drop_search_index(apps, schema_editor)
+    importlib.import_module(
+        "productivity.migrations.0002_productivity_search"
+    ).forward(apps, schema_editor)
+
+
+def create_groups(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    """Create a group per distinct name, then point objects to it."""
+    productivity_model = apps.get_model("productivity", "Productivity")
+    group_model = apps.get_model("productivity", "ProductivityGroup")
+
+    group_model.objects.bulk_create(
+        group_model(name=name)
+        for name in productivity_model.objects.values_list("group", flat=True)
+        .distinct()
+        .order_by("group")
+    )
+    for group in group_model.objects.all():
+        productivity_model.objects.filter(group=group.name).update(
+            group_ref=group
+        )
+
+
+def restore_group_names(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    productivity_model = apps.get_model("productivity", "Productivity")
+    group_model = apps.get_model("productivity", "ProductivityGroup")
+
+    for group in group_model.objects.all():
+        productivity_model.objects.filter(group_ref=group).update(
+            group=group.name
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("productivity", "0006_task"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductivityGroup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=200, unique=True)),
+            ],
+        ),
+        migrations.RunPython(drop_search_index, create_search_index),
+        migrations.AddField(
+            model_name="productivity",
+            name="group_ref",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="productivity.productivitygroup",
+            ),
+        ),
+        migrations.RunPython(create_groups, restore_group_names),
+        # Default lets reverse add the column back to existing rows.
+        migrations.AlterField(
+            model_name="productivity",
+            name="group",
+            field=models.CharField(default="", max_length=200),
+        ),
+        migrations.RemoveField(
+            model_name="productivity",
+            name="group",
+        ),
+        migrations.RenameField(
+            model_name="productivity",
+            old_name="group_ref",
+            new_name="group",
+        ),
+        migrations.AlterField(
+            model_name="productivity",
+            name="group",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="productivities",
+                to="productivity.productivitygroup",
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:09
+
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+from productivity.positions import spread_keys
+
+
+def assign_positions(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    """Spread position keys per group, in order of ID."""
+    productivity_model = apps.get_model("productivity", "Productivity")
+
+    group_ids = (
+        productivity_model.objects.values_list("group", flat=True)
+        .distinct()
+        .order_by()
+    )
+    for group_id in group_ids:
+        objs = list(
+            productivity_model.objects.filter(group=group_id)
+            .order_by("id")
+            .only("id")
+        )
+        for obj, position in zip(objs, spread_keys(len(objs))):
+            obj.position = position
+        productivity_model.objects.bulk_update(
+            objs, ["position"], batch_size=500
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("productivity", "0007_productivitygroup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productivity",
+            name="position",
+            field=models.CharField(blank=True, default="", max_length=200),
+        ),
+        migrations.RunPython(assign_positions, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="productivity",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["group", "position", "id"],
+                name="productivity_position_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+
+def record_last_checks(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    """Start history of each object with its `last_check`."""
+    productivity_model = apps.get_model("productivity", "Productivity")
+    check_model = apps.get_model("productivity", "ProductivityCheck")
+
+    check_model.objects.bulk_create(
+        (
+            check_model(productivity_id=productivity_id, checked_at=last_check)
+            for productivity_id, last_check in (
+                productivity_model.objects.values_list("id", "last_check")
+                .order_by("id")
+                .iterator()
+            )
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("productivity", "0008_productivity_position"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductivityCheck",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("checked_at", models.DateTimeField()),
+                (
+                    "productivity",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="checks",
+                        to="productivity.productivity",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["productivity", "checked_at"],
+                        name="productivitycheck_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(record_last_checks, migrations.RunPython.noop),
+    ]
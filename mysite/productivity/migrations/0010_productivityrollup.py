@@ -0,0 +1,67 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("productivity", "0009_productivitycheck"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductivityRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "frequency",
+                    models.IntegerField(
+                        choices=[
+                            (0, "Key"),
+                            (1, "Loop"),
+                            (2, "Day"),
+                            (3, "Week"),
+                            (4, "Month"),
+                        ]
+                    ),
+                ),
+                ("period_start", models.DateField()),
+                ("checks", models.IntegerField(default=0)),
+                ("done", models.IntegerField(default=0)),
+                ("total", models.IntegerField(default=0)),
+                (
+                    "group",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="productivity.productivitygroup",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["period_start"],
+                        name="productivityrollup_period_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="productivityrollup",
+            constraint=models.UniqueConstraint(
+                fields=("group", "frequency", "period_start"),
+                name="productivityrollup_unique",
+            ),
+        ),
+    ]
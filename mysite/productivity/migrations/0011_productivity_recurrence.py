@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("productivity", "0010_productivityrollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedproductivity",
+            name="recurrence",
+            field=models.CharField(blank=True, default="", max_length=200),
+        ),
+        migrations.AddField(
+            model_name="productivity",
+            name="recurrence",
+            field=models.CharField(blank=True, default="", max_length=200),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("productivity", "0012_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="productivity",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["frequency", "id"],
+                name="productivity_frequency_idx",
+            ),
+        ),
+    ]
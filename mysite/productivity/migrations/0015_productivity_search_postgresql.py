@@ -0,0 +1,49 @@
+import importlib
+
+from django.db import migrations
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+# Replaces index of 0002_productivity_search, dropped by
+# 0007_productivitygroup, one index per table, see `search.POSTGRESQL_SQL`.
+POSTGRESQL_FORWARD = [
+    """
+    CREATE INDEX productivity_productivity_item_search
+    ON productivity_productivity
+    USING GIN (to_tsvector('simple', item))
+    WHERE deleted_at IS NULL
+    """,
+    """
+    CREATE INDEX productivity_productivitygroup_name_search
+    ON productivity_productivitygroup
+    USING GIN (to_tsvector('simple', name))
+    """,
+]
+
+POSTGRESQL_REVERSE = [
+    "DROP INDEX productivity_productivitygroup_name_search",
+    "DROP INDEX productivity_productivity_item_search",
+]
+
+
+def forward(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    importlib.import_module(
+        "productivity.migrations.0002_productivity_search"
+    ).run_statements(schema_editor, {"postgresql": POSTGRESQL_FORWARD})
+
+
+def reverse(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    importlib.import_module(
+        "productivity.migrations.0002_productivity_search"
+    ).run_statements(schema_editor, {"postgresql": POSTGRESQL_REVERSE})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("productivity", "0014_cachegeneration"),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, reverse),
+    ]
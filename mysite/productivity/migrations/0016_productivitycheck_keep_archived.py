@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("productivity", "0015_productivity_search_postgresql"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="productivitycheck",
+            name="productivity",
+            field=models.ForeignKey(
+                db_constraint=False,
+                db_index=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="checks",
+                to="productivity.productivity",
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("productivity", "0016_productivitycheck_keep_archived"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductivityEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("action", models.CharField(max_length=6)),
+                ("productivity_id", models.BigIntegerField(null=True)),
+            ],
+        ),
+    ]
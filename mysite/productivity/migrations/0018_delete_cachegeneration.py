@@ -0,0 +1,16 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:53
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("productivity", "0017_productivityevent"),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name="CacheGeneration",
+        ),
+    ]
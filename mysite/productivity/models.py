@@ -1,16 +1,747 @@
+# pylint: disable=too-many-lines
 """Models for productivity app."""
 
 import logging
-from datetime import datetime
+import operator
+from collections import Counter
+from collections.abc import (
+    Callable,
+    Collection,
+    Iterable,
+    Mapping,
+    Sequence,
+)
+from datetime import date, datetime, time, timedelta
+from functools import reduce
+from typing import Any, Optional, cast
 
+from django.conf import settings
+from django.core.cache import caches
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from productivity import cache, events, positions, search
+from productivity.recurrence import Scheduler, get_due, parse_rule
+from productivity.validation import FieldsValidator
 
 logger = logging.getLogger(__name__)
 
+CHECK_BATCH_SIZE = 2000
+
+EPOCH = datetime(1970, 1, 1)
+
+GROUP_IDS_TIMEOUT = 300
+
+
+def to_epoch(dt: Optional[datetime]) -> Optional[int]:
+    """Convert naive datetime in UTC to integer seconds since epoch.
+
+    Args:
+        dt:
+            Datetime object.
+
+    Returns:
+        Seconds since epoch, None if datetime is None.
+    """
+    return (dt - EPOCH) // timedelta(seconds=1) if dt else None
+
+
+def get_rollup_start(
+    frequency: "Productivity.Frequency", dt: datetime
+) -> datetime:
+    """Return start of period counting a check in rollups.
+
+    Args:
+        frequency:
+            Frequency of checked object.
+        dt:
+            Datetime of check.
+
+    Returns:
+        Start of period of Frequency, start of day for KEY and LOOP.
+    """
+    return frequency.get_period_start(dt) or datetime.combine(
+        dt.date(), time()
+    )
+
+
+class VersionConflictError(Exception):
+    """Productivity object was changed since expected version."""
+
+
+class ProductivityGroupQuerySet(models.QuerySet["ProductivityGroup"]):
+    """QuerySet that invalidates cached values on bulk writes, including
+    cached map of group names, see `ProductivityGroupManager`."""
+
+    def bulk_create(
+        self, objs: Iterable["ProductivityGroup"], *args: Any, **kwargs: Any
+    ) -> list["ProductivityGroup"]:
+        """Override method in base class, see class docstring."""
+        created = super().bulk_create(objs, *args, **kwargs)
+        cache.invalidate()
+
+        return created
+
+    def delete(self) -> tuple[int, dict[str, int]]:
+        """Override method in base class, see class docstring."""
+        result = super().delete()
+        cache.invalidate()
+
+        return result
+
+    def update(self, **kwargs: Any) -> int:
+        """Override method in base class, see class docstring."""
+        rows = super().update(**kwargs)
+        cache.invalidate()
+
+        return rows
+
+
+ProductivityGroupManagerBase = models.Manager.from_queryset(
+    ProductivityGroupQuerySet
+)
+
+
+class ProductivityGroupManager(
+    ProductivityGroupManagerBase["ProductivityGroup"]
+):
+    """Manager resolving group names through a cached name to ID map.
+
+    - Map is cached under a key of `cache.make_key`, so every group write,
+    which invalidates cached values, is seen by all processes. Writes are
+    `ProductivityGroup.save` and `delete`, and bulk writes of
+    `ProductivityGroupQuerySet`.
+    - Map expires after `GROUP_IDS_TIMEOUT` seconds. It is not cached while
+    in a transaction, which could roll back a group it created.
+    """
+
+    def check_name(self, name: str) -> None:
+        """Validate name of a group to be created.
+
+        Args:
+            name:
+                Group name.
+
+        Raises:
+            django.core.exceptions.ValidationError:
+                Invalid name, with messages under `group`.
+        """
+        try:
+            validate_group(ProductivityGroup(name=name))
+        except ValidationError as exc:
+            raise ValidationError({"group": exc.messages}) from exc
+
+    def delete_group(self, group_id: int) -> bool:
+        """Soft delete objects of a group, then the group if unused.
+
+        - Soft deleted objects keep their group, so each can be restored
+        with `restore`. The group row, and with it its name, is deleted once
+        no object references it, such as for an empty group.
+
+        Args:
+            group_id:
+                Group ID.
+
+        Returns:
+            True if group existed.
+        """
+        with transaction.atomic():
+            if not self.filter(id=group_id).exists():
+                return False
+
+            Productivity.objects.soft_delete_group(group_id)
+            self.filter(id=group_id, productivities__isnull=True).delete()
+
+        return True
+
+    def get_id(self, name: str) -> int:
+        """Return ID of group by name, creating group if missing.
+
+        Args:
+            name:
+                Group name.
+
+        Returns:
+            Group ID.
+
+        Raises:
+            django.core.exceptions.ValidationError:
+                Invalid name, with messages under `group`.
+        """
+        group_id = self.get_ids().get(name)
+        if group_id is not None:
+            return group_id
+
+        self.check_name(name)
+        group, _ = self.get_or_create(name=name)
+
+        return group.id
+
+    def get_ids(self) -> dict[str, int]:
+        """Return map of group name to ID."""
+        key = cache.make_key("group_ids")
+        ids: Optional[dict[str, int]] = caches["default"].get(key)
+        if ids is None:
+            ids = dict(self.values_list("name", "id"))
+            if not transaction.get_connection().in_atomic_block:
+                caches["default"].set(key, ids, GROUP_IDS_TIMEOUT)
+
+        return ids
+
+    def get_names(self) -> dict[int, str]:
+        """Return map of group ID to name."""
+        return {group_id: name for name, group_id in self.get_ids().items()}
+
+    def rename(self, group_id: int, name: str) -> Optional[str]:
+        """Rename group in a single UPDATE, its objects are not written.
+
+        - Search index entries of its objects are replaced in the same
+        transaction, see `search.reindex_group`.
+        - Archived objects, which store the group by name, are renamed with
+        a second UPDATE, so their checks still resolve to the group, see
+        `rollups.rebuild_rollups`.
+
+        Args:
+            group_id:
+                Group ID.
+            name:
+                New group name, not used by another group.
+
+        Returns:
+            Previous group name, None if group does not exist.
+
+        Raises:
+            django.core.exceptions.ValidationError:
+                Invalid name, with messages under `name`.
+            django.db.IntegrityError:
+                Name is used by another group.
+        """
+        validate_group(ProductivityGroup(name=name))
+        with transaction.atomic():
+            old_name = (
+                self.filter(id=group_id).values_list("name", flat=True).first()
+            )
+            if old_name is None:
+                return None
+
+            self.filter(id=group_id).update(name=name)
+            ArchivedProductivity.objects.filter(group=old_name).update(
+                group=name
+            )
+            search.reindex_group(group_id, old_name, name)
+        events.publish_change("bulk", None)
+
+        return old_name
+
+
+class ProductivityGroup(models.Model):
+    """Group of Productivity objects, stored once and referenced by ID.
+
+    - Groups are created on first use by `ProductivityGroupManager.get_id`,
+    and kept when their objects are deleted, until deleted by
+    `ProductivityGroupManager.delete_group`.
+    """
+
+    name = models.CharField(max_length=200, unique=True)
+
+    objects = ProductivityGroupManager()
+
+    def __str__(self) -> str:
+        return self.name
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        """Override method in base class, invalidate cached values."""
+        result = super().delete(*args, **kwargs)
+        cache.invalidate()
+
+        return result
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Override method in base class, invalidate cached values."""
+        super().save(*args, **kwargs)
+        cache.invalidate()
+
+
+class ProductivityQuerySet(models.QuerySet["Productivity"]):
+    """QuerySet that invalidates cached values and publishes change on bulk
+    writes."""
+
+    def bulk_create(
+        self,
+        objs: Iterable["Productivity"],
+        *args: Any,
+        validate: bool = True,
+        **kwargs: Any,
+    ) -> list["Productivity"]:
+        """Override method in base class, see class docstring.
+
+        - Groups of objects with `new_group_name` are created, in the same
+        transaction as the objects, see `Productivity.resolve_group`.
+        - Objects without `position` are appended to their group, in order.
+        - Validate model fields of each object with `validate_productivity`,
+        unless `validate` is False for objects built by trusted code.
+        """
+        objs = list(objs)
+        if any(obj.new_group_name is not None for obj in objs):
+            with transaction.atomic(using=self.db, savepoint=False):
+                for obj in objs:
+                    obj.resolve_group()
+                return self.bulk_create(
+                    objs, *args, validate=validate, **kwargs
+                )
+
+        next_positions: dict[int, Optional[str]] = {}
+        for obj in objs:
+            if not obj.position:
+                if obj.group_id not in next_positions:
+                    next_positions[obj.group_id] = (
+                        self.model.objects.last_position(obj.group_id)
+                    )
+                obj.position = positions.key_between(
+                    next_positions[obj.group_id], None
+                )
+                next_positions[obj.group_id] = obj.position
+        if validate:
+            for obj in objs:
+                validate_productivity(obj)
+
+        created = super().bulk_create(objs, *args, **kwargs)
+        cache.invalidate()
+        events.publish_change("bulk", None)
+
+        return created
+
+    def delete(self, keep_checks: bool = False) -> tuple[int, dict[str, int]]:
+        """Override method in base class, see class docstring.
+
+        - Checks of deleted objects are deleted in the same transaction, as
+        by a cascade, unless `keep_checks`, as for archived objects, see
+        `ProductivityCheck`.
+        """
+        with transaction.atomic(using=self.db, savepoint=False):
+            if not keep_checks:
+                self.delete_checks()
+            result = super().delete()
+        cache.invalidate()
+        events.publish_change("bulk", None)
+
+        return result
+
+    def delete_checks(self) -> int:
+        """Delete checks of objects in this QuerySet.
+
+        Returns:
+            Number of checks deleted.
+        """
+        return ProductivityCheck.objects.filter(
+            productivity_id__in=self.values("id")
+        ).delete()[0]
+
+    def due(
+        self, until: date, limit: Optional[int] = None
+    ) -> list[tuple[date, int]]:
+        """Return objects due by a date, earliest first.
+
+        - Due date is the next occurrence of `recurrence`, or of default
+        rule of Frequency, after day of `last_check`, see
+        `productivity.recurrence`. Objects without either are never due.
+
+        Args:
+            until:
+                Last due date to include.
+            limit:
+                Maximum number of objects, None for no limit.
+
+        Returns:
+            Due date and ID per object, ordered by both.
+        """
+        default_rules = {
+            frequency.value: frequency.get_default_rule()
+            for frequency in Productivity.Frequency
+        }
+        rows = (
+            self.exclude(
+                recurrence="",
+                frequency__in=[
+                    frequency
+                    for frequency, rule in default_rules.items()
+                    if rule is None
+                ],
+            )
+            .order_by()
+            .values_list("id", "frequency", "recurrence", "last_check")
+        )
+
+        scheduler = Scheduler(
+            (
+                get_due(
+                    rule or cast(str, default_rules[frequency]),
+                    last_check.date(),
+                ),
+                productivity_id,
+            )
+            for productivity_id, frequency, rule, last_check in rows.iterator()
+        )
+
+        return scheduler.pop_due(until, limit)
+
+    def last_position(self, group_id: int) -> Optional[str]:
+        """Return highest `position` of objects of a group.
+
+        Args:
+            group_id:
+                Group ID.
+
+        Returns:
+            Position key, None if group has no object.
+        """
+        return (
+            self.filter(group_id=group_id)
+            .order_by("-position")
+            .values_list("position", flat=True)
+            .first()
+        )
+
+    def mark_checked(self, now: datetime) -> int:
+        """Check all objects of this QuerySet, in set-based queries.
+
+        - Same effect as checking each object with `save`, and recording it
+        with `ProductivityCheckQuerySet.record`, in one UPDATE of objects,
+        batched INSERTs of checks and one UPDATE per rollup.
+
+        Args:
+            now:
+                Datetime of check.
+
+        Returns:
+            Number of objects checked.
+        """
+        checks: Counter[tuple[int, int, date]] = Counter()
+        done: Counter[tuple[int, int, date]] = Counter()
+        with transaction.atomic():
+            batch: list[ProductivityCheck] = []
+            for productivity_id, group_id, frequency, last_check in (
+                self.order_by()
+                .values_list("id", "group", "frequency", "last_check")
+                .iterator(chunk_size=CHECK_BATCH_SIZE)
+            ):
+                start = get_rollup_start(
+                    Productivity.Frequency(frequency), now
+                )
+                key = (group_id, frequency, start.date())
+                checks[key] += 1
+                done[key] += last_check < start
+                batch.append(
+                    ProductivityCheck(
+                        productivity_id=productivity_id, checked_at=now
+                    )
+                )
+                if len(batch) >= CHECK_BATCH_SIZE:
+                    ProductivityCheck.objects.bulk_create(batch)
+                    batch = []
+            ProductivityCheck.objects.bulk_create(batch)
+
+            rows = self.update(
+                last_check=now,
+                last_check_undo=models.F("last_check"),
+                version=models.F("version") + 1,
+            )
+            for key, count in checks.items():
+                ProductivityRollup.objects.add(*key, count, done[key])
+
+        return rows
+
+    def move(
+        self, productivity_id: int, after_id: Optional[int]
+    ) -> Optional[str]:
+        """Move an object after another of its group, in a single UPDATE.
+
+        - Only the moved object is written, with a `position` between its
+        new neighbours, see `productivity.positions`.
+
+        Args:
+            productivity_id:
+                ID (primary key) of Productivity object to move.
+            after_id:
+                ID of object of the same group to move after, None to move
+                first.
+
+        Returns:
+            New position key, None if an object is not found.
+        """
+        moved = self.filter(id=productivity_id).values("group_id").first()
+        if moved is None:
+            return None
+        siblings = self.filter(group_id=moved["group_id"]).exclude(
+            id=productivity_id
+        )
+
+        before = None
+        if after_id is not None:
+            before = (
+                siblings.filter(id=after_id)
+                .values_list("position", flat=True)
+                .first()
+            )
+            if before is None:
+                return None
+            siblings = siblings.filter(position__gt=before)
+        after = (
+            siblings.order_by("position")
+            .values_list("position", flat=True)
+            .first()
+        )
+
+        position = positions.key_between(before, after)
+        if not self.update_object(productivity_id, "save", position=position):
+            return None
+
+        return position
+
+    def purge(self) -> int:
+        """Hard delete soft deleted objects in this QuerySet.
+
+        - Cached values are not invalidated and no change is published, as
+        soft deleted objects are not visible.
+
+        Returns:
+            Number of objects deleted.
+        """
+        queryset = self.filter(deleted_at__isnull=False)
+        with transaction.atomic(using=self.db, savepoint=False):
+            queryset.delete_checks()
+            # Base class delete, as `delete` publishes `bulk`
+            rows, _ = super(ProductivityQuerySet, queryset).delete()
+
+        return rows
+
+    def rebalance_positions(self, group_id: int) -> int:
+        """Respread `position` keys of a group, keeping their order.
+
+        - Keys get longer as objects are moved between close neighbours,
+        this shortens them again, see `positions.needs_rebalance`.
+
+        Args:
+            group_id:
+                Group ID.
+
+        Returns:
+            Number of objects updated.
+        """
+        with transaction.atomic():
+            objs = list(
+                self.filter(group_id=group_id)
+                .order_by("position", "id")
+                .only("id", "position")
+            )
+            for obj, position in zip(objs, positions.spread_keys(len(objs))):
+                obj.position = position
+
+            return self.bulk_update(objs, ["position"])
+
+    def restore(self, productivity_id: int) -> bool:
+        """Undo soft delete of an object in a single UPDATE.
+
+        Args:
+            productivity_id:
+                ID (primary key) of Productivity object.
+
+        Returns:
+            True if object was soft deleted and is restored.
+        """
+        return self.filter(deleted_at__isnull=False).update_object(
+            productivity_id,
+            "save",
+            deleted_at=None,
+            version=models.F("version") + 1,
+        )
+
+    def soft_delete(self, productivity_id: int) -> bool:
+        """Mark an object deleted in a single UPDATE, without loading it.
+
+        Args:
+            productivity_id:
+                ID (primary key) of Productivity object.
+
+        Returns:
+            True if object existed and was not deleted yet.
+        """
+        return self.filter(deleted_at__isnull=True).update_object(
+            productivity_id,
+            "delete",
+            deleted_at=timezone.now(),
+            version=models.F("version") + 1,
+        )
+
+    def soft_delete_group(self, group_id: int) -> int:
+        """Mark all objects of a group deleted in a single UPDATE.
+
+        Args:
+            group_id:
+                Group ID.
+
+        Returns:
+            Number of objects deleted.
+        """
+        return self.filter(group_id=group_id).soft_delete_many()
+
+    def soft_delete_many(self) -> int:
+        """Mark all objects of this QuerySet deleted in a single UPDATE.
+
+        Returns:
+            Number of objects deleted.
+        """
+        return self.filter(deleted_at__isnull=True).update(
+            deleted_at=timezone.now(), version=models.F("version") + 1
+        )
+
+    def stale(self, cutoff: datetime) -> "ProductivityQuerySet":
+        """Filter objects to be archived.
+
+        - KEY and LOOP objects not checked since cutoff.
+        - All objects of groups with no object checked since cutoff.
+
+        Args:
+            cutoff:
+                Objects last checked before this datetime are stale.
+
+        Returns:
+            Filtered QuerySet.
+        """
+        inactive_groups = (
+            self.values("group")
+            .annotate(latest=models.Max("last_check"))
+            .filter(latest__lt=cutoff)
+            .values("group")
+        )
+
+        return self.filter(
+            models.Q(
+                frequency__in=[
+                    Productivity.Frequency.KEY,
+                    Productivity.Frequency.LOOP,
+                ],
+                last_check__lt=cutoff,
+            )
+            | models.Q(group__in=inactive_groups)
+        )
+
+    def undo_checks(self) -> int:
+        """Undo last check of all objects of this QuerySet, in set-based
+        queries.
+
+        - Same effect as undoing each check with `update_productivity`:
+        `last_check` and `last_check_undo` are swapped, checks after the
+        restored `last_check` are deleted and their rollups counted down,
+        see `ProductivityCheckQuerySet.record`.
+
+        Returns:
+            Number of objects updated.
+        """
+        removed: Counter[tuple[int, int, date]] = Counter()
+        undone: Counter[tuple[int, int, date]] = Counter()
+        periods: set[tuple[int, tuple[int, int, date]]] = set()
+        with transaction.atomic():
+            later = ProductivityCheck.objects.filter(
+                productivity__in=self.values("id"),
+                checked_at__gt=models.F("productivity__last_check_undo"),
+            )
+            for productivity_id, group_id, frequency, checked_at, current in (
+                later.order_by()
+                .values_list(
+                    "productivity",
+                    "productivity__group",
+                    "productivity__frequency",
+                    "checked_at",
+                    "productivity__last_check_undo",
+                )
+                .iterator(chunk_size=CHECK_BATCH_SIZE)
+            ):
+                start = get_rollup_start(
+                    Productivity.Frequency(frequency), checked_at
+                )
+                key = (group_id, frequency, start.date())
+                removed[key] += 1
+                # Checks left are not after current
+                if (productivity_id, key) not in periods:
+                    periods.add((productivity_id, key))
+                    undone[key] += current < start
+            later.delete()
+
+            rows = self.update(
+                last_check=models.F("last_check_undo"),
+                last_check_undo=models.F("last_check"),
+                version=models.F("version") + 1,
+            )
+            for key, count in removed.items():
+                ProductivityRollup.objects.add(*key, -count, -undone[key])
+
+        return rows
+
+    def update(self, **kwargs: Any) -> int:
+        """Override method in base class, see class docstring."""
+        rows = super().update(**kwargs)
+        cache.invalidate()
+        events.publish_change("bulk", None)
+
+        return rows
+
+    def update_object(
+        self, productivity_id: int, action: str, **kwargs: Any
+    ) -> bool:
+        """Update an object by ID, publishing change of that object only.
+
+        Args:
+            productivity_id:
+                ID (primary key) of Productivity object.
+            action:
+                Action to publish, see `events.publish_change`.
+            kwargs:
+                Field values, as for `update`.
+
+        Returns:
+            True if object is updated.
+        """
+        # Base class update, as `update` publishes `bulk`
+        rows = super(
+            ProductivityQuerySet, self.filter(id=productivity_id)
+        ).update(**kwargs)
+        if not rows:
+            return False
+
+        cache.invalidate()
+        events.publish_change(action, productivity_id)
+
+        return True
+
 
-class Productivity(models.Model):
-    """Productivity model."""
+ProductivityManagerBase = models.Manager.from_queryset(ProductivityQuerySet)
+
+
+class ProductivityManager(  # pylint: disable=too-few-public-methods
+    ProductivityManagerBase["Productivity"]
+):
+    """Manager of Productivity objects not soft deleted."""
+
+    def get_queryset(self) -> models.QuerySet["Productivity"]:
+        """Override method in base class, see class docstring."""
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class Productivity(  # pylint: disable=too-many-instance-attributes
+    models.Model
+):
+    """Productivity model.
+
+    - Objects are soft deleted by setting `deleted_at`, see
+    `ProductivityQuerySet.soft_delete`. Default manager `objects` leaves them
+    out, `all_objects` includes them.
+    - Objects are listed by group, then by `position`, a fractional key set
+    on save to append the object to its group, and by
+    `ProductivityQuerySet.move`.
+    """
 
     class Frequency(models.IntegerChoices):
         """Choices for Frequency field."""
@@ -21,16 +752,141 @@ class Productivity(models.Model):
         WEEK = 3
         MONTH = 4
 
+        def get_period_start(self, now: datetime) -> Optional[datetime]:
+            """Return start of current period.
+
+            - An item is done if checked since start of current period.
+            - DAY starts at midnight, WEEK on Monday, MONTH on the 1st.
+
+            Args:
+                now:
+                    Current datetime.
+
+            Returns:
+                Start of current period, None if Frequency has no period.
+            """
+            today = now.date()
+            if self == self.DAY:
+                start: Optional[date] = today
+            elif self == self.WEEK:
+                start = today - timedelta(days=today.weekday())
+            elif self == self.MONTH:
+                start = today.replace(day=1)
+            else:
+                start = None
+
+            return datetime.combine(start, time()) if start else None
+
+        def get_default_rule(self) -> Optional[str]:
+            """Return recurrence rule of objects without `recurrence`.
+
+            - Objects are due once their period ends, see
+            `get_period_start`.
+
+            Returns:
+                Rule, see `productivity.recurrence`, None if Frequency has
+                no period.
+            """
+            return {
+                self.DAY: "FREQ=DAILY",
+                self.WEEK: "FREQ=WEEKLY;BYDAY=MO",
+                self.MONTH: "FREQ=MONTHLY;BYMONTHDAY=1",
+            }.get(self)
+
+        def get_period_index(self, dt: datetime) -> int:
+            """Return number of period containing datetime.
+
+            - Consecutive periods have consecutive numbers, see
+            `get_period_start` for their start. KEY and LOOP, which have no
+            period, are numbered by day.
+
+            Args:
+                dt:
+                    Datetime.
+
+            Returns:
+                Period number.
+            """
+            day = dt.date().toordinal()
+            if self == self.WEEK:
+                # Day 1 of the proleptic Gregorian calendar is a Monday
+                return (day - 1) // 7
+            if self == self.MONTH:
+                return dt.year * 12 + dt.month - 1
+
+            return day
+
     item = models.CharField(max_length=200)
     frequency = models.IntegerField(choices=Frequency.choices)
-    group = models.CharField(max_length=200)
+    group = models.ForeignKey(
+        ProductivityGroup,
+        on_delete=models.PROTECT,
+        related_name="productivities",
+    )
     last_check = models.DateTimeField(auto_now=True)
     last_check_undo = models.DateTimeField(default=datetime.min)
+    version = models.PositiveIntegerField(default=1)
+    deleted_at = models.DateTimeField(null=True, blank=True, default=None)
+    position = models.CharField(max_length=200, blank=True, default="")
+    recurrence = models.CharField(max_length=200, blank=True, default="")
+
+    objects = ProductivityManager()
+    all_objects = ProductivityQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(deleted_at__isnull=True),
+                name="productivity_live_idx",
+            ),
+            models.Index(
+                fields=["frequency", "id"],
+                condition=models.Q(deleted_at__isnull=True),
+                name="productivity_frequency_idx",
+            ),
+            models.Index(
+                fields=["deleted_at"],
+                condition=models.Q(deleted_at__isnull=False),
+                name="productivity_deleted_idx",
+            ),
+            models.Index(
+                fields=["group", "position", "id"],
+                condition=models.Q(deleted_at__isnull=True),
+                name="productivity_position_idx",
+            ),
+        ]
+
+    LIST_ORDERING = ("group", "position", "id")
+
+    # Name of a group not created yet, see `resolve_group`
+    new_group_name: Optional[str] = None
+
+    SERIALIZED_FIELDS = (
+        "id",
+        "item",
+        "frequency",
+        "recurrence",
+        "group",
+        "last_check",
+        "last_check_undo",
+        "version",
+    )
 
     @classmethod
-    def deserialize_json(cls, json_obj: dict[str, str]) -> "Productivity":
+    def deserialize_json(cls, json_obj: Mapping[str, Any]) -> "Productivity":
         """Deserialize JSON to model.
 
+        - `frequency` is an enum name, or its integer value either as number
+        or as string of digits, as sent in form data.
+        - `group` is a group name. A missing group is not created here,
+        but by `save` or `bulk_create` in the transaction of the write, so
+        invalid objects and failed writes leave no group behind. Its name
+        is kept in `new_group_name` until then.
+        - `recurrence` is optional, see `parse_recurrence`.
+        - `last_check` and `last_check_undo` are optional, model default is
+        used if missing.
+
         Args:
             json_obj:
                 JSON object to deserialize.
@@ -44,27 +900,62 @@ class Productivity(models.Model):
             django.core.exceptions.ValidationError:
                 Model field fail validation.
         """
-        frequency_name = json_obj["frequency"].upper()
-        try:
-            frequency = cls.Frequency[frequency_name].value
-        except KeyError as exc:
-            raise ValidationError("Invalid enum name for Frequency") from exc
-
-        productivity = cls(
-            item=json_obj["item"],
-            frequency=frequency,
-            group=json_obj["group"],
-            last_check=cls.parse_iso_datetime(
-                json_obj["last_check"], "last_check"
-            ),
-            last_check_undo=cls.parse_iso_datetime(
-                json_obj["last_check_undo"], "last_check_undo"
+        kwargs = {
+            "item": json_obj["item"],
+            "frequency": cls.parse_frequency(json_obj["frequency"]),
+            "group_id": ProductivityGroup.objects.get_ids().get(
+                json_obj["group"]
             ),
-        )
-        productivity.clean_fields()
+        }
+        if "recurrence" in json_obj:
+            kwargs["recurrence"] = cls.parse_recurrence(json_obj["recurrence"])
+        for field_name in ("last_check", "last_check_undo"):
+            if field_name in json_obj:
+                kwargs[field_name] = cls.parse_iso_datetime(
+                    json_obj[field_name], field_name
+                )
+
+        productivity = cls(**kwargs)
+        if productivity.group_id is None:
+            ProductivityGroup.objects.check_name(json_obj["group"])
+            productivity.new_group_name = json_obj["group"]
+            validate_productivity(productivity, exclude=["group"])
+        else:
+            validate_productivity(productivity)
 
         return productivity
 
+    @classmethod
+    def parse_frequency(cls, value: Any) -> int:
+        """Parse frequency from enum name or integer value.
+
+        Args:
+            value:
+                Enum name, integer value, or integer value as string.
+
+        Returns:
+            Integer value, checked against choices by
+            `validate_productivity`.
+
+        Raises:
+            django.core.exceptions.ValidationError:
+                Value is not an enum name or an integer.
+        """
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+
+        if isinstance(value, str):
+            if value.isdigit():
+                return int(value)
+            try:
+                return cls.Frequency[value.upper()].value
+            except KeyError as exc:
+                raise ValidationError(
+                    "Invalid enum name for Frequency"
+                ) from exc
+
+        raise ValidationError("Invalid enum name for Frequency")
+
     @classmethod
     def parse_iso_datetime(cls, dt_iso: str, field_name: str) -> datetime:
         """Parse datetime string in ISO format into a datetime object.
@@ -84,13 +975,135 @@ class Productivity(models.Model):
         """
         try:
             dt = datetime.fromisoformat(dt_iso)
-        except ValueError as exc:
+        except (TypeError, ValueError) as exc:
             raise ValidationError(
                 f"Invalid date_string format for {field_name}"
             ) from exc
 
         return dt
 
+    @classmethod
+    def parse_recurrence(cls, value: Any) -> str:
+        """Parse recurrence rule into its canonical text.
+
+        Args:
+            value:
+                Rule, see `productivity.recurrence`, empty for default rule
+                of Frequency.
+
+        Returns:
+            Canonical rule text, empty if value is empty.
+
+        Raises:
+            django.core.exceptions.ValidationError:
+                Value is not a valid rule.
+        """
+        if value == "":
+            return ""
+        if not isinstance(value, str):
+            raise ValidationError("Invalid recurrence rule")
+        try:
+            return str(parse_rule(value))
+        except ValueError as exc:
+            raise ValidationError("Invalid recurrence rule") from exc
+
+    @classmethod
+    def serialize_rows(
+        cls,
+        fields: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        compact: bool = False,
+    ) -> list[Any]:
+        """Serialize rows of field values to JSON.
+
+        - Rows are from `values_list(*fields)`, so model instances are not
+        created.
+        - Default format is same as `serialize_json`, limited to `fields`.
+        - Compact format is a header row of field names followed by a list of
+        values per row, with `frequency` as integer and datetimes as integer
+        seconds since epoch.
+
+        Args:
+            fields:
+                Field names, each in `SERIALIZED_FIELDS`.
+            rows:
+                Field values per row, in order of `fields`.
+            compact:
+                Serialize to compact format.
+
+        Returns:
+            List of JSON objects, or header row and value lists if compact.
+        """
+        if compact:
+            converters = [COMPACT_CONVERTERS.get(f) for f in fields]
+            return [
+                list(fields),
+                *(
+                    [
+                        convert(value) if convert else value
+                        for convert, value in zip(converters, row)
+                    ]
+                    for row in rows
+                ),
+            ]
+
+        json_converters = [JSON_CONVERTERS.get(f) for f in fields]
+        return [
+            {
+                field: convert(value) if convert else value
+                for field, convert, value in zip(fields, json_converters, row)
+            }
+            for row in rows
+        ]
+
+    @classmethod
+    def summarize(cls, now: datetime) -> list[dict[str, Any]]:
+        """Count done and pending items per group and Frequency.
+
+        - Counted in a single `GROUP BY` query, without loading items, joined
+        to group table for names.
+
+        Args:
+            now:
+                Current datetime, to determine if items are done.
+
+        Returns:
+            List of counts, ordered by group and Frequency.
+                - group
+                - frequency
+                - total
+                - done
+                - pending
+        """
+        is_done = reduce(
+            operator.or_,
+            [
+                models.Q(frequency=frequency, last_check__gte=period_start)
+                for frequency in cls.Frequency
+                if (period_start := frequency.get_period_start(now))
+            ],
+        )
+
+        rows = (
+            cls.objects.values("group__name", "frequency")
+            .annotate(
+                total=models.Count("id"),
+                done=models.Count("id", filter=is_done),
+            )
+            .order_by("group__name", "frequency")
+        )
+
+        return [
+            {
+                "group": row["group__name"],
+                "frequency": cls.Frequency(row["frequency"]).name.title(),
+                "total": row["total"],
+                "done": row["done"],
+                "pending": row["total"] - row["done"],
+            }
+            for row in rows
+        ]
+
     def __str__(self) -> str:
         last_check = (
             self.last_check.strftime("%d %b %I:%M %p")
@@ -98,8 +1111,12 @@ class Productivity(models.Model):
             else ""
         )
 
+        group_name = ProductivityGroup.objects.get_names().get(
+            self.group_id, ""
+        )
+
         return (
-            f"[{self.get_frequency()}-{self.group}]"
+            f"[{self.get_frequency()}-{group_name}]"
             + " "
             + self.item
             + " "
@@ -117,36 +1134,566 @@ class Productivity(models.Model):
 
         return frequency_name
 
-    def save(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def _do_update(
+        self,
+        base_qs: models.QuerySet["Productivity"],
+        using: Optional[str],
+        pk_val: Any,
+        values: Collection[tuple["models.Field[Any, Any]", Any, Any]],
+        update_fields: Optional[Iterable[str]],
+        forced_update: bool,
+    ) -> bool:
         """Override method in base class.
 
+        - Increment `version` in the same UPDATE statement.
+        - If an expected version is passed to `save()`, update only if
+        `version` still matches it.
+        - If `last_check` is passed to `save()`, store it instead of current
+        time of `auto_now`.
+
+        Raises:
+            productivity.models.VersionConflictError:
+                `version` does not match expected version.
+        """
+        expected_version = getattr(self, "_expected_version", None)
+        if expected_version is not None:
+            base_qs = base_qs.filter(version=expected_version)
+
+        overrides: dict[str, Any] = {"version": models.F("version") + 1}
+        last_check = getattr(self, "_last_check", None)
+        if last_check is not None:
+            overrides["last_check"] = last_check
+
+        values = [
+            (field, model, overrides.get(field.attname, value))
+            for field, model, value in values
+        ]
+
+        updated = super()._do_update(
+            base_qs, using, pk_val, values, update_fields, forced_update
+        )
+        if updated:
+            self.version = (
+                self.version if expected_version is None else expected_version
+            ) + 1
+        elif expected_version is not None:
+            raise VersionConflictError(
+                f"Version {expected_version} is not current"
+            )
+
+        return updated
+
+    def delete(  # type: ignore[no-untyped-def]
+        self, *args, **kwargs
+    ) -> tuple[int, dict[str, int]]:
+        """Override method in base class.
+
+        - Delete checks of object in the same transaction.
+        - Invalidate cached values.
+        - Publish change.
+        """
+        productivity_id = self.id
+        with transaction.atomic():
+            ProductivityCheck.objects.filter(
+                productivity_id=productivity_id
+            ).delete()
+            result = super().delete(*args, **kwargs)
+        cache.invalidate()
+        events.publish_change("delete", productivity_id)
+
+        return result
+
+    def save(  # type: ignore[no-untyped-def]
+        self,
+        *args,
+        expected_version: Optional[int] = None,
+        last_check: Optional[datetime] = None,
+        validate: bool = True,
+        **kwargs,
+    ) -> None:
+        """Override method in base class.
+
+        - Create group of `new_group_name` in the same transaction, see
+        `resolve_group`.
         - Copy `last_check` to `last_check_undo` if not None.
-        - Validate model fields before save.
+        - Append object to its group if `position` is empty, as for a new
+        object or one moved to another group.
+        - Validate model fields before save, unless already validated by
+        caller.
+        - Increment `version` of existing object, see `_do_update`.
+        - Invalidate cached values.
+        - Publish change.
+
+        Args:
+            expected_version:
+                Update existing object only if its `version` in database
+                still matches, without locking the row.
+            last_check:
+                Store as `last_check` of existing object in the same UPDATE,
+                instead of current time of `auto_now`.
+            validate:
+                Validate model fields with `validate_productivity`. Pass
+                False only if fields were validated since last change, such
+                as by `deserialize_json`, or are set by trusted code.
 
         Raises:
             django.core.exceptions.ValidationError:
                 Invalid field data.
+            productivity.models.VersionConflictError:
+                `version` does not match `expected_version`.
         """
+        if self.new_group_name is not None:
+            with transaction.atomic():
+                self.resolve_group()
+                self.save(
+                    *args,
+                    expected_version=expected_version,
+                    last_check=last_check,
+                    validate=validate,
+                    **kwargs,
+                )
+            return
+
         if self.last_check:
             self.last_check_undo = self.last_check
 
-        self.clean_fields()
+        if not self.position:
+            self.position = positions.key_between(
+                Productivity.objects.last_position(self.group_id), None
+            )
 
+        if validate:
+            validate_productivity(self)
+
+        # pylint: disable=attribute-defined-outside-init
+        self._expected_version = expected_version
+        self._last_check = last_check
+        # pylint: enable=attribute-defined-outside-init
         super().save(*args, **kwargs)
+        if last_check is not None:
+            self.last_check = last_check
+        cache.invalidate()
+        events.publish_change("save", self.id)
+
+    def resolve_group(self) -> None:
+        """Set `group_id` to group of `new_group_name`, creating it if
+        missing, call in the transaction of the write.
 
-    def serialize_json(self) -> dict[str, str]:
+        Raises:
+            django.core.exceptions.ValidationError:
+                Invalid name, with messages under `group`.
+        """
+        if self.new_group_name is not None:
+            # pylint: disable-next=attribute-defined-outside-init
+            self.group_id = ProductivityGroup.objects.get_id(
+                self.new_group_name
+            )
+            self.new_group_name = None
+
+    def serialize_json(
+        self, group_names: Optional[Mapping[int, str]] = None
+    ) -> dict[str, str]:
         """Serialize model to JSON.
 
+        Args:
+            group_names:
+                Map of group ID to name, from
+                `ProductivityGroup.objects.get_names()` if None. Pass it
+                when serializing many objects.
+
         Returns:
             Dictionary mapping of serialized model in JSON.
         """
+        if group_names is None:
+            group_names = ProductivityGroup.objects.get_names()
+
         return {
             "id": str(self.id),
             "item": self.item,
             "frequency": self.get_frequency(),
-            "group": self.group,
+            "recurrence": self.recurrence,
+            "group": group_names.get(self.group_id, ""),
             "last_check": (
                 self.last_check.isoformat() if self.last_check else ""
             ),
             "last_check_undo": self.last_check_undo.isoformat(),
         }
+
+
+class ProductivityCheckQuerySet(models.QuerySet["ProductivityCheck"]):
+    """QuerySet of checks of Productivity objects."""
+
+    def record(
+        self, productivity: Productivity, previous: Optional[datetime]
+    ) -> None:
+        """Record change of `last_check` of an object, and its rollup.
+
+        - Call in the transaction writing `last_check`.
+        - A later `last_check` is a check, appended as a row. An earlier one
+        undoes checks, their rows after it are deleted.
+        - Counts of the rollup of each period are changed by the checks
+        added or removed, see `ProductivityRollupQuerySet.add`.
+
+        Args:
+            productivity:
+                Productivity object, with `last_check` after the change.
+            previous:
+                `last_check` before the change.
+        """
+        current = productivity.last_check
+        frequency = Productivity.Frequency(productivity.frequency)
+        checks = self.filter(productivity_id=productivity.id)
+
+        if previous is None or current > previous:
+            start = get_rollup_start(frequency, current)
+            is_first = not checks.filter(checked_at__gte=start).exists()
+            self.create(productivity_id=productivity.id, checked_at=current)
+            ProductivityRollup.objects.add(
+                productivity.group_id, frequency, start.date(), 1, is_first
+            )
+        elif current < previous:
+            removed = Counter(
+                get_rollup_start(frequency, checked_at)
+                for checked_at in checks.filter(
+                    checked_at__gt=current
+                ).values_list("checked_at", flat=True)
+            )
+            checks.filter(checked_at__gt=current).delete()
+            for start, count in removed.items():
+                # Checks left are not after current
+                is_done = (
+                    start <= current
+                    and checks.filter(checked_at__gte=start).exists()
+                )
+                ProductivityRollup.objects.add(
+                    productivity.group_id,
+                    frequency,
+                    start.date(),
+                    -count,
+                    -int(not is_done),
+                )
+
+
+class ProductivityCheck(models.Model):
+    """Check of a Productivity object, appended on each check.
+
+    - Rows are only inserted, and deleted on undo, by
+    `ProductivityCheckQuerySet.record`, never updated.
+    - Row is an object ID and a datetime, read through the index on both,
+    which also serves lookups by object, so the foreign key has no index of
+    its own.
+    - Rows outlive their object when it is archived, as
+    `ArchivedProductivity` keeps its ID, so check history still matches
+    rollups, see `rollups.rebuild_rollups`. The foreign key has no database
+    constraint for that reason. Hard deletes of objects delete their rows,
+    see `ProductivityQuerySet.delete`.
+    """
+
+    productivity = models.ForeignKey(
+        Productivity,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="checks",
+        db_index=False,
+    )
+    checked_at = models.DateTimeField()
+
+    objects = ProductivityCheckQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["productivity", "checked_at"],
+                name="productivitycheck_idx",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.productivity_id} ({self.checked_at.isoformat()})"
+
+
+class ProductivityRollupQuerySet(models.QuerySet["ProductivityRollup"]):
+    """QuerySet of check counts per group, Frequency and period."""
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def add(
+        self,
+        group_id: int,
+        frequency: int,
+        period_start: date,
+        checks: int,
+        done: int,
+    ) -> None:
+        """Add to counts of a rollup in a single UPDATE.
+
+        - Rollup is created if missing and counts are added, not removed.
+        - `total` is set to the number of objects of the group and
+        Frequency, in the same UPDATE.
+
+        Args:
+            group_id:
+                Group ID.
+            frequency:
+                Frequency value.
+            period_start:
+                Start date of period, see `get_rollup_start`.
+            checks:
+                Number of checks to add, negative to remove.
+            done:
+                Number of objects first checked in period to add, negative
+                to remove.
+        """
+        rollup = self.filter(
+            group_id=group_id, frequency=frequency, period_start=period_start
+        )
+        total = (
+            Productivity.objects.filter(group_id=group_id, frequency=frequency)
+            .order_by()
+            .values("group")
+            .annotate(count=models.Count("id"))
+            .values("count")
+        )
+        values = {
+            "checks": models.F("checks") + checks,
+            "done": models.F("done") + done,
+            "total": Coalesce(models.Subquery(total), 0),
+        }
+        if rollup.update(**values) or checks < 0 or done < 0:
+            return
+
+        try:
+            with transaction.atomic():
+                self.create(
+                    group_id=group_id,
+                    frequency=frequency,
+                    period_start=period_start,
+                )
+        except IntegrityError:
+            # Created by a concurrent check
+            pass
+        rollup.update(**values)
+
+
+class ProductivityRollup(models.Model):
+    """Check counts of a group and Frequency in a period.
+
+    - Kept up to date by `ProductivityCheckQuerySet.record`, and rebuilt
+    from checks by `rebuild_rollups` command, see `productivity.rollups`.
+    - Period of DAY, WEEK and MONTH is that of the Frequency, see
+    `Productivity.Frequency.get_period_start`, KEY and LOOP are counted per
+    day.
+    - `done` is the number of objects checked in period, out of `total`
+    objects of the group and Frequency as of the last check.
+    """
+
+    group = models.ForeignKey(
+        ProductivityGroup, on_delete=models.CASCADE, related_name="+"
+    )
+    frequency = models.IntegerField(choices=Productivity.Frequency.choices)
+    period_start = models.DateField()
+    checks = models.IntegerField(default=0)
+    done = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+
+    objects = ProductivityRollupQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["group", "frequency", "period_start"],
+                name="productivityrollup_unique",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["period_start"], name="productivityrollup_period_idx"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return (
+            f"[{FREQUENCY_NAMES.get(self.frequency, '')}-{self.group_id}] "
+            f"{self.period_start.isoformat()} ({self.done}/{self.total})"
+        )
+
+
+class ArchivedProductivity(models.Model):
+    """Productivity object moved out of Productivity table.
+
+    - Stale objects are moved by `archive_productivity` command, so queries
+    on Productivity table do not scan them.
+    - `id` is kept from Productivity object, which never reuses IDs, so IDs
+    are unique across both tables.
+    """
+
+    id = models.IntegerField(primary_key=True)
+    item = models.CharField(max_length=200)
+    frequency = models.IntegerField(choices=Productivity.Frequency.choices)
+    recurrence = models.CharField(max_length=200, blank=True, default="")
+    group = models.CharField(max_length=200)
+    last_check = models.DateTimeField()
+    last_check_undo = models.DateTimeField()
+    version = models.PositiveIntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def from_productivity(
+        cls, productivity: Productivity, group_names: Mapping[int, str]
+    ) -> "ArchivedProductivity":
+        """Copy Productivity object to an unsaved archived object.
+
+        - Group is stored by name, so archived objects do not reference
+        groups.
+
+        Args:
+            productivity:
+                Productivity object.
+            group_names:
+                Map of group ID to name.
+
+        Returns:
+            Model instance.
+        """
+        return cls(
+            **{
+                field_name: getattr(productivity, field_name)
+                for field_name in Productivity.SERIALIZED_FIELDS
+                if field_name != "group"
+            },
+            group=group_names[productivity.group_id],
+        )
+
+    def __str__(self) -> str:
+        return f"[Archived-{self.group}] {self.item}"
+
+
+class ProductivityEvent(models.Model):
+    """Change notification of Productivity objects, see
+    `productivity.events.DatabaseBroker`.
+
+    - `id` is the sequence number of event.
+    - `productivity_id` is not a foreign key, events of deleted objects are
+    kept.
+    """
+
+    action = models.CharField(max_length=6)
+    productivity_id = models.BigIntegerField(null=True)
+
+    def __str__(self) -> str:
+        return f"{self.id} {self.action} {self.productivity_id}"
+
+
+class IdempotencyKey(models.Model):
+    """Stored response of a write request, replayed to retries sending the
+    same `Idempotency-Key`, see `productivity.idempotency`.
+
+    - `fingerprint` is a SHA-256 digest of the request, so a key reused for
+    another request is detected.
+    - Expired rows are ignored, and deleted by `purge_idempotency_keys`
+    command through the index on `expires_at`.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name="+",
+    )
+    key = models.CharField(max_length=255)
+    fingerprint = models.BinaryField(max_length=32)
+    status = models.PositiveSmallIntegerField()
+    headers = models.JSONField(default=dict)
+    body = models.BinaryField()
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="idempotencykey_unique"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["expires_at"], name="idempotencykey_expires_idx"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"[{self.status}] {self.key}"
+
+
+class Task(models.Model):
+    """Background task run by worker process, see `productivity.tasks`.
+
+    - While RUNNING, `run_at` is the time the worker lease expires, after
+    which another worker may claim the task again.
+    """
+
+    class Status(models.TextChoices):
+        """Choices for Status field."""
+
+        PENDING = "pending"
+        RUNNING = "running"
+        SUCCEEDED = "succeeded"
+        FAILED = "failed"
+
+    name = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    result = models.JSONField(null=True, blank=True, default=None)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "run_at"], name="task_status_run_at_idx"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"[{self.status}] {self.name} ({self.id})"
+
+    def serialize_json(self) -> dict[str, Any]:
+        """Serialize model to JSON.
+
+        Returns:
+            Dictionary mapping of serialized model in JSON.
+        """
+        return {
+            "id": str(self.id),
+            "name": self.name,
+            "status": self.status,
+            "attempts": self.attempts,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+
+validate_group = FieldsValidator(ProductivityGroup)
+
+validate_productivity = FieldsValidator(Productivity)
+
+FREQUENCY_NAMES = {f.value: f.name.title() for f in Productivity.Frequency}
+
+JSON_CONVERTERS: dict[str, Callable[[Any], Any]] = {
+    "id": str,
+    "version": str,
+    "frequency": lambda value: FREQUENCY_NAMES.get(value, ""),
+    "last_check": lambda value: value.isoformat() if value else "",
+    "last_check_undo": datetime.isoformat,
+}
+
+COMPACT_CONVERTERS: dict[str, Callable[[Any], Any]] = {
+    "last_check": to_epoch,
+    "last_check_undo": to_epoch,
+}
@@ -0,0 +1,75 @@
+"""Request body parsing for productivity app.
+
+- Bodies with `application/json` content type are parsed with `orjson` if
+the optional package is installed, else with the standard `json` module.
+- Other bodies are parsed as form data into a `QueryDict`.
+- Parsed data is kept on the request, so the body is parsed once per request
+however many times `parse_body` is called.
+"""
+
+import json
+from collections.abc import Mapping
+from typing import Any, cast
+
+from django.http import HttpRequest, QueryDict
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+JSON_CONTENT_TYPE = "application/json"
+
+PARSED_BODY_ATTRIBUTE = "_productivity_parsed_body"
+
+
+def loads(data: bytes) -> Any:
+    """Parse JSON document, with `orjson` if installed.
+
+    Args:
+        data:
+            JSON document.
+
+    Returns:
+        Parsed value.
+
+    Raises:
+        ValueError:
+            Malformed JSON document.
+    """
+    if orjson:
+        return orjson.loads(data)  # pylint: disable=no-member
+
+    return json.loads(data)
+
+
+def parse_body(request: HttpRequest) -> Mapping[str, Any]:
+    """Parse request body into a mapping of field names to values.
+
+    Args:
+        request:
+            HttpRequest object.
+
+    Returns:
+        Parsed JSON object, or `QueryDict` of form data.
+
+    Raises:
+        ValueError:
+            JSON body is malformed or not an object.
+    """
+    if hasattr(request, PARSED_BODY_ATTRIBUTE):
+        return cast(Mapping[str, Any], getattr(request, PARSED_BODY_ATTRIBUTE))
+
+    data: Mapping[str, Any]
+    if request.content_type == JSON_CONTENT_TYPE:
+        data = loads(request.body)
+        if not isinstance(data, dict):
+            raise ValueError("JSON body is not an object")
+    elif request.method == "POST":
+        data = request.POST
+    else:
+        data = QueryDict(request.body, encoding=request.encoding)
+
+    setattr(request, PARSED_BODY_ATTRIBUTE, data)
+
+    return data
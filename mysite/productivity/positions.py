@@ -0,0 +1,170 @@
+"""Fractional position keys ordering Productivity objects within a group.
+
+- A key is a string compared byte by byte, so a key between any two keys
+always exists and moving an object writes its own row only.
+- Digits are `0-9a-z`, which sort the same in binary and in locale
+collations, so database `ORDER BY` matches Python order.
+- A key is an integer part of `INTEGER_DIGITS` digits and an optional
+fraction not ending in `0`. Appending or prepending steps the integer part,
+so keys stay short. Moving between neighbours extends the fraction, keys of
+a group are respread by `spread_keys` once they exceed `REBALANCE_LENGTH`.
+"""
+
+from typing import Optional
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+INITIAL_KEY = "i000"
+
+INTEGER_DIGITS = 4
+
+INTEGER_RANGE = len(DIGITS) ** INTEGER_DIGITS
+
+REBALANCE_LENGTH = 12
+
+
+def encode_integer(value: int, width: int = INTEGER_DIGITS) -> str:
+    """Encode integer part as fixed-width digits.
+
+    Args:
+        value:
+            Integer from 0 to `len(DIGITS) ** width - 1`.
+        width:
+            Number of digits.
+
+    Returns:
+        Integer part of key, or key digits if width is larger.
+    """
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, len(DIGITS))
+        digits.append(DIGITS[digit])
+
+    return "".join(reversed(digits))
+
+
+def decode_integer(digits: str) -> int:
+    """Decode integer part of key.
+
+    Args:
+        digits:
+            Integer part of key.
+
+    Returns:
+        Integer value.
+    """
+    return int(digits, len(DIGITS))
+
+
+def midpoint(low: str, high: Optional[str]) -> str:
+    """Return fraction between two fractions.
+
+    Args:
+        low:
+            Lower fraction, empty for lowest.
+        high:
+            Higher fraction, None for no upper bound.
+
+    Returns:
+        Fraction greater than low and less than high, not ending in `0`.
+    """
+    if high is not None:
+        common = 0
+        while common < len(high) and (
+            low[common] if common < len(low) else DIGITS[0]
+        ) == (high[common]):
+            common += 1
+        if common:
+            return high[:common] + midpoint(low[common:], high[common:])
+
+    digit_low = DIGITS.index(low[0]) if low else 0
+    digit_high = DIGITS.index(high[0]) if high is not None else len(DIGITS)
+    if digit_high - digit_low > 1:
+        return DIGITS[(digit_low + digit_high + 1) // 2]
+    if high is not None and len(high) > 1:
+        return high[0]
+
+    return DIGITS[digit_low] + midpoint(low[1:], None)
+
+
+def key_between(  # pylint: disable=too-many-return-statements
+    before: Optional[str], after: Optional[str]
+) -> str:
+    """Return key ordered between two keys.
+
+    Args:
+        before:
+            Key to order after, None for first.
+        after:
+            Key to order before, None for last.
+
+    Returns:
+        Position key.
+
+    Raises:
+        ValueError:
+            `before` is not less than `after`, or nothing is before `after`.
+    """
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"{before!r} is not less than {after!r}")
+
+    if before is None:
+        if after is None:
+            return INITIAL_KEY
+        integer, fraction = after[:INTEGER_DIGITS], after[INTEGER_DIGITS:]
+        if fraction:
+            return integer + midpoint("", fraction)
+        value = decode_integer(integer)
+        if value > 1:
+            return encode_integer(value - 1)
+        if value == 1:
+            return encode_integer(0) + midpoint("", None)
+        raise ValueError(f"No key before {after!r}")
+
+    integer, fraction = before[:INTEGER_DIGITS], before[INTEGER_DIGITS:]
+    value = decode_integer(integer)
+    if after is None:
+        if value < INTEGER_RANGE - 1:
+            return encode_integer(value + 1)
+        return integer + midpoint(fraction, None)
+
+    after_integer = after[:INTEGER_DIGITS]
+    if integer == after_integer:
+        return integer + midpoint(fraction, after[INTEGER_DIGITS:])
+    after_value = decode_integer(after_integer)
+    if after_value - value > 1:
+        return encode_integer((value + after_value) // 2)
+
+    return integer + midpoint(fraction, None)
+
+
+def spread_keys(count: int) -> list[str]:
+    """Return evenly spaced keys, without fractions if possible.
+
+    - Over `INTEGER_RANGE` keys, keys have a fraction of fixed width.
+
+    Args:
+        count:
+            Number of keys.
+
+    Returns:
+        Keys in ascending order.
+    """
+    width = INTEGER_DIGITS
+    while len(DIGITS) ** width <= count:
+        width += 1
+    step = len(DIGITS) ** width // (count + 1)
+
+    keys = []
+    for i in range(count):
+        digits = encode_integer(step * (i + 1), width)
+        keys.append(
+            digits[:INTEGER_DIGITS] + digits[INTEGER_DIGITS:].rstrip(DIGITS[0])
+        )
+
+    return keys
+
+
+def needs_rebalance(key: str) -> bool:
+    """Return True if key is long enough to respread keys of its group."""
+    return len(key) > REBALANCE_LENGTH
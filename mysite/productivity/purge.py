@@ -0,0 +1,73 @@
+"""Purge of soft deleted Productivity objects and expired idempotency keys.
+
+- Soft deleted objects, see `ProductivityQuerySet.soft_delete`, are kept for
+a retention period so deletes can be undone, then hard deleted in batches by
+`purge_productivity` command. Each batch is a short transaction, so writes
+from requests are not blocked for long.
+- Expired idempotency keys, see `productivity.idempotency`, are deleted the
+same way by `purge_idempotency_keys` command.
+"""
+
+from datetime import datetime
+
+from productivity.models import IdempotencyKey, Productivity
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def purge_productivities(
+    cutoff: datetime, batch_size: int = DEFAULT_BATCH_SIZE
+) -> int:
+    """Hard delete Productivity objects soft deleted before cutoff.
+
+    Args:
+        cutoff:
+            Objects soft deleted before this datetime are deleted.
+        batch_size:
+            Maximum number of objects deleted per transaction.
+
+    Returns:
+        Number of objects deleted.
+    """
+    total = 0
+    while True:
+        ids = list(
+            Productivity.all_objects.filter(deleted_at__lt=cutoff)
+            .order_by("deleted_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+
+        total += Productivity.all_objects.filter(id__in=ids).purge()
+
+    return total
+
+
+def purge_idempotency_keys(
+    now: datetime, batch_size: int = DEFAULT_BATCH_SIZE
+) -> int:
+    """Delete idempotency keys expired by now.
+
+    Args:
+        now:
+            Keys expiring at or before this datetime are deleted.
+        batch_size:
+            Maximum number of keys deleted per transaction.
+
+    Returns:
+        Number of keys deleted.
+    """
+    total = 0
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(expires_at__lte=now)
+            .order_by("expires_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+
+        total += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+
+    return total
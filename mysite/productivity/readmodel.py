@@ -0,0 +1,401 @@
+"""In-memory read model of live Productivity objects, one per process.
+
+- Enabled by `PRODUCTIVITY_READ_MODEL` in settings. Lists are then served
+from memory of the worker process, see `get_read_model`, without reading
+the table or creating model instances.
+- Rows are stored by column, in list order: IDs, versions and datetimes, as
+microseconds since epoch, in `array`s, Frequency values in `bytes`, and
+group IDs keyed into a table of interned group names. Equal recurrence
+rules share one interned string.
+- Before each read, a probe checks for writes since last refresh: the cache
+generation, bumped by writes of processes sharing the cache backend, see
+`cache.invalidate`, and on SQLite `PRAGMA data_version` of a dedicated
+connection, changed by commits of any other connection. Neither reads the objects table. On other
+databases, the probe also changes every `REFRESH_INTERVAL` seconds, which
+bounds staleness from writes that do not bump the generation.
+- A refresh scans ID and version of live objects in list order, through
+the position index, and fetches only objects that are new or have a new
+version. Other rows are copied from the previous snapshot, so moves, which
+keep the version, are applied by the new order alone. Group names are
+reloaded from the group table, not from the cached map of
+`ProductivityGroupManager`, for renames.
+- Readers get an immutable `Snapshot`, replaced by refresh under a lock,
+so threads of a worker never see a partial refresh.
+"""
+
+import copy
+import os
+import sys
+import threading
+import time
+from array import array
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db import connections, router
+
+from productivity import cache
+from productivity.models import EPOCH, Productivity, ProductivityGroup
+
+FETCH_CHUNK_SIZE = 500
+
+REFRESH_INTERVAL = 1.0
+
+# Fields of a stored row, see `Snapshot.get_row`
+STORED_FIELDS = (
+    "id",
+    "item",
+    "frequency",
+    "group_id",
+    "recurrence",
+    "last_check",
+    "last_check_undo",
+    "version",
+)
+
+Row = tuple[int, str, int, int, str, int, int, int]
+
+
+def to_microseconds(dt: datetime) -> int:
+    """Convert naive datetime in UTC to integer microseconds since epoch."""
+    return (dt - EPOCH) // timedelta(microseconds=1)
+
+
+def from_microseconds(microseconds: int) -> datetime:
+    """Convert integer microseconds since epoch to naive datetime in UTC."""
+    return EPOCH + timedelta(microseconds=microseconds)
+
+
+def to_row(values: Sequence[Any]) -> Row:
+    """Convert values of `STORED_FIELDS` from database to a stored row."""
+    (
+        productivity_id,
+        item,
+        frequency,
+        group_id,
+        recurrence,
+        last_check,
+        last_check_undo,
+        version,
+    ) = values
+
+    return (
+        productivity_id,
+        item,
+        frequency,
+        group_id,
+        sys.intern(recurrence),
+        to_microseconds(last_check),
+        to_microseconds(last_check_undo),
+        version,
+    )
+
+
+class Snapshot:  # pylint: disable=too-many-instance-attributes
+    """Live objects at a point in time, stored by column in list order."""
+
+    __slots__ = (
+        "ids",
+        "items",
+        "frequencies",
+        "group_ids",
+        "recurrences",
+        "last_checks",
+        "last_check_undos",
+        "versions",
+        "group_names",
+        "revision",
+    )
+
+    def __init__(
+        self, rows: Sequence[Row], group_names: dict[int, str], revision: int
+    ) -> None:
+        self.ids = array("q", (row[0] for row in rows))
+        self.items = tuple(row[1] for row in rows)
+        self.frequencies = bytes(row[2] for row in rows)
+        self.group_ids = array("q", (row[3] for row in rows))
+        self.recurrences = tuple(row[4] for row in rows)
+        self.last_checks = array("q", (row[5] for row in rows))
+        self.last_check_undos = array("q", (row[6] for row in rows))
+        self.versions = array("q", (row[7] for row in rows))
+        self.group_names = group_names
+        self.revision = revision
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get_row(self, index: int) -> Row:
+        """Return stored row at an index."""
+        return (
+            self.ids[index],
+            self.items[index],
+            self.frequencies[index],
+            self.group_ids[index],
+            self.recurrences[index],
+            self.last_checks[index],
+            self.last_check_undos[index],
+            self.versions[index],
+        )
+
+    def replace_rows(
+        self, rows: Mapping[int, Row], group_names: dict[int, str]
+    ) -> "Snapshot":
+        """Return copy with rows at some indexes replaced.
+
+        - Faster than building a snapshot from all rows, as unchanged
+        columns are copied whole.
+
+        Args:
+            rows:
+                Map of index to new stored row, of the same ID.
+            group_names:
+                Map of group ID to interned name.
+
+        Returns:
+            New snapshot.
+        """
+        snapshot = copy.copy(self)
+        items = list(self.items)
+        frequencies = bytearray(self.frequencies)
+        group_ids = self.group_ids[:]
+        recurrences = list(self.recurrences)
+        last_checks = self.last_checks[:]
+        last_check_undos = self.last_check_undos[:]
+        versions = self.versions[:]
+        for index, row in rows.items():
+            (
+                _,
+                items[index],
+                frequencies[index],
+                group_ids[index],
+                recurrences[index],
+                last_checks[index],
+                last_check_undos[index],
+                versions[index],
+            ) = row
+
+        snapshot.items = tuple(items)
+        snapshot.frequencies = bytes(frequencies)
+        snapshot.group_ids = group_ids
+        snapshot.recurrences = tuple(recurrences)
+        snapshot.last_checks = last_checks
+        snapshot.last_check_undos = last_check_undos
+        snapshot.versions = versions
+        snapshot.group_names = group_names
+        snapshot.revision = time.time_ns()
+
+        return snapshot
+
+    def get_rows(
+        self,
+        fields: Sequence[str],
+        frequency: Optional[int] = None,
+        group: Optional[str] = None,
+    ) -> Iterator[list[Any]]:
+        """Return field values per object, as `values_list(*fields)` would
+        with `group` as group name.
+
+        Args:
+            fields:
+                Field names, each in `Productivity.SERIALIZED_FIELDS`.
+            frequency:
+                Only objects of this Frequency value, all if None.
+            group:
+                Only objects of this group name, all if None.
+
+        Returns:
+            Iterator of field values per object, in list order.
+        """
+        getters: dict[str, Callable[[int], Any]] = {
+            "id": self.ids.__getitem__,
+            "item": self.items.__getitem__,
+            "frequency": self.frequencies.__getitem__,
+            "recurrence": self.recurrences.__getitem__,
+            "group": lambda i: self.group_names.get(self.group_ids[i], ""),
+            "last_check": lambda i: from_microseconds(self.last_checks[i]),
+            "last_check_undo": lambda i: from_microseconds(
+                self.last_check_undos[i]
+            ),
+            "version": self.versions.__getitem__,
+        }
+        row_getters = [getters[field] for field in fields]
+
+        indexes: Sequence[int] = range(len(self))
+        if frequency is not None:
+            indexes = [i for i in indexes if self.frequencies[i] == frequency]
+        if group is not None:
+            group_ids = {
+                group_id
+                for group_id, name in self.group_names.items()
+                if name == group
+            }
+            indexes = [i for i in indexes if self.group_ids[i] in group_ids]
+
+        return ([get(i) for get in row_getters] for i in indexes)
+
+
+def fetch_rows(productivity_ids: Optional[list[int]]) -> dict[int, Row]:
+    """Fetch stored rows of live objects by ID.
+
+    Args:
+        productivity_ids:
+            IDs of objects, fetched in chunks, all objects if None.
+
+    Returns:
+        Map of ID to stored row, objects not found left out.
+    """
+    queryset = Productivity.objects.order_by().values_list(*STORED_FIELDS)
+    if productivity_ids is None:
+        chunks = [queryset]
+    else:
+        chunks = [
+            queryset.filter(
+                id__in=productivity_ids[start : start + FETCH_CHUNK_SIZE]
+            )
+            for start in range(0, len(productivity_ids), FETCH_CHUNK_SIZE)
+        ]
+
+    return {values[0]: to_row(values) for chunk in chunks for values in chunk}
+
+
+def refresh_snapshot(old: Optional[Snapshot]) -> Snapshot:
+    """Build snapshot of live objects, reusing unchanged rows of an older
+    one, see module docstring.
+
+    - If more than half of the objects changed, all are fetched in a single
+    query instead of by ID.
+    - If order is unchanged, as after checks, changed rows are replaced in
+    a copy of the old snapshot, see `Snapshot.replace_rows`.
+
+    Args:
+        old:
+            Previous snapshot, None to load all objects.
+
+    Returns:
+        New snapshot, or `old` if nothing changed.
+    """
+    scan = list(
+        Productivity.objects.order_by(*Productivity.LIST_ORDERING).values_list(
+            "id", "version"
+        )
+    )
+    old_indexes = (
+        {} if old is None else {pk: i for i, pk in enumerate(old.ids)}
+    )
+    old_versions = array("q") if old is None else old.versions
+    changed = {
+        pk
+        for pk, version in scan
+        if (i := old_indexes.get(pk)) is None or old_versions[i] != version
+    }
+    group_names = {
+        group_id: sys.intern(name)
+        for group_id, name in ProductivityGroup.objects.values_list(
+            "id", "name"
+        )
+    }
+    ids = array("q", (pk for pk, _ in scan))
+    if (
+        old is not None
+        and not changed
+        and ids == old.ids
+        and group_names == old.group_names
+    ):
+        return old
+
+    fetched = fetch_rows(
+        None if len(changed) * 2 > len(scan) else sorted(changed)
+    )
+    if old is not None and ids == old.ids and changed <= fetched.keys():
+        return old.replace_rows(
+            {old_indexes[pk]: fetched[pk] for pk in changed}, group_names
+        )
+
+    rows = []
+    for pk in ids:
+        row = fetched.get(pk)
+        # Changed objects not fetched were deleted after scan
+        if row is None and pk not in changed and old is not None:
+            row = old.get_row(old_indexes[pk])
+        if row is not None:
+            rows.append(row)
+
+    return Snapshot(rows, group_names, time.time_ns())
+
+
+class ReadModel:
+    """Read model of current process, see module docstring."""
+
+    def __init__(self) -> None:
+        self.alias: Optional[str] = None
+        self.connection: Any = None
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.probe: Optional[tuple[Any, ...]] = None
+        self.snapshot: Optional[Snapshot] = None
+
+    def close(self) -> None:
+        """Close probe connection, reopened by next probe."""
+        with self.lock:
+            if self.connection is not None and self.pid == os.getpid():
+                self.connection.close()
+            self.connection = None
+
+    def get_probe(self) -> tuple[Any, ...]:
+        """Return values that change on writes, see module docstring.
+
+        - Probe connection is opened on first use, again in a forked child,
+        as SQLite connections must not be used across `fork`.
+        """
+        alias = router.db_for_read(Productivity)
+        wrapper = connections[alias]
+        if wrapper.vendor != "sqlite":
+            return (
+                alias,
+                cache.get_generation(),
+                time.monotonic() // REFRESH_INTERVAL,
+            )
+
+        if self.connection is None or (alias, os.getpid()) != (
+            self.alias,
+            self.pid,
+        ):
+            if self.connection is not None and self.pid == os.getpid():
+                self.connection.close()
+            self.connection = wrapper.get_new_connection(
+                wrapper.get_connection_params()
+            )
+            self.alias = alias
+            self.pid = os.getpid()
+        (data_version,) = self.connection.execute(
+            "PRAGMA data_version"
+        ).fetchone()
+
+        return alias, cache.get_generation(), data_version
+
+    def get_snapshot(self) -> Snapshot:
+        """Return current snapshot, refreshed if probe changed.
+
+        - Probe is read before refreshing, so writes during a refresh
+        change the next probe and are not missed.
+        """
+        with self.lock:
+            probe = self.get_probe()
+            if self.snapshot is None or probe != self.probe:
+                self.snapshot = refresh_snapshot(self.snapshot)
+                self.probe = probe
+
+            return self.snapshot
+
+
+@lru_cache(maxsize=None)
+def get_read_model() -> Optional[ReadModel]:
+    """Return read model of current process, None if not enabled by
+    `PRODUCTIVITY_READ_MODEL` in settings."""
+    if not getattr(settings, "PRODUCTIVITY_READ_MODEL", False):
+        return None
+
+    return ReadModel()
@@ -0,0 +1,244 @@
+"""Recurrence rules of Productivity objects and their due dates.
+
+- A rule is a subset of iCalendar `RRULE`, parts separated by `;`:
+    - `FREQ=DAILY;INTERVAL=3`: every 3 days
+    - `FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR`: weekdays only, `INTERVAL` skips
+    weeks
+    - `FREQ=MONTHLY;BYMONTHDAY=1,15`: 1st and 15th, days past the end of a
+    month fall on its last day, `INTERVAL` skips months
+- An object is due on the first occurrence after the day of its last check.
+- Rules are parsed once per distinct text, and expanded once per rule into
+a table of days to next occurrence, by weekday or by day of month. Next
+occurrence of an object is then a table lookup, not a walk over its
+calendar.
+- `Scheduler` orders objects by due date in a heap, so the next due objects
+are popped without sorting all objects.
+"""
+
+import calendar
+import heapq
+from collections.abc import Iterable
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+DUE_CACHE_SIZE = 4096
+
+RULE_CACHE_SIZE = 1024
+
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+
+class Rule(NamedTuple):
+    """Parsed recurrence rule, see module docstring."""
+
+    freq: str
+    interval: int = 1
+    by_day: tuple[int, ...] = ()
+    by_month_day: tuple[int, ...] = ()
+
+    def __str__(self) -> str:
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.by_day:
+            parts.append(f"BYDAY={','.join(WEEKDAYS[d] for d in self.by_day)}")
+        if self.by_month_day:
+            parts.append(
+                f"BYMONTHDAY={','.join(str(d) for d in self.by_month_day)}"
+            )
+
+        return ";".join(parts)
+
+
+@lru_cache(maxsize=RULE_CACHE_SIZE)
+def parse_rule(text: str) -> Rule:
+    """Parse recurrence rule.
+
+    Args:
+        text:
+            Rule, see module docstring. Case and order of parts do not
+            matter.
+
+    Returns:
+        Parsed rule, `str()` of which is its canonical text.
+
+    Raises:
+        ValueError:
+            Invalid rule.
+    """
+    parts = {}
+    for part in text.upper().replace(" ", "").split(";"):
+        name, sep, value = part.partition("=")
+        if not sep or not value or name in parts:
+            raise ValueError(f"Invalid rule part {part!r}")
+        parts[name] = value
+
+    freq = parts.pop("FREQ", "")
+    interval = int(parts.pop("INTERVAL", "1"))
+    if interval < 1:
+        raise ValueError("INTERVAL must be positive")
+
+    by_day: tuple[int, ...] = ()
+    by_month_day: tuple[int, ...] = ()
+    if freq == "WEEKLY":
+        names = parts.pop("BYDAY", "").split(",")
+        if not set(names) <= set(WEEKDAYS):
+            raise ValueError("BYDAY must be weekdays MO to SU")
+        by_day = tuple(sorted({WEEKDAYS.index(name) for name in names}))
+    elif freq == "MONTHLY":
+        days = sorted(
+            {int(day) for day in parts.pop("BYMONTHDAY", "").split(",")}
+        )
+        if not 1 <= days[0] <= days[-1] <= 31:
+            raise ValueError("BYMONTHDAY must be days 1 to 31")
+        by_month_day = tuple(days)
+    elif freq != "DAILY":
+        raise ValueError("FREQ must be DAILY, WEEKLY or MONTHLY")
+    if parts:
+        raise ValueError(f"Unsupported rule parts {sorted(parts)}")
+
+    return Rule(freq, interval, by_day, by_month_day)
+
+
+@lru_cache(maxsize=RULE_CACHE_SIZE)
+def expand_weekly(rule: Rule) -> tuple[int, ...]:
+    """Return days to next occurrence of weekly rule, by weekday.
+
+    - Week of the last check is an occurrence week, next one is `interval`
+    weeks later.
+
+    Args:
+        rule:
+            Weekly rule.
+
+    Returns:
+        Days to next occurrence, indexed by weekday, Monday 0.
+    """
+    return tuple(
+        next(
+            (day - weekday for day in rule.by_day if day > weekday),
+            7 * rule.interval - weekday + rule.by_day[0],
+        )
+        for weekday in range(7)
+    )
+
+
+@lru_cache(maxsize=RULE_CACHE_SIZE)
+def expand_monthly(rule: Rule, month_length: int) -> tuple[int, ...]:
+    """Return days of month of monthly rule, in a month of given length.
+
+    Args:
+        rule:
+            Monthly rule.
+        month_length:
+            Number of days in month.
+
+    Returns:
+        Days of month in ascending order.
+    """
+    return tuple(sorted({min(day, month_length) for day in rule.by_month_day}))
+
+
+def next_occurrence(rule: Rule, after: date) -> date:
+    """Return first occurrence of rule after a date.
+
+    Args:
+        rule:
+            Recurrence rule.
+        after:
+            Date of last check.
+
+    Returns:
+        Date of next occurrence.
+    """
+    if rule.freq == "DAILY":
+        return after + timedelta(days=rule.interval)
+    if rule.freq == "WEEKLY":
+        return after + timedelta(days=expand_weekly(rule)[after.weekday()])
+
+    days = expand_monthly(
+        rule, calendar.monthrange(after.year, after.month)[1]
+    )
+    day = next((d for d in days if d > after.day), None)
+    if day is not None:
+        return after.replace(day=day)
+
+    year, month = divmod(after.year * 12 + after.month - 1 + rule.interval, 12)
+    month += 1
+
+    return date(
+        year,
+        month,
+        expand_monthly(rule, calendar.monthrange(year, month)[1])[0],
+    )
+
+
+@lru_cache(maxsize=DUE_CACHE_SIZE)
+def get_due(text: str, after: date) -> date:
+    """Return next occurrence of rule text, memoized for objects sharing a
+    rule and day of last check.
+
+    Args:
+        text:
+            Valid rule, see `parse_rule`.
+        after:
+            Date of last check.
+
+    Returns:
+        Date of next occurrence.
+    """
+    return next_occurrence(parse_rule(text), after)
+
+
+class Scheduler:
+    """Priority queue of Productivity objects by due date.
+
+    - Built in linear time, each pop or push takes logarithmic time.
+    """
+
+    def __init__(self, entries: Iterable[tuple[date, int]] = ()) -> None:
+        """Build queue.
+
+        Args:
+            entries:
+                Due date and object ID per object.
+        """
+        self.heap = list(entries)
+        heapq.heapify(self.heap)
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def pop_due(
+        self, until: date, limit: Optional[int] = None
+    ) -> list[tuple[date, int]]:
+        """Remove objects due by a date, earliest first.
+
+        Args:
+            until:
+                Last due date to include.
+            limit:
+                Maximum number of objects, None for no limit.
+
+        Returns:
+            Due date and object ID per object, ordered by both.
+        """
+        due: list[tuple[date, int]] = []
+        while self.heap and self.heap[0][0] <= until:
+            if limit is not None and len(due) >= limit:
+                break
+            due.append(heapq.heappop(self.heap))
+
+        return due
+
+    def push(self, due: date, productivity_id: int) -> None:
+        """Add object, such as one checked after being popped.
+
+        Args:
+            due:
+                Due date.
+            productivity_id:
+                ID (primary key) of Productivity object.
+        """
+        heapq.heappush(self.heap, (due, productivity_id))
@@ -0,0 +1,156 @@
+"""Completion statistics of Productivity objects from rollups.
+
+- A rollup counts checks per group, Frequency and period, see
+`ProductivityRollup`. Rollups are updated with each check, so statistics
+read a few rows per period instead of scanning check history.
+- `rebuild_rollups` recomputes all rollups from check history, after
+rollups are first created or if they are found to drift.
+"""
+
+from collections import Counter, defaultdict
+from datetime import date
+from typing import Any
+
+from django.db import transaction
+
+from productivity.history import STREAM_CHUNK_SIZE
+from productivity.models import (
+    FREQUENCY_NAMES,
+    ArchivedProductivity,
+    Productivity,
+    ProductivityCheck,
+    ProductivityGroup,
+    ProductivityRollup,
+    get_rollup_start,
+)
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def rebuild_rollups(batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Replace rollups with counts from check history.
+
+    - Checks are streamed once in index order, so memory grows with number
+    of rollups, not of checks.
+    - Checks are counted under current group and Frequency of their object,
+    soft deleted and archived objects included. Checks of objects archived
+    under a group renamed before archived names followed renames are
+    skipped.
+
+    Args:
+        batch_size:
+            Rollups inserted per statement.
+
+    Returns:
+        Number of rollups.
+    """
+    group_ids = dict(ProductivityGroup.objects.values_list("name", "id"))
+    objects = {
+        productivity_id: (group_ids[group], Productivity.Frequency(frequency))
+        for productivity_id, group, frequency in (
+            ArchivedProductivity.objects.values_list(
+                "id", "group", "frequency"
+            )
+        )
+        if group in group_ids
+    }
+    objects.update(
+        (productivity_id, (group_id, Productivity.Frequency(frequency)))
+        for productivity_id, group_id, frequency in (
+            Productivity.all_objects.values_list("id", "group", "frequency")
+        )
+    )
+    totals = Counter(
+        Productivity.objects.values_list("group", "frequency").order_by()
+    )
+
+    counts: defaultdict[tuple[int, int, date], list[int]] = defaultdict(
+        lambda: [0, 0]
+    )
+    last = None
+    for productivity_id, checked_at in (
+        ProductivityCheck.objects.order_by("productivity_id", "checked_at")
+        .values_list("productivity_id", "checked_at")
+        .iterator(chunk_size=STREAM_CHUNK_SIZE)
+    ):
+        if productivity_id not in objects:
+            continue
+        group_id, frequency = objects[productivity_id]
+        start = get_rollup_start(frequency, checked_at).date()
+        count = counts[(group_id, frequency, start)]
+        count[0] += 1
+        if (productivity_id, start) != last:
+            count[1] += 1
+            last = (productivity_id, start)
+
+    with transaction.atomic():
+        ProductivityRollup.objects.all().delete()
+        ProductivityRollup.objects.bulk_create(
+            (
+                ProductivityRollup(
+                    group_id=group_id,
+                    frequency=frequency,
+                    period_start=start,
+                    checks=checks,
+                    done=done,
+                    total=totals[(group_id, frequency)],
+                )
+                for (group_id, frequency, start), (checks, done) in (
+                    counts.items()
+                )
+            ),
+            batch_size=batch_size,
+        )
+
+    return len(counts)
+
+
+def get_stats(since: date, until: date) -> list[dict[str, Any]]:
+    """Return completion rates per group, Frequency and period.
+
+    - Read from rollups through the index on period start, so time depends
+    on the range, not on the length of history.
+
+    Args:
+        since:
+            First period start to include.
+        until:
+            Last period start to include.
+
+    Returns:
+        List of rates, ordered by group, Frequency and period.
+            - group
+            - frequency
+            - period_start
+            - checks
+            - done
+            - total
+            - rate: `done` out of `total`, None if `total` is 0
+    """
+    rows = (
+        ProductivityRollup.objects.filter(
+            period_start__gte=since, period_start__lte=until
+        )
+        .order_by("group__name", "frequency", "period_start")
+        .values_list(
+            "group__name",
+            "frequency",
+            "period_start",
+            "checks",
+            "done",
+            "total",
+        )
+    )
+
+    return [
+        {
+            "group": group,
+            "frequency": FREQUENCY_NAMES.get(frequency, ""),
+            "period_start": period_start.isoformat(),
+            "checks": checks,
+            "done": done,
+            "total": total,
+            "rate": round(min(done / total, 1.0), 4) if total else None,
+        }
+        for group, frequency, period_start, checks, done, total in rows
+    ]
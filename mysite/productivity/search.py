@@ -0,0 +1,296 @@
+"""Full-text search over Productivity objects.
+
+- SQLite: contentless FTS5 table `productivity_productivity_fts` of `item`
+and group name, kept in sync by triggers, and by `reindex_group` on group
+rename, see `ProductivityGroupManager.rename`.
+- PostgreSQL: `to_tsvector` of `item` and group name. An index cannot
+include a column of another table, so GIN indexes of `item` and of group
+name, see migration 0015, find objects matching any word, and the match of
+all words is checked on those rows only.
+- Other databases: `icontains` scan.
+
+Results are not ranked, ranking would score every match before applying the
+limit, which is slower than a scan for common words.
+
+SQLite index is created by `install_search_index` after every `migrate`.
+"""
+
+import re
+from typing import TYPE_CHECKING
+
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+
+if TYPE_CHECKING:
+    from productivity.models import Productivity
+
+SEARCH_LIMIT = 100
+
+SQLITE_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS productivity_productivity_fts USING fts5(
+        item,
+        "group",
+        content='',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+SQLITE_GROUP_NAME = """
+    (SELECT name FROM productivity_productivitygroup WHERE id = {}.group_id)
+"""
+
+SQLITE_TRIGGERS = {
+    "productivity_productivity_fts_insert": f"""
+        CREATE TRIGGER productivity_productivity_fts_insert
+        AFTER INSERT ON productivity_productivity
+        BEGIN
+            INSERT INTO productivity_productivity_fts(rowid, item, "group")
+            VALUES (new.id, new.item, {SQLITE_GROUP_NAME.format("new")});
+        END
+    """,
+    "productivity_productivity_fts_delete": f"""
+        CREATE TRIGGER productivity_productivity_fts_delete
+        AFTER DELETE ON productivity_productivity
+        BEGIN
+            INSERT INTO productivity_productivity_fts(
+                productivity_productivity_fts, rowid, item, "group"
+            )
+            VALUES (
+                'delete', old.id, old.item, {SQLITE_GROUP_NAME.format("old")}
+            );
+        END
+    """,
+    "productivity_productivity_fts_update": f"""
+        CREATE TRIGGER productivity_productivity_fts_update
+        AFTER UPDATE OF item, group_id ON productivity_productivity
+        BEGIN
+            INSERT INTO productivity_productivity_fts(
+                productivity_productivity_fts, rowid, item, "group"
+            )
+            VALUES (
+                'delete', old.id, old.item, {SQLITE_GROUP_NAME.format("old")}
+            );
+            INSERT INTO productivity_productivity_fts(rowid, item, "group")
+            VALUES (new.id, new.item, {SQLITE_GROUP_NAME.format("new")});
+        END
+    """,
+}
+
+SQLITE_REBUILD = [
+    """
+    INSERT INTO productivity_productivity_fts(productivity_productivity_fts)
+    VALUES ('delete-all')
+    """,
+    """
+    INSERT INTO productivity_productivity_fts(rowid, item, "group")
+    SELECT p.id, p.item, g.name
+    FROM productivity_productivity p
+    JOIN productivity_productivitygroup g ON g.id = p.group_id
+    """,
+]
+
+SQLITE_REINDEX_GROUP = [
+    """
+    INSERT INTO productivity_productivity_fts(
+        productivity_productivity_fts, rowid, item, "group"
+    )
+    SELECT 'delete', id, item, %s
+    FROM productivity_productivity
+    WHERE group_id = %s
+    """,
+    """
+    INSERT INTO productivity_productivity_fts(rowid, item, "group")
+    SELECT id, item, %s
+    FROM productivity_productivity
+    WHERE group_id = %s
+    """,
+]
+
+# Soft deleted objects are indexed, they are left out before the limit
+SQLITE_SQL = """
+    SELECT f.rowid
+    FROM productivity_productivity_fts f
+    JOIN productivity_productivity p ON p.id = f.rowid
+    WHERE productivity_productivity_fts MATCH %s AND p.deleted_at IS NULL
+    LIMIT %s
+"""
+
+# Parameters: query of any word, twice, query of all words, limit
+POSTGRESQL_SQL = """
+    SELECT p.id
+    FROM productivity_productivity p
+    JOIN productivity_productivitygroup g ON g.id = p.group_id
+    WHERE (
+            to_tsvector('simple', p.item) @@ to_tsquery('simple', %s)
+            OR p.group_id IN (
+                SELECT id FROM productivity_productivitygroup
+                WHERE to_tsvector('simple', name) @@ to_tsquery('simple', %s)
+            )
+        )
+        AND to_tsvector('simple', p.item) || to_tsvector('simple', g.name)
+            @@ to_tsquery('simple', %s)
+        AND p.deleted_at IS NULL
+    LIMIT %s
+"""
+
+
+def build_fts_query(text: str, vendor: str, match_all: bool = True) -> str:
+    """Build full-text query matching all words of text as prefixes.
+
+    - Words are quoted, so operators in text are matched literally.
+
+    Args:
+        text:
+            Search text.
+        vendor:
+            Database vendor, `sqlite` or `postgresql`.
+        match_all:
+            Match all words if True, any word if False, on PostgreSQL only.
+
+    Returns:
+        Query string for FTS5 `MATCH` or `to_tsquery`, empty if text has no
+        words.
+    """
+    words = re.findall(r"\w+", text)
+    if vendor == "postgresql":
+        operator = " & " if match_all else " | "
+        return operator.join(f"'{word}':*" for word in words)
+
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def find_productivities(
+    text: str, limit: int = SEARCH_LIMIT
+) -> list["Productivity"]:
+    """Search Productivity objects by words in `item` and `group`.
+
+    Args:
+        text:
+            Search text, each word matched as a prefix.
+        limit:
+            Maximum number of objects to return.
+
+    Returns:
+        List of Productivity objects.
+    """
+    model = apps.get_model("productivity", "Productivity")
+    db = model.objects.db
+    vendor = connections[db].vendor
+
+    if vendor not in ("sqlite", "postgresql"):
+        return find_productivities_icontains(text, limit)
+
+    query = build_fts_query(text, vendor)
+    if not query:
+        return []
+
+    with connections[db].cursor() as cursor:
+        if vendor == "sqlite":
+            cursor.execute(SQLITE_SQL, [query, limit])
+        else:
+            any_query = build_fts_query(text, vendor, match_all=False)
+            cursor.execute(
+                POSTGRESQL_SQL, [any_query, any_query, query, limit]
+            )
+        ids = [row[0] for row in cursor.fetchall()]
+
+    productivities = model.objects.in_bulk(ids)
+
+    return [productivities[i] for i in ids if i in productivities]
+
+
+def find_productivities_icontains(
+    text: str, limit: int = SEARCH_LIMIT
+) -> list["Productivity"]:
+    """Search Productivity objects by scanning `item` and `group`.
+
+    - Fallback for databases without a full-text index.
+
+    Args:
+        text:
+            Search text, each word matched as a substring.
+        limit:
+            Maximum number of objects to return.
+
+    Returns:
+        List of Productivity objects.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return []
+
+    condition = Q()
+    for word in words:
+        condition &= Q(item__icontains=word) | Q(group__name__icontains=word)
+
+    model = apps.get_model("productivity", "Productivity")
+
+    return list(model.objects.filter(condition)[:limit])
+
+
+def reindex_group(
+    group_id: int, old_name: str, name: str, using: str = DEFAULT_DB_ALIAS
+) -> None:
+    """Replace group name in SQLite index entries of objects of a group.
+
+    - Not a trigger on group table, which would reference objects table and
+    break migrations rebuilding it. Called by
+    `ProductivityGroupManager.rename` in the transaction of the rename.
+
+    Args:
+        group_id:
+            Group ID.
+        old_name:
+            Group name before rename, as indexed.
+        name:
+            Group name after rename.
+        using:
+            Database alias.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+
+    delete, insert = SQLITE_REINDEX_GROUP
+    with connection.cursor() as cursor:
+        cursor.execute(delete, [old_name, group_id])
+        cursor.execute(insert, [name, group_id])
+
+
+def install_search_index(using: str = DEFAULT_DB_ALIAS) -> None:
+    """Create SQLite full-text index and its triggers if missing.
+
+    - SQLite drops triggers of a table when a migration rebuilds it, so this
+    runs after every `migrate`, see `ProductivityConfig.ready`.
+    - If a trigger was missing, index is rebuilt, as writes made meanwhile
+    were not indexed.
+
+    Args:
+        using:
+            Database alias.
+    """
+    connection = connections[using]
+    if not {
+        apps.get_model("productivity", "Productivity")._meta.db_table,
+        apps.get_model("productivity", "ProductivityGroup")._meta.db_table,
+    } <= set(connection.introspection.table_names()):
+        return
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(SQLITE_TABLE)
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            missing = [
+                sql
+                for name, sql in SQLITE_TRIGGERS.items()
+                if name not in existing
+            ]
+            for sql in missing:
+                cursor.execute(sql)
+            if missing:
+                for sql in SQLITE_REBUILD:
+                    cursor.execute(sql)
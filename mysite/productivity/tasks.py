@@ -0,0 +1,262 @@
+"""Background tasks backed by `Task` table.
+
+- Views call `enqueue` and return at once, a worker process started by
+`run_tasks` command claims and runs pending tasks.
+- Task functions are registered by name with `register`, keyword arguments
+and return value must be JSON serializable.
+- A task raising an exception is retried with exponential backoff, up to
+`Task.max_attempts` attempts. `PermanentTaskError` fails it without retry.
+- A worker holds a lease on a claimed task for `TASK_TIMEOUT` seconds. If
+the worker dies, the task is claimed again once the lease expires.
+"""
+
+import json
+import logging
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from django.core.exceptions import ValidationError
+from django.db import close_old_connections, models, transaction
+from django.utils import timezone
+
+from productivity.models import Productivity, Task
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+
+POLL_INTERVAL = 1.0
+
+RETRY_BACKOFF = 10
+
+TASK_TIMEOUT = 10 * 60
+
+TaskFunction = Callable[..., Any]
+
+TASKS: dict[str, TaskFunction] = {}
+
+
+class PermanentTaskError(Exception):
+    """Task failed in a way retrying does not fix."""
+
+
+def register(name: str) -> Callable[[TaskFunction], TaskFunction]:
+    """Return decorator registering a task function by name.
+
+    Args:
+        name:
+            Task name passed to `enqueue`.
+
+    Returns:
+        Decorator returning the function unchanged.
+    """
+
+    def decorator(func: TaskFunction) -> TaskFunction:
+        TASKS[name] = func
+        return func
+
+    return decorator
+
+
+def enqueue(
+    name: str, max_attempts: int = MAX_ATTEMPTS, **kwargs: Any
+) -> Task:
+    """Add task to be run by a worker.
+
+    Args:
+        name:
+            Registered task name.
+        max_attempts:
+            Maximum number of attempts before task fails.
+        kwargs:
+            Keyword arguments of task function, JSON serializable.
+
+    Returns:
+        Pending task.
+
+    Raises:
+        KeyError:
+            Task name is not registered.
+    """
+    if name not in TASKS:
+        raise KeyError(name)
+
+    return Task.objects.create(
+        name=name, kwargs=kwargs, max_attempts=max_attempts
+    )
+
+
+def get_retry_at(now: datetime, attempts: int) -> datetime:
+    """Return time to retry a task, doubling delay per attempt.
+
+    Args:
+        now:
+            Current datetime.
+        attempts:
+            Number of attempts made.
+
+    Returns:
+        Datetime of next attempt.
+    """
+    return now + timedelta(seconds=RETRY_BACKOFF * 2 ** (attempts - 1))
+
+
+def claim_task(now: Optional[datetime] = None) -> Optional[Task]:
+    """Claim next due task, without locking rows.
+
+    - A task is due if PENDING and its `run_at` has passed, or if RUNNING
+    and its lease has expired.
+    - Claim is a conditional UPDATE on `run_at`, so of several workers
+    claiming the same task, only one succeeds.
+
+    Args:
+        now:
+            Current datetime, `timezone.now()` if None.
+
+    Returns:
+        Claimed task, None if no task is due.
+    """
+    now = now or timezone.now()
+    due = models.Q(
+        status__in=[Task.Status.PENDING, Task.Status.RUNNING],
+        run_at__lte=now,
+    )
+    for task_id, run_at in (
+        Task.objects.filter(due)
+        .order_by("run_at")
+        .values_list("id", "run_at")[:10]
+    ):
+        claimed = Task.objects.filter(due, id=task_id, run_at=run_at).update(
+            status=Task.Status.RUNNING,
+            run_at=now + timedelta(seconds=TASK_TIMEOUT),
+            attempts=models.F("attempts") + 1,
+            updated_at=now,
+        )
+        if claimed:
+            return Task.objects.get(id=task_id)
+
+    return None
+
+
+def run_task(task: Task) -> None:
+    """Run claimed task and store its outcome.
+
+    - Outcome is stored only if the task was not claimed again by another
+    worker after the lease expired.
+
+    Args:
+        task:
+            Task returned by `claim_task`.
+    """
+    values: dict[str, Any]
+    try:
+        func = TASKS.get(task.name)
+        if func is None:
+            raise PermanentTaskError(f"Unknown task {task.name}")
+        result = func(**task.kwargs)
+    except PermanentTaskError as exc:
+        values = {"status": Task.Status.FAILED, "error": str(exc)}
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.exception("Task %s (%s) failed", task.name, task.id)
+        if task.attempts >= task.max_attempts:
+            values = {"status": Task.Status.FAILED, "error": repr(exc)}
+        else:
+            values = {
+                "status": Task.Status.PENDING,
+                "run_at": get_retry_at(timezone.now(), task.attempts),
+                "error": repr(exc),
+            }
+    else:
+        values = {
+            "status": Task.Status.SUCCEEDED,
+            "result": result,
+            "error": "",
+        }
+
+    values["updated_at"] = timezone.now()
+    Task.objects.filter(
+        id=task.id, status=Task.Status.RUNNING, attempts=task.attempts
+    ).update(**values)
+
+
+def run_worker(
+    poll_interval: float = POLL_INTERVAL, once: bool = False
+) -> int:
+    """Claim and run tasks until interrupted.
+
+    Args:
+        poll_interval:
+            Seconds to wait before checking again if no task is due.
+        once:
+            Return once no task is due, instead of waiting.
+
+    Returns:
+        Number of tasks run.
+    """
+    count = 0
+    while True:
+        close_old_connections()
+        task = claim_task()
+        if task is None:
+            if once:
+                return count
+            time.sleep(poll_interval)
+            continue
+
+        run_task(task)
+        count += 1
+
+
+@register("import_productivities")
+def import_productivities(productivities: list[Any]) -> dict[str, int]:
+    """Create Productivity objects from JSON objects.
+
+    - All objects are validated first, nothing is created if any is invalid.
+    - Missing groups are created with the objects, in the same transaction,
+    see `Productivity.deserialize_json`.
+
+    Args:
+        productivities:
+            JSON objects, see `Productivity.deserialize_json`.
+
+    Returns:
+        Number of created objects.
+
+    Raises:
+        PermanentTaskError:
+            Some objects are invalid, with error per list index in message.
+    """
+    objs = []
+    errors = {}
+    for i, json_obj in enumerate(productivities):
+        try:
+            objs.append(Productivity.deserialize_json(json_obj))
+        except KeyError as exc:
+            errors[i] = f"Missing {exc.args[0]}"
+        except TypeError:
+            errors[i] = "Not an object"
+        except ValidationError as exc:
+            errors[i] = "; ".join(exc.messages)
+    if errors:
+        raise PermanentTaskError(json.dumps(errors))
+
+    with transaction.atomic():
+        Productivity.objects.bulk_create(objs, validate=False)
+
+    return {"created": len(objs)}
+
+
+@register("rebalance_positions")
+def rebalance_positions(group_id: int) -> dict[str, int]:
+    """Respread position keys of a group, see `productivity.positions`.
+
+    Args:
+        group_id:
+            Group ID.
+
+    Returns:
+        Number of updated objects.
+    """
+    return {"updated": Productivity.objects.rebalance_positions(group_id)}
@@ -1,24 +1,162 @@
+# pylint: disable=too-many-lines
+import asyncio
+import gzip
 import json
 import logging
-from datetime import date, datetime, time
+import random
+import threading
+from datetime import date, datetime, time, timedelta
+from io import StringIO
 from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.handlers import StaticFilesHandler
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.http import HttpResponseRedirect, QueryDict
-from django.test import Client, RequestFactory, TestCase
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, models, transaction
+from django.http import (
+    HttpResponse,
+    HttpResponseRedirect,
+    QueryDict,
+    StreamingHttpResponse,
+)
+from django.test import (
+    AsyncRequestFactory,
+    Client,
+    LiveServerTestCase,
+    RequestFactory,
+    TestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
 # pylint: disable=wrong-import-order
+from mysite.compression import compress
+from mysite.routers import replica_reads
 from mysite.settings import LOGGING
-from productivity.models import Productivity, logger
+from productivity.admin import ProductivityAdmin, estimate_count
+from productivity.archive import archive_productivities
+from productivity.cache import (
+    GENERATION_KEY,
+    bump_generation,
+    get_generation,
+    invalidate,
+    make_key,
+)
+from productivity.events import (
+    Broker,
+    CacheBroker,
+    DatabaseBroker,
+    InProcessBroker,
+    get_broker,
+    publish_change,
+)
+from productivity.history import (
+    HISTORY_PAGE_MAX,
+    Streak,
+    compute_streaks,
+    get_history,
+    get_streaks,
+)
+from productivity.idempotency import (
+    IDEMPOTENCY_TTL,
+    KEY_MAX_LENGTH,
+    REPLAYED_HEADER,
+)
+from productivity.loadtest import (
+    SEED_GROUP,
+    Config,
+    LevelResult,
+    Sample,
+    find_capacity,
+    is_lock_error,
+    parse_mix,
+    percentile,
+    prepare_data,
+    run_level,
+    summarize,
+)
+from productivity.models import (
+    ArchivedProductivity,
+    IdempotencyKey,
+    Productivity,
+    ProductivityCheck,
+    ProductivityEvent,
+    ProductivityGroup,
+    ProductivityRollup,
+    Task,
+    VersionConflictError,
+    logger,
+    validate_productivity,
+)
+from productivity.parsers import loads, parse_body
+from productivity.positions import (
+    INITIAL_KEY,
+    INTEGER_DIGITS,
+    key_between,
+    needs_rebalance,
+    spread_keys,
+)
+from productivity.purge import purge_idempotency_keys, purge_productivities
+from productivity.readmodel import ReadModel, get_read_model
+from productivity.recurrence import (
+    Rule,
+    Scheduler,
+    next_occurrence,
+    parse_rule,
+)
+from productivity.rollups import get_stats, rebuild_rollups
+from productivity.search import (
+    build_fts_query,
+    find_productivities,
+    find_productivities_icontains,
+    install_search_index,
+)
+from productivity.tasks import (
+    RETRY_BACKOFF,
+    TASK_TIMEOUT,
+    TASKS,
+    claim_task,
+    enqueue,
+    get_retry_at,
+)
+from productivity.tasks import logger as tasks_logger
+from productivity.tasks import run_task
+from productivity.validation import compile_check
 from productivity.views import (
+    bulk,
     create_productivity,
     delete_productivity,
+    due,
+    events,
+    events_poll,
     get_productivities,
     get_productivity,
     get_productivity_object,
+    get_start_sequence,
+    get_summary,
+    group_detail,
+    groups,
+    history,
+    history_detail,
     index,
     index_detail,
+    move,
+    parse_flag,
+    parse_if_match,
+    render_productivities,
+    restore,
+    search,
+    search_productivities,
+    stats,
+    stream_events,
+    summary,
+    task_detail,
     update_productivity,
 )
 
@@ -46,7 +184,7 @@ def is_productivity_almost_equal(
         ((first.id == second.id) if (first.id is not None) else True)
         and (first.item == second.item)
         and (first.frequency == second.frequency)
-        and (first.group == second.group)
+        and (first.group_id == second.group_id)
         and (first.last_check.date() == second.last_check.date())
         and (first.last_check_undo.date() == second.last_check_undo.date())
     )
@@ -83,348 +221,3667 @@ def reset_last_check_time(json_objs: list[dict[str, str]]) -> None:
         j["last_check_undo"] = j["last_check_undo"][0:11] + "00:00:00"
 
 
-class ProductivityModelTests(TestCase):
+class AdminTests(TestCase):
     def setUp(self) -> None:
-        self.dt_today = datetime.combine(date.today(), time())
-        self.productivity = Productivity(
-            item="Calendar",
-            frequency=0,
-            group="Next",
+        self.client.force_login(
+            get_user_model().objects.create_superuser("admin")
         )
+        self.group_id = ProductivityGroup.objects.get_id("Health")
+        self.ids = [
+            Productivity.objects.create(
+                item=item, frequency=frequency, group_id=self.group_id
+            ).id
+            for item, frequency in (
+                ("Run", Productivity.Frequency.DAY),
+                ("Swim", Productivity.Frequency.DAY),
+                ("Ride", Productivity.Frequency.WEEK),
+            )
+        ]
+        Productivity.objects.update(last_check=datetime(2024, 3, 1))
 
-    def test_deserialize_json(self) -> None:
-        j = {
-            "item": "Calendar",
-            "frequency": "Key",
-            "group": "Next",
-            "last_check": self.dt_today.isoformat(),
-            "last_check_undo": "0001-01-01T00:00:00",
-        }
-        productivity = Productivity.deserialize_json(j)
+    def action(self, action: str, ids: list[int]) -> Any:
+        return self.client.post(
+            "/admin/productivity/productivity/",
+            {"action": action, "_selected_action": ids, "index": 0},
+        )
 
-        self.productivity.last_check = self.dt_today
-        self.assertIs(
-            is_productivity_almost_equal(productivity, self.productivity), True
+    def get_rollups(self) -> list[tuple[Any, ...]]:
+        return list(
+            ProductivityRollup.objects.filter(checks__gt=0)
+            .order_by("frequency", "period_start")
+            .values_list("frequency", "period_start", "checks", "done")
         )
 
-    def test_deserialize_json_key_error(self) -> None:
-        j = {
-            "ite": "Calendar",
-            "frequency": "Key",
-        }
-        with self.assertRaises(KeyError) as cm:
-            Productivity.deserialize_json(j)
-        self.assertEqual(cm.exception.args[0], "item")
+    def test_changelist(self) -> None:
+        with patch.object(ProductivityAdmin, "list_per_page", 2):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get("/admin/productivity/productivity/")
+            next_response = self.client.get(
+                "/admin/productivity/productivity/",
+                {"after": response.context["cl"].next_cursor},
+            )
 
-    def test_deserialize_json_validation_error_item(self) -> None:
-        j = {
-            "item": "Calendar" * 26,
-            "frequency": "Key",
-            "group": "Next",
-            "last_check": "2024-01-01T00:00:00",
-            "last_check_undo": "0001-01-01T00:00:00",
-        }
-        with self.assertRaises(ValidationError) as cm:
-            Productivity.deserialize_json(j)
-        self.assertIn("item", cm.exception.args[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(
+            [p.id for p in response.context["cl"].result_list],
+            self.ids[:0:-1],
+        )
+        self.assertContains(response, "3 productivitys")
+        self.assertContains(response, "?after=")
+        self.assertContains(response, "soft_delete_selected")
+        self.assertNotContains(response, '"delete_selected"')
+        self.assertListEqual(
+            [p.id for p in next_response.context["cl"].result_list],
+            self.ids[:1],
+        )
+        self.assertIsNone(next_response.context["cl"].next_cursor)
+        for query in queries.captured_queries:
+            if "COUNT(" in query["sql"]:
+                self.assertIn("LIMIT", query["sql"])
 
-    def test_deserialize_json_validation_error_frequency(self) -> None:
-        j = {
-            "item": "Calendar",
-            "frequency": "Ke",
-        }
-        with self.assertRaises(ValidationError) as cm:
-            Productivity.deserialize_json(j)
-        self.assertEqual(
-            cm.exception.args[0], "Invalid enum name for Frequency"
+    def test_changelist_filter(self) -> None:
+        response = self.client.get(
+            "/admin/productivity/productivity/",
+            {"frequency__exact": Productivity.Frequency.WEEK, "after": 99},
         )
 
-    def test_deserialize_json_validation_error_datetime(self) -> None:
-        j = {
-            "item": "Calendar",
-            "frequency": "Key",
-            "group": "Next",
-            "last_check": "",
-        }
-        with self.assertRaises(ValidationError) as cm:
-            Productivity.deserialize_json(j)
-        self.assertEqual(
-            cm.exception.args[0], "Invalid date_string format for last_check"
+        self.assertListEqual(
+            [p.id for p in response.context["cl"].result_list], self.ids[2:]
         )
 
-    def test_parse_iso_datetime(self) -> None:
+    def test_check_selected(self) -> None:
+        response = self.action("check_selected", self.ids[:2])
+        checked = self.get_rollups()
+        rebuild_rollups()
+
+        self.assertEqual(response.status_code, 302)
         self.assertEqual(
-            Productivity.parse_iso_datetime(
-                "2024-01-01T00:00:00", "last_check"
-            ),
-            datetime(2024, 1, 1),
+            ProductivityCheck.objects.filter(
+                productivity_id__in=self.ids[:2]
+            ).count(),
+            2,
         )
-
-    def test_parse_iso_datetime_validation_error(self) -> None:
-        with self.assertRaises(ValidationError) as cm:
-            Productivity.parse_iso_datetime("", "last_check")
         self.assertEqual(
-            cm.exception.args[0], "Invalid date_string format for last_check"
+            Productivity.objects.get(id=self.ids[0]).last_check_undo,
+            datetime(2024, 3, 1),
         )
-
-    def test_str(self) -> None:
-        self.productivity.last_check = self.dt_today
         self.assertEqual(
-            str(self.productivity),
-            f"[Key-Next] Calendar ({self.dt_today.strftime('%d %b %I:%M %p')})",
+            Productivity.objects.get(id=self.ids[2]).last_check,
+            datetime(2024, 3, 1),
         )
+        self.assertEqual(checked[0][2:], (2, 2))
+        self.assertListEqual(checked, self.get_rollups())
 
-    def test_str_empty_instance(self) -> None:
-        self.assertEqual(str(Productivity()), "[-]  ()")
-
-    def test_get_frequency(self) -> None:
-        self.assertEqual(self.productivity.get_frequency(), "Key")
-
-    def test_get_frequency_invalid_enum_value(self) -> None:
-        self.productivity.frequency = 10
-        with self.assertLogs(logger, logging.ERROR) as logger_obj:
-            self.assertEqual(self.productivity.get_frequency(), "")
-            self.assertEqual(
-                logger_obj.records[0].getMessage(),
-                "Invalid enum value for Frequency",
-            )
-
-    def test_save_new_object(self) -> None:
-        self.productivity.save()
-
-        self.assertEqual(Productivity.objects.count(), 1)
-        self.assertEqual(self.productivity.last_check_undo, datetime.min)
-
-    def test_save_existing_object(self) -> None:
-        self.productivity.last_check = self.dt_today
-        self.productivity.save()
-
-        self.assertEqual(Productivity.objects.count(), 1)
-        self.assertEqual(self.productivity.last_check_undo, self.dt_today)
-
-    def test_save_invalid_data(self) -> None:
-        self.productivity.frequency = 10
-
-        with self.assertRaises(ValidationError) as cm:
-            self.productivity.save()
-        self.assertIn("frequency", cm.exception.args[0])
-
-        self.assertEqual(Productivity.objects.count(), 0)
+    def test_delete_view(self) -> None:
+        response = self.client.post(
+            f"/admin/productivity/productivity/{self.ids[0]}/delete/",
+            {"post": "yes"},
+        )
 
-    def test_serialize_json(self) -> None:
-        self.productivity.id = 1
-        self.productivity.last_check = self.dt_today
-        expected = {
-            "id": "1",
-            "item": "Calendar",
-            "frequency": "Key",
-            "group": "Next",
-            "last_check": self.dt_today.isoformat(),
-            "last_check_undo": "0001-01-01T00:00:00",
-        }
-        self.assertDictEqual(self.productivity.serialize_json(), expected)
+        self.assertEqual(response.status_code, 302)
+        self.assertListEqual(
+            list(Productivity.objects.values_list("id", flat=True)),
+            self.ids[1:],
+        )
+        self.assertEqual(Productivity.all_objects.count(), 3)
 
-    def test_serialize_json_empty_instance(self) -> None:
-        expected = {
-            "id": "None",
-            "item": "",
-            "frequency": "",
-            "group": "",
-            "last_check": "",
-            "last_check_undo": "0001-01-01T00:00:00",
-        }
-        self.assertDictEqual(Productivity().serialize_json(), expected)
+    def test_estimate_count(self) -> None:
+        self.assertTupleEqual(
+            estimate_count(Productivity.objects.all(), 3), (3, False)
+        )
+        self.assertTupleEqual(
+            estimate_count(Productivity.objects.all(), 2), (2, True)
+        )
 
-    def test_crud(self) -> None:
-        self.productivity.save()
+    def test_soft_delete_selected(self) -> None:
+        self.action("soft_delete_selected", self.ids[:2])
 
-        productivities = Productivity.objects.all()
-        self.assertEqual(len(productivities), 1)
-        expected = Productivity(
-            id=1,
-            item="Calendar",
-            frequency=0,
-            group="Next",
-            last_check=self.dt_today,
-        )
-        self.assertIs(
-            is_productivity_almost_equal(productivities[0], expected), True
+        self.assertListEqual(
+            list(Productivity.objects.values_list("id", flat=True)),
+            self.ids[2:],
         )
+        self.assertEqual(Productivity.all_objects.count(), 3)
 
-        self.productivity.item = "To-Do"
-        self.productivity.save()
-        productivities = Productivity.objects.all()
-        self.assertEqual(len(productivities), 1)
-        expected = Productivity(
-            id=1,
-            item="To-Do",
-            frequency=0,
-            group="Next",
-            last_check=self.dt_today,
-            last_check_undo=self.dt_today,
+    def test_undo_checks(self) -> None:
+        self.action("check_selected", self.ids)
+        self.action("check_selected", self.ids[:1])
+        self.action("undo_checks", self.ids)
+        undone = self.get_rollups()
+        rebuild_rollups()
+
+        self.assertEqual(
+            ProductivityCheck.objects.filter(
+                productivity_id=self.ids[0]
+            ).count(),
+            1,
         )
-        self.assertIs(
-            is_productivity_almost_equal(productivities[0], expected), True
+        self.assertFalse(
+            ProductivityCheck.objects.filter(
+                productivity_id__in=self.ids[1:]
+            ).exists()
         )
-
         self.assertEqual(
-            self.productivity.delete(), (1, {"productivity.Productivity": 1})
+            Productivity.objects.get(id=self.ids[2]).last_check,
+            datetime(2024, 3, 1),
         )
-        self.assertEqual(Productivity.objects.count(), 0)
+        self.assertListEqual(undone, self.get_rollups())
 
 
-class ViewsTest(TestCase):
+class ArchiveTests(TestCase):
     def setUp(self) -> None:
-        self.dt_today = datetime.combine(date.today(), time())
-        self.productivity = Productivity(
+        self.cutoff = datetime(2024, 1, 1)
+        self.old = self.cutoff - timedelta(days=1)
+
+    def create(self, frequency: int, group: str, last_check: datetime) -> int:
+        productivity = Productivity(
             item="Calendar",
-            frequency=0,
-            group="Next",
+            frequency=frequency,
+            group_id=ProductivityGroup.objects.get_id(group),
         )
-
-    def test_create_productivity(self) -> None:
-        request = RequestFactory().post(
-            "",
-            data={"item": "Calendar", "frequency": "0", "group": "Next"},
+        productivity.save()
+        Productivity.objects.filter(id=productivity.id).update(
+            last_check=last_check
         )
-        response = create_productivity(request.POST)
 
-        self.assertEqual(response.status_code, 201)
+        return productivity.id
 
-        j = json.loads(response.content)
-        self.assertEqual(len(j), 6)
-        self.assertIn("id", j)
+    def test_stale(self) -> None:
+        old_key = self.create(0, "Next", self.old)
+        self.create(0, "Next", self.cutoff)
+        self.create(2, "Next", self.old)
+        inactive_day = self.create(2, "Later", self.old)
 
-        self.productivity.last_check = self.dt_today
-        self.assertIs(
-            is_productivity_almost_equal(
-                Productivity.deserialize_json(j), self.productivity
+        self.assertSetEqual(
+            set(
+                Productivity.objects.stale(self.cutoff).values_list(
+                    "id", flat=True
+                )
             ),
-            True,
+            {old_key, inactive_day},
         )
 
-        self.assertEqual(Productivity.objects.count(), 1)
+    def test_archive_productivities(self) -> None:
+        ids = [self.create(1, "Next", self.old) for _ in range(5)]
+        active_id = self.create(2, "Next", self.cutoff)
 
-    def test_create_productivity_fail_missing_data(self) -> None:
-        request = RequestFactory().post("")
-        response = create_productivity(request.POST)
+        self.assertEqual(archive_productivities(self.cutoff, chunk_size=2), 5)
 
-        self.assertEqual(response.status_code, 400)
-        self.assertDictEqual(
-            json.loads(response.content), {"error": "Missing data"}
+        self.assertListEqual(
+            list(Productivity.objects.values_list("id", flat=True)),
+            [active_id],
         )
+        archived = ArchivedProductivity.objects.order_by("id")
+        self.assertListEqual([a.id for a in archived], ids)
+        self.assertEqual(archived[0].last_check, self.old)
+        self.assertEqual(archived[0].frequency, 1)
 
-    def test_create_productivity_fail_invalid_data_item(self) -> None:
-        request = RequestFactory().post(
-            "",
-            data={"item": "Calendar" * 26, "frequency": "0", "group": "Next"},
+    def test_archive_productivities_keep_checks(self) -> None:
+        productivity_id = self.create(2, "Next", self.old)
+        ProductivityCheck.objects.create(
+            productivity_id=productivity_id, checked_at=self.old
         )
-        response = create_productivity(request.POST)
 
-        self.assertEqual(response.status_code, 400)
-        self.assertDictEqual(
-            json.loads(response.content), {"error": "Data validation error"}
+        archive_productivities(self.cutoff)
+        ProductivityGroup.objects.rename(
+            ProductivityGroup.objects.get_id("Next"), "Later"
         )
+        rebuild_rollups()
 
-    def test_create_productivity_fail_invalid_data_frequency(self) -> None:
-        request = RequestFactory().post(
-            "",
-            data={"item": "Calendar", "frequency": "10", "group": "Next"},
+        self.assertEqual(
+            ProductivityCheck.objects.get().productivity_id, productivity_id
         )
-        response = create_productivity(request.POST)
-
-        self.assertEqual(response.status_code, 400)
-        self.assertDictEqual(
-            json.loads(response.content), {"error": "Data validation error"}
+        self.assertEqual(ArchivedProductivity.objects.get().group, "Later")
+        self.assertListEqual(
+            list(
+                ProductivityRollup.objects.values_list(
+                    "group__name", "checks", "done"
+                )
+            ),
+            [("Later", 1, 1)],
         )
 
-    def test_create_productivity_fail_invalid_data_group(self) -> None:
-        request = RequestFactory().post(
-            "",
-            data={"item": "Calendar", "frequency": "0", "group": "Next" * 51},
+    def test_archive_productivities_invalidate_cache(self) -> None:
+        self.create(0, "Next", self.old)
+        generation = get_generation()
+
+        archive_productivities(self.cutoff)
+
+        self.assertGreater(get_generation(), generation)
+
+    def test_command(self) -> None:
+        self.create(0, "Next", datetime.now() - timedelta(days=31))
+        stdout = StringIO()
+
+        call_command(
+            "archive_productivity", "--older-than", "30", stdout=stdout
         )
-        response = create_productivity(request.POST)
 
-        self.assertEqual(response.status_code, 400)
-        self.assertDictEqual(
-            json.loads(response.content), {"error": "Data validation error"}
+        self.assertEqual(
+            stdout.getvalue(), "Archived 1 Productivity objects\n"
         )
+        self.assertEqual(ArchivedProductivity.objects.count(), 1)
 
-    def test_delete_productivity(self) -> None:
-        self.productivity.save()
-        self.assertEqual(Productivity.objects.count(), 1)
+    def test_command_fail_invalid_chunk_size(self) -> None:
+        with self.assertRaises(CommandError):
+            call_command(
+                "archive_productivity",
+                "--older-than",
+                "30",
+                "--chunk-size",
+                "0",
+            )
 
-        response = delete_productivity(self.productivity.id)
 
-        self.assertEqual(response.status_code, 204)
-        self.assertEqual(Productivity.objects.count(), 0)
+class CacheTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
 
-    def test_delete_productivity_not_exist(self) -> None:
-        response = delete_productivity(1)
+    def test_bump_generation(self) -> None:
+        generation = get_generation()
+        bump_generation()
 
-        self.assertEqual(response.status_code, 404)
+        self.assertGreater(get_generation(), generation)
+
+    def test_bump_generation_missing_key(self) -> None:
+        bump_generation()
+
+        self.assertIsNotNone(cache.get(GENERATION_KEY))
+
+    def test_get_generation_evicted(self) -> None:
+        generation = get_generation()
+        cache.delete(GENERATION_KEY)
+
+        self.assertGreater(get_generation(), generation)
+
+    def test_get_generation(self) -> None:
+        self.assertEqual(get_generation(), get_generation())
+
+    def test_invalidate(self) -> None:
+        generation = get_generation()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            invalidate()
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(get_generation(), generation + 2)
+
+    @override_settings(DATABASE_REPLICAS=["replica"])
+    def test_make_key_replica(self) -> None:
+        with replica_reads(), patch(
+            "productivity.cache.get_generation", return_value=1
+        ) as get_generation_mock:
+            key = make_key("summary", "2024-01-01")
+
+        self.assertEqual(key, "productivity:replica:1:summary:2024-01-01")
+        get_generation_mock.assert_called_once_with()
+
+    def test_make_key(self) -> None:
+        key = make_key("summary", "2024-01-01")
+        self.assertEqual(
+            key, f"productivity:default:{get_generation()}:summary:2024-01-01"
+        )
+
+        bump_generation()
+        self.assertNotEqual(make_key("summary", "2024-01-01"), key)
+
+
+class EventsTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_in_process_broker_publish(self) -> None:
+        broker = InProcessBroker(history=2)
+        self.assertEqual(broker.get_sequence(), 0)
+
+        broker.publish("save", 1)
+        broker.publish("delete", 1)
+        event = broker.publish("bulk", None)
+
+        self.assertDictEqual(
+            dict(event), {"sequence": 3, "action": "bulk", "id": None}
+        )
+        self.assertEqual(broker.get_sequence(), 3)
+        self.assertListEqual(
+            [e["sequence"] for e in broker.get_events(0)], [2, 3]
+        )
+        self.assertListEqual(broker.get_events(3), [])
+
+    async def test_in_process_broker_wait(self) -> None:
+        broker = InProcessBroker()
+        broker.publish("save", 1)
+
+        self.assertEqual(len(await broker.wait(0, 1)), 1)
+
+    async def test_in_process_broker_wait_timeout(self) -> None:
+        broker = InProcessBroker()
+
+        self.assertListEqual(await broker.wait(0, 0.01), [])
+
+    async def test_in_process_broker_wait_other_thread(self) -> None:
+        broker = InProcessBroker()
+        timer = threading.Timer(0.05, broker.publish, ["save", 1])
+        timer.start()
+
+        events_list = await broker.wait(0, 5)
+        timer.join()
+
+        self.assertEqual(events_list[0]["id"], 1)
+
+    def test_cache_broker_publish(self) -> None:
+        broker = CacheBroker()
+        self.assertEqual(broker.get_sequence(), 0)
+
+        broker.publish("save", 1)
+        event = broker.publish("delete", 1)
+
+        self.assertDictEqual(
+            dict(event), {"sequence": 2, "action": "delete", "id": 1}
+        )
+        self.assertEqual(broker.get_sequence(), 2)
+
+    async def test_cache_broker_wait(self) -> None:
+        broker = CacheBroker(poll_interval=0.01)
+        await sync_to_async(broker.publish)("save", 1)
+        await sync_to_async(broker.publish)("save", 2)
+
+        events_list = await broker.wait(1, 1)
+
+        self.assertListEqual([e["id"] for e in events_list], [2])
+
+    async def test_cache_broker_wait_timeout(self) -> None:
+        broker = CacheBroker(poll_interval=0.01)
+
+        self.assertListEqual(await broker.wait(0, 0.05), [])
+
+    async def test_cache_broker_wait_expired(self) -> None:
+        broker = CacheBroker(poll_interval=0.01)
+        await sync_to_async(broker.publish)("save", 1)
+        await sync_to_async(cache.delete)(broker.get_event_key(1))
+
+        self.assertListEqual(await broker.wait(0, 1), [])
+
+    def test_broker_abstract(self) -> None:
+        with self.assertRaises(TypeError):
+            # pylint: disable-next=abstract-class-instantiated
+            Broker()  # type: ignore[abstract]
+
+    def test_database_broker_publish(self) -> None:
+        broker = DatabaseBroker(history=2)
+        self.assertEqual(broker.get_sequence(), 0)
+
+        first = broker.publish("save", 1)
+        broker.publish("delete", 1)
+        event = broker.publish("bulk", None)
+
+        self.assertDictEqual(
+            dict(event),
+            {"sequence": first["sequence"] + 2, "action": "bulk", "id": None},
+        )
+        self.assertEqual(broker.get_sequence(), event["sequence"])
+        self.assertListEqual(
+            [e["action"] for e in broker.get_events(0)], ["delete", "bulk"]
+        )
+        self.assertEqual(ProductivityEvent.objects.count(), 2)
+
+    async def test_database_broker_wait(self) -> None:
+        broker = DatabaseBroker(poll_interval=0.01)
+        first = await sync_to_async(broker.publish)("save", 1)
+        await sync_to_async(broker.publish)("save", 2)
+
+        events_list = await broker.wait(first["sequence"], 1)
+
+        self.assertListEqual([e["id"] for e in events_list], [2])
+
+    async def test_database_broker_wait_timeout(self) -> None:
+        broker = DatabaseBroker(poll_interval=0.01)
+
+        self.assertListEqual(await broker.wait(0, 0.05), [])
+
+    async def test_database_broker_wait_deleted(self) -> None:
+        broker = DatabaseBroker(poll_interval=0.01, history=1)
+        first = await sync_to_async(broker.publish)("save", 1)
+        await sync_to_async(broker.publish)("save", 2)
+
+        events_list = await broker.wait(first["sequence"] - 1, 1)
+
+        self.assertNotEqual(events_list[0]["sequence"], first["sequence"])
+
+    def test_get_broker(self) -> None:
+        self.assertIsInstance(get_broker(), InProcessBroker)
+        self.assertIs(get_broker(), get_broker())
+
+    def test_publish_change(self) -> None:
+        sequence = get_broker().get_sequence()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            publish_change("save", 1)
+            self.assertEqual(get_broker().get_sequence(), sequence)
+
+        self.assertEqual(get_broker().get_sequence(), sequence + 1)
+
+    def test_model_publish_change(self) -> None:
+        productivity = Productivity(
+            item="Calendar",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        )
+        sequence = get_broker().get_sequence()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            productivity.save()
+            productivity_id = productivity.id
+            Productivity.objects.update(item="To-Do")
+            productivity.delete()
+
+        self.assertListEqual(
+            [
+                (e["action"], e["id"])
+                for e in get_broker().get_events(sequence)  # type: ignore[attr-defined]
+            ],
+            [
+                ("save", productivity_id),
+                ("bulk", None),
+                ("delete", productivity_id),
+            ],
+        )
+
+    def test_soft_delete_publish_change(self) -> None:
+        productivity = Productivity(
+            item="Calendar",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        )
+        productivity.save()
+        sequence = get_broker().get_sequence()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Productivity.objects.soft_delete(productivity.id)
+            Productivity.all_objects.restore(productivity.id)
+            Productivity.all_objects.filter(id=productivity.id).purge()
+
+        self.assertListEqual(
+            [
+                (e["action"], e["id"])
+                for e in get_broker().get_events(sequence)  # type: ignore[attr-defined]
+            ],
+            [("delete", productivity.id), ("save", productivity.id)],
+        )
+
+
+class HistoryTests(TestCase):
+    def setUp(self) -> None:
+        self.productivity = Productivity(
+            item="Run",
+            frequency=Productivity.Frequency.DAY,
+            group_id=ProductivityGroup.objects.get_id("Health"),
+        )
+        self.productivity.save()
+
+    def check(self, *days: int) -> None:
+        ProductivityCheck.objects.bulk_create(
+            ProductivityCheck(
+                productivity_id=self.productivity.id,
+                checked_at=datetime(2024, 3, day, 8),
+            )
+            for day in days
+        )
+
+    def test_compute_streaks(self) -> None:
+        rows = [
+            (1, datetime(2024, 3, day, hour))
+            for day, hour in ((1, 8), (2, 8), (2, 20), (3, 8), (6, 8), (7, 8))
+        ] + [(2, datetime(2024, 2, 26)), (2, datetime(2024, 3, 4))]
+        frequencies = {
+            1: Productivity.Frequency.DAY,
+            2: Productivity.Frequency.WEEK,
+        }
+
+        streaks = compute_streaks(rows, frequencies, datetime(2024, 3, 8, 12))
+
+        self.assertDictEqual(streaks, {1: Streak(6, 2, 3), 2: Streak(2, 2, 2)})
+
+    def test_compute_streaks_broken(self) -> None:
+        rows = [(1, datetime(2024, 1, 31)), (1, datetime(2024, 2, 1))]
+
+        for frequency, expected in (
+            (Productivity.Frequency.DAY, Streak(2, 0, 2)),
+            (Productivity.Frequency.MONTH, Streak(2, 0, 2)),
+        ):
+            with self.subTest(frequency=frequency):
+                self.assertDictEqual(
+                    compute_streaks(
+                        rows, {1: frequency}, datetime(2024, 4, 1)
+                    ),
+                    {1: expected},
+                )
+
+    def test_compute_streaks_skip_unknown(self) -> None:
+        rows = [(1, datetime(2024, 3, 1)), (2, datetime(2024, 3, 1))]
+
+        streaks = compute_streaks(
+            rows, {2: Productivity.Frequency.KEY}, datetime(2024, 3, 1)
+        )
+
+        self.assertListEqual(list(streaks), [2])
+
+    def test_get_history(self) -> None:
+        self.check(1, 3, 2)
+
+        self.assertListEqual(
+            get_history(self.productivity.id, limit=2),
+            [datetime(2024, 3, 3, 8), datetime(2024, 3, 2, 8)],
+        )
+
+    def test_get_streaks(self) -> None:
+        self.check(1, 2, 4)
+        other = Productivity(
+            item="Swim",
+            frequency=Productivity.Frequency.WEEK,
+            group_id=self.productivity.group_id,
+        )
+        other.save()
+        deleted = Productivity(
+            item="Ride",
+            frequency=Productivity.Frequency.DAY,
+            group_id=self.productivity.group_id,
+        )
+        deleted.save()
+        Productivity.objects.soft_delete(deleted.id)
+
+        streaks = get_streaks(datetime(2024, 3, 5))
+
+        self.assertDictEqual(
+            streaks,
+            {
+                self.productivity.id: Streak(3, 1, 2),
+                other.id: Streak(0, 0, 0),
+            },
+        )
+        self.assertDictEqual(
+            get_streaks(datetime(2024, 3, 5), [other.id]),
+            {other.id: Streak(0, 0, 0)},
+        )
+
+    def record(self, previous: datetime, current: datetime) -> None:
+        self.productivity.last_check = current
+        ProductivityCheck.objects.record(self.productivity, previous)
+
+    def test_record(self) -> None:
+        checks = ProductivityCheck.objects.filter(
+            productivity_id=self.productivity.id
+        )
+
+        self.record(datetime(2024, 2, 29), datetime(2024, 3, 1))
+        self.record(datetime(2024, 3, 1), datetime(2024, 3, 2))
+        self.record(datetime(2024, 3, 2), datetime(2024, 3, 2))
+        self.assertEqual(checks.count(), 2)
+
+        self.record(datetime(2024, 3, 2), datetime(2024, 3, 1))
+        self.assertListEqual(
+            list(checks.values_list("checked_at", flat=True)),
+            [datetime(2024, 3, 1)],
+        )
+
+    def test_record_rollup(self) -> None:
+        rollups = ProductivityRollup.objects.order_by("period_start")
+
+        self.record(datetime(2024, 3, 1), datetime(2024, 3, 1, 8))
+        self.record(datetime(2024, 3, 1, 8), datetime(2024, 3, 1, 20))
+        self.record(datetime(2024, 3, 1, 20), datetime(2024, 3, 2, 8))
+        self.assertListEqual(
+            list(rollups.values_list("period_start", "checks", "done")),
+            [(date(2024, 3, 1), 2, 1), (date(2024, 3, 2), 1, 1)],
+        )
+        self.assertEqual(rollups[0].total, 1)
+
+        self.record(datetime(2024, 3, 2, 8), datetime(2024, 3, 1, 9))
+        self.assertListEqual(
+            list(rollups.values_list("period_start", "checks", "done")),
+            [(date(2024, 3, 1), 1, 1), (date(2024, 3, 2), 0, 0)],
+        )
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user("user")
+        self.data = {"item": "Calendar", "frequency": "Key", "group": "Next"}
+
+    def post(
+        self, data: dict[str, Any], key: str = "key-1", user: Any = None
+    ) -> HttpResponse:
+        request = RequestFactory().post(
+            "/productivity/",
+            data=data,
+            content_type="application/json",
+            headers={"Idempotency-Key": key},
+        )
+        request.user = user or self.user
+
+        return index(request)
+
+    def test_create(self) -> None:
+        response = self.post(self.data)
+        replayed = self.post(self.data)
+
+        self.assertEqual(Productivity.objects.count(), 1)
+        self.assertEqual(replayed.status_code, 201)
+        self.assertEqual(replayed.content, response.content)
+        self.assertEqual(replayed.headers["Content-Type"], "application/json")
+        self.assertEqual(replayed.headers[REPLAYED_HEADER], "true")
+        self.assertNotIn(REPLAYED_HEADER, response.headers)
+
+    def test_create_error_replayed(self) -> None:
+        self.post({"item": "Calendar"})
+        replayed = self.post({"item": "Calendar"})
+
+        self.assertEqual(replayed.status_code, 400)
+        self.assertEqual(replayed.headers[REPLAYED_HEADER], "true")
+
+    def test_create_keys(self) -> None:
+        other_user = get_user_model().objects.create_user("other")
+
+        self.post(self.data)
+        self.post(self.data, key="key-2")
+        self.post(self.data, user=other_user)
+
+        self.assertEqual(Productivity.objects.count(), 3)
+
+    def test_create_expired(self) -> None:
+        self.post(self.data)
+        IdempotencyKey.objects.update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        response = self.post(self.data)
+
+        self.assertNotIn(REPLAYED_HEADER, response.headers)
+        self.assertEqual(Productivity.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+        self.assertGreater(
+            IdempotencyKey.objects.get().expires_at,
+            timezone.now() + IDEMPOTENCY_TTL - timedelta(minutes=1),
+        )
+
+    def test_create_fail_key_reused(self) -> None:
+        self.post(self.data)
+        response = self.post({**self.data, "item": "Mail"})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Productivity.objects.count(), 1)
+
+    def test_create_fail_invalid_key(self) -> None:
+        for key in ("", "k" * (KEY_MAX_LENGTH + 1)):
+            with self.subTest(key=key):
+                response = self.post(self.data, key=key)
+
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(Productivity.objects.count(), 0)
+
+    def test_update_delete(self) -> None:
+        productivity = Productivity.deserialize_json(self.data)
+        productivity.save()
+        put_data = {**self.data, "item": "Mail", "last_check": ""}
+        for method, data in (("put", put_data), ("delete", None)):
+            with self.subTest(method=method):
+                responses = []
+                for _ in range(2):
+                    request = getattr(RequestFactory(), method)(
+                        f"/productivity/{productivity.id}/",
+                        data=data,
+                        content_type="application/json",
+                        headers={"Idempotency-Key": method},
+                    )
+                    request.user = self.user
+                    responses.append(index_detail(request, productivity.id))
+
+                self.assertEqual(
+                    responses[1].status_code, responses[0].status_code
+                )
+                self.assertEqual(responses[1].content, responses[0].content)
+                self.assertEqual(
+                    responses[1].headers.get("ETag"),
+                    responses[0].headers.get("ETag"),
+                )
+        # One update and one soft delete
+        self.assertEqual(
+            Productivity.all_objects.get().version, productivity.version + 2
+        )
+
+    def test_bulk(self) -> None:
+        responses = []
+        for _ in range(2):
+            request = RequestFactory().post(
+                "/productivity/bulk/",
+                data={"productivities": [self.data]},
+                content_type="application/json",
+                headers={"Idempotency-Key": "bulk"},
+            )
+            request.user = self.user
+            responses.append(bulk(request))
+
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertEqual(responses[1].status_code, 202)
+        self.assertEqual(
+            responses[1].headers["Location"], responses[0].headers["Location"]
+        )
+
+    def test_get_not_stored(self) -> None:
+        request = RequestFactory().get(
+            "/productivity/", headers={"Idempotency-Key": "key-1"}
+        )
+        request.user = self.user
+        index(request)
+
+        self.assertEqual(IdempotencyKey.objects.count(), 0)
+
+    def test_purge_idempotency_keys(self) -> None:
+        for key in ("key-1", "key-2", "key-3"):
+            self.post(self.data, key=key)
+        IdempotencyKey.objects.exclude(key="key-3").update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        stdout = StringIO()
+
+        self.assertEqual(purge_idempotency_keys(timezone.now(), 1), 2)
+        call_command("purge_idempotency_keys", stdout=stdout)
+
+        self.assertEqual(stdout.getvalue(), "Purged 0 idempotency keys\n")
+        self.assertListEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)),
+            ["key-3"],
+        )
+
+
+class SerialStaticFilesHandler(StaticFilesHandler):
+    """Handler of live server that handles one request at a time, as its
+    threads share one in-memory SQLite connection and transaction state."""
+
+    lock = threading.Lock()
+
+    def __call__(self, environ: Any, start_response: Any) -> Any:
+        with self.lock:
+            return super().__call__(environ, start_response)
+
+
+# Live server serves static files from STATIC_URL, unset in settings
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    STATIC_URL="/static/",
+)
+class LoadTestTests(LiveServerTestCase):
+    static_handler = SerialStaticFilesHandler
+
+    def setUp(self) -> None:
+        # Tables are flushed between tests, cached group IDs are not
+        cache.clear()
+
+    def level(self, users: int, rps: float, p99: float) -> LevelResult:
+        return LevelResult(
+            users=users,
+            requests=100,
+            rps=rps,
+            p50=p99 / 2,
+            p99=p99,
+            error_rate=0.0,
+            locked=0,
+            lock_waits=None,
+        )
+
+    def test_find_capacity(self) -> None:
+        results = [
+            self.level(1, 10.0, 0.1),
+            self.level(4, 30.0, 0.4),
+            self.level(16, 35.0, 2.0),
+        ]
+
+        self.assertEqual(find_capacity(results, 0.5, 0.01), results[1])
+        self.assertIsNone(find_capacity(results, 0.05, 0.01))
+
+    def test_find_capacity_error_rate(self) -> None:
+        result = self.level(4, 30.0, 0.1)
+        result["error_rate"] = 0.05
+
+        self.assertIsNone(find_capacity([result], 0.5, 0.01))
+
+    def test_is_lock_error(self) -> None:
+        self.assertTrue(is_lock_error(500, {"x-database-lock": "1"}))
+        self.assertFalse(is_lock_error(200, {"x-database-lock": "1"}))
+        self.assertFalse(is_lock_error(500, {}))
+
+    def test_parse_mix(self) -> None:
+        self.assertDictEqual(
+            parse_mix("list=3, check=1"), {"list": 3, "check": 1}
+        )
+
+    def test_parse_mix_fail(self) -> None:
+        for value in ("view=1", "list=x", "list=-1", "list=0,check=0"):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    parse_mix(value)
+
+    def test_percentile(self) -> None:
+        values = [float(i) for i in range(100, 0, -1)]
+
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile(values, 100), 100.0)
+        self.assertEqual(percentile([], 99), 0.0)
+
+    def test_prepare_data(self) -> None:
+        prepare_data("loadtest", "secret", 3)
+        prepare_data("loadtest", "secret", 2)
+
+        self.assertTrue(Client().login(username="loadtest", password="secret"))
+        self.assertEqual(
+            Productivity.objects.filter(group__name=SEED_GROUP).count(), 3
+        )
+
+    def test_run_level(self) -> None:
+        prepare_data("loadtest", "secret", 5)
+        config = Config(
+            host=self.server_thread.host,
+            port=self.server_thread.port,
+            username="loadtest",
+            password="secret",
+            mix={"list": 1, "check": 1, "create": 1, "delete": 1},
+            think_time=0.0,
+            duration=0.5,
+        )
+
+        result = asyncio.run(run_level(config, 2))
+
+        self.assertGreater(result["requests"], 4)
+        self.assertEqual(result["error_rate"], 0.0)
+        self.assertIsNone(result["lock_waits"])
+
+    def test_run_level_fail_login(self) -> None:
+        config = Config(
+            host=self.server_thread.host,
+            port=self.server_thread.port,
+            username="nobody",
+            password="secret",
+            mix={"list": 1},
+            think_time=0.0,
+            duration=0.5,
+        )
+
+        result = asyncio.run(run_level(config, 1))
+
+        self.assertEqual(result["requests"], 2)
+
+    def test_summarize(self) -> None:
+        samples = [
+            Sample("list", 0.1, 200, False),
+            Sample("check", 0.2, 404, False),
+            Sample("check", 0.3, 500, True),
+            Sample("list", 0.4, 0, False),
+        ]
+
+        result = summarize(2, samples, 2.0, [0, 3, 1])
+
+        self.assertEqual(result["rps"], 2.0)
+        self.assertEqual(result["p99"], 0.4)
+        self.assertEqual(result["error_rate"], 0.5)
+        self.assertEqual(result["locked"], 1)
+        self.assertEqual(result["lock_waits"], 3)
+
+
+class ParsersTests(TestCase):
+    def test_parse_body_json(self) -> None:
+        request = RequestFactory().post(
+            "",
+            data={"item": "Calendar", "frequency": 0},
+            content_type="application/json",
+        )
+
+        self.assertDictEqual(
+            dict(parse_body(request)), {"item": "Calendar", "frequency": 0}
+        )
+
+    def test_parse_body_json_once(self) -> None:
+        request = RequestFactory().put(
+            "", data={"item": "Calendar"}, content_type="application/json"
+        )
+
+        with patch("productivity.parsers.loads", wraps=loads) as mock_loads:
+            first = parse_body(request)
+            second = parse_body(request)
+
+        mock_loads.assert_called_once()
+        self.assertIs(first, second)
+
+    def test_parse_body_form_put(self) -> None:
+        request = RequestFactory().put("", data="item=Calendar&frequency=0")
+
+        data = parse_body(request)
+
+        self.assertIsInstance(data, QueryDict)
+        self.assertEqual(data["frequency"], "0")
+
+    def test_parse_body_fail_invalid_json(self) -> None:
+        for body in ("{", "[1, 2]"):
+            with self.subTest(body=body):
+                request = RequestFactory().post(
+                    "", data=body, content_type="application/json"
+                )
+                with self.assertRaises(ValueError):
+                    parse_body(request)
+
+
+class PositionsTests(TestCase):
+    def test_key_between(self) -> None:
+        rng = random.Random(0)
+        keys: list[str] = []
+        for _ in range(500):
+            i = rng.randint(0, len(keys))
+            key = key_between(
+                keys[i - 1] if i else None,
+                keys[i] if i < len(keys) else None,
+            )
+            keys.insert(i, key)
+
+        self.assertListEqual(keys, sorted(set(keys)))
+
+    def test_key_between_append(self) -> None:
+        key = None
+        for _ in range(1000):
+            key = key_between(key, None)
+        assert key is not None
+
+        self.assertEqual(len(key), INTEGER_DIGITS)
+
+    def test_key_between_prepend(self) -> None:
+        keys = [key_between(None, "0002")]
+        keys.append(key_between(None, keys[-1]))
+        keys.append(key_between(None, keys[-1]))
+
+        self.assertListEqual(keys, ["0001", "0000i", "00009"])
+
+    def test_key_between_fail_order(self) -> None:
+        for before, after in (("i000", "i000"), ("i001", "i000")):
+            with self.subTest(before=before, after=after):
+                with self.assertRaises(ValueError):
+                    key_between(before, after)
+
+    def test_needs_rebalance(self) -> None:
+        key = INITIAL_KEY
+        after = key_between(key, None)
+        for _ in range(100):
+            if needs_rebalance(key):
+                break
+            key = key_between(key, after)
+
+        self.assertTrue(needs_rebalance(key))
+        self.assertFalse(needs_rebalance(INITIAL_KEY))
+
+    def test_spread_keys(self) -> None:
+        self.assertListEqual(spread_keys(3), ["9000", "i000", "r000"])
+        self.assertListEqual(spread_keys(0), [])
+
+
+# pylint: disable-next=too-many-public-methods
+class ProductivityModelTests(TestCase):
+    def setUp(self) -> None:
+        self.dt_today = datetime.combine(date.today(), time())
+        self.productivity = Productivity(
+            item="Calendar",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        )
+
+    def test_frequency_get_period_start(self) -> None:
+        now = datetime(2024, 3, 27, 13, 30)
+        expected = [
+            (Productivity.Frequency.KEY, None),
+            (Productivity.Frequency.LOOP, None),
+            (Productivity.Frequency.DAY, datetime(2024, 3, 27)),
+            (Productivity.Frequency.WEEK, datetime(2024, 3, 25)),
+            (Productivity.Frequency.MONTH, datetime(2024, 3, 1)),
+        ]
+        for frequency, period_start in expected:
+            with self.subTest(frequency=frequency):
+                self.assertEqual(frequency.get_period_start(now), period_start)
+
+    def test_frequency_get_period_index(self) -> None:
+        monday = datetime(2024, 3, 25)
+        sunday = datetime(2024, 3, 31, 23, 59)
+        for frequency, same_period in (
+            (Productivity.Frequency.DAY, False),
+            (Productivity.Frequency.WEEK, True),
+            (Productivity.Frequency.MONTH, True),
+        ):
+            with self.subTest(frequency=frequency):
+                self.assertIs(
+                    frequency.get_period_index(monday)
+                    == frequency.get_period_index(sunday),
+                    same_period,
+                )
+                self.assertEqual(
+                    frequency.get_period_index(sunday + timedelta(days=1)),
+                    frequency.get_period_index(sunday) + 1,
+                )
+
+    def test_deserialize_json(self) -> None:
+        j = {
+            "item": "Calendar",
+            "frequency": "Key",
+            "recurrence": "",
+            "group": "Next",
+            "last_check": self.dt_today.isoformat(),
+            "last_check_undo": "0001-01-01T00:00:00",
+        }
+        productivity = Productivity.deserialize_json(j)
+
+        self.productivity.last_check = self.dt_today
+        self.assertIs(
+            is_productivity_almost_equal(productivity, self.productivity), True
+        )
+
+    def test_deserialize_json_new_group(self) -> None:
+        j = {"item": "Run", "frequency": "Week", "group": "Health"}
+
+        productivity = Productivity.deserialize_json(j)
+
+        self.assertIsNone(productivity.group_id)
+        self.assertFalse(ProductivityGroup.objects.filter(name="Health"))
+
+        productivity.save()
+
+        self.assertEqual(
+            productivity.group_id, ProductivityGroup.objects.get_id("Health")
+        )
+        self.assertIsNone(productivity.new_group_name)
+        self.assertEqual(
+            Productivity.objects.get().serialize_json()["group"], "Health"
+        )
+
+    def test_deserialize_json_key_error(self) -> None:
+        j = {
+            "ite": "Calendar",
+            "frequency": "Key",
+        }
+        with self.assertRaises(KeyError) as cm:
+            Productivity.deserialize_json(j)
+        self.assertEqual(cm.exception.args[0], "item")
+
+    def test_deserialize_json_validation_error_item(self) -> None:
+        j = {
+            "item": "Calendar" * 26,
+            "frequency": "Key",
+            "recurrence": "",
+            "group": "Next",
+            "last_check": "2024-01-01T00:00:00",
+            "last_check_undo": "0001-01-01T00:00:00",
+        }
+        with self.assertRaises(ValidationError) as cm:
+            Productivity.deserialize_json(j)
+        self.assertIn("item", cm.exception.args[0])
+
+    def test_deserialize_json_validation_error_frequency(self) -> None:
+        j = {
+            "item": "Calendar",
+            "frequency": "Ke",
+        }
+        with self.assertRaises(ValidationError) as cm:
+            Productivity.deserialize_json(j)
+        self.assertEqual(
+            cm.exception.args[0], "Invalid enum name for Frequency"
+        )
+
+    def test_deserialize_json_validation_error_datetime(self) -> None:
+        j = {
+            "item": "Calendar",
+            "frequency": "Key",
+            "group": "Next",
+            "last_check": "",
+        }
+        with self.assertRaises(ValidationError) as cm:
+            Productivity.deserialize_json(j)
+        self.assertEqual(
+            cm.exception.args[0], "Invalid date_string format for last_check"
+        )
+
+    def test_deserialize_json_frequency_value(self) -> None:
+        for frequency in (0, "0"):
+            with self.subTest(frequency=frequency):
+                j = {
+                    "item": "Calendar",
+                    "frequency": frequency,
+                    "group": "Next",
+                }
+                productivity = Productivity.deserialize_json(j)
+
+                self.assertEqual(productivity.frequency, 0)
+                self.assertIsNone(productivity.last_check)
+
+    def test_deserialize_json_validation_error_frequency_type(self) -> None:
+        for frequency in (None, True, [0]):
+            with self.subTest(frequency=frequency):
+                j = {
+                    "item": "Calendar",
+                    "frequency": frequency,
+                    "group": "Next",
+                }
+                with self.assertRaises(ValidationError):
+                    Productivity.deserialize_json(j)
+
+    def test_deserialize_json_recurrence(self) -> None:
+        j = {
+            "item": "Calendar",
+            "frequency": "Key",
+            "group": "Next",
+            "recurrence": "byday=fr,mo;freq=weekly",
+        }
+        productivity = Productivity.deserialize_json(j)
+
+        self.assertEqual(productivity.recurrence, "FREQ=WEEKLY;BYDAY=MO,FR")
+
+    def test_deserialize_json_validation_error_recurrence(self) -> None:
+        for recurrence in ("FREQ=YEARLY", "every day", None):
+            with self.subTest(recurrence=recurrence):
+                j = {
+                    "item": "Calendar",
+                    "frequency": "Key",
+                    "group": "Next",
+                    "recurrence": recurrence,
+                }
+                with self.assertRaises(ValidationError):
+                    Productivity.deserialize_json(j)
+
+    def test_parse_iso_datetime(self) -> None:
+        self.assertEqual(
+            Productivity.parse_iso_datetime(
+                "2024-01-01T00:00:00", "last_check"
+            ),
+            datetime(2024, 1, 1),
+        )
+
+    def test_parse_iso_datetime_validation_error(self) -> None:
+        with self.assertRaises(ValidationError) as cm:
+            Productivity.parse_iso_datetime("", "last_check")
+        self.assertEqual(
+            cm.exception.args[0], "Invalid date_string format for last_check"
+        )
+
+    def test_serialize_rows(self) -> None:
+        rows = [(1, "Calendar", 0, self.dt_today), (2, "Mail", 10, None)]
+        expected = [
+            {
+                "id": "1",
+                "item": "Calendar",
+                "frequency": "Key",
+                "last_check": self.dt_today.isoformat(),
+            },
+            {"id": "2", "item": "Mail", "frequency": "", "last_check": ""},
+        ]
+        self.assertListEqual(
+            Productivity.serialize_rows(
+                ["id", "item", "frequency", "last_check"], rows
+            ),
+            expected,
+        )
+
+    def test_serialize_rows_compact(self) -> None:
+        rows = [
+            (1, "Calendar", 0, datetime(2024, 1, 1), datetime.min),
+            (2, "Mail", 2, None, datetime.min),
+        ]
+        fields = ["id", "item", "frequency", "last_check", "last_check_undo"]
+        expected = [
+            fields,
+            [1, "Calendar", 0, 1704067200, -62135596800],
+            [2, "Mail", 2, None, -62135596800],
+        ]
+        self.assertListEqual(
+            Productivity.serialize_rows(fields, rows, compact=True),
+            expected,
+        )
+
+    def test_summarize(self) -> None:
+        Productivity(
+            item="Calendar",
+            frequency=2,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        ).save()
+        Productivity(
+            item="To-Do",
+            frequency=2,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        ).save()
+        Productivity(
+            item="Mail",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        ).save()
+        Productivity(
+            item="Run",
+            frequency=3,
+            group_id=ProductivityGroup.objects.get_id("Health"),
+        ).save()
+        Productivity.objects.filter(item="To-Do").update(
+            last_check=self.dt_today - timedelta(days=1)
+        )
+
+        expected = [
+            {
+                "group": "Health",
+                "frequency": "Week",
+                "total": 1,
+                "done": 1,
+                "pending": 0,
+            },
+            {
+                "group": "Next",
+                "frequency": "Key",
+                "total": 1,
+                "done": 0,
+                "pending": 1,
+            },
+            {
+                "group": "Next",
+                "frequency": "Day",
+                "total": 2,
+                "done": 1,
+                "pending": 1,
+            },
+        ]
+        with self.assertNumQueries(1):
+            self.assertListEqual(
+                Productivity.summarize(datetime.now()), expected
+            )
+
+    def test_summarize_zero_object(self) -> None:
+        self.assertListEqual(Productivity.summarize(datetime.now()), [])
+
+    def test_str(self) -> None:
+        self.productivity.last_check = self.dt_today
+        self.assertEqual(
+            str(self.productivity),
+            f"[Key-Next] Calendar ({self.dt_today.strftime('%d %b %I:%M %p')})",
+        )
+
+    def test_str_empty_instance(self) -> None:
+        self.assertEqual(str(Productivity()), "[-]  ()")
+
+    def test_get_frequency(self) -> None:
+        self.assertEqual(self.productivity.get_frequency(), "Key")
+
+    def test_get_frequency_invalid_enum_value(self) -> None:
+        self.productivity.frequency = 10
+        with self.assertLogs(logger, logging.ERROR) as logger_obj:
+            self.assertEqual(self.productivity.get_frequency(), "")
+            self.assertEqual(
+                logger_obj.records[0].getMessage(),
+                "Invalid enum value for Frequency",
+            )
+
+    def test_bulk_create(self) -> None:
+        generation = get_generation()
+
+        Productivity.objects.bulk_create(
+            [
+                self.productivity,
+                Productivity(
+                    item="Mail",
+                    frequency=2,
+                    group_id=ProductivityGroup.objects.get_id("Next"),
+                ),
+            ]
+        )
+
+        self.assertEqual(Productivity.objects.count(), 2)
+        self.assertGreater(get_generation(), generation)
+
+    def test_bulk_create_invalid_data(self) -> None:
+        self.productivity.frequency = 10
+
+        with self.assertRaises(ValidationError) as cm:
+            Productivity.objects.bulk_create([self.productivity])
+        self.assertIn("frequency", cm.exception.args[0])
+
+        self.assertEqual(Productivity.objects.count(), 0)
+
+    def test_bulk_create_skip_validation(self) -> None:
+        with patch(
+            "productivity.models.validate_productivity"
+        ) as mock_validate:
+            Productivity.objects.bulk_create(
+                [self.productivity], validate=False
+            )
+
+        mock_validate.assert_not_called()
+        self.assertEqual(Productivity.objects.count(), 1)
+
+    def test_delete_invalidate_cache(self) -> None:
+        self.productivity.save()
+        generation = get_generation()
+
+        self.productivity.delete()
+
+        self.assertGreater(get_generation(), generation)
+
+    def test_queryset_delete_invalidate_cache(self) -> None:
+        self.productivity.save()
+        generation = get_generation()
+
+        Productivity.objects.all().delete()
+
+        self.assertGreater(get_generation(), generation)
+
+    def test_queryset_update_invalidate_cache(self) -> None:
+        self.productivity.save()
+        generation = get_generation()
+
+        Productivity.objects.update(item="To-Do")
+
+        self.assertGreater(get_generation(), generation)
+
+    def test_soft_delete(self) -> None:
+        self.productivity.save()
+        generation = get_generation()
+
+        with self.assertNumQueries(1):
+            self.assertIs(
+                Productivity.objects.soft_delete(self.productivity.id), True
+            )
+
+        self.assertGreater(get_generation(), generation)
+        self.assertEqual(Productivity.objects.count(), 0)
+        productivity = Productivity.all_objects.get()
+        self.assertIsNotNone(productivity.deleted_at)
+        self.assertEqual(productivity.version, 2)
+
+    def test_soft_delete_not_exist(self) -> None:
+        self.productivity.save()
+        Productivity.objects.soft_delete(self.productivity.id)
+        generation = get_generation()
+
+        self.assertIs(
+            Productivity.objects.soft_delete(self.productivity.id), False
+        )
+        self.assertIs(Productivity.objects.soft_delete(100), False)
+        self.assertEqual(get_generation(), generation)
+
+    def test_group_delete(self) -> None:
+        self.productivity.save()
+
+        self.assertIs(
+            ProductivityGroup.objects.delete_group(self.productivity.group_id),
+            True,
+        )
+
+        self.assertEqual(Productivity.objects.count(), 0)
+        self.assertIs(
+            Productivity.all_objects.restore(self.productivity.id), True
+        )
+        self.assertEqual(
+            Productivity.objects.get().serialize_json()["group"], "Next"
+        )
+
+    def test_group_delete_empty(self) -> None:
+        group_id = ProductivityGroup.objects.get_id("Health")
+
+        self.assertIs(ProductivityGroup.objects.delete_group(group_id), True)
+
+        self.assertNotIn("Health", ProductivityGroup.objects.get_ids())
+        self.assertEqual(
+            ProductivityGroup.objects.rename(
+                self.productivity.group_id, "Health"
+            ),
+            "Next",
+        )
+
+    def test_group_delete_not_exist(self) -> None:
+        self.assertIs(ProductivityGroup.objects.delete_group(99), False)
+
+    def test_group_get_id(self) -> None:
+        group_id = ProductivityGroup.objects.get_id("Health")
+
+        self.assertEqual(ProductivityGroup.objects.get_id("Health"), group_id)
+        self.assertEqual(
+            ProductivityGroup.objects.get(id=group_id).name, "Health"
+        )
+
+    def test_group_get_id_fail_invalid(self) -> None:
+        with self.assertRaises(ValidationError) as cm:
+            ProductivityGroup.objects.get_id("Next" * 51)
+
+        self.assertEqual(list(cm.exception.message_dict), ["group"])
+
+    def test_group_get_ids_cached(self) -> None:
+        cache.clear()
+        # Cached IDs outlive test transaction
+        self.addCleanup(cache.clear)
+        with patch.object(connection, "in_atomic_block", False):
+            ids = ProductivityGroup.objects.get_ids()
+            with self.assertNumQueries(0):
+                self.assertDictEqual(ProductivityGroup.objects.get_ids(), ids)
+
+    def test_group_get_ids_create(self) -> None:
+        cache.clear()
+        self.addCleanup(cache.clear)
+        with patch.object(connection, "in_atomic_block", False):
+            ProductivityGroup.objects.get_ids()
+            group = ProductivityGroup.objects.create(name="Health")
+
+            self.assertEqual(
+                ProductivityGroup.objects.get_ids()["Health"], group.id
+            )
+
+    def test_group_get_ids_other_process(self) -> None:
+        cache.clear()
+        self.addCleanup(cache.clear)
+        group_id = ProductivityGroup.objects.get_id("Next")
+        with patch.object(connection, "in_atomic_block", False):
+            ProductivityGroup.objects.get_ids()
+            # As another process sharing the cache backend would
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE productivity_productivitygroup SET name = %s",
+                    ["Later"],
+                )
+            bump_generation()
+
+            self.assertDictEqual(
+                ProductivityGroup.objects.get_ids(), {"Later": group_id}
+            )
+
+    def test_group_rename(self) -> None:
+        self.productivity.save()
+
+        self.assertEqual(
+            ProductivityGroup.objects.rename(
+                self.productivity.group_id, "Later"
+            ),
+            "Next",
+        )
+        self.assertEqual(
+            Productivity.objects.get().serialize_json()["group"], "Later"
+        )
+        self.assertEqual(Productivity.objects.get().version, 1)
+
+    def test_group_rename_fail_exists(self) -> None:
+        group_id = ProductivityGroup.objects.get_id("Health")
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ProductivityGroup.objects.rename(group_id, "Next")
+
+    def test_group_rename_not_exist(self) -> None:
+        self.assertIsNone(ProductivityGroup.objects.rename(99, "Later"))
+
+    def test_soft_delete_group(self) -> None:
+        self.productivity.save()
+        Productivity(
+            item="Run",
+            frequency=3,
+            group_id=ProductivityGroup.objects.get_id("Health"),
+        ).save()
+
+        self.assertEqual(
+            Productivity.objects.soft_delete_group(self.productivity.group_id),
+            1,
+        )
+
+        self.assertListEqual(
+            list(Productivity.objects.values_list("item", flat=True)),
+            ["Run"],
+        )
+
+    def test_restore(self) -> None:
+        self.productivity.save()
+        self.assertIs(
+            Productivity.all_objects.restore(self.productivity.id), False
+        )
+        Productivity.objects.soft_delete(self.productivity.id)
+
+        self.assertIs(
+            Productivity.all_objects.restore(self.productivity.id), True
+        )
+
+        productivity = Productivity.objects.get()
+        self.assertIsNone(productivity.deleted_at)
+        self.assertEqual(productivity.version, 3)
+
+    def test_move(self) -> None:
+        self.productivity.save()
+        mail = Productivity(
+            item="Mail",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        )
+        mail.save()
+
+        # Moved object and next position read, moved object updated
+        with self.assertNumQueries(3):
+            position = Productivity.objects.move(mail.id, None)
+
+        self.assertEqual(
+            position, Productivity.objects.get(id=mail.id).position
+        )
+        self.assertListEqual(
+            list(
+                Productivity.objects.order_by(
+                    *Productivity.LIST_ORDERING
+                ).values_list("item", flat=True)
+            ),
+            ["Mail", "Calendar"],
+        )
+
+    def test_move_after(self) -> None:
+        for item in ("Mail", "To-Do", "Journal"):
+            Productivity(
+                item=item,
+                frequency=0,
+                group_id=ProductivityGroup.objects.get_id("Next"),
+            ).save()
+        journal = Productivity.objects.get(item="Journal")
+        mail = Productivity.objects.get(item="Mail")
+
+        Productivity.objects.move(journal.id, mail.id)
+
+        self.assertListEqual(
+            list(
+                Productivity.objects.order_by(
+                    *Productivity.LIST_ORDERING
+                ).values_list("item", flat=True)
+            ),
+            ["Mail", "Journal", "To-Do"],
+        )
+
+    def test_move_not_exist(self) -> None:
+        self.productivity.save()
+        other = Productivity(
+            item="Run",
+            frequency=3,
+            group_id=ProductivityGroup.objects.get_id("Health"),
+        )
+        other.save()
+
+        self.assertIsNone(Productivity.objects.move(99, None))
+        self.assertIsNone(
+            Productivity.objects.move(self.productivity.id, other.id)
+        )
+
+    def test_due(self) -> None:
+        group_id = ProductivityGroup.objects.get_id("Next")
+        Productivity.objects.bulk_create(
+            Productivity(
+                item=item,
+                frequency=frequency,
+                group_id=group_id,
+                recurrence=recurrence,
+                last_check=datetime(2024, 3, 1, 8),
+            )
+            for item, frequency, recurrence in (
+                ("Mail", Productivity.Frequency.DAY, ""),
+                ("Plan", Productivity.Frequency.WEEK, ""),
+                (
+                    "Rent",
+                    Productivity.Frequency.KEY,
+                    "FREQ=MONTHLY;BYMONTHDAY=1",
+                ),
+                (
+                    "Water",
+                    Productivity.Frequency.LOOP,
+                    "FREQ=DAILY;INTERVAL=3",
+                ),
+                ("Journal", Productivity.Frequency.KEY, ""),
+            )
+        )
+        # bulk_create saves auto_now fields as now
+        Productivity.objects.update(last_check=datetime(2024, 3, 1, 8))
+        ids = dict(Productivity.objects.values_list("item", "id"))
+
+        self.assertListEqual(
+            Productivity.objects.due(date(2024, 3, 4)),
+            [
+                (date(2024, 3, 2), ids["Mail"]),
+                (date(2024, 3, 4), ids["Plan"]),
+                (date(2024, 3, 4), ids["Water"]),
+            ],
+        )
+        self.assertListEqual(
+            Productivity.objects.due(date(2024, 4, 1), limit=1),
+            [(date(2024, 3, 2), ids["Mail"])],
+        )
+        self.assertEqual(len(Productivity.objects.due(date(2024, 4, 1))), 4)
+
+    def test_rebalance_positions(self) -> None:
+        for item in ("Mail", "To-Do", "Journal"):
+            Productivity(
+                item=item,
+                frequency=0,
+                group_id=ProductivityGroup.objects.get_id("Next"),
+            ).save()
+        mail = Productivity.objects.get(item="Mail")
+        for item in ("Journal", "To-Do", "Journal", "To-Do"):
+            Productivity.objects.move(
+                Productivity.objects.get(item=item).id, mail.id
+            )
+
+        self.assertEqual(
+            Productivity.objects.rebalance_positions(mail.group_id), 3
+        )
+
+        self.assertListEqual(
+            list(
+                Productivity.objects.order_by(
+                    *Productivity.LIST_ORDERING
+                ).values_list("item", "position")
+            ),
+            [("Mail", "9000"), ("To-Do", "i000"), ("Journal", "r000")],
+        )
+
+    def test_delete_deletes_checks(self) -> None:
+        self.productivity.save()
+        ProductivityCheck.objects.create(
+            productivity_id=self.productivity.id,
+            checked_at=datetime(2024, 3, 1),
+        )
+
+        Productivity.objects.all().delete()
+
+        self.assertFalse(ProductivityCheck.objects.exists())
+
+    def test_purge(self) -> None:
+        self.productivity.save()
+        deleted = Productivity(
+            item="Mail",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        )
+        deleted.save()
+        Productivity.objects.soft_delete(deleted.id)
+        ProductivityCheck.objects.create(
+            productivity_id=deleted.id, checked_at=datetime(2024, 3, 1)
+        )
+
+        self.assertEqual(Productivity.all_objects.all().purge(), 1)
+        self.assertFalse(ProductivityCheck.objects.exists())
+
+        self.assertListEqual(
+            list(Productivity.all_objects.values_list("id", flat=True)),
+            [self.productivity.id],
+        )
+
+    def test_save_new_object(self) -> None:
+        self.productivity.save()
+
+        self.assertEqual(Productivity.objects.count(), 1)
+        self.assertEqual(self.productivity.last_check_undo, datetime.min)
+
+    def test_save_new_object_position(self) -> None:
+        self.productivity.save()
+        mail = Productivity(
+            item="Mail",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        )
+        mail.save()
+
+        self.assertEqual(self.productivity.position, INITIAL_KEY)
+        self.assertGreater(mail.position, self.productivity.position)
+
+    def test_bulk_create_position(self) -> None:
+        self.productivity.save()
+        created = Productivity.objects.bulk_create(
+            Productivity(
+                item=item,
+                frequency=0,
+                group_id=ProductivityGroup.objects.get_id(group),
+            )
+            for item, group in (("Mail", "Next"), ("Run", "Health"))
+        )
+
+        self.assertGreater(created[0].position, self.productivity.position)
+        self.assertEqual(created[1].position, INITIAL_KEY)
+
+    def test_save_invalidate_cache(self) -> None:
+        generation = get_generation()
+
+        self.productivity.save()
+
+        self.assertGreater(get_generation(), generation)
+
+    def test_save_existing_object(self) -> None:
+        self.productivity.last_check = self.dt_today
+        self.productivity.save()
+
+        self.assertEqual(Productivity.objects.count(), 1)
+        self.assertEqual(self.productivity.last_check_undo, self.dt_today)
+
+    def test_save_version(self) -> None:
+        self.productivity.save()
+        self.assertEqual(self.productivity.version, 1)
+
+        self.productivity.save()
+        self.assertEqual(self.productivity.version, 2)
+
+        Productivity.objects.update(version=5)
+        self.productivity.save()
+        self.assertEqual(
+            Productivity.objects.get(pk=self.productivity.id).version, 6
+        )
+
+    def test_save_expected_version(self) -> None:
+        self.productivity.save()
+        self.productivity.item = "To-Do"
+
+        self.productivity.save(expected_version=1)
+
+        self.assertEqual(self.productivity.version, 2)
+        self.assertEqual(Productivity.objects.get().item, "To-Do")
+
+    def test_save_expected_version_conflict(self) -> None:
+        self.productivity.save()
+        Productivity.objects.update(version=2)
+        self.productivity.item = "To-Do"
+
+        with self.assertRaises(VersionConflictError) as cm:
+            with transaction.atomic():
+                self.productivity.save(expected_version=1)
+        self.assertEqual(cm.exception.args[0], "Version 1 is not current")
+
+        self.assertEqual(Productivity.objects.get().item, "Calendar")
+
+    def test_save_invalid_data(self) -> None:
+        self.productivity.frequency = 10
+
+        with self.assertRaises(ValidationError) as cm:
+            self.productivity.save()
+        self.assertIn("frequency", cm.exception.args[0])
+
+        self.assertEqual(Productivity.objects.count(), 0)
+
+    def test_save_skip_validation(self) -> None:
+        with patch(
+            "productivity.models.validate_productivity"
+        ) as mock_validate:
+            self.productivity.save(validate=False)
+
+        mock_validate.assert_not_called()
+        self.assertEqual(Productivity.objects.count(), 1)
+
+    def test_serialize_json(self) -> None:
+        self.productivity.id = 1
+        self.productivity.last_check = self.dt_today
+        expected = {
+            "id": "1",
+            "item": "Calendar",
+            "frequency": "Key",
+            "recurrence": "",
+            "group": "Next",
+            "last_check": self.dt_today.isoformat(),
+            "last_check_undo": "0001-01-01T00:00:00",
+        }
+        self.assertDictEqual(self.productivity.serialize_json(), expected)
+
+    def test_serialize_json_empty_instance(self) -> None:
+        expected = {
+            "id": "None",
+            "item": "",
+            "frequency": "",
+            "recurrence": "",
+            "group": "",
+            "last_check": "",
+            "last_check_undo": "0001-01-01T00:00:00",
+        }
+        self.assertDictEqual(Productivity().serialize_json(), expected)
+
+    def test_crud(self) -> None:
+        self.productivity.save()
+
+        productivities = Productivity.objects.all()
+        self.assertEqual(len(productivities), 1)
+        expected = Productivity(
+            id=1,
+            item="Calendar",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+            last_check=self.dt_today,
+        )
+        self.assertIs(
+            is_productivity_almost_equal(productivities[0], expected), True
+        )
+
+        self.productivity.item = "To-Do"
+        self.productivity.save()
+        productivities = Productivity.objects.all()
+        self.assertEqual(len(productivities), 1)
+        expected = Productivity(
+            id=1,
+            item="To-Do",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+            last_check=self.dt_today,
+            last_check_undo=self.dt_today,
+        )
+        self.assertIs(
+            is_productivity_almost_equal(productivities[0], expected), True
+        )
+
+        self.assertEqual(
+            self.productivity.delete(), (1, {"productivity.Productivity": 1})
+        )
+        self.assertEqual(Productivity.objects.count(), 0)
+
+
+class PurgeTests(TestCase):
+    def create_deleted(self, deleted_at: datetime) -> int:
+        productivity = Productivity(
+            item="Calendar",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        )
+        productivity.save()
+        Productivity.objects.soft_delete(productivity.id)
+        Productivity.all_objects.filter(id=productivity.id).update(
+            deleted_at=deleted_at
+        )
+
+        return productivity.id
+
+    def test_purge_productivities(self) -> None:
+        cutoff = datetime(2024, 1, 1)
+        for _ in range(5):
+            self.create_deleted(cutoff - timedelta(days=1))
+        kept_id = self.create_deleted(cutoff)
+        Productivity(
+            item="Mail",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        ).save()
+
+        self.assertEqual(purge_productivities(cutoff, batch_size=2), 5)
+
+        self.assertEqual(Productivity.objects.count(), 1)
+        self.assertListEqual(
+            list(
+                Productivity.all_objects.filter(
+                    deleted_at__isnull=False
+                ).values_list("id", flat=True)
+            ),
+            [kept_id],
+        )
+
+    def test_command(self) -> None:
+        self.create_deleted(datetime.now() - timedelta(days=31))
+        self.create_deleted(datetime.now())
+        stdout = StringIO()
+
+        call_command("purge_productivity", stdout=stdout)
+
+        self.assertEqual(stdout.getvalue(), "Purged 1 Productivity objects\n")
+        self.assertEqual(Productivity.all_objects.count(), 1)
+
+    def test_command_fail_invalid_batch_size(self) -> None:
+        with self.assertRaises(CommandError):
+            call_command("purge_productivity", "--batch-size", "0")
+
+
+class ReadModelTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.productivities = [
+            Productivity(
+                item=item,
+                frequency=frequency,
+                group_id=ProductivityGroup.objects.get_id(group),
+                recurrence=recurrence,
+            )
+            for item, frequency, group, recurrence in (
+                ("Run", Productivity.Frequency.DAY, "Health", ""),
+                ("Swim", Productivity.Frequency.WEEK, "Health", "FREQ=DAILY"),
+                ("Calendar", Productivity.Frequency.DAY, "Next", ""),
+            )
+        ]
+        for productivity in self.productivities:
+            productivity.save()
+        self.read_model = ReadModel()
+        self.addCleanup(self.read_model.close)
+
+    def test_get_productivities(self) -> None:
+        cases: list[dict[str, Any]] = [
+            {},
+            {"fields": "id,group,last_check,version"},
+            {"response_format": "compact"},
+            {"include_archived": True},
+            {"frequency": Productivity.Frequency.DAY},
+            {"group": "Health", "response_format": "compact"},
+            {"frequency": Productivity.Frequency.WEEK, "group": "Next"},
+        ]
+        expected = [get_productivities(**case).content for case in cases]
+        cache.clear()
+
+        get_read_model.cache_clear()
+        self.addCleanup(get_read_model.cache_clear)
+        with override_settings(PRODUCTIVITY_READ_MODEL=True):
+            read_model = get_read_model()
+            assert read_model is not None
+            self.addCleanup(read_model.close)
+
+            for case, content in zip(cases, expected):
+                with self.subTest(**case):
+                    self.assertEqual(
+                        get_productivities(**case).content, content
+                    )
+
+    def test_get_snapshot(self) -> None:
+        snapshot = self.read_model.get_snapshot()
+
+        with self.assertNumQueries(0):
+            self.assertIs(self.read_model.get_snapshot(), snapshot)
+        self.assertListEqual(
+            list(snapshot.get_rows(["id", "item", "group"])),
+            [
+                [self.productivities[0].id, "Run", "Health"],
+                [self.productivities[1].id, "Swim", "Health"],
+                [self.productivities[2].id, "Calendar", "Next"],
+            ],
+        )
+        self.assertEqual(snapshot.frequencies, bytes([2, 3, 2]))
+        self.assertIs(snapshot.recurrences[0], snapshot.recurrences[2])
+
+    def test_get_snapshot_refresh(self) -> None:
+        run, swim, calendar = self.productivities
+        old = self.read_model.get_snapshot()
+        swim.item = "Dive"
+        swim.save()
+        Productivity.objects.move(calendar.id, None)
+        Productivity.objects.soft_delete(run.id)
+        ProductivityGroup.objects.rename(calendar.group_id, "Later")
+
+        # Scan, group names, fetch of changed object
+        with self.assertNumQueries(3):
+            snapshot = self.read_model.get_snapshot()
+
+        self.assertNotEqual(snapshot.revision, old.revision)
+        self.assertListEqual(
+            list(snapshot.get_rows(["id", "item", "group", "version"])),
+            [
+                [swim.id, "Dive", "Health", 2],
+                [calendar.id, "Calendar", "Later", 1],
+            ],
+        )
+        # Unchanged row is copied from previous snapshot
+        self.assertIs(snapshot.items[1], old.items[2])
+
+    def test_get_snapshot_group_names_from_table(self) -> None:
+        # Stale map, as cached by a process that missed a rename
+        cache.set(
+            make_key("group_ids"), {"Old": self.productivities[0].group_id}
+        )
+
+        snapshot = self.read_model.get_snapshot()
+
+        self.assertListEqual(
+            [row[0] for row in snapshot.get_rows(["group"])],
+            ["Health", "Health", "Next"],
+        )
+
+    def test_get_snapshot_replace_rows(self) -> None:
+        old = self.read_model.get_snapshot()
+        Productivity.objects.filter(id=self.productivities[1].id).mark_checked(
+            datetime(2024, 3, 1)
+        )
+
+        snapshot = self.read_model.get_snapshot()
+
+        self.assertIs(snapshot.ids, old.ids)
+        self.assertListEqual(
+            list(snapshot.get_rows(["last_check", "version"])),
+            [
+                [self.productivities[0].last_check, 1],
+                [datetime(2024, 3, 1), 2],
+                [self.productivities[2].last_check, 1],
+            ],
+        )
+
+    def test_get_snapshot_unchanged_write(self) -> None:
+        old = self.read_model.get_snapshot()
+        Productivity.objects.filter(id=0).update(item="Dive")
+
+        self.assertIs(self.read_model.get_snapshot(), old)
+
+
+class RecurrenceTests(TestCase):
+    def test_parse_rule(self) -> None:
+        for text, expected in (
+            ("FREQ=DAILY;INTERVAL=3", Rule("DAILY", 3)),
+            ("freq=daily; interval=1", Rule("DAILY")),
+            (
+                "FREQ=WEEKLY;BYDAY=FR,MO,FR",
+                Rule("WEEKLY", by_day=(0, 4)),
+            ),
+            (
+                "BYMONTHDAY=15,1;FREQ=MONTHLY;INTERVAL=2",
+                Rule("MONTHLY", 2, by_month_day=(1, 15)),
+            ),
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(parse_rule(text), expected)
+
+        self.assertEqual(
+            str(parse_rule("BYMONTHDAY=15,1;FREQ=MONTHLY;INTERVAL=2")),
+            "FREQ=MONTHLY;INTERVAL=2;BYMONTHDAY=1,15",
+        )
+
+    def test_parse_rule_fail(self) -> None:
+        for text in (
+            "",
+            "FREQ=YEARLY",
+            "FREQ=DAILY;INTERVAL=0",
+            "FREQ=DAILY;FREQ=DAILY",
+            "FREQ=DAILY;BYDAY=MO",
+            "FREQ=WEEKLY",
+            "FREQ=WEEKLY;BYDAY=XX",
+            "FREQ=MONTHLY;BYMONTHDAY=0",
+            "FREQ=MONTHLY;BYMONTHDAY=1,x",
+        ):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    parse_rule(text)
+
+    def test_next_occurrence(self) -> None:
+        # 2024-03-01 is a Friday
+        after = date(2024, 3, 1)
+        for text, expected in (
+            ("FREQ=DAILY;INTERVAL=3", date(2024, 3, 4)),
+            ("FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR", date(2024, 3, 4)),
+            ("FREQ=WEEKLY;BYDAY=FR,SA", date(2024, 3, 2)),
+            ("FREQ=WEEKLY;INTERVAL=2;BYDAY=TH", date(2024, 3, 14)),
+            ("FREQ=MONTHLY;BYMONTHDAY=1,15", date(2024, 3, 15)),
+            ("FREQ=MONTHLY;INTERVAL=12;BYMONTHDAY=1", date(2025, 3, 1)),
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(
+                    next_occurrence(parse_rule(text), after), expected
+                )
+
+    def test_next_occurrence_month_end(self) -> None:
+        rule = parse_rule("FREQ=MONTHLY;BYMONTHDAY=30,31")
+
+        self.assertEqual(
+            next_occurrence(rule, date(2024, 1, 31)), date(2024, 2, 29)
+        )
+        self.assertEqual(
+            next_occurrence(rule, date(2024, 4, 29)), date(2024, 4, 30)
+        )
+        self.assertEqual(
+            next_occurrence(rule, date(2024, 12, 31)), date(2025, 1, 30)
+        )
+
+    def test_scheduler(self) -> None:
+        scheduler = Scheduler(
+            [
+                (date(2024, 3, 3), 1),
+                (date(2024, 3, 1), 3),
+                (date(2024, 3, 1), 2),
+            ]
+        )
+
+        self.assertListEqual(
+            scheduler.pop_due(date(2024, 3, 2)),
+            [(date(2024, 3, 1), 2), (date(2024, 3, 1), 3)],
+        )
+        scheduler.push(date(2024, 3, 2), 2)
+        self.assertListEqual(
+            scheduler.pop_due(date(2024, 3, 9), limit=1),
+            [(date(2024, 3, 2), 2)],
+        )
+        self.assertEqual(len(scheduler), 1)
+
+
+class RollupsTests(TestCase):
+    def setUp(self) -> None:
+        self.group_id = ProductivityGroup.objects.get_id("Health")
+        self.productivities = [
+            Productivity(
+                item=item, frequency=frequency, group_id=self.group_id
+            )
+            for item, frequency in (
+                ("Run", Productivity.Frequency.DAY),
+                ("Swim", Productivity.Frequency.DAY),
+                ("Ride", Productivity.Frequency.WEEK),
+            )
+        ]
+        Productivity.objects.bulk_create(self.productivities)
+
+    def check(self, productivity: Productivity, *days: int) -> None:
+        ProductivityCheck.objects.bulk_create(
+            ProductivityCheck(
+                productivity_id=productivity.id,
+                checked_at=datetime(2024, 3, day, 8),
+            )
+            for day in days
+        )
+
+    def test_add_fail_missing_negative(self) -> None:
+        ProductivityRollup.objects.add(
+            self.group_id, Productivity.Frequency.DAY, date(2024, 3, 1), -1, -1
+        )
+
+        self.assertFalse(ProductivityRollup.objects.exists())
+
+    def test_get_stats(self) -> None:
+        run, swim, ride = self.productivities
+        self.check(run, 4, 5)
+        self.check(swim, 5)
+        self.check(ride, 4, 6)
+        rebuild_rollups()
+
+        self.assertListEqual(
+            get_stats(date(2024, 3, 4), date(2024, 3, 5)),
+            [
+                {
+                    "group": "Health",
+                    "frequency": "Day",
+                    "period_start": "2024-03-04",
+                    "checks": 1,
+                    "done": 1,
+                    "total": 2,
+                    "rate": 0.5,
+                },
+                {
+                    "group": "Health",
+                    "frequency": "Day",
+                    "period_start": "2024-03-05",
+                    "checks": 2,
+                    "done": 2,
+                    "total": 2,
+                    "rate": 1.0,
+                },
+                {
+                    "group": "Health",
+                    "frequency": "Week",
+                    "period_start": "2024-03-04",
+                    "checks": 2,
+                    "done": 1,
+                    "total": 1,
+                    "rate": 1.0,
+                },
+            ],
+        )
+        self.assertListEqual(
+            get_stats(date(2024, 3, 6), date(2024, 3, 31)), []
+        )
+
+    def test_rebuild_rollups(self) -> None:
+        run = self.productivities[0]
+        for day in (1, 2):
+            run.last_check = datetime(2024, 3, day, 8)
+            ProductivityCheck.objects.record(run, datetime(2024, 3, day))
+        incremental = list(
+            ProductivityRollup.objects.order_by("period_start").values_list(
+                "period_start", "checks", "done", "total"
+            )
+        )
+
+        out = StringIO()
+        call_command("rebuild_rollups", stdout=out)
+
+        self.assertIn("Rebuilt 2 rollups", out.getvalue())
+        self.assertListEqual(
+            list(
+                ProductivityRollup.objects.order_by(
+                    "period_start"
+                ).values_list("period_start", "checks", "done", "total")
+            ),
+            incremental,
+        )
+
+
+class SearchTests(TestCase):
+    def setUp(self) -> None:
+        for item, frequency, group in [
+            ("Calendar", 0, "Next"),
+            ("To-Do list", 2, "Next"),
+            ("Running shoes", 3, "Health"),
+        ]:
+            Productivity(
+                item=item,
+                frequency=frequency,
+                group_id=ProductivityGroup.objects.get_id(group),
+            ).save()
+
+    def get_items(self, productivities: list[Productivity]) -> list[str]:
+        return [p.item for p in productivities]
+
+    def test_build_fts_query_sqlite(self) -> None:
+        self.assertEqual(
+            build_fts_query('to-do "list" OR', "sqlite"),
+            '"to"* "do"* "list"* "OR"*',
+        )
+
+    def test_build_fts_query_postgresql(self) -> None:
+        self.assertEqual(
+            build_fts_query("to-do list", "postgresql"),
+            "'to':* & 'do':* & 'list':*",
+        )
+        self.assertEqual(
+            build_fts_query("to-do list", "postgresql", match_all=False),
+            "'to':* | 'do':* | 'list':*",
+        )
+
+    def test_build_fts_query_no_word(self) -> None:
+        self.assertEqual(build_fts_query("-- ?", "sqlite"), "")
+
+    def test_find_productivities_item(self) -> None:
+        self.assertListEqual(
+            self.get_items(find_productivities("calendar")), ["Calendar"]
+        )
+
+    def test_find_productivities_prefix(self) -> None:
+        self.assertListEqual(
+            self.get_items(find_productivities("run sho")), ["Running shoes"]
+        )
+
+    def test_find_productivities_group(self) -> None:
+        self.assertCountEqual(
+            self.get_items(find_productivities("next")),
+            ["Calendar", "To-Do list"],
+        )
+
+    def test_find_productivities_no_match(self) -> None:
+        self.assertListEqual(find_productivities("mail"), [])
+        self.assertListEqual(find_productivities("--"), [])
+
+    def test_find_productivities_limit(self) -> None:
+        self.assertEqual(len(find_productivities("next", limit=1)), 1)
+
+    def test_find_productivities_limit_soft_deleted(self) -> None:
+        Productivity.objects.soft_delete(
+            Productivity.objects.get(item="Calendar").id
+        )
+
+        self.assertListEqual(
+            self.get_items(find_productivities("next", limit=1)),
+            ["To-Do list"],
+        )
+
+    def test_find_productivities_sync_update(self) -> None:
+        Productivity.objects.filter(item="Calendar").update(item="Mail")
+
+        self.assertListEqual(find_productivities("calendar"), [])
+        self.assertListEqual(
+            self.get_items(find_productivities("mail")), ["Mail"]
+        )
+
+    def test_find_productivities_sync_delete(self) -> None:
+        Productivity.objects.filter(item="Calendar").delete()
+
+        self.assertListEqual(find_productivities("calendar"), [])
+
+    def test_find_productivities_sync_group(self) -> None:
+        Productivity.objects.filter(item="Calendar").update(
+            group_id=ProductivityGroup.objects.get_id("Health")
+        )
+
+        self.assertCountEqual(
+            self.get_items(find_productivities("health")),
+            ["Calendar", "Running shoes"],
+        )
+
+    def test_find_productivities_sync_group_rename(self) -> None:
+        group_id = ProductivityGroup.objects.get_id("Health")
+        ProductivityGroup.objects.rename(group_id, "Fitness")
+
+        self.assertListEqual(find_productivities("health"), [])
+        self.assertListEqual(
+            self.get_items(find_productivities("fitness")), ["Running shoes"]
+        )
+
+    def test_install_search_index(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER productivity_productivity_fts_insert")
+        Productivity(
+            item="Mail",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        ).save()
+        self.assertListEqual(find_productivities("mail"), [])
+
+        install_search_index()
+        install_search_index()
+
+        self.assertListEqual(
+            self.get_items(find_productivities("mail")), ["Mail"]
+        )
+        Productivity(
+            item="Mailbox",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        ).save()
+        self.assertEqual(len(find_productivities("mail")), 2)
+
+    def test_find_productivities_fallback(self) -> None:
+        with patch.object(connection, "vendor", "mysql"):
+            self.assertListEqual(
+                self.get_items(find_productivities("run")), ["Running shoes"]
+            )
+
+    def test_find_productivities_icontains(self) -> None:
+        self.assertListEqual(
+            self.get_items(find_productivities_icontains("do next")),
+            ["To-Do list"],
+        )
+        self.assertListEqual(find_productivities_icontains(""), [])
+
+
+class TasksTests(TestCase):
+    def setUp(self) -> None:
+        # Tasks enqueued in test are due
+        self.now = timezone.now() + timedelta(seconds=1)
+
+    def test_enqueue(self) -> None:
+        task = enqueue("import_productivities", productivities=[])
+
+        self.assertEqual(task.status, Task.Status.PENDING)
+        self.assertDictEqual(task.kwargs, {"productivities": []})
+
+    def test_enqueue_fail_unknown_task(self) -> None:
+        with self.assertRaises(KeyError):
+            enqueue("unknown")
+
+    def test_claim_task(self) -> None:
+        task = enqueue("import_productivities", productivities=[])
+        Task.objects.create(
+            name="import_productivities",
+            run_at=self.now + timedelta(seconds=1),
+        )
+
+        claimed = claim_task(self.now)
+
+        assert claimed is not None
+        self.assertEqual(claimed.id, task.id)
+        self.assertEqual(claimed.status, Task.Status.RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(claim_task(self.now))
+
+    def test_claim_task_expired_lease(self) -> None:
+        task = enqueue("import_productivities", productivities=[])
+        claim_task(self.now)
+
+        claimed = claim_task(self.now + timedelta(seconds=TASK_TIMEOUT))
+
+        assert claimed is not None
+        self.assertEqual(claimed.id, task.id)
+        self.assertEqual(claimed.attempts, 2)
+
+    def test_run_task(self) -> None:
+        enqueue(
+            "import_productivities",
+            productivities=[
+                {"item": "Calendar", "frequency": "Key", "group": "Next"}
+            ],
+        )
+
+        task = claim_task()
+        assert task is not None
+        run_task(task)
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.SUCCEEDED)
+        self.assertDictEqual(task.result, {"created": 1})
+        self.assertEqual(Productivity.objects.count(), 1)
+        self.assertEqual(
+            Productivity.objects.get().serialize_json()["group"], "Next"
+        )
+
+    def test_run_task_retry(self) -> None:
+        func = MagicMock(side_effect=RuntimeError("Busy"))
+        with patch.dict(TASKS, {"test": func}):
+            task = enqueue("test", max_attempts=2)
+
+            claimed = claim_task(self.now)
+            assert claimed is not None
+            with self.assertLogs(tasks_logger, logging.ERROR):
+                run_task(claimed)
+
+            task.refresh_from_db()
+            self.assertEqual(task.status, Task.Status.PENDING)
+            self.assertEqual(task.error, "RuntimeError('Busy')")
+            self.assertIsNone(claim_task(self.now))
+            self.assertAlmostEqual(
+                task.run_at,
+                timezone.now() + timedelta(seconds=RETRY_BACKOFF),
+                delta=timedelta(seconds=1),
+            )
+
+            claimed = claim_task(task.run_at)
+            assert claimed is not None
+            with self.assertLogs(tasks_logger, logging.ERROR):
+                run_task(claimed)
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.FAILED)
+        self.assertEqual(func.call_count, 2)
+
+    def test_run_task_permanent_error_no_group(self) -> None:
+        enqueue(
+            "import_productivities",
+            productivities=[
+                {"item": "Run", "frequency": "Week", "group": "Health"},
+                {"item": "Swim", "frequency": "Fortnight", "group": "Sport"},
+            ],
+        )
+
+        task = claim_task()
+        assert task is not None
+        run_task(task)
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.FAILED)
+        self.assertFalse(ProductivityGroup.objects.exists())
+
+    def test_run_task_permanent_error(self) -> None:
+        enqueue("import_productivities", productivities=[{"item": "Mail"}, 1])
+
+        task = claim_task()
+        assert task is not None
+        run_task(task)
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.FAILED)
+        self.assertDictEqual(
+            json.loads(task.error),
+            {"0": "Missing frequency", "1": "Not an object"},
+        )
+        self.assertEqual(Productivity.objects.count(), 0)
+
+    def test_run_task_unknown(self) -> None:
+        task = Task.objects.create(name="unknown")
+
+        claimed = claim_task()
+        assert claimed is not None
+        run_task(claimed)
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.FAILED)
+        self.assertEqual(task.error, "Unknown task unknown")
+
+    def test_run_task_lease_lost(self) -> None:
+        task = enqueue("import_productivities", productivities=[])
+        claimed = claim_task(self.now)
+        assert claimed is not None
+        claim_task(self.now + timedelta(seconds=TASK_TIMEOUT))
+
+        run_task(claimed)
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.RUNNING)
+
+    def test_rebalance_positions(self) -> None:
+        group_id = ProductivityGroup.objects.get_id("Next")
+        Productivity(
+            item="Calendar", frequency=0, group_id=group_id, position="i0001"
+        ).save()
+
+        self.assertDictEqual(
+            TASKS["rebalance_positions"](group_id=group_id), {"updated": 1}
+        )
+        self.assertEqual(Productivity.objects.get().position, "i000")
+
+    def test_get_retry_at(self) -> None:
+        self.assertEqual(
+            get_retry_at(self.now, 3),
+            self.now + timedelta(seconds=RETRY_BACKOFF * 4),
+        )
+
+    def test_command(self) -> None:
+        enqueue("import_productivities", productivities=[])
+        enqueue("import_productivities", productivities=[])
+        stdout = StringIO()
+
+        with patch("productivity.tasks.close_old_connections"):
+            call_command("run_tasks", "--once", stdout=stdout)
+
+        self.assertEqual(stdout.getvalue(), "Ran 2 tasks\n")
+        self.assertEqual(
+            Task.objects.filter(status=Task.Status.SUCCEEDED).count(), 2
+        )
+
+
+class ValidationTests(TestCase):
+    def setUp(self) -> None:
+        self.productivity = Productivity(
+            item="Calendar",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        )
+
+    def test_validate_productivity(self) -> None:
+        validate_productivity(self.productivity)
+
+        self.productivity.last_check = datetime(2024, 1, 1)
+        validate_productivity(self.productivity)
+
+    def test_validate_productivity_error(self) -> None:
+        cases = [
+            ("item", "Calendar" * 26),
+            ("item", ""),
+            ("item", 1),
+            ("frequency", 5),
+            ("frequency", True),
+            ("frequency", None),
+            ("group", None),
+            ("last_check", "2024-01-01T00:00:00"),
+            ("last_check_undo", None),
+            ("version", -1),
+        ]
+        for field_name, value in cases:
+            with self.subTest(field_name=field_name, value=value):
+                productivity = Productivity(
+                    item="Calendar",
+                    frequency=0,
+                    group_id=ProductivityGroup.objects.get_id("Next"),
+                )
+                setattr(productivity, field_name, value)
+
+                with self.assertRaises(ValidationError) as cm:
+                    validate_productivity(productivity)
+                self.assertEqual(list(cm.exception.args[0]), [field_name])
+
+    def test_validate_productivity_same_as_clean_fields(self) -> None:
+        cases: list[dict[str, object]] = [
+            {"item": "Calendar" * 26},
+            {"item": ""},
+            {"frequency": 5, "group_id": None},
+            {"last_check_undo": None},
+        ]
+        for values in cases:
+            with self.subTest(values=values):
+                productivity = Productivity(
+                    item="Calendar",
+                    frequency=0,
+                    group_id=ProductivityGroup.objects.get_id("Next"),
+                )
+                for field_name, value in values.items():
+                    setattr(productivity, field_name, value)
+
+                with self.assertRaises(ValidationError) as cm:
+                    productivity.clean_fields()
+                with self.assertRaises(ValidationError) as cm_compiled:
+                    validate_productivity(productivity)
+                self.assertEqual(
+                    cm_compiled.exception.message_dict.keys(),
+                    cm.exception.message_dict.keys(),
+                )
+
+    def test_compile_check_fail_unsupported_field(self) -> None:
+        with self.assertRaises(TypeError):
+            compile_check(models.BooleanField())
+
+
+class ViewsTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.dt_today = datetime.combine(date.today(), time())
+        self.productivity = Productivity(
+            item="Calendar",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        )
+
+    def test_bulk(self) -> None:
+        request = RequestFactory().post(
+            "",
+            data={
+                "productivities": [
+                    {"item": "Calendar", "frequency": "Key", "group": "Next"}
+                ]
+            },
+            content_type="application/json",
+        )
+        request.user = get_user_model()()
+        response = bulk(request)
+
+        self.assertEqual(response.status_code, 202)
+        task = Task.objects.get()
+        self.assertEqual(
+            response.headers["Location"], f"/productivity/tasks/{task.id}/"
+        )
+        self.assertEqual(json.loads(response.content)["status"], "pending")
+        self.assertEqual(Productivity.objects.count(), 0)
+
+    def test_bulk_fail_missing_data(self) -> None:
+        for data in ("{}", '{"productivities": {}}'):
+            with self.subTest(data=data):
+                request = RequestFactory().post(
+                    "", data=data, content_type="application/json"
+                )
+                request.user = get_user_model()()
+                response = bulk(request)
+
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.count(), 0)
+
+    def test_create_productivity(self) -> None:
+        request = RequestFactory().post(
+            "",
+            data={"item": "Calendar", "frequency": "0", "group": "Next"},
+        )
+        response = create_productivity(request.POST)
+
+        self.assertEqual(response.status_code, 201)
+
+        j = json.loads(response.content)
+        self.assertEqual(len(j), 7)
+        self.assertIn("id", j)
+
+        self.productivity.last_check = self.dt_today
+        self.assertIs(
+            is_productivity_almost_equal(
+                Productivity.deserialize_json(j), self.productivity
+            ),
+            True,
+        )
+
+        self.assertEqual(Productivity.objects.count(), 1)
+
+    def test_create_productivity_fail_missing_data(self) -> None:
+        request = RequestFactory().post("")
+        response = create_productivity(request.POST)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertDictEqual(
+            json.loads(response.content), {"error": "Missing data"}
+        )
+
+    def test_create_productivity_fail_invalid_data_frequency_name(
+        self,
+    ) -> None:
+        request = RequestFactory().post(
+            "",
+            data={"item": "Calendar", "frequency": "abc", "group": "Next"},
+        )
+        response = create_productivity(request.POST)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertDictEqual(
+            json.loads(response.content), {"error": "Data validation error"}
+        )
+
+    def test_create_productivity_fail_invalid_data_item(self) -> None:
+        request = RequestFactory().post(
+            "",
+            data={"item": "Calendar" * 26, "frequency": "0", "group": "Next"},
+        )
+        response = create_productivity(request.POST)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertDictEqual(
+            json.loads(response.content), {"error": "Data validation error"}
+        )
+
+    def test_create_productivity_fail_invalid_data_new_group(self) -> None:
+        request = RequestFactory().post(
+            "",
+            data={
+                "item": "Calendar" * 26,
+                "frequency": "0",
+                "group": "Health",
+            },
+        )
+        response = create_productivity(request.POST)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ProductivityGroup.objects.filter(name="Health"))
+
+    def test_create_productivity_fail_invalid_data_frequency(self) -> None:
+        request = RequestFactory().post(
+            "",
+            data={"item": "Calendar", "frequency": "10", "group": "Next"},
+        )
+        response = create_productivity(request.POST)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertDictEqual(
+            json.loads(response.content), {"error": "Data validation error"}
+        )
+
+    def test_create_productivity_fail_invalid_data_group(self) -> None:
+        request = RequestFactory().post(
+            "",
+            data={"item": "Calendar", "frequency": "0", "group": "Next" * 51},
+        )
+        response = create_productivity(request.POST)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertDictEqual(
+            json.loads(response.content), {"error": "Data validation error"}
+        )
+
+    def test_delete_productivity(self) -> None:
+        self.productivity.save()
+        self.assertEqual(Productivity.objects.count(), 1)
+
+        with self.assertNumQueries(1):
+            response = delete_productivity(self.productivity.id)
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(Productivity.objects.count(), 0)
+        self.assertEqual(Productivity.all_objects.count(), 1)
+        self.assertEqual(
+            get_productivity(self.productivity.id).status_code, 404
+        )
+
+    def test_delete_productivity_not_exist(self) -> None:
+        response = delete_productivity(1)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertDictEqual(
+            json.loads(response.content), {"error": "ID not found"}
+        )
+
+    def test_due(self) -> None:
+        self.productivity.frequency = Productivity.Frequency.DAY
+        self.productivity.save()
+        today = self.dt_today.date()
+
+        for query, count in (
+            ("", 0),
+            (f"until={today + timedelta(days=1)}", 1),
+        ):
+            with self.subTest(query=query):
+                request = RequestFactory().get(f"?{query}")
+                request.user = get_user_model()()
+                response = due(request)
+
+                productivities = json.loads(response.content)
+                self.assertEqual(len(productivities), count)
+        self.assertEqual(
+            productivities[0]["due"], (today + timedelta(days=1)).isoformat()
+        )
+        self.assertEqual(productivities[0]["item"], "Calendar")
+
+    def test_due_fail_invalid_data(self) -> None:
+        for query in ("until=tomorrow", "limit=0", "limit=x"):
+            with self.subTest(query=query):
+                request = RequestFactory().get(f"?{query}")
+                request.user = get_user_model()()
+                response = due(request)
+
+                self.assertEqual(response.status_code, 400)
+
+    def test_get_productivity(self) -> None:
+        self.productivity.save()
+
+        response = get_productivity(1)
+
+        self.assertEqual(response.status_code, 200)
+
+        expected = {
+            "id": "1",
+            "item": "Calendar",
+            "frequency": "Key",
+            "recurrence": "",
+            "group": "Next",
+            "last_check": self.dt_today.isoformat(),
+            "last_check_undo": "0001-01-01T00:00:00",
+        }
+        productivity = json.loads(response.content)
+        reset_last_check_time([productivity])
+        self.assertDictEqual(productivity, expected)
+
+    def test_get_productivity_etag(self) -> None:
+        self.productivity.save()
+        self.productivity.save()
+
+        response = get_productivity(1)
+
+        self.assertEqual(response.headers["ETag"], '"2"')
+
+    def test_get_productivity_not_exist(self) -> None:
+        response = get_productivity(1)
+
+        self.assertEqual(response.status_code, 404)
+
+        self.assertDictEqual(
+            json.loads(response.content), {"error": "ID not found"}
+        )
+
+    def test_get_productivity_object(self) -> None:
+        self.productivity.save()
+
+        expected = Productivity(
+            id=1,
+            item="Calendar",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+            last_check=self.dt_today,
+        )
+        self.assertIs(
+            is_productivity_almost_equal(get_productivity_object(1), expected),
+            True,
+        )
+
+    def test_get_productivity_object_not_exist(self) -> None:
+        with self.assertRaises(Productivity.DoesNotExist):
+            get_productivity_object(1)
+
+    async def test_events(self) -> None:
+        broker = get_broker()
+        sequence = broker.publish("save", 1)["sequence"]
+
+        request = AsyncRequestFactory().get(
+            "", headers={"Last-Event-ID": str(sequence - 1)}
+        )
+        request.user = get_user_model()()
+        response = await events(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Content-Type"], "text/event-stream")
+
+        assert isinstance(response, StreamingHttpResponse)
+        stream = aiter(response)
+        self.assertEqual(await anext(stream), b"retry: 1000\n\n")
+        self.assertEqual(
+            await anext(stream),
+            (
+                f"id: {sequence}\nevent: change\n"
+                f'data: {{"sequence": {sequence}, "action": "save", '
+                '"id": 1}\n\n'
+            ).encode(),
+        )
+
+    async def test_events_fail_post(self) -> None:
+        request = RequestFactory().post("")
+        response = await events(request)
+
+        self.assertEqual(response.status_code, 405)
+
+    def test_events_fail_not_login(self) -> None:
+        response = Client().get("/productivity/events/")
+
+        assert isinstance(response, HttpResponseRedirect)
+        self.assertIs(is_login_redirect(response), True)
+
+    async def test_events_fail_wsgi(self) -> None:
+        request = RequestFactory().get("")
+        request.user = get_user_model()()
+        response = await events(request)
+
+        self.assertEqual(response.status_code, 501)
+
+    async def test_events_poll(self) -> None:
+        broker = get_broker()
+        sequence = broker.get_sequence()
+        timer = threading.Timer(0.05, broker.publish, ["delete", 1])
+        timer.start()
+
+        request = RequestFactory().get("", data={"since": str(sequence)})
+        request.user = get_user_model()()
+        response = await events_poll(request)
+        timer.join()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertDictEqual(
+            json.loads(response.content),
+            {
+                "sequence": sequence + 1,
+                "events": [
+                    {"sequence": sequence + 1, "action": "delete", "id": 1}
+                ],
+                "reset": False,
+            },
+        )
+
+    async def test_events_poll_timeout(self) -> None:
+        sequence = get_broker().get_sequence()
+
+        request = RequestFactory().get(
+            "", data={"since": str(sequence), "timeout": "0.01"}
+        )
+        request.user = get_user_model()()
+        response = await events_poll(request)
+
+        self.assertDictEqual(
+            json.loads(response.content),
+            {"sequence": sequence, "events": [], "reset": False},
+        )
+
+    async def test_events_poll_reset(self) -> None:
+        sequence = get_broker().get_sequence()
+
+        request = RequestFactory().get("")
+        request.user = get_user_model()()
+        response = await events_poll(request)
+
+        self.assertDictEqual(
+            json.loads(response.content),
+            {"sequence": sequence, "events": [], "reset": True},
+        )
+
+    async def test_events_poll_fail_invalid_timeout(self) -> None:
+        request = RequestFactory().get("", data={"since": "0", "timeout": "a"})
+        request.user = get_user_model()()
+        response = await events_poll(request)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertDictEqual(
+            json.loads(response.content), {"error": "Invalid data for timeout"}
+        )
+
+    async def test_events_poll_fail_put(self) -> None:
+        request = RequestFactory().put("")
+        response = await events_poll(request)
+
+        self.assertEqual(response.status_code, 405)
+
+    def test_events_poll_fail_not_login(self) -> None:
+        response = Client().get("/productivity/events/poll/")
+
+        assert isinstance(response, HttpResponseRedirect)
+        self.assertIs(is_login_redirect(response), True)
+
+    def test_get_productivities_zero_object(self) -> None:
+        response = get_productivities()
+
+        self.assertEqual(response.status_code, 200)
+
+        self.assertListEqual(json.loads(response.content), [])
+
+    def test_get_productivities_one_object(self) -> None:
+        self.productivity.save()
+
+        response = get_productivities()
+
+        self.assertEqual(response.status_code, 200)
+
+        expected = [
+            {
+                "id": "1",
+                "item": "Calendar",
+                "frequency": "Key",
+                "recurrence": "",
+                "group": "Next",
+                "last_check": self.dt_today.isoformat(),
+                "last_check_undo": "0001-01-01T00:00:00",
+            }
+        ]
+        productivities = json.loads(response.content)
+        reset_last_check_time(productivities)
+        self.assertListEqual(productivities, expected)
+
+    def test_get_start_sequence(self) -> None:
+        broker = get_broker()
+        broker.publish("save", 1)
+        sequence = broker.get_sequence()
+
+        self.assertTupleEqual(
+            get_start_sequence(str(sequence - 1)), (sequence - 1, False)
+        )
+        self.assertTupleEqual(get_start_sequence(None), (sequence, True))
+        self.assertTupleEqual(get_start_sequence("a"), (sequence, True))
+        self.assertTupleEqual(
+            get_start_sequence(str(sequence + 1)), (sequence, True)
+        )
+        self.assertTupleEqual(get_start_sequence("-1"), (sequence, True))
+
+    def test_get_summary(self) -> None:
+        self.productivity.save()
+
+        response = get_summary()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(
+            json.loads(response.content),
+            [
+                {
+                    "group": "Next",
+                    "frequency": "Key",
+                    "total": 1,
+                    "done": 0,
+                    "pending": 1,
+                }
+            ],
+        )
+
+    def test_get_summary_cached(self) -> None:
+        self.productivity.save()
+        get_summary()
+
+        with self.assertNumQueries(0):
+            response = get_summary()
+        self.assertEqual(len(json.loads(response.content)), 1)
+
+        Productivity(
+            item="Run",
+            frequency=3,
+            group_id=ProductivityGroup.objects.get_id("Health"),
+        ).save()
+        self.assertEqual(len(json.loads(get_summary().content)), 2)
+
+    def test_get_productivities_fields(self) -> None:
+        self.productivity.save()
+
+        with self.assertNumQueries(1):
+            response = get_productivities("id,item,last_check")
+
+        self.assertEqual(response.status_code, 200)
+
+        expected = [
+            {
+                "id": "1",
+                "item": "Calendar",
+                "last_check": self.dt_today.isoformat(),
+            }
+        ]
+        productivities = json.loads(response.content)
+        productivities[0]["last_check"] = (
+            productivities[0]["last_check"][0:11] + "00:00:00"
+        )
+        self.assertListEqual(productivities, expected)
+
+    def test_get_productivities_compact(self) -> None:
+        self.productivity.save()
+
+        response = get_productivities(response_format="compact")
+
+        self.assertEqual(response.status_code, 200)
+
+        productivities = json.loads(response.content)
+        self.assertListEqual(
+            productivities[0], list(Productivity.SERIALIZED_FIELDS)
+        )
+        self.assertListEqual(
+            productivities[1][0:5], [1, "Calendar", 0, "", "Next"]
+        )
+        self.assertEqual(len(productivities), 2)
+
+    def test_get_productivities_compact_fields(self) -> None:
+        self.productivity.save()
+
+        response = get_productivities("id,frequency", "compact")
+
+        self.assertListEqual(
+            json.loads(response.content), [["id", "frequency"], [1, 0]]
+        )
+
+    def test_get_productivities_cached(self) -> None:
+        self.productivity.save()
+        get_productivities()
+
+        with self.assertNumQueries(0):
+            response = get_productivities()
+        self.assertEqual(len(json.loads(response.content)), 1)
+
+        Productivity(
+            item="To-Do",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        ).save()
+        self.assertEqual(len(json.loads(get_productivities().content)), 2)
+
+    def test_get_productivities_gzip(self) -> None:
+        for i in range(5):
+            Productivity(
+                item=f"Item {i}",
+                frequency=0,
+                group_id=ProductivityGroup.objects.get_id("Next"),
+            ).save()
+        identity = get_productivities().content
+
+        with patch(
+            "productivity.views.compress", side_effect=compress
+        ) as compress_mock:
+            response = get_productivities(accept_encoding="gzip")
+            cached_response = get_productivities(accept_encoding="gzip")
+
+        compress_mock.assert_called_once()
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+        self.assertEqual(gzip.decompress(response.content), identity)
+        self.assertEqual(cached_response.content, response.content)
+
+    def test_get_productivities_gzip_skip_small(self) -> None:
+        response = get_productivities(accept_encoding="gzip")
+
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertListEqual(json.loads(response.content), [])
+
+    def test_get_productivities_include_archived(self) -> None:
+        self.productivity.save()
+        ArchivedProductivity.objects.create(
+            id=5,
+            item="Mail",
+            frequency=0,
+            group="Next",
+            last_check=datetime(2024, 1, 1),
+            last_check_undo=datetime.min,
+            version=1,
+        )
+
+        response = get_productivities(include_archived=True)
+
+        productivities = json.loads(response.content)
+        self.assertListEqual(
+            sorted(p["id"] for p in productivities), ["1", "5"]
+        )
+        self.assertEqual(len(productivities[0]), 7)
+
+        response = get_productivities(
+            "id,item", "compact", include_archived=True
+        )
+
+        self.assertEqual(len(json.loads(response.content)), 3)
+
+        response = get_productivities()
+
+        self.assertEqual(len(json.loads(response.content)), 1)
+
+    def test_get_productivities_fail_invalid_fields(self) -> None:
+        response = get_productivities("id,password")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertDictEqual(
+            json.loads(response.content), {"error": "Invalid fields"}
+        )
+
+    def test_get_productivities_fail_invalid_format(self) -> None:
+        response = get_productivities(response_format="xml")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertDictEqual(
+            json.loads(response.content), {"error": "Invalid format"}
+        )
+
+    def test_group_detail_put(self) -> None:
+        self.productivity.save()
+
+        request = RequestFactory().put(
+            "", data={"name": "Later"}, content_type="application/json"
+        )
+        request.user = get_user_model()()
+        response = group_detail(request, self.productivity.group_id)
+
+        self.assertEqual(response.status_code, 200)
         self.assertDictEqual(
-            json.loads(response.content), {"error": "ID not found"}
+            json.loads(response.content),
+            {"id": str(self.productivity.group_id), "name": "Later"},
+        )
+        self.assertEqual(
+            [p.item for p in find_productivities("later")], ["Calendar"]
         )
 
-    def test_get_productivity(self) -> None:
+    def test_group_detail_put_fail_exists(self) -> None:
+        group_id = ProductivityGroup.objects.get_id("Health")
+
+        request = RequestFactory().put(
+            "", data={"name": "Next"}, content_type="application/json"
+        )
+        request.user = get_user_model()()
+        response = group_detail(request, group_id)
+
+        self.assertEqual(response.status_code, 409)
+
+    def test_group_detail_put_fail_invalid_data(self) -> None:
+        request = RequestFactory().put(
+            "", data={"name": ""}, content_type="application/json"
+        )
+        request.user = get_user_model()()
+        response = group_detail(request, self.productivity.group_id)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_group_detail_put_fail_not_exist(self) -> None:
+        request = RequestFactory().put(
+            "", data={"name": "Later"}, content_type="application/json"
+        )
+        request.user = get_user_model()()
+        response = group_detail(request, 99)
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_group_detail_delete(self) -> None:
         self.productivity.save()
 
-        response = get_productivity(1)
+        request = RequestFactory().delete("")
+        request.user = get_user_model()()
+        response = group_detail(request, self.productivity.group_id)
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(Productivity.objects.count(), 0)
+        self.assertEqual(Productivity.all_objects.count(), 1)
+
+    def test_group_detail_delete_empty(self) -> None:
+        request = RequestFactory().delete("")
+        request.user = get_user_model()()
+        response = group_detail(request, self.productivity.group_id)
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.content, b"")
+        self.assertFalse(ProductivityGroup.objects.exists())
+
+    def test_group_detail_delete_not_exist(self) -> None:
+        request = RequestFactory().delete("")
+        request.user = get_user_model()()
+        response = group_detail(request, 99)
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_groups(self) -> None:
+        self.productivity.save()
+        Productivity(
+            item="Mail",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        ).save()
+        deleted = Productivity(
+            item="Run",
+            frequency=3,
+            group_id=ProductivityGroup.objects.get_id("Health"),
+        )
+        deleted.save()
+        Productivity.objects.soft_delete(deleted.id)
+
+        request = RequestFactory().get("")
+        request.user = get_user_model()()
+        response = groups(request)
+
+        self.assertListEqual(
+            json.loads(response.content),
+            [
+                {
+                    "id": str(self.productivity.group_id),
+                    "name": "Next",
+                    "count": 2,
+                }
+            ],
+        )
+
+    def test_history(self) -> None:
+        self.productivity.save()
+        ProductivityCheck.objects.create(
+            productivity_id=self.productivity.id, checked_at=self.dt_today
+        )
+
+        request = RequestFactory().get("")
+        request.user = get_user_model()()
+        response = history(request)
+
+        self.assertListEqual(
+            json.loads(response.content),
+            [
+                {
+                    "id": str(self.productivity.id),
+                    "checks": 1,
+                    "current_streak": 1,
+                    "longest_streak": 1,
+                }
+            ],
+        )
+
+    def test_history_detail(self) -> None:
+        self.productivity.save()
+        ProductivityCheck.objects.bulk_create(
+            ProductivityCheck(
+                productivity_id=self.productivity.id,
+                checked_at=self.dt_today - timedelta(days=days),
+            )
+            for days in (3, 1, 0)
+        )
+
+        request = RequestFactory().get("")
+        request.user = get_user_model()()
+        response = history_detail(request, self.productivity.id)
+
+        self.assertDictEqual(
+            json.loads(response.content),
+            {
+                "id": str(self.productivity.id),
+                "checks": 3,
+                "current_streak": 2,
+                "longest_streak": 2,
+                "history": [
+                    (self.dt_today - timedelta(days=days)).isoformat()
+                    for days in (0, 1, 3)
+                ],
+            },
+        )
+
+    def test_history_detail_fail_not_exist(self) -> None:
+        request = RequestFactory().get("")
+        request.user = get_user_model()()
+        response = history_detail(request, 1)
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_history_fail_invalid_data(self) -> None:
+        for query in (
+            {"after": "-1"},
+            {"after": "x"},
+            {"limit": "0"},
+            {"limit": str(HISTORY_PAGE_MAX + 1)},
+        ):
+            with self.subTest(query=query):
+                request = RequestFactory().get("", query)
+                request.user = get_user_model()()
+                response = history(request)
+
+                self.assertEqual(response.status_code, 400)
+
+    def test_history_page(self) -> None:
+        self.productivity.save()
+        productivity2 = Productivity.objects.create(
+            item="Other", frequency=0, group_id=self.productivity.group_id
+        )
+        ProductivityCheck.objects.bulk_create(
+            ProductivityCheck(productivity_id=p.id, checked_at=self.dt_today)
+            for p in (self.productivity, productivity2)
+        )
+
+        request = RequestFactory().get("", {"limit": "1"})
+        request.user = get_user_model()()
+        # Page of objects, checks of page
+        with self.assertNumQueries(2):
+            response = history(request)
+        page = json.loads(response.content)
+
+        self.assertListEqual(
+            [streak["id"] for streak in page], [str(self.productivity.id)]
+        )
+
+        request = RequestFactory().get(
+            "", {"after": page[-1]["id"], "limit": "1"}
+        )
+        request.user = get_user_model()()
+        response = history(request)
+
+        self.assertListEqual(
+            json.loads(response.content),
+            [
+                {
+                    "id": str(productivity2.id),
+                    "checks": 1,
+                    "current_streak": 1,
+                    "longest_streak": 1,
+                }
+            ],
+        )
+
+    def test_index_get(self) -> None:
+        self.productivity.save()
+        Productivity(
+            item="To-Do",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        ).save()
+
+        request = RequestFactory().get("")
+        request.user = get_user_model()()
+        response = index(request)
+
+        self.assertEqual(response.status_code, 200)
+
+        expected = [
+            {
+                "id": "1",
+                "item": "Calendar",
+                "frequency": "Key",
+                "recurrence": "",
+                "group": "Next",
+                "last_check": self.dt_today.isoformat(),
+                "last_check_undo": "0001-01-01T00:00:00",
+            },
+            {
+                "id": "2",
+                "item": "To-Do",
+                "frequency": "Key",
+                "recurrence": "",
+                "group": "Next",
+                "last_check": self.dt_today.isoformat(),
+                "last_check_undo": "0001-01-01T00:00:00",
+            },
+        ]
+        productivities = json.loads(response.content)
+        reset_last_check_time(productivities)
+        self.assertListEqual(productivities, expected)
+
+    def test_index_get_compact(self) -> None:
+        self.productivity.save()
+
+        request = RequestFactory().get(
+            "", data={"fields": "id,item", "format": "compact"}
+        )
+        request.user = get_user_model()()
+        response = index(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(
+            json.loads(response.content), [["id", "item"], [1, "Calendar"]]
+        )
+
+    def test_index_get_gzip(self) -> None:
+        for i in range(5):
+            Productivity(
+                item=f"Item {i}",
+                frequency=0,
+                group_id=ProductivityGroup.objects.get_id("Next"),
+            ).save()
+
+        response = Client().get("/productivity/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 302)
+
+        client = Client()
+        client.force_login(
+            get_user_model().objects.create_user("user", password="pass")
+        )
+        response = client.get("/productivity/", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))), 5)
+
+    def test_index_post(self) -> None:
+        request = RequestFactory().post(
+            "",
+            data={"item": "Calendar", "frequency": "0", "group": "Next"},
+        )
+        request.user = get_user_model()()
+        response = index(request)
+
+        self.assertEqual(response.status_code, 201)
+
+        self.productivity.last_check = self.dt_today
+        self.assertIs(
+            is_productivity_almost_equal(
+                Productivity.deserialize_json(json.loads(response.content)),
+                self.productivity,
+            ),
+            True,
+        )
+
+    def test_index_post_json(self) -> None:
+        request = RequestFactory().post(
+            "",
+            data={"item": "Calendar", "frequency": "Key", "group": "Next"},
+            content_type="application/json",
+        )
+        request.user = get_user_model()()
+        response = index(request)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(json.loads(response.content)["frequency"], "Key")
+
+    def test_index_post_fail_invalid_json(self) -> None:
+        request = RequestFactory().post(
+            "", data="{", content_type="application/json"
+        )
+        request.user = get_user_model()()
+        response = index(request)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertDictEqual(
+            json.loads(response.content), {"error": "Invalid JSON"}
+        )
+
+    def test_index_get_filter(self) -> None:
+        self.productivity.save()
+        Productivity(
+            item="Run",
+            frequency=Productivity.Frequency.DAY,
+            group_id=ProductivityGroup.objects.get_id("Health"),
+        ).save()
+
+        for data, items in (
+            ({"frequency": "Day"}, ["Run"]),
+            ({"frequency": "0", "group": "Next"}, ["Calendar"]),
+            ({"group": "Later"}, []),
+        ):
+            request = RequestFactory().get("", data=data)
+            request.user = get_user_model()()
+            response = index(request)
+
+            self.assertListEqual(
+                [p["item"] for p in json.loads(response.content)], items
+            )
+
+    def test_index_fail_invalid_frequency(self) -> None:
+        request = RequestFactory().get("", data={"frequency": "Year"})
+        request.user = get_user_model()()
+        response = index(request)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertDictEqual(
+            json.loads(response.content), {"error": "Invalid frequency"}
+        )
+
+    def test_index_fail_invalid_include_archived(self) -> None:
+        request = RequestFactory().get("", data={"include_archived": "yes"})
+        request.user = get_user_model()()
+        response = index(request)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertDictEqual(
+            json.loads(response.content), {"error": "Invalid include_archived"}
+        )
+
+    def test_index_fail_put(self) -> None:
+        request = RequestFactory().put("")
+        request.user = get_user_model()()
+        response = index(request)
+
+        self.assertEqual(response.status_code, 405)
+
+    def test_index_fail_not_login(self) -> None:
+        response = Client().get("/productivity/")
+
+        assert isinstance(response, HttpResponseRedirect)
+        self.assertIs(is_login_redirect(response), True)
+
+    def test_index_detail_get(self) -> None:
+        self.productivity.save()
+
+        request = RequestFactory().get("")
+        request.user = get_user_model()()
+        response = index_detail(request, 1)
+
+        self.assertEqual(response.status_code, 200)
+
+        expected = {
+            "id": "1",
+            "item": "Calendar",
+            "frequency": "Key",
+            "recurrence": "",
+            "group": "Next",
+            "last_check": self.dt_today.isoformat(),
+            "last_check_undo": "0001-01-01T00:00:00",
+        }
+        productivity = json.loads(response.content)
+        reset_last_check_time([productivity])
+        self.assertDictEqual(productivity, expected)
+
+    def test_index_detail_put_if_match(self) -> None:
+        self.productivity.save()
+
+        request = RequestFactory().put(
+            "",
+            data="item=To-Do&frequency=1&group=Next1&last_check=",
+            HTTP_IF_MATCH='"1"',
+        )
+        request.user = get_user_model()()
+        response = index_detail(request, 1)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["ETag"], '"2"')
+
+        response = index_detail(request, 1)
+
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response.headers["ETag"], '"2"')
+
+    def test_index_detail_put_json(self) -> None:
+        self.productivity.save()
+
+        request = RequestFactory().put(
+            "",
+            data={
+                "item": "To-Do",
+                "frequency": 1,
+                "group": "Next1",
+                "last_check": "2024-01-01T00:00:00",
+            },
+            content_type="application/json",
+        )
+        request.user = get_user_model()()
+        response = index_detail(request, 1)
+
+        self.assertEqual(response.status_code, 200)
+
+        j = json.loads(response.content)
+        self.assertEqual(j["item"], "To-Do")
+        self.assertEqual(j["frequency"], "Loop")
+        self.assertEqual(j["last_check"], "2024-01-01T00:00:00")
+
+    def test_index_detail_put_fail_invalid_json(self) -> None:
+        request = RequestFactory().put(
+            "", data="[]", content_type="application/json"
+        )
+        request.user = get_user_model()()
+        response = index_detail(request, 1)
 
-        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.status_code, 400)
 
-        expected = {
-            "id": "1",
-            "item": "Calendar",
-            "frequency": "Key",
-            "group": "Next",
-            "last_check": self.dt_today.isoformat(),
-            "last_check_undo": "0001-01-01T00:00:00",
-        }
-        productivity = json.loads(response.content)
-        reset_last_check_time([productivity])
-        self.assertDictEqual(productivity, expected)
+    def test_index_detail_fail_post(self) -> None:
+        request = RequestFactory().post("")
+        request.user = get_user_model()()
+        response = index_detail(request, 1)
 
-    def test_get_productivity_not_exist(self) -> None:
-        response = get_productivity(1)
+        self.assertEqual(response.status_code, 405)
 
-        self.assertEqual(response.status_code, 404)
+    def test_index_detail_fail_not_login(self) -> None:
+        response = Client().get("/productivity/1/")
 
-        self.assertDictEqual(
-            json.loads(response.content), {"error": "ID not found"}
-        )
+        assert isinstance(response, HttpResponseRedirect)
+        self.assertIs(is_login_redirect(response), True)
 
-    def test_get_productivity_object(self) -> None:
+    def test_restore(self) -> None:
         self.productivity.save()
+        Productivity.objects.soft_delete(self.productivity.id)
 
-        expected = Productivity(
-            id=1,
-            item="Calendar",
-            frequency=0,
-            group="Next",
-            last_check=self.dt_today,
-        )
-        self.assertIs(
-            is_productivity_almost_equal(get_productivity_object(1), expected),
-            True,
-        )
+        request = RequestFactory().post("")
+        request.user = get_user_model()()
+        response = restore(request, self.productivity.id)
 
-    def test_get_productivity_object_not_exist(self) -> None:
-        with self.assertRaises(Productivity.DoesNotExist):
-            get_productivity_object(1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["item"], "Calendar")
+        self.assertEqual(Productivity.objects.count(), 1)
 
-    def test_get_productivities_zero_object(self) -> None:
-        response = get_productivities()
+    def test_restore_fail_not_deleted(self) -> None:
+        self.productivity.save()
 
-        self.assertEqual(response.status_code, 200)
+        request = RequestFactory().post("")
+        request.user = get_user_model()()
+        response = restore(request, self.productivity.id)
 
-        self.assertListEqual(json.loads(response.content), [])
+        self.assertEqual(response.status_code, 404)
 
-    def test_get_productivities_one_object(self) -> None:
+    def test_search(self) -> None:
         self.productivity.save()
 
-        response = get_productivities()
+        request = RequestFactory().get("", data={"q": "cal"})
+        request.user = get_user_model()()
+        response = search(request)
 
         self.assertEqual(response.status_code, 200)
 
@@ -433,6 +3890,7 @@ class ViewsTest(TestCase):
                 "id": "1",
                 "item": "Calendar",
                 "frequency": "Key",
+                "recurrence": "",
                 "group": "Next",
                 "last_check": self.dt_today.isoformat(),
                 "last_check_undo": "0001-01-01T00:00:00",
@@ -442,104 +3900,209 @@ class ViewsTest(TestCase):
         reset_last_check_time(productivities)
         self.assertListEqual(productivities, expected)
 
-    def test_index_get(self) -> None:
+    def test_search_fail_not_login(self) -> None:
+        response = Client().get("/productivity/search/", data={"q": "cal"})
+
+        assert isinstance(response, HttpResponseRedirect)
+        self.assertIs(is_login_redirect(response), True)
+
+    def test_search_productivities_no_match(self) -> None:
         self.productivity.save()
-        Productivity(item="To-Do", frequency=0, group="Next").save()
 
-        request = RequestFactory().get("")
-        request.user = get_user_model()()
-        response = index(request)
+        response = search_productivities("mail")
 
         self.assertEqual(response.status_code, 200)
+        self.assertListEqual(json.loads(response.content), [])
 
-        expected = [
-            {
-                "id": "1",
-                "item": "Calendar",
-                "frequency": "Key",
-                "group": "Next",
-                "last_check": self.dt_today.isoformat(),
-                "last_check_undo": "0001-01-01T00:00:00",
-            },
-            {
-                "id": "2",
-                "item": "To-Do",
-                "frequency": "Key",
-                "group": "Next",
-                "last_check": self.dt_today.isoformat(),
-                "last_check_undo": "0001-01-01T00:00:00",
-            },
-        ]
-        productivities = json.loads(response.content)
-        reset_last_check_time(productivities)
-        self.assertListEqual(productivities, expected)
+    def test_search_productivities_fail_missing_data(self) -> None:
+        response = search_productivities(" ")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertDictEqual(
+            json.loads(response.content), {"error": "Missing data"}
+        )
+
+    async def test_stream_events_reset(self) -> None:
+        after = get_broker().get_sequence()
+        stream = stream_events(after, True, duration=0.01)
+
+        self.assertEqual(await anext(stream), "retry: 1000\n\n")
+        self.assertEqual(
+            await anext(stream), f"id: {after}\nevent: reset\ndata: {{}}\n\n"
+        )
+        self.assertEqual(await anext(stream), ": keepalive\n\n")
+        with self.assertRaises(StopAsyncIteration):
+            await anext(stream)
+
+    async def test_stream_events_missed(self) -> None:
+        broker = get_broker()
+        after = broker.get_sequence()
+        broker.publish("save", 1)
+        broker.publish("save", 2)
+
+        stream = stream_events(after + 1, False, duration=1)
+        await anext(stream)
+
+        self.assertTrue((await anext(stream)).startswith(f"id: {after + 2}\n"))
+
+    def test_move(self) -> None:
+        self.productivity.save()
+        mail = Productivity(
+            item="Mail",
+            frequency=0,
+            group_id=ProductivityGroup.objects.get_id("Next"),
+        )
+        mail.save()
 
-    def test_index_post(self) -> None:
         request = RequestFactory().post(
             "",
-            data={"item": "Calendar", "frequency": "0", "group": "Next"},
+            data={"after": str(mail.id)},
+            content_type="application/json",
         )
         request.user = get_user_model()()
-        response = index(request)
+        response = move(request, self.productivity.id)
 
-        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["item"], "Calendar")
+        self.assertListEqual(
+            [p["item"] for p in json.loads(render_productivities().content)],
+            ["Mail", "Calendar"],
+        )
+        self.assertFalse(Task.objects.exists())
 
-        self.productivity.last_check = self.dt_today
-        self.assertIs(
-            is_productivity_almost_equal(
-                Productivity.deserialize_json(json.loads(response.content)),
-                self.productivity,
-            ),
-            True,
+    def test_move_rebalance(self) -> None:
+        self.productivity.save()
+
+        request = RequestFactory().post("")
+        request.user = get_user_model()()
+        with patch("productivity.views.needs_rebalance", return_value=True):
+            response = move(request, self.productivity.id)
+
+        self.assertEqual(response.status_code, 200)
+        task = Task.objects.get()
+        self.assertEqual(task.name, "rebalance_positions")
+        self.assertDictEqual(
+            task.kwargs, {"group_id": self.productivity.group_id}
         )
 
-    def test_index_fail_put(self) -> None:
-        request = RequestFactory().put("")
+    def test_move_fail_invalid_after(self) -> None:
+        self.productivity.save()
+        for after in ("abc", str(self.productivity.id)):
+            with self.subTest(after=after):
+                request = RequestFactory().post("", data={"after": after})
+                request.user = get_user_model()()
+                response = move(request, self.productivity.id)
+
+                self.assertEqual(response.status_code, 400)
+
+    def test_move_fail_not_exist(self) -> None:
+        request = RequestFactory().post("")
         request.user = get_user_model()()
-        response = index(request)
+        response = move(request, 99)
 
-        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response.status_code, 404)
 
-    def test_index_fail_not_login(self) -> None:
-        response = Client().get("/productivity/")
+    def test_parse_flag(self) -> None:
+        for value, expected in (
+            (None, False),
+            ("0", False),
+            ("False", False),
+            ("1", True),
+            ("true", True),
+        ):
+            with self.subTest(value=value):
+                self.assertIs(parse_flag(value), expected)
 
-        assert isinstance(response, HttpResponseRedirect)
-        self.assertIs(is_login_redirect(response), True)
+    def test_parse_flag_fail_invalid(self) -> None:
+        with self.assertRaises(ValueError):
+            parse_flag("yes")
 
-    def test_index_detail_get(self) -> None:
+    def test_parse_if_match(self) -> None:
+        self.assertEqual(parse_if_match('"3"'), 3)
+        self.assertEqual(parse_if_match(' "3" '), 3)
+        self.assertEqual(parse_if_match('W/"3"'), 3)
+        self.assertIsNone(parse_if_match(None))
+        self.assertIsNone(parse_if_match("*"))
+
+    def test_parse_if_match_invalid(self) -> None:
+        for if_match in ["3", "W/3", '""', '"a"']:
+            with self.subTest(if_match=if_match):
+                with self.assertRaises(ValueError):
+                    parse_if_match(if_match)
+
+    def test_stats(self) -> None:
         self.productivity.save()
+        ProductivityRollup.objects.create(
+            group_id=self.productivity.group_id,
+            frequency=self.productivity.frequency,
+            period_start=self.dt_today.date(),
+            checks=3,
+            done=1,
+            total=1,
+        )
+
+        for query, count in (
+            ("", 1),
+            (f"until={self.dt_today.date() - timedelta(days=1)}", 0),
+            (f"since={self.dt_today.date()}", 1),
+        ):
+            with self.subTest(query=query):
+                request = RequestFactory().get(f"?{query}")
+                request.user = get_user_model()()
+                response = stats(request)
+
+                self.assertEqual(len(json.loads(response.content)), count)
 
+    def test_stats_fail_invalid_range(self) -> None:
+        for query in ("since=yesterday", "since=2024-03-02&until=2024-03-01"):
+            with self.subTest(query=query):
+                request = RequestFactory().get(f"?{query}")
+                request.user = get_user_model()()
+                response = stats(request)
+
+                self.assertEqual(response.status_code, 400)
+
+    def test_summary(self) -> None:
         request = RequestFactory().get("")
         request.user = get_user_model()()
-        response = index_detail(request, 1)
+        response = summary(request)
 
         self.assertEqual(response.status_code, 200)
+        self.assertListEqual(json.loads(response.content), [])
 
-        expected = {
-            "id": "1",
-            "item": "Calendar",
-            "frequency": "Key",
-            "group": "Next",
-            "last_check": self.dt_today.isoformat(),
-            "last_check_undo": "0001-01-01T00:00:00",
-        }
-        productivity = json.loads(response.content)
-        reset_last_check_time([productivity])
-        self.assertDictEqual(productivity, expected)
-
-    def test_index_detail_fail_post(self) -> None:
+    def test_summary_fail_post(self) -> None:
         request = RequestFactory().post("")
         request.user = get_user_model()()
-        response = index_detail(request, 1)
+        response = summary(request)
 
         self.assertEqual(response.status_code, 405)
 
-    def test_index_detail_fail_not_login(self) -> None:
-        response = Client().get("/productivity/1/")
+    def test_summary_fail_not_login(self) -> None:
+        response = Client().get("/productivity/summary/")
 
         assert isinstance(response, HttpResponseRedirect)
         self.assertIs(is_login_redirect(response), True)
 
+    def test_task_detail(self) -> None:
+        task = enqueue("import_productivities", productivities=[])
+
+        request = RequestFactory().get("")
+        request.user = get_user_model()()
+        response = task_detail(request, task.id)
+
+        self.assertEqual(response.status_code, 200)
+        j = json.loads(response.content)
+        self.assertEqual(j["id"], str(task.id))
+        self.assertEqual(j["status"], "pending")
+        self.assertEqual(j["attempts"], 0)
+
+    def test_task_detail_fail_not_exist(self) -> None:
+        request = RequestFactory().get("")
+        request.user = get_user_model()()
+        response = task_detail(request, 1)
+
+        self.assertEqual(response.status_code, 404)
+
     def test_update_productivity_auto_last_check(self) -> None:
         self.productivity.save()
 
@@ -554,6 +4117,7 @@ class ViewsTest(TestCase):
             "id": "1",
             "item": "To-Do",
             "frequency": "Loop",
+            "recurrence": "",
             "group": "Next1",
             "last_check": self.dt_today.isoformat(),
             "last_check_undo": self.dt_today.isoformat(),
@@ -581,6 +4145,7 @@ class ViewsTest(TestCase):
             "id": "1",
             "item": "To-Do",
             "frequency": "Loop",
+            "recurrence": "",
             "group": "Next1",
             "last_check": datetime(2024, 3, 25).isoformat(),
             "last_check_undo": self.dt_today.isoformat(),
@@ -589,6 +4154,179 @@ class ViewsTest(TestCase):
         reset_last_check_time([productivity])
         self.assertDictEqual(productivity, expected)
 
+    def test_update_productivity_manual_last_check_single_write(
+        self,
+    ) -> None:
+        self.productivity.save()
+
+        with patch(
+            "productivity.models.events.publish_change"
+        ) as publish_change_mock:
+            update_productivity(
+                self.productivity.id,
+                {
+                    "item": "To-Do",
+                    "frequency": "Loop",
+                    "group": "Next",
+                    "last_check": "2024-03-25T00:00:00",
+                },
+            )
+
+        publish_change_mock.assert_called_once_with(
+            "save", self.productivity.id
+        )
+        productivity = Productivity.objects.get()
+        self.assertEqual(productivity.last_check, datetime(2024, 3, 25))
+        self.assertEqual(productivity.version, 2)
+
+    def test_update_productivity_records_check(self) -> None:
+        self.productivity.save()
+        checks = ProductivityCheck.objects.filter(
+            productivity_id=self.productivity.id
+        )
+
+        update_productivity(
+            self.productivity.id,
+            QueryDict("item=To-Do&frequency=1&group=Next1&last_check="),
+        )
+        self.assertEqual(checks.count(), 1)
+
+        update_productivity(
+            self.productivity.id,
+            {
+                "item": "To-Do",
+                "frequency": "Loop",
+                "group": "Next1",
+                "last_check": self.productivity.last_check.isoformat(),
+            },
+        )
+        self.assertEqual(checks.count(), 0)
+
+    def test_update_productivity_recurrence(self) -> None:
+        self.productivity.save()
+        data = {
+            "item": "Calendar",
+            "frequency": "Key",
+            "group": "Next",
+            "last_check": "",
+        }
+
+        for body, expected in (
+            (
+                {**data, "recurrence": "FREQ=DAILY;INTERVAL=2"},
+                "FREQ=DAILY;INTERVAL=2",
+            ),
+            (data, "FREQ=DAILY;INTERVAL=2"),
+            ({**data, "recurrence": ""}, ""),
+        ):
+            with self.subTest(body=body):
+                response = update_productivity(self.productivity.id, body)
+
+                self.assertEqual(
+                    json.loads(response.content)["recurrence"], expected
+                )
+
+    def test_update_productivity_group_position(self) -> None:
+        self.productivity.save()
+        Productivity(
+            item="Run",
+            frequency=3,
+            group_id=ProductivityGroup.objects.get_id("Health"),
+        ).save()
+
+        response = update_productivity(
+            self.productivity.id,
+            {
+                "item": "Calendar",
+                "frequency": "Key",
+                "group": "Health",
+                "last_check": "",
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(
+            [p["item"] for p in json.loads(render_productivities().content)],
+            ["Run", "Calendar"],
+        )
+
+    def test_update_productivity_if_match(self) -> None:
+        self.productivity.save()
+
+        response = update_productivity(
+            self.productivity.id,
+            QueryDict("item=To-Do&frequency=1&group=Next1&last_check="),
+            '"1"',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["ETag"], '"2"')
+        self.assertEqual(Productivity.objects.get().version, 2)
+
+    def test_update_productivity_if_match_any(self) -> None:
+        self.productivity.save()
+
+        response = update_productivity(
+            self.productivity.id,
+            QueryDict("item=To-Do&frequency=1&group=Next1&last_check="),
+            "*",
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_update_productivity_fail_if_match_stale(self) -> None:
+        self.productivity.save()
+        self.productivity.save()
+
+        response = update_productivity(
+            self.productivity.id,
+            QueryDict("item=To-Do&frequency=1&group=Next1&last_check="),
+            '"1"',
+        )
+
+        self.assertEqual(response.status_code, 412)
+        self.assertDictEqual(
+            json.loads(response.content), {"error": "Version conflict"}
+        )
+        self.assertEqual(response.headers["ETag"], '"2"')
+        self.assertEqual(Productivity.objects.get().item, "Calendar")
+        self.assertFalse(ProductivityGroup.objects.filter(name="Next1"))
+
+    def test_update_productivity_fail_if_match_race(self) -> None:
+        self.productivity.save()
+
+        def save_concurrently(productivity_id: int) -> Productivity:
+            productivity = Productivity.objects.get(pk=productivity_id)
+            Productivity.objects.update(version=2)
+            return productivity
+
+        with patch(
+            "productivity.views.get_productivity_object",
+            side_effect=save_concurrently,
+        ):
+            response = update_productivity(
+                self.productivity.id,
+                QueryDict(
+                    (
+                        "item=To-Do&frequency=1&group=Next1&"
+                        "last_check=2024-03-25T00%3A00%3A00"
+                    )
+                ),
+                '"1"',
+            )
+
+        self.assertEqual(response.status_code, 412)
+        productivity = Productivity.objects.get()
+        self.assertEqual(productivity.item, "Calendar")
+        self.assertEqual(productivity.version, 2)
+        # Group created by the failed write is rolled back with it
+        self.assertFalse(ProductivityGroup.objects.filter(name="Next1"))
+
+    def test_update_productivity_fail_if_match_invalid(self) -> None:
+        response = update_productivity(1, QueryDict(""), "1")
+
+        self.assertEqual(response.status_code, 412)
+
     def test_update_productivity_fail_not_exist(self) -> None:
         response = update_productivity(1, QueryDict(""))
 
@@ -643,5 +4381,9 @@ def tearDownModule() -> None:
     try:
         Path(log_filename).unlink()
         print(f"Removed {log_filename}")
+    except FileNotFoundError:
+        # Module is torn down again after LiveServerTestCase tests, which
+        # run after all TestCase tests
+        pass
     except PermissionError:
         print(f"{log_filename} not removed")
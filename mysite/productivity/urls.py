@@ -7,4 +7,18 @@ from productivity import views
 urlpatterns = [
     path("", views.index),
     path("<int:productivity_id>/", views.index_detail),
+    path("<int:productivity_id>/history/", views.history_detail),
+    path("<int:productivity_id>/move/", views.move),
+    path("<int:productivity_id>/restore/", views.restore),
+    path("bulk/", views.bulk),
+    path("due/", views.due),
+    path("events/", views.events),
+    path("events/poll/", views.events_poll),
+    path("groups/", views.groups),
+    path("groups/<int:group_id>/", views.group_detail),
+    path("history/", views.history),
+    path("search/", views.search),
+    path("stats/", views.stats),
+    path("summary/", views.summary),
+    path("tasks/<int:task_id>/", views.task_detail),
 ]
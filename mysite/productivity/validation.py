@@ -0,0 +1,195 @@
+"""Field validation compiled from model field definitions.
+
+`Model.clean_fields()` looks up validators and runs `Field.clean()` on every
+field of every call. `FieldsValidator` reads the field definitions once and
+keeps a plain check function per field, for the field types used by
+productivity models.
+
+- Values are checked, not converted, so a value must already have the
+Python type of its field, as set by the code creating the instance.
+- Errors are raised in the same shape as `clean_fields()`, a
+`ValidationError` with a dictionary of field name to messages.
+- A `ForeignKey` is checked as the ID in its `attname`, with the check of
+its target field, the related object is not loaded.
+"""
+
+from collections.abc import Callable, Collection
+from datetime import datetime
+from typing import Any, Optional
+
+from django.core.exceptions import ValidationError
+from django.db import models
+
+Check = Callable[[Any], Optional[str]]
+
+
+def check_char(max_length: Optional[int]) -> Check:
+    """Return check of a `CharField` value.
+
+    Args:
+        max_length:
+            Maximum number of characters, None for no limit.
+
+    Returns:
+        Check function returning error message, None if valid.
+    """
+
+    def check(value: Any) -> Optional[str]:
+        if not isinstance(value, str):
+            return "Value must be a string."
+        if max_length is not None and len(value) > max_length:
+            return (
+                f"Ensure this value has at most {max_length} characters "
+                f"(it has {len(value)})."
+            )
+        return None
+
+    return check
+
+
+def check_choice(choices: Collection[Any]) -> Check:
+    """Return check of a value against choices.
+
+    Args:
+        choices:
+            Valid values.
+
+    Returns:
+        Check function returning error message, None if valid.
+    """
+    valid = frozenset(choices)
+
+    def check(value: Any) -> Optional[str]:
+        if isinstance(value, bool) or value not in valid:
+            return f"Value {value!r} is not a valid choice."
+        return None
+
+    return check
+
+
+def check_datetime(value: Any) -> Optional[str]:
+    """Check a `DateTimeField` value.
+
+    Args:
+        value:
+            Field value.
+
+    Returns:
+        Error message, None if valid.
+    """
+    if not isinstance(value, datetime):
+        return "Value must be a datetime."
+    return None
+
+
+def check_integer(minimum: Optional[int]) -> Check:
+    """Return check of an `IntegerField` value.
+
+    Args:
+        minimum:
+            Minimum value, None for no limit.
+
+    Returns:
+        Check function returning error message, None if valid.
+    """
+
+    def check(value: Any) -> Optional[str]:
+        if isinstance(value, bool) or not isinstance(value, int):
+            return "Value must be an integer."
+        if minimum is not None and value < minimum:
+            return f"Ensure this value is greater than or equal to {minimum}."
+        return None
+
+    return check
+
+
+def compile_check(field: "models.Field[Any, Any]") -> Check:
+    """Return check function for a model field.
+
+    Args:
+        field:
+            Model field.
+
+    Returns:
+        Check function returning error message, None if valid.
+
+    Raises:
+        TypeError:
+            Field type is not supported.
+    """
+    if field.choices:
+        return check_choice([value for value, _ in field.flatchoices])
+    if isinstance(field, models.CharField):
+        return check_char(field.max_length)
+    if isinstance(field, models.DateTimeField):
+        return check_datetime
+    if isinstance(field, models.PositiveIntegerField):
+        return check_integer(0)
+    if isinstance(field, models.IntegerField):
+        return check_integer(None)
+    if isinstance(field, models.ForeignKey):
+        return compile_check(field.target_field)
+
+    raise TypeError(f"Unsupported field type {type(field).__name__}")
+
+
+class FieldsValidator:  # pylint: disable=too-few-public-methods
+    """Validator of concrete fields of a model, compiled once per model.
+
+    - Auto-created primary key is not checked, as `clean_fields()` skips it
+    while it is unset and it is set by the database.
+    - Empty values of fields with `blank=True` are not checked, as in
+    `clean_fields()`.
+    """
+
+    def __init__(self, model: type[models.Model]) -> None:
+        self.checks: list[tuple[str, str, bool, bool, Check]] = [
+            (
+                field.name,
+                field.attname,
+                field.blank,
+                field.null,
+                compile_check(field),
+            )
+            for field in model._meta.fields
+            if field.concrete and not field.auto_created
+        ]
+
+    def __call__(
+        self, instance: models.Model, exclude: Collection[str] = ()
+    ) -> None:
+        """Validate fields of a model instance.
+
+        Args:
+            instance:
+                Model instance.
+            exclude:
+                Names of fields not to validate, as in `clean_fields()`.
+
+        Raises:
+            django.core.exceptions.ValidationError:
+                Field fail validation, with messages per field name.
+        """
+        errors: dict[str, list[str]] = {}
+        for name, attname, blank, null, check in self.checks:
+            if name in exclude:
+                continue
+
+            value = getattr(instance, attname)
+            if value is None or value == "":
+                if not blank:
+                    errors[name] = [
+                        (
+                            "This field cannot be null."
+                            if value is None and not null
+                            else "This field cannot be blank."
+                        )
+                    ]
+                continue
+
+            message = check(value)
+            if message is not None:
+                errors[name] = [message]
+
+        if errors:
+            raise ValidationError(errors)
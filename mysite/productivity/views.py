@@ -1,47 +1,142 @@
+# pylint: disable=too-many-lines
 """Views for productivity app."""
 
-from typing import cast
+import json
+import time
+from collections.abc import AsyncIterator, Iterable, Mapping, Sequence
+from datetime import date, timedelta
+from itertools import chain
+from typing import Any, Optional, cast
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.http import HttpRequest, JsonResponse, QueryDict
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, models, transaction
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseNotAllowed,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.http.response import HttpResponseBase
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 from django.views.decorators.http import require_http_methods
 
-from productivity.models import Productivity
+# pylint: disable=wrong-import-order
+from mysite.compression import MIN_COMPRESS_SIZE, compress, negotiate_encoding
+from productivity.cache import make_key
+from productivity.events import get_broker
+from productivity.history import (
+    HISTORY_PAGE_LIMIT,
+    HISTORY_PAGE_MAX,
+    Streak,
+    get_history,
+    get_streaks,
+)
+from productivity.idempotency import idempotent
+from productivity.models import (
+    ArchivedProductivity,
+    Productivity,
+    ProductivityCheck,
+    ProductivityGroup,
+    Task,
+    VersionConflictError,
+)
+from productivity.parsers import parse_body
+from productivity.positions import needs_rebalance
+from productivity.readmodel import Snapshot, get_read_model
+from productivity.rollups import get_stats
+from productivity.search import find_productivities
+from productivity.tasks import enqueue
 
+# pylint: enable=wrong-import-order
 
-def create_productivity(request_post: QueryDict) -> JsonResponse:
+DUE_LIMIT = 100
+
+EVENTS_KEEPALIVE_INTERVAL = 15
+
+EVENTS_POLL_TIMEOUT = 25
+
+EVENTS_RETRY_MILLISECONDS = 1000
+
+EVENTS_STREAM_DURATION = 5 * 60
+
+LIST_CACHE_TIMEOUT = 60 * 60
+
+STATS_DEFAULT_DAYS = 90
+
+SUMMARY_CACHE_TIMEOUT = 60 * 60
+
+
+@login_required
+@require_http_methods(["POST"])
+@idempotent
+def bulk(request: HttpRequest) -> JsonResponse:
+    """Create Productivity objects in a background task.
+
+    Args:
+        request:
+            HttpRequest object.
+                - JSON object in body, with list of objects to create in
+                `productivities`, see `Productivity.deserialize_json`.
+                - `Idempotency-Key` header optional, see
+                `productivity.idempotency`.
+
+    Returns:
+        JSON Response of task with `Location` of its status, or error
+        message.
+    """
+    try:
+        productivities = parse_body(request)["productivities"]
+    except (KeyError, ValueError):
+        return JsonResponse({"error": "Missing data"}, status=400)
+    if not isinstance(productivities, list):
+        return JsonResponse({"error": "Missing data"}, status=400)
+
+    task = enqueue("import_productivities", productivities=productivities)
+
+    json_response = JsonResponse(task.serialize_json(), status=202)
+    json_response.headers["Location"] = f"/productivity/tasks/{task.id}/"
+
+    return json_response
+
+
+def create_productivity(request_data: Mapping[str, Any]) -> JsonResponse:
     """Create Productivity object.
 
     Args:
-        request_post:
-            `QueryDict` object with Productivity fields.
+        request_data:
+            Parsed request body with Productivity fields, see `parse_body`.
                 - item
                 - frequency
                 - group
+                - recurrence (optional)
 
     Returns:
         JSON Response of Productivity object or error message.
     """
     try:
-        productivity = Productivity(
-            item=cast(str, request_post["item"]),
-            frequency=int(cast(str, request_post["frequency"])),
-            group=cast(str, request_post["group"]),
-        )
+        productivity = Productivity.deserialize_json(pick_fields(request_data))
     except KeyError:
         return JsonResponse({"error": "Missing data"}, status=400)
-
-    try:
-        productivity.save()
     except ValidationError:
         return JsonResponse({"error": "Data validation error"}, status=400)
 
+    productivity.save(validate=False)
+
     return JsonResponse(productivity.serialize_json(), status=201)
 
 
 def delete_productivity(productivity_id: int) -> JsonResponse:
-    """Delete Productivity object.
+    """Soft delete Productivity object.
+
+    - Object is marked deleted in a single UPDATE, without loading it, see
+    `restore` to undo.
 
     Args:
         productivity_id:
@@ -50,13 +145,9 @@ def delete_productivity(productivity_id: int) -> JsonResponse:
     Returns:
         JSON Response message or error message.
     """
-    try:
-        productivity = get_productivity_object(productivity_id)
-    except Productivity.DoesNotExist:
+    if not Productivity.objects.soft_delete(productivity_id):
         return JsonResponse({"error": "ID not found"}, status=404)
 
-    productivity.delete()
-
     return JsonResponse({}, status=204)
 
 
@@ -75,7 +166,10 @@ def get_productivity(productivity_id: int) -> JsonResponse:
     except Productivity.DoesNotExist:
         return JsonResponse({"error": "ID not found"}, status=404)
 
-    return JsonResponse(productivity.serialize_json())
+    json_response = JsonResponse(productivity.serialize_json())
+    set_etag(json_response, productivity)
+
+    return json_response
 
 
 def get_productivity_object(productivity_id: int) -> Productivity:
@@ -95,47 +189,503 @@ def get_productivity_object(productivity_id: int) -> Productivity:
     return Productivity.objects.get(pk=productivity_id)
 
 
-def get_productivities() -> JsonResponse:
-    """Return list of Productivity objects."""
-    productivities = Productivity.objects.all()
+@login_required
+@require_http_methods(["GET"])
+def due(request: HttpRequest) -> JsonResponse:
+    """Get Productivity objects due by a date, earliest first.
+
+    - Due dates follow `recurrence`, or Frequency, see
+    `ProductivityQuerySet.due`.
+
+    Args:
+        request:
+            HttpRequest object.
+                - Below parameters optional in query string.
+                    - until: last due date as ISO date, default today
+                    - limit: maximum number of objects, default
+                    `DUE_LIMIT`
+
+    Returns:
+        JSON Response of Productivity objects with `due` date, or error
+        message.
+    """
+    try:
+        until = (
+            date.fromisoformat(request.GET["until"])
+            if "until" in request.GET
+            else timezone.now().date()
+        )
+    except ValueError:
+        return JsonResponse({"error": "Invalid data for until"}, status=400)
+    try:
+        limit = int(request.GET.get("limit", DUE_LIMIT))
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        return JsonResponse({"error": "Invalid data for limit"}, status=400)
+
+    due_ids = Productivity.objects.due(until, limit)
+    productivities = Productivity.objects.in_bulk(
+        [productivity_id for _, productivity_id in due_ids]
+    )
+    group_names = ProductivityGroup.objects.get_names()
+
+    return JsonResponse(
+        [
+            {
+                **productivities[productivity_id].serialize_json(group_names),
+                "due": due_date.isoformat(),
+            }
+            for due_date, productivity_id in due_ids
+            if productivity_id in productivities
+        ],
+        safe=False,
+    )
+
+
+async def events(request: HttpRequest) -> HttpResponseBase:
+    """Stream change notifications of Productivity objects.
+
+    - Needs an ASGI server, under WSGI the stream would be buffered until it
+    ends, so it is refused, see `productivity.events`.
+    - Server-Sent Events, each with `id` of event sequence number, `event` of
+    `change` and `data` of event in JSON. See `productivity.events`.
+    - Stream ends after `EVENTS_STREAM_DURATION`, `EventSource` reconnects
+    with `Last-Event-ID` and resumes.
+
+    Args:
+        request:
+            HttpRequest object.
+                - Last-Event-ID header: sequence number to resume after
+
+    Returns:
+        Streaming Response of events, or error response.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    if not await is_authenticated(request):
+        return redirect_to_login(request.get_full_path())
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"error": "Server-Sent Events need ASGI, use events/poll/"},
+            status=501,
+        )
+
+    after, is_reset = await sync_to_async(get_start_sequence)(
+        request.headers.get("Last-Event-ID")
+    )
+
+    response = StreamingHttpResponse(
+        stream_events(after, is_reset), content_type="text/event-stream"
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+
+    return response
+
+
+async def events_poll(request: HttpRequest) -> HttpResponse:
+    """Long-poll change notifications of Productivity objects.
+
+    - Primary path, served by WSGI and ASGI servers alike. Server-Sent
+    Events of `events` need an ASGI server.
+    - Without `since`, return current sequence number immediately, to be
+    used as `since` of next poll.
+
+    Args:
+        request:
+            HttpRequest object.
+                - since: sequence number of last event received
+                - timeout: maximum seconds to wait, up to
+                `EVENTS_POLL_TIMEOUT`
+
+    Returns:
+        JSON Response of events or error message.
+            - sequence: sequence number to be used as `since` of next poll
+            - events: list of events
+            - reset: True if client should reload Productivity objects
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    if not await is_authenticated(request):
+        return redirect_to_login(request.get_full_path())
+
+    try:
+        timeout = min(
+            float(request.GET.get("timeout", EVENTS_POLL_TIMEOUT)),
+            EVENTS_POLL_TIMEOUT,
+        )
+    except ValueError:
+        return JsonResponse({"error": "Invalid data for timeout"}, status=400)
+
+    after, is_reset = await sync_to_async(get_start_sequence)(
+        request.GET.get("since")
+    )
+    if "since" not in request.GET or is_reset:
+        return JsonResponse({"sequence": after, "events": [], "reset": True})
+
+    changes = await get_broker().wait(after, timeout)
 
     return JsonResponse(
-        [p.serialize_json() for p in productivities], safe=False
+        {
+            "sequence": changes[-1]["sequence"] if changes else after,
+            "events": changes,
+            "reset": bool(changes) and changes[0]["sequence"] != after + 1,
+        }
+    )
+
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments
+def get_productivities(
+    fields: Optional[str] = None,
+    response_format: Optional[str] = None,
+    accept_encoding: str = "",
+    include_archived: bool = False,
+    frequency: Optional[int] = None,
+    group: Optional[str] = None,
+) -> HttpResponse:
+    """Return list of Productivity objects.
+
+    - Response body is cached until next write, together with its compressed
+    bytes per content coding, so a cache hit does no query, serialization or
+    compression.
+    - If read model is enabled, live objects are read from it, and cached
+    bodies are also keyed by its snapshot, see `productivity.readmodel`.
+
+    Args:
+        fields:
+            Comma-separated field names to return, all fields if None. Only
+            these fields are selected from database.
+        response_format:
+            `compact` for a header row followed by a list of values per
+            object, see `Productivity.serialize_rows`. Default format if None.
+        accept_encoding:
+            Value of `Accept-Encoding` header, to negotiate compression.
+        include_archived:
+            Include `ArchivedProductivity` objects.
+        frequency:
+            Only objects of this Frequency value, all if None.
+        group:
+            Only objects of this group name, all if None.
+
+    Returns:
+        JSON Response of Productivity objects or error message.
+    """
+    read_model = get_read_model()
+    snapshot = None if read_model is None else read_model.get_snapshot()
+    key = make_key(
+        "productivities",
+        fields,
+        response_format,
+        include_archived,
+        frequency,
+        group,
+        None if snapshot is None else snapshot.revision,
+    )
+    bodies = cache.get(key)
+    if bodies is None:
+        json_response = render_productivities(
+            fields,
+            response_format,
+            include_archived,
+            frequency,
+            group,
+            snapshot,
+        )
+        if json_response.status_code != 200:
+            return json_response
+        bodies = {"identity": json_response.content}
+        cache.set(key, bodies, LIST_CACHE_TIMEOUT)
+
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding and len(bodies["identity"]) < MIN_COMPRESS_SIZE:
+        encoding = None
+    if encoding and encoding not in bodies:
+        bodies[encoding] = compress(bodies["identity"], encoding)
+        cache.set(key, bodies, LIST_CACHE_TIMEOUT)
+
+    # pylint: disable-next=http-response-with-content-type-json
+    response = HttpResponse(
+        bodies[encoding or "identity"], content_type="application/json"
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    patch_vary_headers(response, ("Accept-Encoding",))
+
+    return response
+
+
+def get_start_sequence(value: Optional[str]) -> tuple[int, bool]:
+    """Parse sequence number a client resumes events after.
+
+    Args:
+        value:
+            Sequence number sent by client, None if client has none.
+
+    Returns:
+        Tuple of sequence number to wait for events after, and True if
+        client should reload Productivity objects, as sequence number is
+        missing, invalid or unknown to broker.
+    """
+    sequence = get_broker().get_sequence()
+
+    try:
+        after = int(cast(str, value))
+    except (TypeError, ValueError):
+        return sequence, True
+
+    if not 0 <= after <= sequence:
+        return sequence, True
+
+    return after, False
+
+
+def get_summary() -> JsonResponse:
+    """Return counts of done and pending items per group and Frequency.
+
+    - Counts are cached until next write or until the day changes.
+    """
+    now = timezone.now()
+    key = make_key("summary", now.date().isoformat())
+
+    counts = cache.get(key)
+    if counts is None:
+        counts = Productivity.summarize(now)
+        cache.set(key, counts, SUMMARY_CACHE_TIMEOUT)
+
+    return JsonResponse(counts, safe=False)
+
+
+@login_required
+@require_http_methods(["PUT", "DELETE"])
+def group_detail(  # pylint: disable=too-many-return-statements
+    request: HttpRequest, group_id: int
+) -> HttpResponse:
+    """Rename group if PUT, delete group with its objects if DELETE.
+
+    - Rename writes the group row and its search index entries only. Delete
+    soft deletes the objects of the group in a single UPDATE, each can be
+    restored with `restore`, and deletes the group once it has no objects,
+    see `ProductivityGroupManager.delete_group`.
+
+    Args:
+        request:
+            HttpRequest object.
+                - If PUT, below data required in body, as form data or JSON
+                object.
+                    - name
+        group_id:
+            `id` field (primary key) of ProductivityGroup object.
+
+    Returns:
+        JSON Response of group, response or error message.
+    """
+    if request.method == "DELETE":
+        if not ProductivityGroup.objects.delete_group(group_id):
+            return JsonResponse({"error": "ID not found"}, status=404)
+        return HttpResponse(status=204)
+
+    try:
+        name = parse_body(request)["name"]
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    except KeyError:
+        return JsonResponse({"error": "Missing data"}, status=400)
+
+    try:
+        old_name = ProductivityGroup.objects.rename(group_id, name)
+    except ValidationError:
+        return JsonResponse({"error": "Data validation error"}, status=400)
+    except IntegrityError:
+        return JsonResponse({"error": "Group name exists"}, status=409)
+    if old_name is None:
+        return JsonResponse({"error": "ID not found"}, status=404)
+
+    return JsonResponse({"id": str(group_id), "name": name})
+
+
+@login_required
+@require_http_methods(["GET"])
+def groups(request: HttpRequest) -> JsonResponse:
+    """Get groups having objects, with their number of objects.
+
+    Args:
+        request:
+            HttpRequest object.
+
+    Returns:
+        JSON Response of groups, ordered by name.
+    """
+    rows = (
+        ProductivityGroup.objects.filter(
+            productivities__deleted_at__isnull=True
+        )
+        .annotate(count=models.Count("productivities"))
+        .order_by("name")
+        .values_list("id", "name", "count")
+    )
+
+    return JsonResponse(
+        [
+            {"id": str(group_id), "name": name, "count": count}
+            for group_id, name, count in rows
+        ],
+        safe=False,
+    )
+
+
+@login_required
+@require_http_methods(["GET"])
+def history(request: HttpRequest) -> JsonResponse:
+    """Get check counts and streaks of a page of Productivity objects.
+
+    - Computed in one pass over checks streamed in index order, see
+    `productivity.history`.
+    - Paged by object ID, pass ID of last object as `after` to get next page.
+    A page shorter than `limit` is the last.
+
+    Args:
+        request:
+            HttpRequest object.
+                - Below parameters optional in query string.
+                    - after: ID of last object of previous page, default 0
+                    - limit: maximum number of objects, default
+                    `HISTORY_PAGE_LIMIT`, at most `HISTORY_PAGE_MAX`
+
+    Returns:
+        JSON Response of streaks, ordered by ID, or error message.
+    """
+    try:
+        after = int(request.GET.get("after", 0))
+    except ValueError:
+        after = -1
+    if after < 0:
+        return JsonResponse({"error": "Invalid data for after"}, status=400)
+    try:
+        limit = int(request.GET.get("limit", HISTORY_PAGE_LIMIT))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= HISTORY_PAGE_MAX:
+        return JsonResponse({"error": "Invalid data for limit"}, status=400)
+
+    streaks = get_streaks(timezone.now(), after=after, limit=limit)
+
+    return JsonResponse(
+        [
+            serialize_streak(productivity_id, streak)
+            for productivity_id, streak in streaks.items()
+        ],
+        safe=False,
+    )
+
+
+@login_required
+@require_http_methods(["GET"])
+def history_detail(request: HttpRequest, productivity_id: int) -> JsonResponse:
+    """Get latest checks and streaks of Productivity object.
+
+    Args:
+        request:
+            HttpRequest object.
+        productivity_id:
+            `id` field (primary key) of Productivity object.
+
+    Returns:
+        JSON Response of streaks with latest checks, or error message.
+    """
+    streak = get_streaks(timezone.now(), [productivity_id]).get(
+        productivity_id
+    )
+    if streak is None:
+        return JsonResponse({"error": "ID not found"}, status=404)
+
+    return JsonResponse(
+        {
+            **serialize_streak(productivity_id, streak),
+            "history": [
+                checked_at.isoformat()
+                for checked_at in get_history(productivity_id)
+            ],
+        }
     )
 
 
 @login_required
 @require_http_methods(["GET", "POST"])
-def index(request: HttpRequest) -> JsonResponse:
+@idempotent
+def index(request: HttpRequest) -> HttpResponse:
     """Get Productivity objects if GET, create if POST.
 
     Args:
         request:
             HttpRequest object.
-                - If POST, below data required in body.
+                - If GET, below parameters optional in query string.
+                    - fields: comma-separated field names
+                    - format: `compact`
+                    - include_archived: `true` or `1` to include archived
+                    objects
+                    - frequency: only objects of this Frequency, by enum
+                    name or integer value
+                    - group: only objects of this group name
+                - If POST, below data required in body, as form data or
+                JSON object.
                     - item
                     - frequency
                     - group
+                    - recurrence (optional)
+                - If POST, `Idempotency-Key` header optional, see
+                `productivity.idempotency`.
 
     Returns:
         JSON Response of Productivity object/objects or error message.
     """
     if request.method == "GET":
-        json_response = get_productivities()
+        try:
+            include_archived = parse_flag(request.GET.get("include_archived"))
+        except ValueError:
+            return JsonResponse(
+                {"error": "Invalid include_archived"}, status=400
+            )
+        frequency = request.GET.get("frequency")
+        try:
+            json_response = get_productivities(
+                request.GET.get("fields"),
+                request.GET.get("format"),
+                request.headers.get("Accept-Encoding", ""),
+                include_archived,
+                (
+                    None
+                    if frequency is None
+                    else Productivity.parse_frequency(frequency)
+                ),
+                request.GET.get("group"),
+            )
+        except ValidationError:
+            json_response = JsonResponse(
+                {"error": "Invalid frequency"}, status=400
+            )
     elif request.method == "POST":
-        json_response = create_productivity(request.POST)
+        try:
+            json_response = create_productivity(parse_body(request))
+        except ValueError:
+            json_response = JsonResponse({"error": "Invalid JSON"}, status=400)
 
     return json_response
 
 
 @login_required
 @require_http_methods(["GET", "PUT", "DELETE"])
+@idempotent
 def index_detail(request: HttpRequest, productivity_id: int) -> JsonResponse:
     """Get Productivity object if GET, update if PUT, delete if DELETE.
 
     Args:
         request:
             HttpRequest object.
+                - If PUT, form data or JSON object in body, `If-Match`
+                header optional, see `update_productivity`.
+                - If PUT or DELETE, `Idempotency-Key` header optional, see
+                `productivity.idempotency`.
         productivity_id:
             `id` field (primary key) of Productivity object.
 
@@ -145,8 +695,12 @@ def index_detail(request: HttpRequest, productivity_id: int) -> JsonResponse:
     if request.method == "GET":
         json_response = get_productivity(productivity_id)
     elif request.method == "PUT":
+        try:
+            request_body = parse_body(request)
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON"}, status=400)
         json_response = update_productivity(
-            productivity_id, QueryDict(request.body)
+            productivity_id, request_body, request.headers.get("If-Match")
         )
     elif request.method == "DELETE":
         json_response = delete_productivity(productivity_id)
@@ -154,37 +708,504 @@ def index_detail(request: HttpRequest, productivity_id: int) -> JsonResponse:
     return json_response
 
 
-def update_productivity(
-    productivity_id: int, request_body: QueryDict
+@login_required
+@require_http_methods(["POST"])
+def move(request: HttpRequest, productivity_id: int) -> JsonResponse:
+    """Move Productivity object after another object of its group.
+
+    - Only the moved object is written. Once position keys of the group get
+    long, they are respread by a background task.
+
+    Args:
+        request:
+            HttpRequest object.
+                - Below data optional in body, as form data or JSON object.
+                    - after: ID of object to move after, empty or missing to
+                    move first
+        productivity_id:
+            `id` field (primary key) of Productivity object.
+
+    Returns:
+        JSON Response of Productivity object or error message.
+    """
+    try:
+        after = parse_body(request).get("after")
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    after_id = None
+    try:
+        if after is not None and after != "":
+            after_id = int(after)
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "Invalid data for after"}, status=400)
+    if after_id == productivity_id:
+        return JsonResponse({"error": "Invalid data for after"}, status=400)
+
+    position = Productivity.objects.move(productivity_id, after_id)
+    if position is None:
+        return JsonResponse({"error": "ID not found"}, status=404)
+
+    if needs_rebalance(position):
+        group_id = (
+            Productivity.objects.filter(id=productivity_id)
+            .values_list("group_id", flat=True)
+            .first()
+        )
+        if group_id is not None:
+            enqueue("rebalance_positions", group_id=group_id)
+
+    return get_productivity(productivity_id)
+
+
+def parse_flag(value: Optional[str]) -> bool:
+    """Parse boolean flag from query string.
+
+    Args:
+        value:
+            Value of query parameter, None if missing.
+
+    Returns:
+        True if `true` or `1`, False if `false`, `0` or missing.
+
+    Raises:
+        ValueError:
+            Value is not a boolean flag.
+    """
+    if value is None:
+        return False
+
+    value = value.lower()
+    if value in ("true", "1"):
+        return True
+    if value in ("false", "0"):
+        return False
+
+    raise ValueError(f"Invalid flag {value}")
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Parse expected version from `If-Match` header.
+
+    Args:
+        if_match:
+            Value of `If-Match` header, an entity tag from `set_etag`.
+
+    Returns:
+        Expected version, None if header is missing or `*`.
+
+    Raises:
+        ValueError:
+            Header is not an entity tag of a version.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+
+    # Weak, as `CompressionMiddleware` makes tags of compressed responses
+    etag = if_match.strip().removeprefix("W/")
+    if len(etag) < 3 or etag[0] != '"' or etag[-1] != '"':
+        raise ValueError("Invalid entity tag")
+
+    return int(etag[1:-1])
+
+
+async def is_authenticated(request: HttpRequest) -> bool:
+    """Check if user is authenticated, from an async view.
+
+    Args:
+        request:
+            HttpRequest object.
+
+    Returns:
+        True if user is authenticated, False otherwise.
+    """
+    return await sync_to_async(lambda: request.user.is_authenticated)()
+
+
+def pick_fields(request_data: Mapping[str, Any]) -> dict[str, Any]:
+    """Pick Productivity fields from parsed request body.
+
+    Args:
+        request_data:
+            Parsed request body, see `parse_body`.
+
+    Returns:
+        `item`, `frequency` and `group`, and `recurrence` if present, see
+        `Productivity.deserialize_json`.
+
+    Raises:
+        KeyError:
+            Request body does not have a required field.
+    """
+    fields = {key: request_data[key] for key in ("item", "frequency", "group")}
+    if "recurrence" in request_data:
+        fields["recurrence"] = request_data["recurrence"]
+
+    return fields
+
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments
+def render_productivities(
+    fields: Optional[str] = None,
+    response_format: Optional[str] = None,
+    include_archived: bool = False,
+    frequency: Optional[int] = None,
+    group: Optional[str] = None,
+    snapshot: Optional[Snapshot] = None,
+) -> JsonResponse:
+    """Serialize list of Productivity objects.
+
+    - Live objects are ordered by group and position, through an index.
+    Archived objects follow, ordered by ID, only if requested.
+
+    Args:
+        fields:
+            Comma-separated field names to return, all fields if None. Only
+            these fields are selected from database.
+        response_format:
+            `compact` for a header row followed by a list of values per
+            object, see `Productivity.serialize_rows`. Default format if None.
+        include_archived:
+            Include `ArchivedProductivity` objects.
+        frequency:
+            Only objects of this Frequency value, all if None.
+        group:
+            Only objects of this group name, all if None.
+        snapshot:
+            Snapshot of read model to read live objects from, database if
+            None.
+
+    Returns:
+        JSON Response of Productivity objects or error message.
+    """
+    if response_format not in (None, "compact"):
+        return JsonResponse({"error": "Invalid format"}, status=400)
+
+    filters: dict[str, Any] = {}
+    if frequency is not None:
+        filters["frequency"] = frequency
+    live = Productivity.objects.filter(**filters).order_by(
+        *Productivity.LIST_ORDERING
+    )
+    archived = ArchivedProductivity.objects.filter(**filters).order_by("id")
+    if group is not None:
+        live = live.filter(group__name=group)
+        archived = archived.filter(group=group)
+
+    if (
+        fields is None
+        and response_format is None
+        and not include_archived
+        and snapshot is None
+    ):
+        group_names = ProductivityGroup.objects.get_names()
+        return JsonResponse(
+            [p.serialize_json(group_names) for p in live],
+            safe=False,
+        )
+
+    if fields:
+        field_names = fields.split(",")
+    elif response_format is None:
+        # Same fields as `Productivity.serialize_json`
+        field_names = [
+            name
+            for name in Productivity.SERIALIZED_FIELDS
+            if name != "version"
+        ]
+    else:
+        field_names = list(Productivity.SERIALIZED_FIELDS)
+    if not set(field_names) <= set(Productivity.SERIALIZED_FIELDS):
+        return JsonResponse({"error": "Invalid fields"}, status=400)
+
+    rows: Iterable[Sequence[Any]]
+    if snapshot is not None:
+        rows = snapshot.get_rows(field_names, frequency, group)
+    else:
+        # Group name is in `group` of archived objects, joined for live
+        # objects
+        rows = live.values_list(
+            *("group__name" if f == "group" else f for f in field_names)
+        )
+    if include_archived:
+        rows = chain(rows, archived.values_list(*field_names))
+
+    return JsonResponse(
+        Productivity.serialize_rows(
+            field_names, rows, compact=response_format == "compact"
+        ),
+        safe=False,
+    )
+
+
+@login_required
+@require_http_methods(["POST"])
+def restore(request: HttpRequest, productivity_id: int) -> JsonResponse:
+    """Restore soft deleted Productivity object.
+
+    Args:
+        request:
+            HttpRequest object.
+        productivity_id:
+            `id` field (primary key) of Productivity object.
+
+    Returns:
+        JSON Response of Productivity object or error message.
+    """
+    if not Productivity.all_objects.restore(productivity_id):
+        return JsonResponse({"error": "ID not found"}, status=404)
+
+    return get_productivity(productivity_id)
+
+
+@login_required
+@require_http_methods(["GET"])
+def search(request: HttpRequest) -> JsonResponse:
+    """Search Productivity objects by words in `item` and `group`.
+
+    Args:
+        request:
+            HttpRequest object.
+                - q: search text in query string
+
+    Returns:
+        JSON Response of Productivity objects or error message.
+    """
+    return search_productivities(request.GET.get("q", ""))
+
+
+def search_productivities(text: str) -> JsonResponse:
+    """Return list of Productivity objects matching search text.
+
+    Args:
+        text:
+            Search text, each word matched as a prefix.
+
+    Returns:
+        JSON Response of Productivity objects or error message.
+    """
+    if text.strip() == "":
+        return JsonResponse({"error": "Missing data"}, status=400)
+
+    group_names = ProductivityGroup.objects.get_names()
+
+    return JsonResponse(
+        [p.serialize_json(group_names) for p in find_productivities(text)],
+        safe=False,
+    )
+
+
+def serialize_streak(productivity_id: int, streak: Streak) -> dict[str, Any]:
+    """Serialize check counts of Productivity object to JSON.
+
+    Args:
+        productivity_id:
+            ID (primary key) of Productivity object.
+        streak:
+            Check counts, see `productivity.history`.
+
+    Returns:
+        Dictionary mapping of serialized counts in JSON.
+    """
+    return {
+        "id": str(productivity_id),
+        "checks": streak.checks,
+        "current_streak": streak.current,
+        "longest_streak": streak.longest,
+    }
+
+
+def set_etag(response: HttpResponse, productivity: Productivity) -> None:
+    """Set `ETag` header to version of Productivity object.
+
+    Args:
+        response:
+            Response to set header of.
+        productivity:
+            Productivity object.
+    """
+    response.headers["ETag"] = f'"{productivity.version}"'
+
+
+async def stream_events(
+    after: int, is_reset: bool, duration: float = EVENTS_STREAM_DURATION
+) -> AsyncIterator[str]:
+    """Generate Server-Sent Events of changes after a sequence number.
+
+    - A `reset` event is sent first if client should reload Productivity
+    objects.
+    - A comment is sent every `EVENTS_KEEPALIVE_INTERVAL` without changes,
+    to keep connection open through proxies.
+
+    Args:
+        after:
+            Sequence number of last event received by client.
+        is_reset:
+            True if client should reload Productivity objects.
+        duration:
+            Seconds before stream ends.
+
+    Yields:
+        Server-Sent Event messages.
+    """
+    yield f"retry: {EVENTS_RETRY_MILLISECONDS}\n\n"
+    if is_reset:
+        yield f"id: {after}\nevent: reset\ndata: {{}}\n\n"
+
+    deadline = time.monotonic() + duration
+    while (remaining := deadline - time.monotonic()) > 0:
+        changes = await get_broker().wait(
+            after, min(EVENTS_KEEPALIVE_INTERVAL, remaining)
+        )
+        if not changes:
+            yield ": keepalive\n\n"
+            continue
+
+        if changes[0]["sequence"] != after + 1:
+            yield f"id: {after}\nevent: reset\ndata: {{}}\n\n"
+        for change in changes:
+            yield (
+                f"id: {change['sequence']}\nevent: change\n"
+                f"data: {json.dumps(change)}\n\n"
+            )
+        after = changes[-1]["sequence"]
+
+
+@login_required
+@require_http_methods(["GET"])
+def stats(request: HttpRequest) -> JsonResponse:
+    """Get completion rates per group, Frequency and period.
+
+    - Served from rollups, see `productivity.rollups`.
+
+    Args:
+        request:
+            HttpRequest object.
+                - Below parameters optional in query string, as ISO dates.
+                    - since: first period start, default
+                    `STATS_DEFAULT_DAYS` days before `until`
+                    - until: last period start, default today
+
+    Returns:
+        JSON Response of rates or error message.
+    """
+    try:
+        until = (
+            date.fromisoformat(request.GET["until"])
+            if "until" in request.GET
+            else timezone.now().date()
+        )
+        since = (
+            date.fromisoformat(request.GET["since"])
+            if "since" in request.GET
+            else until - timedelta(days=STATS_DEFAULT_DAYS)
+        )
+    except ValueError:
+        return JsonResponse({"error": "Invalid date range"}, status=400)
+    if since > until:
+        return JsonResponse({"error": "Invalid date range"}, status=400)
+
+    return JsonResponse(get_stats(since, until), safe=False)
+
+
+@login_required
+@require_http_methods(["GET"])
+def summary(request: HttpRequest) -> JsonResponse:
+    """Get counts of done and pending items per group and Frequency.
+
+    Args:
+        request:
+            HttpRequest object.
+
+    Returns:
+        JSON Response of counts.
+    """
+    return get_summary()
+
+
+@login_required
+@require_http_methods(["GET"])
+def task_detail(request: HttpRequest, task_id: int) -> JsonResponse:
+    """Get status of background task.
+
+    Args:
+        request:
+            HttpRequest object.
+        task_id:
+            `id` field (primary key) of Task object.
+
+    Returns:
+        JSON Response of Task object or error message.
+    """
+    try:
+        task = Task.objects.get(pk=task_id)
+    except Task.DoesNotExist:
+        return JsonResponse({"error": "ID not found"}, status=404)
+
+    return JsonResponse(task.serialize_json())
+
+
+def update_productivity(  # pylint: disable=too-many-return-statements
+    productivity_id: int,
+    request_body: Mapping[str, Any],
+    if_match: Optional[str] = None,
 ) -> JsonResponse:
     """Update Productivity object.
 
+    - If `If-Match` has a version, update only if `version` still matches,
+    checked in the UPDATE statement without locking the row.
+    - Change of `last_check` is recorded in check history in the same
+    transaction, see `ProductivityCheckQuerySet.record`.
+
     Args:
         productivity_id:
             ID (primary key) of Productivity object.
         request_body:
-            `QueryDict` object with Productivity fields.
+            Parsed request body with Productivity fields, see `parse_body`.
                 - item
                 - frequency
                 - group
+                - recurrence (optional, unchanged if missing)
                 - last_check (empty string for auto_now)
+        if_match:
+            Value of `If-Match` header, `ETag` of a previous response.
 
     Returns:
         JSON Response of Productivity object or error message.
     """
+    try:
+        expected_version = parse_if_match(if_match)
+    except ValueError:
+        return JsonResponse({"error": "Version conflict"}, status=412)
+
     try:
         productivity = get_productivity_object(productivity_id)
     except Productivity.DoesNotExist:
         return JsonResponse({"error": "ID not found"}, status=404)
 
+    if expected_version not in (None, productivity.version):
+        json_response = JsonResponse({"error": "Version conflict"}, status=412)
+        set_etag(json_response, productivity)
+        return json_response
+
     try:
-        productivity.item = cast(str, request_body["item"])
-        productivity.frequency = int(cast(str, request_body["frequency"]))
-        productivity.group = cast(str, request_body["group"])
-        last_check_str = cast(str, request_body["last_check"])
+        incoming = Productivity.deserialize_json(pick_fields(request_body))
+        last_check_str = request_body["last_check"]
     except KeyError:
         return JsonResponse({"error": "Missing data"}, status=400)
+    except ValidationError:
+        return JsonResponse({"error": "Data validation error"}, status=400)
 
+    productivity.item = incoming.item
+    productivity.frequency = incoming.frequency
+    if productivity.group_id != incoming.group_id:
+        # Appended to new group on save
+        productivity.position = ""
+    productivity.group_id = incoming.group_id
+    productivity.new_group_name = incoming.new_group_name
+    if "recurrence" in request_body:
+        productivity.recurrence = incoming.recurrence
+
+    last_check = None
     if last_check_str != "":
         try:
             last_check = Productivity.parse_iso_datetime(
@@ -196,14 +1217,21 @@ def update_productivity(
             )
 
     try:
-        productivity.save()
+        with transaction.atomic():
+            productivity.save(
+                expected_version=expected_version,
+                last_check=last_check,
+                validate=False,
+            )
+            ProductivityCheck.objects.record(
+                productivity, productivity.last_check_undo
+            )
     except ValidationError:
         return JsonResponse({"error": "Data validation error"}, status=400)
+    except VersionConflictError:
+        return JsonResponse({"error": "Version conflict"}, status=412)
 
-    if last_check_str != "":
-        Productivity.objects.filter(id__exact=productivity.id).update(
-            last_check=last_check
-        )
-        productivity.refresh_from_db()
+    json_response = JsonResponse(productivity.serialize_json())
+    set_etag(json_response, productivity)
 
-    return JsonResponse(productivity.serialize_json())
+    return json_response